@@ -1,18 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response, BackgroundTasks
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any, Optional, List
 import json # For handling JSON in text fields if needed
 import logging
 import os
+import shutil
 
 from app.db.database import get_db
 from app.db import models
 from app.services.editable_pdf_service import EditablePDFService
 from app.services.text_comparison_service import TextComparisonService
+from app.services.formatted_text_codec import format_for_client
+from app.services.comparison_cache import get_or_compute
+from app.services.diff_payload import (
+    DIFF_LAYOUT_COMPACT,
+    DIFF_LAYOUT_FULL,
+    choose_content_encoding,
+    choose_media_type,
+    compact_differences,
+    encode_payload,
+)
+from app.services.text_versions import comparison_validators, corrected_text_validators, not_modified
+from app.services.incremental_diff import rediff
+from app.services.resolution_rules import resolve_document
+from app.services.batch_comparison import JOB_TYPE as COMPARISON_JOB_TYPE, run_document_comparison, start_document_comparison, triage_pages
+from app.services.editable_pdf_extraction import (
+    UPLOADS_DIR,
+    run_editable_pdf_extraction,
+    start_editable_pdf_extraction,
+    upload_file_name,
+)
+from app.services.jobs import job_to_dict, latest_job
+from app.services.word_geometry import get_word_index
+from app.services.page_alignment import (
+    clear_manual_alignment,
+    compute_alignment,
+    counterpart_page,
+    get_alignment,
+    set_manual_alignment,
+)
 from app.schemas.correction_schemas import (
+    AutoResolveRequest,
     EditablePDFUploadResponse,
+    IncrementalDiffRequest,
     PageComparisonResponse,
     DifferenceSegment,
+    PageAlignmentOverride,
+    PageAlignmentResponse,
     PageCorrectionPayload,
     PageCorrectionResponse,
     FinalCorrectedTextResponse
@@ -26,19 +61,22 @@ router = APIRouter(
 logger = logging.getLogger(__name__)
 
 # Ensure uploads directory exists (though main.py should also do this)
-UPLOADS_DIR_CORRECTION = "uploads/correction_inputs"
+UPLOADS_DIR_CORRECTION = UPLOADS_DIR
 os.makedirs(UPLOADS_DIR_CORRECTION, exist_ok=True)
 
-@router.post("/documents/{document_id}/editable-pdf", response_model=EditablePDFUploadResponse)
+@router.post("/documents/{document_id}/editable-pdf", response_model=EditablePDFUploadResponse, status_code=202)
 async def upload_editable_pdf_for_correction(
     document_id: int,
+    background_tasks: BackgroundTasks,
     editable_pdf_file: UploadFile = File(...),
     db: Session = Depends(get_db),
     service: EditablePDFService = Depends(EditablePDFService) # Inject service
 ):
     """
     Uploads an 'editable PDF' (Document B) associated with an existing primary document (Document A).
-    Extracts text layer from Document B and stores it.
+    Returns 202 with the ID of a background job (see /api/jobs/{id}) that extracts the text layer
+    of Document B in parallel page ranges and stores it; its result holds the ID of the
+    comparison job that then diffs every page for the triage list.
     """
     try:
         # Validate Document A exists
@@ -47,42 +85,27 @@ async def upload_editable_pdf_for_correction(
             logger.warning(f"Upload Editable PDF: Document A with ID {document_id} not found.")
             raise HTTPException(status_code=404, detail=f"Primary document (Document A) with ID {document_id} not found.")
 
-        # Save the uploaded editable PDF (Document B)
-        file_location = os.path.join(UPLOADS_DIR_CORRECTION, f"docA_{document_id}_editable_{editable_pdf_file.filename}")
+        # Save the uploaded editable PDF (Document B); file I/O and parsing stay off the event loop.
+        # Each upload gets its own file, deleted by its extraction job
+        file_location = os.path.join(UPLOADS_DIR_CORRECTION, upload_file_name(document_id, editable_pdf_file.filename))
         with open(file_location, "wb+") as file_object:
-            file_object.write(editable_pdf_file.file.read())
+            await run_in_threadpool(shutil.copyfileobj, editable_pdf_file.file, file_object)
         logger.info(f"Uploaded editable PDF for document ID {document_id} to {file_location}")
 
-        # Extract text from the editable PDF using the service
-        extracted_text_b_by_page = service.extract_text_from_editable_pdf(file_location, str(document_id)) # service expects str ID
-
-        if not extracted_text_b_by_page:
-            logger.warning(f"No text extracted from editable PDF: {file_location} for document ID {document_id}")
-            # Optionally delete the uploaded file if no text extracted and that's considered an error
-            # os.remove(file_location)
+        page_count = await run_in_threadpool(service.count_pages, file_location)
+        if not page_count:
+            logger.warning(f"No pages in editable PDF: {file_location} for document ID {document_id}")
+            os.remove(file_location)
             raise HTTPException(status_code=400, detail="No text could be extracted from the provided editable PDF or PDF is empty/corrupt.")
 
-        # Store this extracted text (Text_B)
-        # Check if an entry already exists for this document_id
-        db_editable_text = db.query(models.EditablePDFText).filter(models.EditablePDFText.document_id == document_id).first()
-        if db_editable_text:
-            db_editable_text.text_content_by_page = json.dumps(extracted_text_b_by_page) # Store as JSON string
-            logger.info(f"Updated existing EditablePDFText for document ID {document_id}")
-        else:
-            db_editable_text = models.EditablePDFText(
-                document_id=document_id,
-                text_content_by_page=json.dumps(extracted_text_b_by_page) # Store as JSON string
-            )
-            db.add(db_editable_text)
-            logger.info(f"Created new EditablePDFText for document ID {document_id}")
-        
-        db.commit()
-        db.refresh(db_editable_text)
+        # Text B and word geometry are extracted by a background job, which then starts the comparison job
+        extraction_job = start_editable_pdf_extraction(db, document_id, page_count)
+        background_tasks.add_task(run_editable_pdf_extraction, extraction_job.id, os.path.abspath(file_location))
 
         return EditablePDFUploadResponse(
-            message="Editable PDF (Document B) uploaded and text extracted successfully.", 
+            message="Editable PDF (Document B) uploaded; text extraction started.",
             document_id=document_id,
-            editable_pdf_internal_id=db_editable_text.id
+            extraction_job_id=extraction_job.id
         )
     except HTTPException as http_exc:
         raise http_exc # Re-raise HTTPException to ensure FastAPI handles it
@@ -100,13 +123,43 @@ async def upload_editable_pdf_for_correction(
 async def get_page_comparison_data(
     document_id: int,
     page_number: int,
+    request: Request,
+    response: Response,
+    formatted_layout: str = Query("compact", pattern="^(compact|legacy)$"),
+    char_level: bool = False,
+    diff_layout: str = Query(DIFF_LAYOUT_FULL, pattern="^(full|compact)$"),
     db: Session = Depends(get_db),
     comparison_service: TextComparisonService = Depends(TextComparisonService)
 ):
     """
     Fetches Text A (OCR), Text B (Editable PDF text), and their differences for a specific page.
+
+    Text B is taken from the Document B page aligned with this page (page_number_b), which
+    differs from page_number when the two documents are paginated differently.
+
+    formatted_text_a uses the compact (version 2) layout unless formatted_layout=legacy.
+    With char_level=true, replace differences carry character-level char_edits.
+    Diff results are cached by text content; the X-Comparison-Cache header reports hit, miss or shared.
+
+    diff_layout=compact sends differences as offset lists without the text of equal segments
+    (see diff_payload), as msgpack when Accept asks for it and brotli/gzip compressed per
+    Accept-Encoding.
+
+    Responses carry an ETag: If-None-Match is answered with a 304 without loading the texts.
     """
     try:
+        if diff_layout == DIFF_LAYOUT_COMPACT:
+            representation = (choose_media_type(request.headers.get("accept")), choose_content_encoding(request.headers.get("accept-encoding")))
+        else:
+            representation = ()
+        validators = comparison_validators(
+            db, document_id, page_number, formatted_layout, char_level, diff_layout, *representation,
+            vary="Accept, Accept-Encoding" if diff_layout == DIFF_LAYOUT_COMPACT else None
+        )
+        cached = not_modified(request, validators)
+        if cached is not None:
+            return cached
+
         # Fetch Document A (original document)
         doc_a = db.query(models.Document).filter(models.Document.id == document_id).first()
         if not doc_a:
@@ -123,7 +176,7 @@ async def get_page_comparison_data(
         formatted_text_a: Optional[str] = None
         if page_obj_a and page_obj_a.extracted_text:
             text_a_ocr = page_obj_a.extracted_text.raw_text # Assuming raw_text holds the OCR output
-            formatted_text_a = page_obj_a.extracted_text.formatted_text # Get formatted text JSON
+            formatted_text_a = format_for_client(page_obj_a.extracted_text.formatted_text, formatted_layout)
         else:
             logger.info(f"Compare Page: No OCR text (Text A) found for document {document_id}, page {page_number}.")
             # Allow proceeding if Text B exists, frontend can handle missing Text A
@@ -131,10 +184,11 @@ async def get_page_comparison_data(
         # Fetch Text B (from EditablePDFText table)
         editable_pdf_text_entry = db.query(models.EditablePDFText).filter(models.EditablePDFText.document_id == document_id).first()
         text_b_editable: Optional[str] = None
-        if editable_pdf_text_entry and editable_pdf_text_entry.text_content_by_page:
+        page_number_b = counterpart_page(db, document_id, page_number)
+        if editable_pdf_text_entry and editable_pdf_text_entry.text_content_by_page and page_number_b is not None:
             try:
                 text_b_all_pages = json.loads(editable_pdf_text_entry.text_content_by_page)
-                text_b_editable = text_b_all_pages.get(str(page_number)) # Page numbers stored as str keys in JSON
+                text_b_editable = text_b_all_pages.get(str(page_number_b)) # Page numbers stored as str keys in JSON
             except json.JSONDecodeError:
                 logger.error(f"Compare Page: Failed to parse JSON for Text B, document {document_id}. Content: {editable_pdf_text_entry.text_content_by_page}")
                 raise HTTPException(status_code=500, detail="Error retrieving Text B data.")
@@ -145,8 +199,14 @@ async def get_page_comparison_data(
 
         # Perform comparison if both texts are available
         differences_list: Optional[List[DifferenceSegment]] = None
+        raw_diffs: Optional[List[Dict[str, Any]]] = None
         if text_a_ocr is not None and text_b_editable is not None:
-            raw_diffs = comparison_service.compare_texts(text_a_ocr, text_b_editable)
+            raw_diffs, cache_status = await get_or_compute(
+                db, document_id, page_number, text_a_ocr, text_b_editable,
+                lambda: comparison_service.compare_texts(text_a_ocr, text_b_editable, char_level=char_level),
+                char_level=char_level
+            )
+            response.headers["X-Comparison-Cache"] = cache_status
             differences_list = [DifferenceSegment(**diff) for diff in raw_diffs] # Validate with Pydantic model
             logger.info(f"Compare Page: Comparison complete for doc {document_id}, page {page_number}. Differences found: {len(differences_list) if differences_list else 0}")
         elif text_a_ocr is None:
@@ -154,15 +214,37 @@ async def get_page_comparison_data(
         elif text_b_editable is None:
              logger.info(f"Compare Page: Text B (Editable PDF) is missing for doc {document_id}, page {page_number}. Cannot perform diff.")
 
+        message = "Comparison data retrieved successfully." if (text_a_ocr or text_b_editable) else "Partial data retrieved; one text source missing."
+        if diff_layout == DIFF_LAYOUT_COMPACT:
+            body, headers = encode_payload({
+                "document_id": document_id,
+                "page_number": page_number,
+                "page_number_b": page_number_b,
+                "text_a_ocr": text_a_ocr,
+                "formatted_text_a": formatted_text_a,
+                "text_b_editable_pdf": text_b_editable,
+                "formatted_text_b": None,
+                "diff_layout": DIFF_LAYOUT_COMPACT,
+                "differences": compact_differences(raw_diffs) if raw_diffs is not None else None,
+                "message": message
+            }, request.headers.get("accept"), request.headers.get("accept-encoding"))
+            if "X-Comparison-Cache" in response.headers:
+                headers["X-Comparison-Cache"] = response.headers["X-Comparison-Cache"]
+            headers.update(validators.headers())
+            return Response(content=body, headers=headers)
+
+        response.headers.update(validators.headers())
+
         return PageComparisonResponse(
             document_id=document_id,
             page_number=page_number,
+            page_number_b=page_number_b,
             text_a_ocr=text_a_ocr,
             formatted_text_a=formatted_text_a,
             text_b_editable_pdf=text_b_editable,
             formatted_text_b=None,  # Document B doesn't have formatted text processing yet
             differences=differences_list,
-            message="Comparison data retrieved successfully." if (text_a_ocr or text_b_editable) else "Partial data retrieved; one text source missing."
+            message=message
         )
     except HTTPException as http_exc:
         raise http_exc
@@ -170,6 +252,198 @@ async def get_page_comparison_data(
         logger.error(f"Error getting page comparison data for document {document_id}, page {page_number}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@router.post("/documents/{document_id}/compare/page/{page_number}/incremental")
+def get_incremental_page_comparison(
+    document_id: int,
+    page_number: int,
+    payload: IncrementalDiffRequest,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Updates the differences of a page after an edit of Text A, re-diffing only the words around
+    the edit (see incremental_diff). Takes and returns the compact diff layout; clients should send
+    text_b so the editable PDF text does not have to be loaded for every edit.
+    """
+    text_b = payload.text_b
+    if text_b is None:
+        editable_pdf_text_entry = db.query(models.EditablePDFText).filter(models.EditablePDFText.document_id == document_id).first()
+        page_number_b = counterpart_page(db, document_id, page_number)
+        if editable_pdf_text_entry and editable_pdf_text_entry.text_content_by_page and page_number_b is not None:
+            text_b = json.loads(editable_pdf_text_entry.text_content_by_page).get(str(page_number_b))
+        if text_b is None:
+            raise HTTPException(status_code=404, detail=f"No editable PDF text found for document {document_id}, page {page_number}.")
+    try:
+        segments, window = rediff(
+            payload.differences, payload.text_a, text_b, payload.edit_start, payload.edit_end,
+            payload.previous_length, char_level=payload.char_level
+        )
+    except (ValueError, IndexError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Cannot apply the edit to the previous differences: {e}")
+    body, headers = encode_payload({
+        "document_id": document_id,
+        "page_number": page_number,
+        "diff_layout": DIFF_LAYOUT_COMPACT,
+        "differences": segments,
+        "window": window
+    }, request.headers.get("accept"), request.headers.get("accept-encoding"))
+    return Response(content=body, headers=headers)
+
+@router.post("/documents/{document_id}/compare/batch", status_code=202)
+async def start_batch_comparison(document_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    (Re)computes the per-page similarity summary of the whole document in the background.
+    Poll /api/jobs/{id} or listen for job.progress events; returns the running job if there is one.
+    """
+    doc_a = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc_a:
+        raise HTTPException(status_code=404, detail=f"Document A with ID {document_id} not found.")
+    if not db.query(models.EditablePDFText.id).filter(models.EditablePDFText.document_id == document_id).first():
+        raise HTTPException(status_code=400, detail="No editable PDF text (Document B) uploaded for this document.")
+
+    job, created = start_document_comparison(db, document_id)
+    if created:
+        background_tasks.add_task(run_document_comparison, job.id)
+    return job_to_dict(job)
+
+@router.get("/documents/{document_id}/compare/triage")
+async def get_comparison_triage(
+    document_id: int,
+    limit: Optional[int] = Query(None, ge=1),
+    max_similarity: Optional[float] = Query(None, ge=0, le=1),
+    db: Session = Depends(get_db)
+):
+    """
+    Pages sorted by how much Text A and Text B disagree (lowest similarity first), from the
+    latest document comparison job.
+    """
+    doc_a = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc_a:
+        raise HTTPException(status_code=404, detail=f"Document A with ID {document_id} not found.")
+    job = latest_job(db, COMPARISON_JOB_TYPE, document_id)
+    return {
+        "document_id": document_id,
+        "job": job_to_dict(job) if job else None,
+        "pages": triage_pages(db, document_id, limit=limit, max_similarity=max_similarity)
+    }
+
+def _alignment_response(db: Session, document_id: int, changed_pages: Optional[List[int]] = None) -> PageAlignmentResponse:
+    return PageAlignmentResponse(
+        document_id=document_id,
+        pages=[
+            {"page_number": row.page_number, "page_number_b": row.page_number_b, "similarity": row.similarity, "method": row.method}
+            for row in get_alignment(db, document_id)
+        ],
+        changed_pages=changed_pages
+    )
+
+# The alignment endpoints are plain functions: aligning is CPU-bound, so FastAPI runs them in its thread pool
+@router.get("/documents/{document_id}/alignment", response_model=PageAlignmentResponse)
+def get_page_alignment(document_id: int, recompute: bool = False, db: Session = Depends(get_db)):
+    """
+    Which Document B page each Document A page is compared with. The alignment is computed by the
+    comparison job after upload; it is computed here if missing or when recompute=true (manual
+    overrides are kept).
+    """
+    doc_a = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc_a:
+        raise HTTPException(status_code=404, detail=f"Document A with ID {document_id} not found.")
+    if not db.query(models.EditablePDFText.id).filter(models.EditablePDFText.document_id == document_id).first():
+        raise HTTPException(status_code=400, detail="No editable PDF text (Document B) uploaded for this document.")
+    changed_pages = None
+    if recompute or not db.query(models.PageAlignment.id).filter(models.PageAlignment.document_id == document_id).first():
+        changed_pages = compute_alignment(db, document_id)
+    return _alignment_response(db, document_id, changed_pages)
+
+@router.put("/documents/{document_id}/alignment/{page_number}", response_model=PageAlignmentResponse)
+def override_page_alignment(document_id: int, page_number: int, payload: PageAlignmentOverride, db: Session = Depends(get_db)):
+    """
+    Manually pins a Document A page to a Document B page (or to none); the other pages are
+    realigned around it. Comparison summaries of pages whose counterpart changed are dropped.
+    """
+    doc_a = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc_a:
+        raise HTTPException(status_code=404, detail=f"Document A with ID {document_id} not found.")
+    try:
+        changed_pages = set_manual_alignment(db, document_id, page_number, payload.page_number_b)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _alignment_response(db, document_id, changed_pages)
+
+@router.delete("/documents/{document_id}/alignment/{page_number}", response_model=PageAlignmentResponse)
+def delete_page_alignment_override(document_id: int, page_number: int, db: Session = Depends(get_db)):
+    """Removes the manual alignment of a page and realigns it automatically."""
+    changed_pages = clear_manual_alignment(db, document_id, page_number)
+    if changed_pages is None:
+        raise HTTPException(status_code=404, detail=f"Page {page_number} of document {document_id} has no manual alignment.")
+    return _alignment_response(db, document_id, changed_pages)
+
+def _word_index_or_404(db: Session, document_id: int, page_number_b: int):
+    index = get_word_index(db, document_id, page_number_b)
+    if index is None:
+        if not db.query(models.Document.id).filter(models.Document.id == document_id).first():
+            raise HTTPException(status_code=404, detail=f"Document A with ID {document_id} not found.")
+        raise HTTPException(status_code=404, detail=f"No word geometry for page {page_number_b} of the editable PDF of document {document_id}.")
+    return index
+
+def _words_response(index, document_id: int, page_number_b: int, scale: float, matches) -> Dict[str, Any]:
+    return {
+        "document_id": document_id,
+        "page_number_b": page_number_b,
+        "scale": scale,
+        "page_width": round(index.width * scale, 2),
+        "page_height": round(index.height * scale, 2),
+        "words": [index.describe(i, scale) for i in matches]
+    }
+
+# Word geometry endpoints: coordinates are Document B page points times `scale`
+# (scale=word_geometry.RENDER_SCALE matches the backend page images); origin is the top left corner.
+@router.get("/documents/{document_id}/editable-pdf/pages/{page_number_b}/words")
+def get_page_words(document_id: int, page_number_b: int, scale: float = Query(1.0, gt=0), db: Session = Depends(get_db)):
+    """All words of a Document B page with their boxes and offsets in the page text."""
+    index = _word_index_or_404(db, document_id, page_number_b)
+    return _words_response(index, document_id, page_number_b, scale, range(len(index.words)))
+
+@router.get("/documents/{document_id}/editable-pdf/pages/{page_number_b}/words/at")
+def get_words_at_point(
+    document_id: int,
+    page_number_b: int,
+    x: float,
+    y: float,
+    tolerance: float = Query(0.0, ge=0),
+    scale: float = Query(1.0, gt=0),
+    db: Session = Depends(get_db)
+):
+    """Words under a point, e.g. a click on the page image."""
+    index = _word_index_or_404(db, document_id, page_number_b)
+    matches = index.at_point(x / scale, y / scale, tolerance / scale)
+    return _words_response(index, document_id, page_number_b, scale, matches)
+
+@router.get("/documents/{document_id}/editable-pdf/pages/{page_number_b}/words/in")
+def get_words_in_rect(
+    document_id: int,
+    page_number_b: int,
+    x0: float,
+    y0: float,
+    x1: float,
+    y1: float,
+    contained: bool = False,
+    scale: float = Query(1.0, gt=0),
+    db: Session = Depends(get_db)
+):
+    """Words intersecting a rectangle (or fully inside it with contained=true), e.g. a selection."""
+    index = _word_index_or_404(db, document_id, page_number_b)
+    x0, x1 = sorted((x0 / scale, x1 / scale))
+    y0, y1 = sorted((y0 / scale, y1 / scale))
+    return _words_response(index, document_id, page_number_b, scale, index.in_rect(x0, y0, x1, y1, contained=contained))
+
+@router.get("/documents/{document_id}/editable-pdf/pages/{page_number_b}/words/offset/{offset}")
+def get_word_at_offset(document_id: int, page_number_b: int, offset: int, scale: float = Query(1.0, gt=0), db: Session = Depends(get_db)):
+    """Box of the word at a character offset of the Text B page, e.g. to highlight a difference."""
+    index = _word_index_or_404(db, document_id, page_number_b)
+    match = index.at_offset(offset)
+    return _words_response(index, document_id, page_number_b, scale, [] if match is None else [match])
+
 @router.post("/documents/{document_id}/corrections/page/{page_number}", response_model=PageCorrectionResponse)
 async def submit_page_corrections(
     document_id: int,
@@ -227,15 +501,42 @@ async def submit_page_corrections(
         logger.error(f"Error submitting corrections for document {document_id}, page {page_number}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@router.post("/documents/{document_id}/corrections/auto-resolve")
+def auto_resolve_corrections(document_id: int, payload: AutoResolveRequest, db: Session = Depends(get_db)):
+    """
+    Accepts Text B for every difference explained by the given rules (punctuation, quote styles,
+    dashes, whitespace, case) on all pages of the document, writes the corrected pages in one
+    transaction and reports what changed. Pages already corrected are resolved from their
+    corrected text. With dry_run=true nothing is written.
+    """
+    doc_a = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc_a:
+        raise HTTPException(status_code=404, detail=f"Document A with ID {document_id} not found.")
+    if not db.query(models.EditablePDFText.id).filter(models.EditablePDFText.document_id == document_id).first():
+        raise HTTPException(status_code=400, detail="No editable PDF text (Document B) uploaded for this document.")
+    try:
+        return resolve_document(db, document_id, rules=payload.rules, pages=payload.pages, dry_run=payload.dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/documents/{document_id}/corrected-text", response_model=Optional[FinalCorrectedTextResponse])
 async def get_final_corrected_text(
     document_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Retrieves the final, fully corrected text for a document, if available.
+    Responses carry an ETag: If-None-Match is answered with a 304 without loading the text.
     """
     try:
+        validators = corrected_text_validators(db, document_id)
+        cached = not_modified(request, validators)
+        if cached is not None:
+            return cached
+        response.headers.update(validators.headers())
+
         corrected_text_entry = db.query(models.CorrectedText).filter(models.CorrectedText.document_id == document_id).first()
         if not corrected_text_entry or not corrected_text_entry.corrected_content_by_page:
             logger.info(f"Get Corrected Text: No corrected text found for document ID {document_id}")
@@ -1,17 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, BackgroundTasks, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from typing import Optional
 import os
 import json
 import uuid
 import datetime
+import logging
+import shutil
+import tempfile
 
 from app.db.database import get_db
-from app.db.models import Document, Page, ExtractedText, CorrectedText
-from app.services.wordextract import WordGenerator
+from app.db.models import Document, DocumentBundle, Page, ExtractedText, CorrectedText
+from app.services.word_export import (
+    DOCX_MEDIA_TYPE,
+    build_export,
+    cached_export,
+    content_version,
+    export_file_name,
+    remove_exports,
+    run_word_export,
+    start_word_export,
+)
+from app.services.editable_pdf_extraction import remove_uploads
+from app.services.formatted_text_codec import format_for_client
+from app.services.text_export import WRITERS, parse_page_ranges, stream_export
+from app.services.page_text_stream import PAGE_TEXT_MEDIA_TYPE, parse_fields, stream_page_texts
+from app.services.static_delivery import cached_file_response, file_digest, page_image_response, versioned_url
+from app.services.text_versions import not_modified, page_text_validators
+from app.services.document_bundle import BUNDLE_MEDIA_TYPE, bundle_file_name, import_bundle, stream_bundle
 
 router = APIRouter(prefix="/api")
 
+logger = logging.getLogger(__name__)
+
 @router.get("/documents")
 async def get_documents(db: Session = Depends(get_db)):
     """Get a list of all documents"""
@@ -26,8 +48,10 @@ async def get_documents(db: Session = Depends(get_db)):
         } for doc in documents
     ]
 
+# The endpoints below that hand out or serve files are plain functions: hashing files and
+# encoding image variants are blocking work, so FastAPI runs them in its thread pool
 @router.get("/documents/{document_id}")
-async def get_document(document_id: int, db: Session = Depends(get_db)):
+def get_document(document_id: int, db: Session = Depends(get_db)):
     """Get details of a specific document"""
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
@@ -37,14 +61,18 @@ async def get_document(document_id: int, db: Session = Depends(get_db)):
         "id": document.id,
         "filename": document.filename,
         "file_path": document.file_path,
+        "file_url": versioned_url(f"/api/documents/{document_id}/file", document.file_path) if os.path.exists(document.file_path) else None,
         "upload_date": document.upload_date,
         "total_pages": document.total_pages,
         "status": document.status
     }
 
 @router.get("/documents/{document_id}/file")
-async def get_document_file(document_id: int, db: Session = Depends(get_db)):
-    """Get the PDF file for a document"""
+def get_document_file(document_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Get the PDF file for a document. Supports byte ranges, ETag revalidation and, with the
+    ?v= of the document's file_url, immutable caching.
+    """
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
@@ -52,14 +80,17 @@ async def get_document_file(document_id: int, db: Session = Depends(get_db)):
     if not os.path.exists(document.file_path):
         raise HTTPException(status_code=404, detail="PDF file not found")
     
-    return FileResponse(
+    return cached_file_response(
+        request,
         document.file_path,
-        media_type="application/pdf",
+        "application/pdf",
+        file_digest(document.file_path),
+        byte_ranges=True,
         filename=document.filename
     )
 
 @router.get("/documents/{document_id}/pages")
-async def get_document_pages(document_id: int, db: Session = Depends(get_db)):
+def get_document_pages(document_id: int, db: Session = Depends(get_db)):
     """Get all pages for a document"""
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
@@ -71,13 +102,45 @@ async def get_document_pages(document_id: int, db: Session = Depends(get_db)):
             "id": page.id,
             "page_number": page.page_number,
             "status": page.status,
-            "has_extracted_text": page.extracted_text is not None
+            "has_extracted_text": page.extracted_text is not None,
+            "image_url": versioned_url(f"/api/documents/{document_id}/pages/{page.page_number}/image", page.image_path)
+            if page.image_path and os.path.exists(page.image_path) else None
         } for page in pages
     ]
 
+@router.get("/documents/{document_id}/pages/text")
+def stream_document_page_texts(
+    document_id: int,
+    pages: Optional[str] = Query(None, description='Pages to include, e.g. "1-5,8,12-" (default: all)'),
+    fields: Optional[str] = Query(None, description='Fields of each record, e.g. "text,source" (default: all)'),
+    formatted_layout: str = Query("compact", pattern="^(compact|legacy)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the text of every page (corrected text if available, otherwise original OCR text)
+    as NDJSON, one record per page in page order, with the fields of the single-page text
+    endpoint. Leave formatted_text out of `fields` when only the text is needed.
+    """
+    document = db.query(Document.id).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
+    page_count = db.query(Page.id).filter(Page.document_id == document_id).count()
+    try:
+        ranges = parse_page_ranges(pages, page_count)
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        stream_page_texts(document_id, ranges, selected_fields, formatted_layout),
+        media_type=PAGE_TEXT_MEDIA_TYPE
+    )
+
 @router.get("/documents/{document_id}/pages/{page_number}/image")
-async def get_page_image(document_id: int, page_number: int, db: Session = Depends(get_db)):
-    """Get the image for a specific page"""
+def get_page_image(document_id: int, page_number: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Get the image for a specific page: JPEG, or WebP/AVIF when Accept prefers it. Supports
+    ETag revalidation and, with the ?v= of the page's image_url, immutable caching.
+    """
     page = db.query(Page).filter(
         Page.document_id == document_id,
         Page.page_number == page_number
@@ -89,14 +152,29 @@ async def get_page_image(document_id: int, page_number: int, db: Session = Depen
     if not page.image_path or not os.path.exists(page.image_path):
         raise HTTPException(status_code=404, detail="Page image not found")
     
-    return FileResponse(
-        page.image_path,
-        media_type="image/jpeg"
-    )
+    return page_image_response(request, page.image_path)
 
 @router.get("/documents/{document_id}/pages/{page_number}/text")
-async def get_page_text(document_id: int, page_number: int, db: Session = Depends(get_db)):
-    """Get the extracted text for a specific page - returns corrected text if available, otherwise original OCR text"""
+async def get_page_text(
+    document_id: int,
+    page_number: int,
+    request: Request,
+    response: Response,
+    formatted_layout: str = Query("compact", pattern="^(compact|legacy)$"),
+    db: Session = Depends(get_db)
+):
+    """Get the extracted text for a specific page - returns corrected text if available, otherwise original OCR text
+
+    formatted_text is returned in the compact (version 2) layout; pass formatted_layout=legacy for the old block list.
+    Responses carry an ETag: If-None-Match is answered with a 304 without loading the text.
+    """
+    validators = page_text_validators(db, document_id, page_number, formatted_layout)
+    cached = not_modified(request, validators)
+    if cached is not None:
+        return cached
+    if validators is not None:
+        response.headers.update(validators.headers())
+
     page = db.query(Page).filter(
         Page.document_id == document_id,
         Page.page_number == page_number
@@ -133,7 +211,7 @@ async def get_page_text(document_id: int, page_number: int, db: Session = Depend
     
     return {
         "text": page.extracted_text.raw_text,
-        "formatted_text": page.extracted_text.formatted_text,
+        "formatted_text": format_for_client(page.extracted_text.formatted_text, formatted_layout),
         "status": "extracted",
         "source": "original_ocr",
         "extraction_date": page.extracted_text.extraction_date
@@ -158,136 +236,160 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
     
     # Delete document from database (will cascade delete pages and extracted text)
     db.delete(document)
+    # Its ids may be reused: a bundle must not resolve to a later document
+    db.query(DocumentBundle).filter(DocumentBundle.document_id == document_id).delete()
     db.commit()
+    remove_exports(document_id)
+    remove_uploads(document_id)
     
     return {"message": f"Document {document_id} deleted successfully"}
 
-@router.get("/documents/{document_id}/export/word")
-async def export_document_to_word(document_id: int, db: Session = Depends(get_db)):
-    """Export the document to Word format with all extracted text"""
+EXPORTABLE_STATUSES = ["completed", "images_extracted", "text_extracted", "correction_in_progress", "correction_complete"]
+
+def _exportable_document(db: Session, document_id: int) -> Document:
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
-    
-    # Make sure document has been processed (original check, might need adjustment if corrected text exists without full processing)
-    # For now, keeping it, as correction implies prior extraction.
-    if document.status not in ["completed", "images_extracted", "text_extracted", "correction_in_progress", "correction_complete"]:
+    # Make sure document has been processed (correction implies prior extraction)
+    if document.status not in EXPORTABLE_STATUSES:
         raise HTTPException(status_code=400, detail="Document processing is not complete or not in a correctable state.")
-    
-    pages = db.query(Page).filter(Page.document_id == document_id).order_by(Page.page_number).all()
-    
-    has_text_to_export = False
-    text_for_word = []
+    return document
 
-    # Get corrected text data (stored as JSON per document, not per page)
-    corrected_text_entry = db.query(CorrectedText).filter(CorrectedText.document_id == document_id).first()
-    corrected_text_by_page = {}
-    if corrected_text_entry and corrected_text_entry.corrected_content_by_page:
-        try:
-            corrected_text_by_page = json.loads(corrected_text_entry.corrected_content_by_page)
-        except json.JSONDecodeError:
-            print(f"Failed to parse corrected text JSON for document {document_id}")
+def _export_response(document: Document, version: str, path: str) -> FileResponse:
+    file_name = export_file_name(document)
+    return FileResponse(
+        path,
+        media_type=DOCX_MEDIA_TYPE,
+        filename=file_name,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{file_name}", "X-Export-Version": version}
+    )
 
-    for page in pages:
-        page_text_content = None
-        source = None
+def _download_url(document_id: int, version: str) -> str:
+    return f"/api/documents/{document_id}/export/word/download?version={version}"
 
-        # Check for corrected text first (higher priority)
-        if str(page.page_number) in corrected_text_by_page:
-            page_text_content = corrected_text_by_page[str(page.page_number)]
-            source = "corrected"
-            has_text_to_export = True
-        elif page.extracted_text and page.extracted_text.raw_text:
-            page_text_content = page.extracted_text.raw_text 
-            source = "extracted"
-            has_text_to_export = True
-        
-        if page_text_content:
-            # Try to use structured formatting if available
-            formatted_data = None
-            if source == "extracted" and page.extracted_text and page.extracted_text.formatted_text:
-                try:
-                    formatted_data = json.loads(page.extracted_text.formatted_text)
-                except json.JSONDecodeError:
-                    print(f"Failed to parse formatted_text for page {page.page_number}")
-            
-            if formatted_data and "blocks" in formatted_data:
-                # Use structured formatting data
-                for block in formatted_data["blocks"]:
-                    text_for_word.append({
-                        "text": block.get("text", ""),
-                        "page": page.page_number,
-                        "block_no": block.get("block_no", len(text_for_word)),
-                        "line_no": 0,
-                        "font": "Calibri",
-                        "size": block.get("font_size", 11),
-                        "color": (0, 0, 0),  # Black
-                        "is_bold": block.get("is_bold", False),
-                        "is_italic": block.get("is_italic", False),
-                        "alignment": block.get("alignment", "left"),
-                        "is_title": block.get("is_title", False),
-                        "is_heading": block.get("is_heading", False),
-                        "is_indent": block.get("is_indent", False),
-                        "is_last_span_in_line": True,
-                        "bbox": [0, 0, 100, 20]  # Default bbox
-                    })
-            else:
-                # Fallback to simple text block
-                text_for_word.append({
-                    "text": page_text_content,
-                    "page": page.page_number,
-                    "block_no": len(text_for_word),
-                    "line_no": 0,
-                    "font": "Calibri", 
-                    "size": 11,
-                    "color": (0, 0, 0),
-                    "is_bold": False,
-                    "is_italic": False,
-                    "alignment": "left",
-                    "is_last_span_in_line": True,
-                    "bbox": [0, 0, 100, 20]
-                })
+# The export endpoints are plain functions: hashing the content and building the DOCX are
+# blocking work, so FastAPI runs them in its thread pool
+@router.get("/documents/{document_id}/export/word")
+def export_document_to_word(document_id: int, db: Session = Depends(get_db)):
+    """
+    Export the document to Word format with all extracted text (corrected text where available).
 
-    if not has_text_to_export:
-        raise HTTPException(status_code=400, detail="No extracted or corrected text available for this document")
-    
-    # Generate Word document using the collected text_for_word
+    Served from the export cache when the content is unchanged, else built in this request;
+    use POST to build large documents in a background job instead.
+    """
+    document = _exportable_document(db, document_id)
     try:
-        # Ensure the output directory exists
-        output_dir = "temp_exports"
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Sanitize filename
-        safe_filename = "".join(c if c.isalnum() else "_" for c in document.filename)
-        if not safe_filename.lower().endswith(".pdf"):
-            safe_filename += f"_doc_{document.id}"
-        else:
-            safe_filename = safe_filename[:-4] + f"_doc_{document.id}"
-
-        file_name = f"{safe_filename}_corrected.docx"
-        output_path = os.path.join(output_dir, file_name)
-        
-        # Use the WordGenerator service
-        word_generator = WordGenerator(text_for_word)
-        word_generator.generate_document(output_path)
-        
-        return FileResponse(
-            output_path,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename=file_name,
-            headers={"Content-Disposition": f"attachment; filename*=UTF-8''{file_name}"}
-        )
+        version, path = build_export(db, document_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        # Log the exception for debugging
-        print(f"Error generating Word document: {e}") # Basic logging
-        # Consider using a proper logger: logger.error(f"Error generating Word document: {e}", exc_info=True)
+        logger.error(f"Error generating Word document for document {document_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Could not generate Word document: {e}")
+    return _export_response(document, version, path)
 
-# Make sure to remove old files from temp_exports periodically or on startup if this is a long-running app.
+@router.post("/documents/{document_id}/export/word")
+def start_word_export_job(document_id: int, response: Response, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Prepare the Word export of the current content. Returns 200 with a download URL if it is
+    cached already, else 202 with a background job (see /api/jobs/{id}) whose result holds
+    the version to download.
+    """
+    _exportable_document(db, document_id)
+    version = content_version(db, document_id)
+    if cached_export(document_id, version):
+        return {"status": "ready", "version": version, "download_url": _download_url(document_id, version)}
+    job, created = start_word_export(db, document_id)
+    if created:
+        background_tasks.add_task(run_word_export, job.id)
+    response.status_code = 202
+    return {"status": "pending", "job_id": job.id, "version": version, "download_url": _download_url(document_id, version)}
 
-# The rest of the file remains unchanged for now.
+@router.get("/documents/{document_id}/export/word/download")
+def download_word_export(
+    document_id: int,
+    version: Optional[str] = Query(None, pattern="^[0-9a-f]{64}$"),
+    db: Session = Depends(get_db)
+):
+    """Download a cached Word export (default: the one of the current content) without building it."""
+    document = _exportable_document(db, document_id)
+    version = version or content_version(db, document_id)
+    path = cached_export(document_id, version)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Word export {version} of document {document_id} is not available; start it with POST /api/documents/{document_id}/export/word")
+    return _export_response(document, version, path)
 
-# Example of how the main app might need to be updated if WordGenerator is a new service
-# from app.services.wordextract import WordGenerator # if not already there
+@router.get("/documents/{document_id}/export/{export_format}")
+def export_document_stream(
+    document_id: int,
+    export_format: str,
+    pages: Optional[str] = Query(None, description='Pages to export, e.g. "1-5,8,12-" (default: all)'),
+    granularity: str = Query("page", pattern="^(page|block)$", description="JSONL records per page or per block"),
+    db: Session = Depends(get_db)
+):
+    """
+    Export the text of a document (corrected text where available) as plain text (txt),
+    Markdown (md), JSONL (jsonl) or a searchable PDF of the original scan (pdf), streamed as
+    it is generated.
+    """
+    writer_class = WRITERS.get(export_format)
+    if writer_class is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export format '{export_format}'; available: {', '.join(sorted(WRITERS))}")
+    document = _exportable_document(db, document_id)
+    page_count = db.query(Page.id).filter(Page.document_id == document_id).count()
+    try:
+        ranges = parse_page_ranges(pages, page_count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if writer_class.needs_scan and not os.path.exists(document.file_path):
+        raise HTTPException(status_code=404, detail=f"Original PDF of document {document_id} not found")
+
+    writer = writer_class(document, granularity=granularity)
+    file_name = export_file_name(document, writer_class.extension)
+    return StreamingResponse(
+        stream_export(document_id, writer, ranges),
+        media_type=writer_class.media_type,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{file_name}"}
+    )
 
-# Consider adding a background task to clean up temp_exports 
\ No newline at end of file
+@router.get("/documents/{document_id}/bundle")
+def export_document_bundle(document_id: int, db: Session = Depends(get_db)):
+    """
+    Download a bundle of the document (zip): the original PDF, page images, OCR text,
+    editable PDF text and corrections, streamed as it is written. Import it on another
+    node with POST /api/documents/import.
+    """
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
+    file_name = bundle_file_name(document)
+    return StreamingResponse(
+        stream_bundle(document_id),
+        media_type=BUNDLE_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{file_name}"}
+    )
+
+@router.post("/documents/import")
+def import_document_bundle(response: Response, file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Import a document bundle without rendering or OCR. Returns 201 with the new document, or
+    200 with the existing one if this bundle was already imported here (or exported from here).
+    """
+    # ZipFile needs a seekable file: spool the upload to disk first
+    with tempfile.NamedTemporaryFile(suffix=".zip") as bundle_file:
+        shutil.copyfileobj(file.file, bundle_file)
+        bundle_file.flush()
+        try:
+            document, created = import_bundle(db, bundle_file.name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error importing bundle {file.filename}: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Could not import bundle: {e}")
+    response.status_code = 201 if created else 200
+    return {
+        "document_id": document.id,
+        "filename": document.filename,
+        "total_pages": document.total_pages,
+        "status": document.status,
+        "created": created
+    }
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import json
+import logging
+
+from app.db.database import get_db
+from app.db.models import Document
+from app.services.event_bus import bus, replay_events
+
+router = APIRouter(prefix="/api")
+
+logger = logging.getLogger(__name__)
+
+# Comment line sent when no event arrived for this long, to keep proxies from closing the stream
+HEARTBEAT_SECONDS = 15.0
+
+def _format_sse(event_data: dict) -> str:
+    lines = []
+    if event_data.get("id") is not None:
+        lines.append(f"id: {event_data['id']}")
+    lines.append(f"event: {event_data['type']}")
+    lines.append(f"data: {json.dumps(event_data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+def _parse_last_event_id(request: Request) -> Optional[int]:
+    value = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+async def _event_stream(request: Request, document_id: Optional[int]):
+    # Subscribe before replaying so nothing published in between is missed
+    subscription = bus.subscribe(document_id)
+    try:
+        yield ": connected\n\n"
+        last_id = _parse_last_event_id(request)
+        if last_id is not None:
+            for event_data in replay_events(last_id, document_id):
+                last_id = event_data["id"]
+                yield _format_sse(event_data)
+
+        # The stream is cancelled by the server when the client disconnects
+        while True:
+            event_data = await subscription.get(timeout=HEARTBEAT_SECONDS)
+            if event_data is None:
+                yield ": keep-alive\n\n"
+                continue
+            if last_id is not None and event_data.get("id") is not None and event_data["id"] <= last_id:
+                continue  # Already sent during replay
+            yield _format_sse(event_data)
+    finally:
+        subscription.close()
+
+def _sse_response(request: Request, document_id: Optional[int]) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(request, document_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/events")
+async def stream_all_events(request: Request):
+    """Server-Sent Events stream of progress events for all documents"""
+    return _sse_response(request, None)
+
+@router.get("/documents/{document_id}/events")
+async def stream_document_events(document_id: int, request: Request, db: Session = Depends(get_db)):
+    """Server-Sent Events stream of page status, image-ready and OCR-complete events for one document"""
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
+    return _sse_response(request, document_id)
+
+async def _websocket_events(websocket: WebSocket, document_id: Optional[int]):
+    await websocket.accept()
+    subscription = bus.subscribe(document_id)
+    try:
+        while True:
+            event_data = await subscription.get(timeout=HEARTBEAT_SECONDS)
+            if event_data is None:
+                event_data = {"type": "keep-alive", "document_id": document_id}
+            await websocket.send_text(json.dumps(event_data, default=str))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.info(f"Event websocket closed: {e}")
+    finally:
+        subscription.close()
+
+@router.websocket("/events/ws")
+async def websocket_all_events(websocket: WebSocket):
+    """WebSocket variant of /api/events"""
+    await _websocket_events(websocket, None)
+
+@router.websocket("/documents/{document_id}/events/ws")
+async def websocket_document_events(websocket: WebSocket, document_id: int):
+    """WebSocket variant of /api/documents/{document_id}/events"""
+    await _websocket_events(websocket, document_id)
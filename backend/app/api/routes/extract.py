@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 import asyncio
 
 from app.db.database import get_db
-from app.db.models import Document, Page
+from app.db.models import Document, Page, DocumentProgress
 from app.services.text_extraction import extract_text_with_gpt_vision
+from app.services.progress_counters import get_progress, status_counts, reconcile_progress_counters
 
 router = APIRouter(prefix="/api")
 
@@ -59,15 +60,15 @@ async def process_document(document_id: int):
         # Update document status
         document = db.query(Document).filter(Document.id == document_id).first()
         if document:
-            # Check if all pages are processed
-            pages = db.query(Page).filter(Page.document_id == document_id).all()
-            all_processed = all(page.status == "processed" for page in pages)
+            # Check if all pages are processed, using the page status counters
+            progress = get_progress(db, document_id)
+            all_processed = progress is not None and progress.processed_pages == progress.total_pages
             
             if all_processed:
                 document.status = "completed"
             else:
                 # Check if any pages have error status
-                any_error = any(page.status == "error" for page in pages)
+                any_error = progress is not None and progress.error_pages > 0
                 if any_error:
                     document.status = "partial"
                 else:
@@ -86,26 +87,51 @@ async def process_document(document_id: int):
         db.close()
 
 @router.get("/documents/{document_id}/status")
-async def get_extraction_status(document_id: int, db: Session = Depends(get_db)):
-    """Get the extraction status of a document"""
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
+async def get_extraction_status(document_id: int, include_pages: bool = False, db: Session = Depends(get_db)):
+    """Get the extraction status of a document from its page status counters"""
+    # Document and counters are read together as a single row
+    row = db.query(Document, DocumentProgress).outerjoin(
+        DocumentProgress, DocumentProgress.document_id == Document.id
+    ).filter(Document.id == document_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
     
-    # Get page statuses
-    pages = db.query(Page).filter(Page.document_id == document_id).all()
-    page_statuses = {page.page_number: page.status for page in pages}
+    document, progress = row
+    if progress is None:
+        # Legacy document without counters yet
+        progress = get_progress(db, document_id)
     
     # Calculate progress
-    total_pages = len(pages)
-    processed_pages = sum(1 for page in pages if page.status == "processed")
-    progress = (processed_pages / total_pages) * 100 if total_pages > 0 else 0
+    total_pages = progress.total_pages if progress else 0
+    processed_pages = progress.processed_pages if progress else 0
+    progress_percent = (processed_pages / total_pages) * 100 if total_pages > 0 else 0
     
-    return {
+    response = {
         "document_id": document_id,
         "status": document.status,
         "total_pages": total_pages,
         "processed_pages": processed_pages,
-        "progress": progress,
-        "page_statuses": page_statuses
-    } 
\ No newline at end of file
+        "progress": progress_percent,
+        "status_counts": status_counts(progress)
+    }
+    
+    # Per-page statuses require scanning the pages table, so only on request
+    if include_pages:
+        pages = db.query(Page.page_number, Page.status).filter(Page.document_id == document_id).all()
+        response["page_statuses"] = {page_number: status for page_number, status in pages}
+    
+    return response
+
+@router.post("/documents/{document_id}/status/reconcile")
+async def reconcile_extraction_status(document_id: int, db: Session = Depends(get_db)):
+    """Recount page statuses for a document and repair its progress counters if they drifted"""
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail=f"Document with ID {document_id} not found")
+    
+    repaired = reconcile_progress_counters(db, document_id)
+    return {
+        "document_id": document_id,
+        "repaired": document_id in repaired,
+        "status_counts": status_counts(get_progress(db, document_id))
+    }
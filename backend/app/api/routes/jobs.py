@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.db.models import BackgroundJob
+from app.services.jobs import job_to_dict
+
+router = APIRouter(prefix="/api")
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Status, progress and result of a background job"""
+    job = db.get(BackgroundJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    return job_to_dict(job)
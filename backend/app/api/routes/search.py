@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.db.database import get_db
+from app.services.search_index import search_pages, SOURCE_OCR, SOURCE_CORRECTED
+
+router = APIRouter(prefix="/api")
+
+@router.get("/search")
+async def search_text(
+    q: str = Query(..., min_length=1, description="Words, \"quoted phrases\" or prefix* terms"),
+    document_id: Optional[int] = None,
+    source: Optional[str] = Query(None, description="Restrict to 'ocr' or 'corrected' text"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Full-text search across extracted and corrected page text, ranked by relevance"""
+    if source is not None and source not in (SOURCE_OCR, SOURCE_CORRECTED):
+        raise HTTPException(status_code=400, detail="source must be 'ocr' or 'corrected'")
+    
+    hits = search_pages(db, q, document_id=document_id, source=source, limit=limit, offset=offset)
+    return {
+        "query": q,
+        "limit": limit,
+        "offset": offset,
+        "hits": hits
+    }
@@ -0,0 +1,178 @@
+import logging
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional, Union
+
+from sqlalchemy import LargeBinary, Text, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+# Stored layout: MAGIC, dictionary id, raw DEFLATE stream compressed with that preset dictionary.
+# Legacy rows are plain TEXT and are returned unchanged, so old and new rows can coexist.
+MAGIC = 0xA7
+RAW_DICTIONARY_ID = 0xFF  # Uncompressed UTF-8 payload (used on databases that need bytes)
+BUILTIN_DICTIONARY_ID = 1
+MIN_COMPRESS_LENGTH = 64  # Shorter values are stored as plain text
+COMPRESSION_LEVEL = 6
+MAX_DICTIONARY_SIZE = 32 * 1024  # DEFLATE window size; larger dictionaries are never used
+
+# Seed dictionary shipped with the code: JSON keys of formatted_text, layout markers and
+# very common English words. DEFLATE prefers recent (later) bytes, so frequent items go last.
+_BUILTIN_DICTIONARY = (
+    " which their there would about these other could after first never those where being "
+    " through before should under while again between himself every great little might "
+    " shall upon without before himself such only over also into than them then some what "
+    " when were been have from they will with this that were your more said each "
+    "[CENTER][TITLE][CENTER][HEADING][INDENT]\n\n[INDENT]\n[HEADING]\n[CENTER]"
+    '"has_formatting": false}"has_formatting": true}'
+    '"is_title": false, "is_heading": false, "is_indent": false}'
+    '"is_title": true, "is_heading": false, "is_indent": false}'
+    '"is_title": false, "is_heading": true, "is_indent": false}'
+    '{"type": "paragraph", "text": "'
+    '", "block_no": 0, "alignment": "center", "font_size": 16, "is_bold": true, "is_italic": false, '
+    '", "block_no": 1, "alignment": "left", "font_size": 11, "is_bold": false, "is_italic": false}, '
+    '{"blocks": [{"type": "paragraph", "text": "'
+    '{"1": "'
+    '", "2": "'
+    '\\n'
+    ' of the and to in a is that for it as was with be by on not he this are or his from at which '
+    ' the of and to a in that is was he for it with as his on be at by i '
+    ", the of and to a in. the "
+).encode("utf-8")
+
+_dictionaries: Dict[int, bytes] = {BUILTIN_DICTIONARY_ID: _BUILTIN_DICTIONARY}
+_active_dictionary_id = BUILTIN_DICTIONARY_ID
+_lock = threading.Lock()
+
+def register_dictionary(dictionary_id: int, data: bytes, activate: bool = False) -> None:
+    """Make a trained dictionary available for decompression (and for new writes if `activate`)."""
+    global _active_dictionary_id
+    if not 0 < dictionary_id < RAW_DICTIONARY_ID:
+        raise ValueError(f"Dictionary id must be between 1 and {RAW_DICTIONARY_ID - 1}")
+    with _lock:
+        _dictionaries[dictionary_id] = data[-MAX_DICTIONARY_SIZE:]
+        if activate:
+            _active_dictionary_id = dictionary_id
+
+def active_dictionary_id() -> int:
+    return _active_dictionary_id
+
+def _get_dictionary(dictionary_id: int) -> bytes:
+    dictionary = _dictionaries.get(dictionary_id)
+    if dictionary is None:
+        # Trained by another process after this one loaded its dictionaries
+        load_dictionaries()
+        dictionary = _dictionaries.get(dictionary_id)
+        if dictionary is None:
+            raise ValueError(f"Unknown compression dictionary id {dictionary_id}")
+    return dictionary
+
+def load_dictionaries(connection=None) -> int:
+    """Load trained dictionaries from the compression_dictionaries table; the newest becomes active."""
+    if connection is None:
+        from app.db.database import engine
+        with engine.connect() as own_connection:
+            return load_dictionaries(own_connection)
+    try:
+        rows = connection.execute(text("SELECT id, data FROM compression_dictionaries ORDER BY id")).fetchall()
+    except Exception:
+        return 0  # Table not created yet
+    for dictionary_id, data in rows:
+        register_dictionary(dictionary_id, bytes(data), activate=True)
+    return len(rows)
+
+def compress_text(value: str, dictionary_id: Optional[int] = None, force_bytes: bool = False) -> Union[str, bytes]:
+    """Compress a text value into the stored format; short values stay plain text unless `force_bytes`."""
+    data = value.encode("utf-8")
+    if len(data) < MIN_COMPRESS_LENGTH:
+        return bytes((MAGIC, RAW_DICTIONARY_ID)) + data if force_bytes else value
+
+    dictionary_id = dictionary_id or _active_dictionary_id
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=_get_dictionary(dictionary_id))
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) + 2 >= len(data):
+        return bytes((MAGIC, RAW_DICTIONARY_ID)) + data if force_bytes else value
+    return bytes((MAGIC, dictionary_id)) + compressed
+
+def decompress_text(value: Union[str, bytes, memoryview, None]) -> Optional[str]:
+    """Inverse of compress_text; legacy plain-text values pass through unchanged."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if len(value) < 2 or value[0] != MAGIC:
+        return value.decode("utf-8")
+    dictionary_id = value[1]
+    if dictionary_id == RAW_DICTIONARY_ID:
+        return value[2:].decode("utf-8")
+    decompressor = zlib.decompressobj(-15, zdict=_get_dictionary(dictionary_id))
+    return (decompressor.decompress(value[2:]) + decompressor.flush()).decode("utf-8")
+
+def is_compressed(value) -> bool:
+    return isinstance(value, (bytes, memoryview)) and len(value) >= 2 and bytes(value[:1])[0] == MAGIC
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Build a DEFLATE preset dictionary from sample values.
+
+    Counts word n-grams (1 to 4 words) across the samples, keeps the ones that save the most
+    bytes (frequency x length) and lays them out with the most valuable last, where DEFLATE
+    references them most cheaply.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        words = sample.split(" ")
+        for n in (1, 2, 3, 4):
+            for i in range(0, len(words) - n + 1):
+                gram = " ".join(words[i:i + n])
+                if 4 <= len(gram) <= 64:
+                    counts[gram] += 1
+
+    scored = sorted(
+        ((count * len(gram), gram) for gram, count in counts.items() if count > 1),
+        reverse=True
+    )
+    chosen = []
+    used = 0
+    for _, gram in scored:
+        encoded = (gram + " ").encode("utf-8")
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+        if used >= size - 4:
+            break
+    return b"".join(reversed(chosen))
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored DEFLATE-compressed with a shared preset dictionary.
+
+    Reads transparently return str, including legacy uncompressed rows. On SQLite the
+    column stays TEXT (compressed values are stored as BLOBs); other databases use a
+    binary column.
+    """
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, force_bytes=dialect.name != "sqlite")
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+@event.listens_for(Engine, "connect")
+def _register_sql_functions(dbapi_connection, connection_record) -> None:
+    """Expose decompress_text to SQL on SQLite, so queries can read compressed columns."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("decompress_text", 1, decompress_text, deterministic=True)
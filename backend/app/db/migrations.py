@@ -0,0 +1,187 @@
+"""
+Data migrations that create_all() cannot do on its own.
+
+Usage (from the backend directory):
+    python -m app.db.migrations compress   # compress legacy plain-text rows, drop duplicated clean_text
+    python -m app.db.migrations train      # train a shared dictionary from stored text and recompress all rows
+    python -m app.db.migrations formatted  # rewrite formatted_text rows in the compact version 2 layout
+
+upgrade_schema() runs at startup for the schema changes create_all() does not make on
+existing tables.
+"""
+import argparse
+import logging
+from typing import Dict, List
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.db.compression import (
+    BUILTIN_DICTIONARY_ID,
+    MIN_COMPRESS_LENGTH,
+    register_dictionary,
+    train_dictionary,
+)
+from app.db.database import Base, SessionLocal, engine
+from app.db.models import CompressionDictionary, CorrectedText, EditablePDFText, EventLog, ExtractedText
+from app.services.formatted_text_codec import is_compact, to_compact
+
+logger = logging.getLogger(__name__)
+
+# (model, column name) pairs stored with CompressedText
+COMPRESSED_COLUMNS = [
+    (ExtractedText, "raw_text"),
+    (ExtractedText, "formatted_text"),
+    (EditablePDFText, "text_content_by_page"),
+    (CorrectedText, "corrected_content_by_page"),
+]
+
+def compress_existing_rows(db: Session, batch_size: int = 500, recompress: bool = False) -> Dict[str, int]:
+    """
+    Rewrite stored text through CompressedText.
+
+    Args:
+        db (Session): Database session.
+        batch_size (int): Rows rewritten per transaction.
+        recompress (bool): Also rewrite rows that are already compressed (e.g. after training a new dictionary).
+
+    Returns:
+        Dict[str, int]: Number of rows rewritten per "table.column".
+    """
+    rewritten = {}
+    for model, column_name in COMPRESSED_COLUMNS:
+        table = model.__table__
+        column = table.c[column_name]
+        # typeof() sees the stored value: 'text' for legacy rows, 'blob' for compressed ones
+        stored_type = func.typeof(column)
+        condition = column.isnot(None)
+        if not recompress:
+            condition = condition & (stored_type == "text") & (func.length(column) >= MIN_COMPRESS_LENGTH)
+
+        count = 0
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(table.c.id, column).where(condition & (table.c.id > last_id)).order_by(table.c.id).limit(batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            for row_id, value in rows:
+                if column_name == "formatted_text":
+                    value = to_compact(value)
+                # Core UPDATE runs the value through CompressedText without firing ORM listeners
+                db.execute(update(table).where(table.c.id == row_id).values({column_name: value}))
+                last_id = row_id
+            db.commit()
+            count += len(rows)
+        rewritten[f"{table.name}.{column_name}"] = count
+        logger.info(f"Rewrote {count} rows of {table.name}.{column_name}")
+    return rewritten
+
+def compact_formatted_text(db: Session, batch_size: int = 500) -> int:
+    """
+    Re-encode legacy (version 1) formatted_text rows, compressed or not, in the version 2 layout.
+
+    Returns:
+        int: Number of rows rewritten.
+    """
+    table = ExtractedText.__table__
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.query(ExtractedText.id, ExtractedText.formatted_text).filter(
+            ExtractedText.formatted_text.isnot(None), ExtractedText.id > last_id
+        ).order_by(ExtractedText.id).limit(batch_size).all()
+        if not rows:
+            break
+        for row_id, value in rows:
+            last_id = row_id
+            if is_compact(value):
+                continue
+            db.execute(update(table).where(table.c.id == row_id).values(formatted_text=to_compact(value)))
+            count += 1
+        db.commit()
+    logger.info(f"Rewrote {count} formatted_text rows in the compact layout")
+    return count
+
+def _sample_values(db: Session, limit_per_column: int) -> List[str]:
+    samples = []
+    for model, column_name in COMPRESSED_COLUMNS:
+        column = model.__table__.c[column_name]
+        rows = db.execute(
+            select(column).where(column.isnot(None)).order_by(func.random()).limit(limit_per_column)
+        ).fetchall()
+        samples.extend(value for (value,) in rows if value)
+    return samples
+
+def train_and_store_dictionary(db: Session, samples_per_column: int = 500) -> int:
+    """
+    Train a dictionary from stored text, store it, activate it and recompress every row with it.
+
+    Returns:
+        int: ID of the new dictionary.
+    """
+    samples = _sample_values(db, samples_per_column)
+    if not samples:
+        raise ValueError("No stored text to train a dictionary from")
+    data = train_dictionary(samples)
+
+    last_id = db.query(func.max(CompressionDictionary.id)).scalar() or BUILTIN_DICTIONARY_ID
+    dictionary = CompressionDictionary(id=max(last_id, BUILTIN_DICTIONARY_ID) + 1, data=data, sample_count=len(samples))
+    db.add(dictionary)
+    db.commit()
+    register_dictionary(dictionary.id, data, activate=True)
+    logger.info(f"Trained compression dictionary {dictionary.id} ({len(data)} bytes) from {len(samples)} samples")
+
+    compress_existing_rows(db, recompress=True)
+    return dictionary.id
+
+def upgrade_schema(bind) -> None:
+    """Bring tables created by an older version up to date (see the module docstring)."""
+    with bind.begin() as connection:
+        if connection.dialect.name != "sqlite":
+            return
+        table_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": EventLog.__tablename__}
+        ).scalar()
+        if table_sql and "AUTOINCREMENT" not in table_sql.upper():
+            # Without AUTOINCREMENT SQLite reuses the ids of pruned events. The table only holds
+            # events for a few minutes, so it is recreated rather than copied
+            logger.info("Recreating event_log with AUTOINCREMENT ids")
+            EventLog.__table__.drop(connection)
+            EventLog.__table__.create(connection)
+
+def database_size_bytes(db: Session) -> int:
+    page_count = db.execute(text("PRAGMA page_count")).scalar()
+    page_size = db.execute(text("PRAGMA page_size")).scalar()
+    return page_count * page_size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["compress", "train", "formatted"])
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return freed pages to the OS")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    db = SessionLocal()
+    try:
+        size_before = database_size_bytes(db)
+        if args.command == "compress":
+            print(compress_existing_rows(db))
+        elif args.command == "formatted":
+            print(f"Rewrote {compact_formatted_text(db)} formatted_text rows")
+        else:
+            print(f"Active dictionary: {train_and_store_dictionary(db)}")
+        if args.vacuum:
+            db.commit()
+            with engine.connect() as connection:
+                connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        print(f"Database size: {size_before / 1e6:.1f} MB -> {database_size_bytes(db) / 1e6:.1f} MB")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
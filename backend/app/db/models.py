@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, LargeBinary, Float, UniqueConstraint
+from sqlalchemy.orm import relationship, column_property
 import datetime
 
 from app.db.database import Base
+from app.db.compression import CompressedText
 
 class Document(Base):
     __tablename__ = "documents"
@@ -15,6 +16,7 @@ class Document(Base):
     status = Column(String, default="uploaded")  # uploaded, processing, completed, error
     
     pages = relationship("Page", back_populates="document", cascade="all, delete-orphan")
+    progress = relationship("DocumentProgress", back_populates="document", uselist=False, cascade="all, delete-orphan")
 
 class Page(Base):
     __tablename__ = "pages"
@@ -23,18 +25,37 @@ class Page(Base):
     document_id = Column(Integer, ForeignKey("documents.id"))
     page_number = Column(Integer)
     image_path = Column(String)
-    status = Column(String, default="pending")  # pending, processed, error
+    # pending, processed, error, no_text, minimal_text
+    # active_history keeps the previous status available to the progress counters even when the row was expired
+    status = column_property(Column(String, default="pending"), active_history=True)
     
     document = relationship("Document", back_populates="pages")
     extracted_text = relationship("ExtractedText", back_populates="page", uselist=False, cascade="all, delete-orphan")
 
+class DocumentProgress(Base):
+    __tablename__ = "document_progress"
+
+    # Per-document page status counters, maintained in the same transaction as
+    # Page.status changes (see app/services/progress_counters.py)
+    document_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+    total_pages = Column(Integer, default=0, nullable=False)
+    pending_pages = Column(Integer, default=0, nullable=False)
+    processed_pages = Column(Integer, default=0, nullable=False)
+    error_pages = Column(Integer, default=0, nullable=False)
+    no_text_pages = Column(Integer, default=0, nullable=False)
+    minimal_text_pages = Column(Integer, default=0, nullable=False)
+    other_pages = Column(Integer, default=0, nullable=False)  # Any status not listed above
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    document = relationship("Document", back_populates="progress")
+
 class ExtractedText(Base):
     __tablename__ = "extracted_texts"
 
     id = Column(Integer, primary_key=True, index=True)
     page_id = Column(Integer, ForeignKey("pages.id"))
-    raw_text = Column(Text)
-    formatted_text = Column(Text)  # JSON string with formatting information
+    raw_text = Column(CompressedText)
+    formatted_text = Column(CompressedText)  # JSON string with formatting information
     extraction_date = Column(DateTime, default=datetime.datetime.utcnow)
     
     page = relationship("Page", back_populates="extracted_text")
@@ -46,7 +67,7 @@ class EditablePDFText(Base):
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, unique=True) # One-to-one with Document for Document B text
     # Store text per page as JSON: {1: "text page 1", 2: "text page 2"}
-    text_content_by_page = Column(Text) # Could be JSON or another structured format
+    text_content_by_page = Column(CompressedText) # Could be JSON or another structured format
     extraction_date = Column(DateTime, default=datetime.datetime.utcnow)
 
     document = relationship("Document", backref="editable_pdf_text_data") # Use backref for simplicity here
@@ -57,12 +78,128 @@ class CorrectedText(Base):
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, unique=True) # One-to-one with Document for its corrected version
     # Store final corrected text per page as JSON: {1: "corrected text page 1", ...}
-    corrected_content_by_page = Column(Text) # Could be JSON or another structured format
+    corrected_content_by_page = Column(CompressedText) # Could be JSON or another structured format
     last_update_date = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     # Potentially add versioning or history if multiple correction passes are needed
 
     document = relationship("Document", backref="corrected_text_data") # Use backref
 
+class EventLog(Base):
+    __tablename__ = "event_log"
+    # Ids must never be reused once old rows are pruned: readers resume from the last id they saw
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    # Outbox of progress events, written in the same transaction as the change that caused them.
+    # Each worker process tails this table to relay events published by other processes.
+    id = Column(Integer, primary_key=True, index=True)
+    origin = Column(String, index=True)  # Publishing process token
+    document_id = Column(Integer, index=True, nullable=True)  # No FK: events outlive deleted documents
+    event_type = Column(String)
+    payload = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class CompressionDictionary(Base):
+    __tablename__ = "compression_dictionaries"
+
+    # Trained DEFLATE preset dictionaries for CompressedText columns (id 1 is built into the code)
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary, nullable=False)
+    sample_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ComparisonCacheEntry(Base):
+    __tablename__ = "comparison_cache"
+
+    # Diff results keyed by the content hashes of both texts and the diff engine version,
+    # so a stale entry can never be served; rows for changed texts are also deleted eagerly.
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)
+    document_id = Column(Integer, index=True, nullable=False)  # No FK: cleaned up by listeners
+    page_number = Column(Integer, nullable=False)
+    differences = Column(CompressedText)  # JSON list of compare_texts() segments
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class PageComparisonSummary(Base):
+    __tablename__ = "page_comparison_summaries"
+    __table_args__ = (UniqueConstraint("document_id", "page_number"),)
+
+    # Written by the document comparison job; drives the review triage list
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True, nullable=False)
+    page_number = Column(Integer, nullable=False)
+    similarity = Column(Float)  # 0..1, 2 * matched words / (words in A + words in B)
+    edit_count = Column(Integer)  # Non-equal segments
+    words_a = Column(Integer)
+    words_b = Column(Integer)
+    computed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class PageAlignment(Base):
+    __tablename__ = "page_alignments"
+    __table_args__ = (UniqueConstraint("document_id", "page_number"),)
+
+    # Which page of Document B holds the text of each page of Document A
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True, nullable=False)
+    page_number = Column(Integer, nullable=False)  # Document A page
+    page_number_b = Column(Integer, nullable=True)  # None: no counterpart in Document B
+    similarity = Column(Float, nullable=True)  # Estimated shingle Jaccard similarity
+    method = Column(String, default="minhash")  # minhash, interpolated, unmatched, manual
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class PageWordGeometry(Base):
+    __tablename__ = "page_word_geometry"
+    __table_args__ = (UniqueConstraint("document_id", "source", "page_number"),)
+
+    # Word boxes of a page as packed little-endian arrays (see app/services/word_geometry.py)
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True, nullable=False)
+    source = Column(String, default="editable_pdf", nullable=False)  # Document B text layer
+    page_number = Column(Integer, nullable=False)
+    page_width = Column(Float)  # PDF points
+    page_height = Column(Float)
+    word_count = Column(Integer, default=0)
+    words = Column(CompressedText)  # Newline-separated words
+    boxes = Column(LargeBinary)  # float32 x0, y0, x1, y1 per word
+    offsets = Column(LargeBinary)  # int32 start, end per word in the page text, -1 if not found
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class TextVersion(Base):
+    __tablename__ = "text_versions"
+    __table_args__ = (UniqueConstraint("document_id", "page_number", "source"),)
+
+    # Counts in-place updates and deletions of text rows, so text endpoints can build ETags
+    # without loading the text. Kept when documents are deleted.
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, index=True, nullable=False)  # No FK: outlives deleted documents
+    page_number = Column(Integer, nullable=False)  # 0 for document-wide text
+    source = Column(String, nullable=False)  # ocr, editable_pdf, corrected
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class DocumentBundle(Base):
+    __tablename__ = "document_bundles"
+
+    # Content hashes of the bundles exported from or imported into this node, so importing a
+    # bundle again finds its document instead of making a copy
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, index=True, nullable=False)
+    document_id = Column(Integer, index=True, nullable=False)  # No FK: checked on lookup, the document may be deleted
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String, index=True)  # e.g. document_comparison
+    document_id = Column(Integer, index=True, nullable=True)
+    status = Column(String, default="queued")  # queued, running, completed, failed
+    progress_current = Column(Integer, default=0)
+    progress_total = Column(Integer, default=0)
+    result = Column(Text)  # JSON summary written on completion
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
 # To keep track of user decisions on diffs for a page (optional, could be complex)
 # This is a more granular approach if we want to store individual diff resolutions.
 # For now, we might just save the whole corrected page text in CorrectedText directly.
@@ -1,11 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 from dotenv import load_dotenv
 
-from app.api.routes import documents, upload, extract, correction
+from app.api.routes import documents, upload, extract, correction, events, search, jobs
 from app.db.database import engine, Base
+from app.db.compression import load_dictionaries
+from app.db.migrations import upgrade_schema
+from app.services.progress_counters import run_reconciliation_job
+from app.services.event_bus import run_event_relay
+from app.services.search_index import initialize_search_index
+from app.services.jobs import shutdown_process_pool
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +25,10 @@ os.makedirs("database", exist_ok=True)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+# Load trained dictionaries used by compressed text columns
+load_dictionaries()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -41,12 +52,28 @@ app.include_router(upload.router, tags=["Upload"])
 app.include_router(documents.router, tags=["Documents"])
 app.include_router(extract.router, tags=["Extraction"])
 app.include_router(correction.router)
+app.include_router(events.router, tags=["Events"])
+app.include_router(search.router, tags=["Search"])
+app.include_router(jobs.router, tags=["Jobs"])
 
 # Mount static files for accessing uploads and extracted images
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 app.mount("/extracted", StaticFiles(directory="extracted"), name="extracted")
 app.mount("/exports", StaticFiles(directory="exports"), name="exports")
 
+@app.on_event("startup")
+async def start_background_jobs():
+    """Prepare the search index, start the progress counter reconciliation job and the cross-process event relay"""
+    initialize_search_index()
+    interval = float(os.getenv("PROGRESS_RECONCILE_INTERVAL_SECONDS", "600"))
+    asyncio.create_task(run_reconciliation_job(interval))
+    asyncio.create_task(run_event_relay())
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """Stop the job process pool"""
+    shutdown_process_pool()
+
 @app.get("/", tags=["Root"])
 async def read_root():
     """Root endpoint"""
@@ -6,11 +6,20 @@ class EditablePDFUploadResponse(BaseModel):
     message: str
     document_id: int
     editable_pdf_internal_id: Optional[int] = None # ID if we create a specific DB entry for it
+    comparison_job_id: Optional[int] = None # Background job diffing every page (see /api/jobs/{id})
+    extraction_job_id: Optional[int] = None # Background job extracting Text B; its result holds comparison_job_id
 
 class TextComparisonRequest(BaseModel):
     text_a: str = Field(..., description="Text from OCR (Document A)")
     text_b: str = Field(..., description="Text from Editable PDF (Document B)")
 
+class CharEdit(BaseModel):
+    type: str = Field(..., description="Type of character edit (replace, delete, insert)")
+    a_start_index: int
+    a_end_index: int
+    b_start_index: int
+    b_end_index: int
+
 class DifferenceSegment(BaseModel):
     type: str = Field(..., description="Type of change (e.g., replace, delete, insert, equal)")
     original_text_a_segment: str = Field(..., description="Segment from text_A")
@@ -19,10 +28,13 @@ class DifferenceSegment(BaseModel):
     a_end_index: int
     b_start_index: int
     b_end_index: int
+    char_edits: Optional[List[CharEdit]] = Field(None, description="Character-level edits inside a replace segment (only when requested)")
+    char_edits_skipped: Optional[str] = Field(None, description="Why a replace segment has no char_edits when they were requested: long_hunk or time_budget")
 
 class PageComparisonResponse(BaseModel):
     document_id: int
     page_number: int
+    page_number_b: Optional[int] = Field(None, description="Document B page aligned with this page (None if it has no counterpart)")
     text_a_ocr: Optional[str] = Field(None, description="OCR text for the page from Document A")
     formatted_text_a: Optional[str] = Field(None, description="Formatted text JSON for Document A")
     text_b_editable_pdf: Optional[str] = Field(None, description="Text from Document B for the page")
@@ -30,6 +42,37 @@ class PageComparisonResponse(BaseModel):
     differences: Optional[List[DifferenceSegment]] = Field(None, description="List of differences between text_a_ocr and text_b_editable_pdf")
     message: Optional[str] = None
 
+class IncrementalDiffRequest(BaseModel):
+    text_a: str = Field(..., description="Text A after the edit")
+    previous_length: int = Field(..., ge=0, description="Length of the Text A the previous differences were computed for")
+    edit_start: int = Field(..., ge=0, description="Start of the edited range (same in the previous and the new Text A)")
+    edit_end: int = Field(..., ge=0, description="End of the edited range in text_a")
+    differences: List[List[Any]] = Field(..., description="Previous differences in the compact layout (diff_layout=compact)")
+    text_b: Optional[str] = Field(None, description="Text B of the page; loaded from the database when omitted")
+    char_level: bool = False
+
+class AutoResolveRequest(BaseModel):
+    rules: List[str] = Field(
+        ["whitespace", "case", "quotes", "dashes", "punctuation"],
+        description="Classes of difference for which Text B is trusted: whitespace, case, quotes, dashes, punctuation"
+    )
+    pages: Optional[List[int]] = Field(None, description="Restrict to these page numbers (default: all pages)")
+    dry_run: bool = Field(False, description="Only report what would change")
+
+class PageAlignmentEntry(BaseModel):
+    page_number: int
+    page_number_b: Optional[int] = Field(None, description="Aligned Document B page, None if the page has no counterpart")
+    similarity: Optional[float] = Field(None, description="Estimated shingle similarity of the two pages")
+    method: str = Field(..., description="minhash, interpolated, unmatched or manual")
+
+class PageAlignmentResponse(BaseModel):
+    document_id: int
+    pages: List[PageAlignmentEntry]
+    changed_pages: Optional[List[int]] = Field(None, description="Pages whose counterpart changed with this request")
+
+class PageAlignmentOverride(BaseModel):
+    page_number_b: Optional[int] = Field(..., description="Document B page to pin this page to, or null for none")
+
 class PageCorrectionPayload(BaseModel):
     corrected_text_for_page: str = Field(..., description="The full, user-corrected text for the specified page.")
     # Optionally, could include more granular diff decisions if that level of detail is stored.
@@ -0,0 +1,162 @@
+import json
+import logging
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import BackgroundJob, EditablePDFText, ExtractedText, Page, PageComparisonSummary
+from app.services import comparison_cache
+from app.services.comparison_worker import compare_page
+from app.services.jobs import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_RUNNING,
+    create_job,
+    find_active_job,
+    get_process_pool,
+    newer_job,
+    update_job,
+)
+from app.services.page_alignment import compute_alignment, get_page_mapping
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = "document_comparison"
+PROGRESS_EVERY = 10  # Pages between progress commits
+ATTENTION_THRESHOLD = 0.98  # Pages below this similarity are counted as needing review
+
+def load_page_texts(db: Session, document_id: int) -> List[Tuple[int, str, str]]:
+    """
+    (page_number, text A, text B) for every page that has both OCR text and editable PDF text.
+
+    Text B comes from the Document B page aligned with each page (see page_alignment).
+    """
+    editable = db.query(EditablePDFText.text_content_by_page).filter(
+        EditablePDFText.document_id == document_id
+    ).scalar()
+    if not editable:
+        return []
+    text_b_by_page = json.loads(editable)
+    mapping = get_page_mapping(db, document_id)
+    rows = db.query(Page.page_number, ExtractedText.raw_text).join(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).filter(Page.document_id == document_id).order_by(Page.page_number)
+    pages = []
+    for page_number, raw_text in rows:
+        page_number_b = mapping.get(page_number, page_number)
+        text_b = text_b_by_page.get(str(page_number_b)) if page_number_b is not None else None
+        if raw_text is not None and text_b is not None:
+            pages.append((page_number, raw_text, text_b))
+    return pages
+
+def start_document_comparison(db: Session, document_id: int, supersede: bool = False) -> Tuple[BackgroundJob, bool]:
+    """
+    Create a comparison job for a document unless one is already queued or running.
+
+    Args:
+        db: Database session.
+        document_id: Document A id.
+        supersede: Always create a new job, for callers that just changed the texts. A job
+            still running on the old texts stops at its next progress commit without
+            saving the pages it diffed since the previous one.
+
+    Returns:
+        Tuple[BackgroundJob, bool]: The job and whether it was newly created (and must be run).
+    """
+    active = None if supersede else find_active_job(db, JOB_TYPE, document_id)
+    if active is not None:
+        return active, False
+    return create_job(db, JOB_TYPE, document_id), True
+
+def _save_page(db: Session, document_id: int, page: Tuple[int, str, str], summary: Dict[str, Any],
+               differences: List[Dict[str, Any]]) -> None:
+    page_number, text_a, text_b = page
+    row = db.query(PageComparisonSummary).filter(
+        PageComparisonSummary.document_id == document_id,
+        PageComparisonSummary.page_number == page_number
+    ).first()
+    if row is None:
+        row = PageComparisonSummary(document_id=document_id, page_number=page_number)
+        db.add(row)
+    for field, value in summary.items():
+        setattr(row, field, value)
+    # Pre-warm the page compare endpoint
+    comparison_cache.store(db, comparison_cache.cache_key(text_a, text_b), document_id, page_number,
+                           differences, commit=False)
+
+def run_document_comparison(job_id: int, session_factory=SessionLocal, executor: Optional[Executor] = None) -> None:
+    """
+    Align the pages of both documents, then diff every page in the process pool and
+    store per-page summaries. Summaries are committed with the progress, unless a newer
+    comparison job of the document superseded this one (see start_document_comparison).
+
+    Meant to run outside the event loop (BackgroundTasks runs it in the thread pool).
+    """
+    db = session_factory()
+    job = db.get(BackgroundJob, job_id)
+    if job is None:
+        db.close()
+        return
+    document_id = job.document_id
+    try:
+        compute_alignment(db, document_id)
+        pages = load_page_texts(db, document_id)
+        update_job(db, job, status=JOB_RUNNING, current=0, total=len(pages))
+        logger.info(f"Comparison job {job_id}: diffing {len(pages)} pages of document {document_id}")
+
+        executor = executor or get_process_pool()
+        chunk_size = max(1, min(16, len(pages) // 32))
+        by_number = {page[0]: page for page in pages}
+        similarities = []
+        for done, (page_number, summary, differences) in enumerate(
+            executor.map(compare_page, pages, chunksize=chunk_size), start=1
+        ):
+            _save_page(db, document_id, by_number[page_number], summary, differences)
+            similarities.append(summary["similarity"])
+            if done % PROGRESS_EVERY == 0 or done == len(pages):
+                newer = newer_job(db, job)
+                if newer is not None:
+                    db.rollback()
+                    update_job(db, job, status=JOB_FAILED, error=f"Superseded by comparison job {newer.id}")
+                    logger.info(f"Comparison job {job_id} superseded by job {newer.id}")
+                    return
+                update_job(db, job, current=done)
+
+        update_job(db, job, status=JOB_COMPLETED, result={
+            "pages": len(pages),
+            "mean_similarity": sum(similarities) / len(similarities) if similarities else None,
+            "pages_needing_attention": sum(1 for value in similarities if value < ATTENTION_THRESHOLD)
+        })
+        logger.info(f"Comparison job {job_id} completed")
+    except Exception as e:
+        logger.error(f"Comparison job {job_id} for document {document_id} failed: {e}", exc_info=True)
+        db.rollback()
+        update_job(db, job, status=JOB_FAILED, error=str(e))
+    finally:
+        db.close()
+
+def triage_pages(db: Session, document_id: int, limit: Optional[int] = None,
+                 max_similarity: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Compared pages, most disagreeing first (lowest similarity, then most edits)."""
+    query = db.query(PageComparisonSummary).filter(PageComparisonSummary.document_id == document_id)
+    if max_similarity is not None:
+        query = query.filter(PageComparisonSummary.similarity <= max_similarity)
+    query = query.order_by(
+        PageComparisonSummary.similarity.asc(),
+        PageComparisonSummary.edit_count.desc(),
+        PageComparisonSummary.page_number.asc()
+    )
+    if limit:
+        query = query.limit(limit)
+    return [
+        {
+            "page_number": row.page_number,
+            "similarity": round(row.similarity, 4),
+            "edit_count": row.edit_count,
+            "words_a": row.words_a,
+            "words_b": row.words_b
+        }
+        for row in query
+    ]
@@ -0,0 +1,271 @@
+"""
+Character-level refinement of word-level replace hunks.
+
+A one-letter OCR error ("rn" vs "m") makes the word diff report a whole-word replace.
+refine_replace_hunks() aligns the two sides of each replace hunk character by character
+and attaches the differing character spans to the hunk.
+
+The alignment uses Myers' bit-parallel edit distance (Hyyrö's formulation): column j of
+the DP matrix is held as two bit vectors VP/VN (vertical +1/-1 deltas), so each character
+of B costs a handful of integer operations regardless of the length of A. The vectors of
+every column are kept, which lets the traceback read D[i][j] as
+j + popcount(VP_j & mask_i) - popcount(VN_j & mask_i).
+
+Refinement is given a time budget of REFINE_TIME_RATIO times the word diff it follows.
+Hunks whose core (what is left after trimming the common ends) has at most one character
+on either side need no alignment and are always refined, first; the others are aligned
+until the deadline passes. That keeps the stage under a tenth of the compare time even on
+very noisy pages. A replace hunk left unrefined carries 'char_edits_skipped' with the
+reason: SKIPPED_LONG_HUNK (core longer than MAX_HUNK_CHARS) or SKIPPED_TIME_BUDGET.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHAR_DIFF_VERSION = 3  # Bump whenever char_edits for the same input can change
+MAX_HUNK_CHARS = 256  # Longer cores are left as a plain word-level replace
+REFINE_TIME_RATIO = 0.06  # Refinement time per second of word diff, leaving headroom for the hunk in flight
+
+SKIPPED_LONG_HUNK = "long_hunk"
+SKIPPED_TIME_BUDGET = "time_budget"
+
+CharEdit = Tuple[str, int, int, int, int]
+
+def _peq(pattern: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+def _columns(a: str, b: str) -> List[Tuple[int, int]]:
+    """(VP, VN) bit vectors of every column of the edit distance matrix of a (rows) vs b (columns)."""
+    m = len(a)
+    mask = (1 << m) - 1
+    peq = _peq(a)
+    vp, vn = mask, 0
+    columns = [(vp, vn)]
+    append, lookup = columns.append, peq.get
+    for char in b:
+        eq = lookup(char, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        # Row 0 of a global alignment grows by one per column: shift a +1 into HP
+        hp = (((vn | ~(xh | vp)) << 1) | 1) & mask
+        hn = ((vp & xh) << 1) & mask
+        vp = hn | (~(xv | hp) & mask)
+        vn = hp & xv
+        append((vp, vn))
+    return columns
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between a and b."""
+    if not a or not b:
+        return len(a) + len(b)
+    vp, vn = _columns(a, b)[-1]
+    return len(b) + vp.bit_count() - vn.bit_count()
+
+def _common_ends(a: str, b: str) -> Tuple[int, int]:
+    """Lengths of the common prefix and of the common suffix after it."""
+    # Most OCR hunks differ in a couple of characters: trim the common ends first. Hunks are a
+    # few words long, for which a plain loop beats os.path.commonprefix
+    shortest = min(len(a), len(b))
+    prefix = 0
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    limit = shortest - prefix
+    suffix = 0
+    while suffix < limit and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+def refine_deadline(diff_started: float) -> float:
+    """perf_counter() deadline of the refinement of a word diff started at diff_started."""
+    now = time.perf_counter()
+    return now + (now - diff_started) * REFINE_TIME_RATIO
+
+def char_edits(a: str, b: str) -> List[CharEdit]:
+    """
+    Character edits turning a into b.
+
+    Common ends are trimmed and the remaining core is aligned with a minimal edit script;
+    a core with at most one character on either side is reported as a single span.
+
+    Returns:
+        List[CharEdit]: ("replace" | "delete" | "insert", a_start, a_end, b_start, b_end) spans,
+        offsets relative to a and b, adjacent edits merged.
+    """
+    prefix, suffix = _common_ends(a, b)
+    return _core_edits(a, b, prefix, suffix)
+
+def _core_edits(a: str, b: str, prefix: int, suffix: int) -> List[CharEdit]:
+    end_a, end_b = len(a) - suffix, len(b) - suffix
+    core_a, core_b = end_a - prefix, end_b - prefix
+    if core_a <= 1 or core_b <= 1:
+        return _short_core_edits(prefix, end_a, end_b)
+    return [
+        (tag, prefix + i1, prefix + i2, prefix + j1, prefix + j2)
+        for tag, i1, i2, j1, j2 in _aligned_edits(a[prefix:end_a], b[prefix:end_b])
+    ]
+
+def _short_core_edits(prefix: int, end_a: int, end_b: int) -> List[CharEdit]:
+    """Edits of a core with at most one character on either side: no alignment needed."""
+    if end_a == prefix and end_b == prefix:
+        return []
+    tag = "replace" if end_a > prefix and end_b > prefix else ("delete" if end_a > prefix else "insert")
+    return [(tag, prefix, end_a, prefix, end_b)]
+
+def quick_char_edits(a: str, b: str, max_hunk_chars: int = MAX_HUNK_CHARS) -> Tuple[Optional[List[CharEdit]], Optional[str]]:
+    """
+    char_edits(a, b) and None when the core needs no alignment; otherwise None and
+    SKIPPED_LONG_HUNK when a side of the core is longer than max_hunk_chars, or None and None
+    when the core needs an alignment (see aligned_char_edits).
+    """
+    # Called for every replace hunk of a page, so _common_ends() is inlined
+    end_a, end_b = len(a), len(b)
+    shortest = min(end_a, end_b)
+    prefix = 0
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    while end_a > prefix and end_b > prefix and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    core_a, core_b = end_a - prefix, end_b - prefix
+    if core_a > max_hunk_chars or core_b > max_hunk_chars:
+        return None, SKIPPED_LONG_HUNK
+    if core_a > 1 and core_b > 1:
+        return None, None
+    return _short_core_edits(prefix, end_a, end_b), None
+
+def aligned_char_edits(a: str, b: str, deadline: Optional[float] = None) -> Tuple[Optional[List[CharEdit]], Optional[str]]:
+    """
+    char_edits(a, b) and None, or None and SKIPPED_TIME_BUDGET once the deadline (a
+    perf_counter() value) has passed. Callers refine the hunks quick_char_edits() handles
+    first and bring the others here, so only alignments are cut by the time budget.
+    """
+    if deadline is not None and time.perf_counter() >= deadline:
+        return None, SKIPPED_TIME_BUDGET
+    return char_edits(a, b), None
+
+def _aligned_edits(a: str, b: str) -> List[CharEdit]:
+    columns = _columns(a, b)
+
+    # Walk back from the bottom-right corner, recording the cells entered by an edit.
+    # D[i-1][j] follows from D[i][j] and the vertical delta bit of column j; D[i][j-1]
+    # is read from column j-1 with one popcount.
+    steps = []  # (a_start, b_start, a_end, b_end) per edit, in reverse order
+    i, j = len(a), len(b)
+    vp, vn = columns[j]
+    current = j + vp.bit_count() - vn.bit_count()
+    while i > 0 and j > 0:
+        bit = 1 << (i - 1)
+        up = current - (1 if vp & bit else (-1 if vn & bit else 0))
+        left_vp, left_vn = columns[j - 1]
+        row_mask = (1 << i) - 1
+        left = j - 1 + (left_vp & row_mask).bit_count() - (left_vn & row_mask).bit_count()
+        diagonal = left - (1 if left_vp & bit else (-1 if left_vn & bit else 0))
+        if a[i - 1] == b[j - 1] and diagonal == current:
+            i, j, current, vp, vn = i - 1, j - 1, diagonal, left_vp, left_vn
+        elif diagonal + 1 == current:
+            steps.append((i - 1, j - 1, i, j))
+            i, j, current, vp, vn = i - 1, j - 1, diagonal, left_vp, left_vn
+        elif up + 1 == current:
+            steps.append((i - 1, j, i, j))
+            i, current = i - 1, up
+        else:
+            steps.append((i, j - 1, i, j))
+            j, current, vp, vn = j - 1, left, left_vp, left_vn
+    if i > 0:
+        steps.append((0, 0, i, 0))
+    elif j > 0:
+        steps.append((0, 0, 0, j))
+
+    edits: List[CharEdit] = []
+    for a_start, b_start, a_end, b_end in reversed(steps):
+        if edits and edits[-1][2] == a_start and edits[-1][4] == b_start:
+            _, merged_a, _, merged_b, _ = edits[-1]
+            a_start, b_start = merged_a, merged_b
+            edits.pop()
+        if a_start < a_end and b_start < b_end:
+            tag = "replace"
+        else:
+            tag = "delete" if a_start < a_end else "insert"
+        edits.append((tag, a_start, a_end, b_start, b_end))
+    return edits
+
+def refine_replace_hunks(
+    differences: List[Dict[str, Any]],
+    text_a: str,
+    text_b: str,
+    max_hunk_chars: int = MAX_HUNK_CHARS,
+    deadline: Optional[float] = None
+) -> int:
+    """
+    Attach character-level edits to the replace hunks of compare_texts() output, in place.
+
+    Each refined hunk gets a 'char_edits' list of dicts with type and absolute
+    a_start_index/a_end_index/b_start_index/b_end_index offsets into text_a/text_b.
+    The others get 'char_edits_skipped' (see quick_char_edits and aligned_char_edits);
+    without a deadline every hunk whose core fits max_hunk_chars is refined, however long
+    it takes.
+
+    Returns:
+        int: Number of hunks refined.
+    """
+    refined = 0
+    aligned = []
+    for diff in differences:
+        if diff["type"] != "replace":
+            continue
+        # quick_char_edits(), inlined: this runs for every replace hunk of the page
+        a_start, b_start = diff["a_start_index"], diff["b_start_index"]
+        a = text_a[a_start:diff["a_end_index"]]
+        b = text_b[b_start:diff["b_end_index"]]
+        end_a, end_b = len(a), len(b)
+        shortest = min(end_a, end_b)
+        prefix = 0
+        while prefix < shortest and a[prefix] == b[prefix]:
+            prefix += 1
+        while end_a > prefix and end_b > prefix and a[end_a - 1] == b[end_b - 1]:
+            end_a -= 1
+            end_b -= 1
+        core_a, core_b = end_a - prefix, end_b - prefix
+        if core_a > max_hunk_chars or core_b > max_hunk_chars:
+            diff.pop("char_edits", None)
+            diff["char_edits_skipped"] = SKIPPED_LONG_HUNK
+            continue
+        if core_a > 1 and core_b > 1:
+            aligned.append((diff, a, b))
+            continue
+        diff.pop("char_edits_skipped", None)
+        diff["char_edits"] = [{
+            "type": "replace" if core_a and core_b else ("delete" if core_a else "insert"),
+            "a_start_index": a_start + prefix,
+            "a_end_index": a_start + end_a,
+            "b_start_index": b_start + prefix,
+            "b_end_index": b_start + end_b,
+        }] if core_a or core_b else []
+        refined += 1
+    for diff, a, b in aligned:
+        refined += _attach_char_edits(diff, *aligned_char_edits(a, b, deadline))
+    return refined
+
+def _attach_char_edits(diff: Dict[str, Any], edits: Optional[List[CharEdit]], skipped: Optional[str]) -> int:
+    if edits is None:
+        diff.pop("char_edits", None)
+        diff["char_edits_skipped"] = skipped
+        return 0
+    diff.pop("char_edits_skipped", None)
+    a_start, b_start = diff["a_start_index"], diff["b_start_index"]
+    diff["char_edits"] = [
+        {
+            "type": tag,
+            "a_start_index": a_start + i1,
+            "a_end_index": a_start + i2,
+            "b_start_index": b_start + j1,
+            "b_end_index": b_start + j2,
+        }
+        for tag, i1, i2, j1, j2 in edits
+    ]
+    return 1
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.models import (
+    ComparisonCacheEntry,
+    Document,
+    EditablePDFText,
+    ExtractedText,
+    Page,
+    PageAlignment,
+    PageComparisonSummary,
+    PageWordGeometry,
+)
+from app.services.char_diff import CHAR_DIFF_VERSION, SKIPPED_TIME_BUDGET
+from app.services.diff_engine import ENGINE_VERSION, default_engine
+
+logger = logging.getLogger(__name__)
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_SHARED = "shared"  # Waited for an identical request that was already computing
+
+# Requests computing a diff right now, by cache key (single-flight within this process)
+_inflight: Dict[str, asyncio.Future] = {}
+
+def text_hash(text_content: str) -> str:
+    return hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+def cache_key(text_a: str, text_b: str, char_level: bool = False, engine: Optional[str] = None) -> str:
+    """Key of a comparison result: both text hashes, the diff engine and its version, and the options."""
+    engine = engine or default_engine()
+    parts = [text_hash(text_a), text_hash(text_b), f"{engine}-{ENGINE_VERSION}", f"char-{CHAR_DIFF_VERSION}" if char_level else "word"]
+    return hashlib.sha256(":".join(parts).encode("ascii")).hexdigest()
+
+def get_cached(db: Session, key: str) -> Optional[List[Dict[str, Any]]]:
+    value = db.execute(
+        select(ComparisonCacheEntry.differences).where(ComparisonCacheEntry.cache_key == key)
+    ).scalar()
+    return json.loads(value) if value is not None else None
+
+def store(
+    db: Session,
+    key: str,
+    document_id: int,
+    page_number: int,
+    differences: List[Dict[str, Any]],
+    commit: bool = True
+) -> None:
+    entry = ComparisonCacheEntry(
+        cache_key=key,
+        document_id=document_id,
+        page_number=page_number,
+        differences=json.dumps(differences, separators=(",", ":"))
+    )
+    if not commit:
+        # Pages with the same text pair share a key: one entry is enough, and a second
+        # insert would violate the unique key when the batch is flushed
+        if any(isinstance(obj, ComparisonCacheEntry) and obj.cache_key == key for obj in db.new):
+            return
+        # Batch writers replace whatever an on-demand request stored meanwhile
+        db.query(ComparisonCacheEntry).filter(ComparisonCacheEntry.cache_key == key).delete()
+        db.add(entry)
+        return
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another process stored the same result first
+        db.rollback()
+
+async def get_or_compute(
+    db: Session,
+    document_id: int,
+    page_number: int,
+    text_a: str,
+    text_b: str,
+    compute: Callable[[], List[Dict[str, Any]]],
+    char_level: bool = False
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Return the cached diff of text_a and text_b, computing and storing it on a miss.
+
+    Concurrent identical requests share one computation, which runs in the thread pool
+    so the event loop keeps serving other requests. A result with hunks left unrefined by
+    the time budget of character-level refinement is not stored, so the next request can
+    refine them.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], str]: The differences and CACHE_HIT, CACHE_MISS or CACHE_SHARED.
+    """
+    key = cache_key(text_a, text_b, char_level)
+    cached = get_cached(db, key)
+    if cached is not None:
+        return cached, CACHE_HIT
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending), CACHE_SHARED
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        differences = await run_in_threadpool(compute)
+        future.set_result(differences)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark as retrieved when nobody else was waiting
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    if not any(diff.get("char_edits_skipped") == SKIPPED_TIME_BUDGET for diff in differences):
+        store(db, key, document_id, page_number, differences)
+    return differences, CACHE_MISS
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_after_flush(session: Session, flush_context) -> None:
+    """
+    Delete cached comparisons and page summaries whose OCR text or editable PDF text changed.
+
+    A new editable PDF also drops the document's page alignment, manual overrides included,
+    and its stored word geometry (the upload stores the new geometry in a later flush).
+    """
+    pages = set()
+    documents = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ExtractedText):
+            if obj in session.dirty and not inspect(obj).attrs.raw_text.history.has_changes():
+                continue
+            pages.add(obj.page_id)
+        elif isinstance(obj, EditablePDFText):
+            if obj in session.dirty and not inspect(obj).attrs.text_content_by_page.history.has_changes():
+                continue
+            documents.add(obj.document_id)
+        elif isinstance(obj, Document) and obj in session.deleted:
+            documents.add(obj.id)
+    if not pages and not documents:
+        return
+
+    connection = session.connection()
+    locations = connection.execute(
+        select(Page.document_id, Page.page_number).where(Page.id.in_(pages))
+    ).fetchall() if pages else []
+    for table in (ComparisonCacheEntry.__table__, PageComparisonSummary.__table__):
+        if documents:
+            connection.execute(delete(table).where(table.c.document_id.in_(documents)))
+        for document_id, page_number in locations:
+            connection.execute(delete(table).where(
+                (table.c.document_id == document_id) & (table.c.page_number == page_number)
+            ))
+    if documents:
+        for table in (PageAlignment.__table__, PageWordGeometry.__table__):
+            connection.execute(delete(table).where(table.c.document_id.in_(documents)))
@@ -0,0 +1,28 @@
+"""
+Per-page comparison run inside the job process pool.
+
+Kept free of database imports so spawned worker processes start quickly and never open
+connections of their own.
+"""
+from typing import Any, Dict, List, Tuple
+
+from app.services.text_comparison_service import TextComparisonService
+
+_service = TextComparisonService()
+
+def summarize_differences(differences: List[Dict[str, Any]], words_a: int, words_b: int) -> Dict[str, Any]:
+    """Similarity (2 * matched words / total words, like SequenceMatcher.ratio) and edit count of a page diff."""
+    matched = sum(len(diff["original_text_a_segment"].split()) for diff in differences if diff["type"] == "equal")
+    total = words_a + words_b
+    return {
+        "similarity": 2.0 * matched / total if total else 1.0,
+        "edit_count": sum(1 for diff in differences if diff["type"] != "equal"),
+        "words_a": words_a,
+        "words_b": words_b
+    }
+
+def compare_page(page: Tuple[int, str, str]) -> Tuple[int, Dict[str, Any], List[Dict[str, Any]]]:
+    """Diff one page; returns (page_number, summary, differences)."""
+    page_number, text_a, text_b = page
+    differences = _service.compare_texts(text_a, text_b)
+    return page_number, summarize_differences(differences, len(text_a.split()), len(text_b.split())), differences
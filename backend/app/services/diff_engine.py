@@ -0,0 +1,241 @@
+"""
+Word-level diff engine used by TextComparisonService.
+
+difflib.SequenceMatcher looks for the longest matching block in every region, which is
+quadratic on long, noisy pages (OCR against a native text layer). This engine combines:
+
+- common prefix/suffix trimming,
+- patience anchoring: tokens that occur exactly once on both sides of a region are matched
+  along their longest increasing subsequence and the gaps between them are diffed recursively,
+- Myers' O(ND) algorithm for small regions,
+- a windowed Myers pass for large regions without unique tokens (repetitive text), which
+  aligns WINDOW_SIZE tokens at a time and keeps the first part of each window's alignment.
+
+Tokens are interned to integer ids held in array('i') so comparisons are int comparisons.
+get_opcodes() returns the same 5-tuples as SequenceMatcher.get_opcodes().
+"""
+import bisect
+import difflib
+import logging
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENGINE_PATIENCE = "patience"
+ENGINE_DIFFLIB = "difflib"
+ENGINE_VERSION = 1  # Bump whenever the output for the same input can change
+
+MYERS_REGION_LIMIT = 4096  # n * m below which a region goes straight to Myers
+WINDOW_SIZE = 64  # Tokens of A per window in the fallback pass
+
+Opcode = Tuple[str, int, int, int, int]
+Block = Tuple[int, int, int]
+
+def default_engine() -> str:
+    return os.getenv("DIFF_ENGINE", ENGINE_PATIENCE).lower()
+
+def intern_tokens(tokens_a: Sequence[str], tokens_b: Sequence[str]) -> Tuple[array, array]:
+    """Map both token lists onto shared integer ids."""
+    ids: Dict[str, int] = {}
+    setdefault = ids.setdefault
+    ids_a = array("i", [setdefault(token, len(ids)) for token in tokens_a])
+    ids_b = array("i", [setdefault(token, len(ids)) for token in tokens_b])
+    return ids_a, ids_b
+
+def _myers(a: array, a_lo: int, a_hi: int, b: array, b_lo: int, b_hi: int, max_d: int) -> Optional[List[Tuple[int, int]]]:
+    """Matched (i, j) pairs of a shortest edit script, or None if it needs more than max_d edits.
+
+    Runs in O((n + m) * d) time; the trace of each step is kept for backtracking (O(d^2) memory).
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = min(max_d, n + m)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, d, n, m, a_lo, b_lo)
+    return None
+
+def _myers_backtrack(trace: List[List[int]], d_final: int, n: int, m: int, a_lo: int, b_lo: int) -> List[Tuple[int, int]]:
+    pairs = []
+    x, y = n, m
+    for d in range(d_final, 0, -1):
+        snapshot = trace[d]  # v before step d, holding diagonals -d-1 .. d+1
+        k = x - y
+        if k == -d or (k != d and snapshot[k - 1 + d + 1] < snapshot[k + 1 + d + 1]):
+            prev_k = k + 1
+            start_x = snapshot[prev_k + d + 1]
+        else:
+            prev_k = k - 1
+            start_x = snapshot[prev_k + d + 1] + 1
+        # Diagonal run that followed the edit made at step d
+        while x > start_x:
+            x -= 1
+            y -= 1
+            pairs.append((a_lo + x, b_lo + y))
+        x = snapshot[prev_k + d + 1]
+        y = x - prev_k
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        pairs.append((a_lo + x, b_lo + y))
+    pairs.reverse()
+    return pairs
+
+def _windowed_myers(a: array, a_lo: int, a_hi: int, b: array, b_lo: int, b_hi: int) -> List[Tuple[int, int]]:
+    """Approximate alignment in O((n + m) * WINDOW_SIZE) for regions patience cannot split."""
+    pairs: List[Tuple[int, int]] = []
+    ratio = (b_hi - b_lo) / (a_hi - a_lo)
+    a_window = WINDOW_SIZE
+    b_window = int(WINDOW_SIZE * ratio) + WINDOW_SIZE // 2
+    a_pos, b_pos = a_lo, b_lo
+    while a_pos < a_hi and b_pos < b_hi:
+        a_end = min(a_hi, a_pos + a_window)
+        b_end = min(b_hi, b_pos + b_window)
+        matched = _myers(a, a_pos, a_end, b, b_pos, b_end, (a_end - a_pos) + (b_end - b_pos))
+        if a_end == a_hi and b_end == b_hi:
+            pairs.extend(matched)
+            break
+        # The end of a window is aligned without seeing what follows; only keep the first part
+        a_limit = a_pos + (a_end - a_pos) * 3 // 4
+        b_limit = b_pos + (b_end - b_pos) * 3 // 4
+        kept = [(i, j) for i, j in matched if i < a_limit and j < b_limit]
+        if kept:
+            pairs.extend(kept)
+            a_pos, b_pos = kept[-1][0] + 1, kept[-1][1] + 1
+        else:
+            a_pos, b_pos = a_limit, b_limit
+    return pairs
+
+def _unique_anchors(a: array, a_lo: int, a_hi: int, b: array, b_lo: int, b_hi: int) -> List[Tuple[int, int]]:
+    """Tokens occurring once in both regions, reduced to their longest increasing subsequence."""
+    seen_a: Dict[int, int] = {}
+    for i in range(a_lo, a_hi):
+        token = a[i]
+        seen_a[token] = -1 if token in seen_a else i
+    seen_b: Dict[int, int] = {}
+    for j in range(b_lo, b_hi):
+        token = b[j]
+        if token in seen_a and seen_a[token] >= 0:
+            seen_b[token] = -1 if token in seen_b else j
+    candidates = [(seen_a[token], j) for token, j in seen_b.items() if j >= 0]
+    if not candidates:
+        return []
+    candidates.sort(key=lambda pair: pair[1])
+
+    # Patience sorting: LIS over a-indices in b order
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(candidates)
+    for index, (i, _) in enumerate(candidates):
+        position = bisect.bisect_left(tails, i)
+        if position == len(tails):
+            tails.append(i)
+            tail_index.append(index)
+        else:
+            tails[position] = i
+            tail_index[position] = index
+        previous[index] = tail_index[position - 1] if position > 0 else -1
+    anchors = []
+    index = tail_index[-1]
+    while index >= 0:
+        anchors.append(candidates[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+def _match_pairs(a: array, b: array) -> List[Tuple[int, int]]:
+    pairs: List[Tuple[int, int]] = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        a_lo, a_hi, b_lo, b_hi = regions.pop()
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            pairs.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            pairs.append((a_hi, b_hi))
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        if (a_hi - a_lo) * (b_hi - b_lo) <= MYERS_REGION_LIMIT:
+            pairs.extend(_myers(a, a_lo, a_hi, b, b_lo, b_hi, (a_hi - a_lo) + (b_hi - b_lo)))
+            continue
+        anchors = _unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi)
+        if not anchors:
+            pairs.extend(_windowed_myers(a, a_lo, a_hi, b, b_lo, b_hi))
+            continue
+        pairs.extend(anchors)
+        previous_i, previous_j = a_lo, b_lo
+        for i, j in anchors:
+            regions.append((previous_i, i, previous_j, j))
+            previous_i, previous_j = i + 1, j + 1
+        regions.append((previous_i, a_hi, previous_j, b_hi))
+    pairs.sort()
+    return pairs
+
+def get_matching_blocks(a: array, b: array) -> List[Block]:
+    """Matching blocks (i, j, size) like SequenceMatcher.get_matching_blocks(), with the (len_a, len_b, 0) sentinel."""
+    blocks: List[Block] = []
+    for i, j in _match_pairs(a, b):
+        if blocks:
+            last_i, last_j, size = blocks[-1]
+            if last_i + size == i and last_j + size == j:
+                blocks[-1] = (last_i, last_j, size + 1)
+                continue
+        blocks.append((i, j, 1))
+    blocks.append((len(a), len(b), 0))
+    return blocks
+
+def opcodes_from_blocks(blocks: List[Block]) -> List[Opcode]:
+    """Same conversion SequenceMatcher.get_opcodes() applies to its matching blocks."""
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for block_i, block_j, size in blocks:
+        if i < block_i and j < block_j:
+            opcodes.append(("replace", i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(("delete", i, block_i, j, block_j))
+        elif j < block_j:
+            opcodes.append(("insert", i, block_i, j, block_j))
+        i, j = block_i + size, block_j + size
+        if size:
+            opcodes.append(("equal", block_i, i, block_j, j))
+    return opcodes
+
+def get_opcodes(tokens_a: Sequence[str], tokens_b: Sequence[str], engine: Optional[str] = None) -> List[Opcode]:
+    """
+    Diff two token lists.
+
+    Args:
+        tokens_a (Sequence[str]): Tokens of the first text.
+        tokens_b (Sequence[str]): Tokens of the second text.
+        engine (Optional[str]): "patience" (default) or "difflib"; defaults to the DIFF_ENGINE setting.
+
+    Returns:
+        List[Opcode]: (tag, i1, i2, j1, j2) tuples as returned by SequenceMatcher.get_opcodes().
+    """
+    engine = engine or default_engine()
+    if engine == ENGINE_DIFFLIB:
+        return difflib.SequenceMatcher(None, tokens_a, tokens_b, autojunk=False).get_opcodes()
+    if engine != ENGINE_PATIENCE:
+        logger.warning(f"Unknown diff engine '{engine}', using {ENGINE_PATIENCE}")
+    ids_a, ids_b = intern_tokens(tokens_a, tokens_b)
+    return opcodes_from_blocks(get_matching_blocks(ids_a, ids_b))
@@ -0,0 +1,147 @@
+"""
+Compact layout and content negotiation for page comparison responses.
+
+The full layout repeats the text of every equal segment inside 'differences' although both
+page texts are already part of the response. The compact layout sends every segment as a
+list instead of an object:
+
+    ["equal", a_start, a_end, b_start, b_end]
+    [type, a_start, a_end, b_start, b_end, text_a_segment, text_b_segment(, char_edits)]
+    [type, a_start, a_end, b_start, b_end, text_a_segment, text_b_segment, null, char_edits_skipped]
+
+Equal segments carry offsets only; their text is the whitespace-normalized slice of the page
+text (words joined by single spaces, like the full layout). char_edits, when requested, are
+[type, a_start, a_end, b_start, b_end] lists; a replace segment left unrefined has null
+instead, followed by the reason (see char_diff).
+
+encode_payload() serializes a response as JSON or msgpack according to the Accept header,
+and compresses it with brotli or gzip according to Accept-Encoding. msgpack and brotli are
+optional dependencies; without them the response falls back to JSON and gzip.
+"""
+import gzip
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON is served instead
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is used instead
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DIFF_LAYOUT_FULL = "full"
+DIFF_LAYOUT_COMPACT = "compact"
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = (MEDIA_MSGPACK, "application/x-msgpack")
+
+MIN_COMPRESS_BYTES = 1024  # Smaller bodies are sent uncompressed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Good ratio while staying fast enough for on-the-fly responses
+
+_SEGMENT_FIELDS = ("a_start_index", "a_end_index", "b_start_index", "b_end_index")
+
+def compact_differences(differences: List[Dict[str, Any]]) -> List[List[Any]]:
+    """Convert compare_texts() output to the compact segment lists."""
+    segments = []
+    for diff in differences:
+        segment = [diff["type"]] + [diff[field] for field in _SEGMENT_FIELDS]
+        if diff["type"] != "equal":
+            segment += [diff["original_text_a_segment"], diff["suggested_text_b_segment"]]
+            if diff.get("char_edits") is not None:
+                segment.append([[edit["type"]] + [edit[field] for field in _SEGMENT_FIELDS] for edit in diff["char_edits"]])
+            elif diff.get("char_edits_skipped") is not None:
+                segment += [None, diff["char_edits_skipped"]]
+        segments.append(segment)
+    return segments
+
+def expand_differences(segments: List[List[Any]], text_a: str, text_b: str) -> List[Dict[str, Any]]:
+    """Rebuild the full layout from compact segments and the two page texts."""
+    differences = []
+    for segment in segments:
+        diff = {"type": segment[0], **dict(zip(_SEGMENT_FIELDS, segment[1:5]))}
+        if segment[0] == "equal":
+            diff["original_text_a_segment"] = " ".join(text_a[segment[1]:segment[2]].split())
+            diff["suggested_text_b_segment"] = " ".join(text_b[segment[3]:segment[4]].split())
+        else:
+            diff["original_text_a_segment"], diff["suggested_text_b_segment"] = segment[5], segment[6]
+            if len(segment) > 7 and segment[7] is not None:
+                diff["char_edits"] = [{"type": edit[0], **dict(zip(_SEGMENT_FIELDS, edit[1:]))} for edit in segment[7]]
+            elif len(segment) > 8:
+                diff["char_edits_skipped"] = segment[8]
+        differences.append(diff)
+    return differences
+
+def _accepted(header: Optional[str]) -> Dict[str, float]:
+    """Media types or codings of an Accept/Accept-Encoding header with their q-values."""
+    accepted = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+def choose_media_type(accept: Optional[str]) -> str:
+    """msgpack when the client asks for it (and it is installed) and ranks it above JSON, else JSON."""
+    if msgpack is None:
+        return MEDIA_JSON
+    accepted = _accepted(accept)
+    msgpack_quality = max(accepted.get(media, 0.0) for media in _MSGPACK_MEDIA_TYPES)
+    json_quality = max(accepted.get(MEDIA_JSON, 0.0), accepted.get("*/*", 0.0), accepted.get("application/*", 0.0))
+    return MEDIA_MSGPACK if msgpack_quality > 0 and msgpack_quality >= json_quality else MEDIA_JSON
+
+def choose_content_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """br (if installed) over gzip over no compression."""
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and accepted.get("br", 0.0) > 0:
+        return "br"
+    if accepted.get("gzip", 0.0) > 0:
+        return "gzip"
+    return None
+
+def serialize(payload: Dict[str, Any], media_type: str = MEDIA_JSON) -> bytes:
+    if media_type == MEDIA_MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+def encode_payload(
+    payload: Dict[str, Any],
+    accept: Optional[str] = None,
+    accept_encoding: Optional[str] = None
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize and compress a response payload according to the request headers.
+
+    Returns:
+        Tuple[bytes, Dict[str, str]]: The body and its Content-Type, Content-Encoding and Vary headers.
+    """
+    media_type = choose_media_type(accept)
+    body = serialize(payload, media_type)
+    headers = {"Content-Type": media_type, "Vary": "Accept, Accept-Encoding"}
+    encoding = choose_content_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
@@ -0,0 +1,506 @@
+"""
+Document bundles: one zip archive with everything this node knows about a document, to move
+it to another deployment without copying uploads/, extracted/ and database rows by hand.
+
+Members, in the order they are streamed:
+    document.json      the document and its pages with their OCR text, the editable PDF text
+                       (Document B) and its word geometry, the corrections and the manual
+                       page alignments
+    original.pdf       the uploaded scan
+    pages/page_N.jpg   the rendered page images
+    manifest.json      format version, SHA-256 and size of every other member, and the
+                       content hash of the bundle
+
+Export streams the archive while it is written (zip data descriptors, no seeking), reading
+pages PAGE_BATCH at a time. Import verifies every member against the manifest and recreates
+the rows with their statuses, so nothing is rendered or OCRed again. The content hash covers
+the members, not database ids or the export time: importing a bundle twice, or a bundle of a
+document this node exported, returns the existing document.
+
+Usage (from the backend directory):
+    python -m app.services.document_bundle export 12 scan_12.zip
+    python -m app.services.document_bundle import scan_12.zip
+"""
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+import zipfile
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.database import Base, SessionLocal, engine
+from app.db.models import (
+    CorrectedText,
+    Document,
+    DocumentBundle,
+    EditablePDFText,
+    ExtractedText,
+    Page,
+    PageAlignment,
+    PageWordGeometry,
+)
+from app.services.word_export import PAGE_BATCH
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = "pdfvision-document-bundle"
+BUNDLE_VERSION = 1
+BUNDLE_MEDIA_TYPE = "application/zip"
+MANIFEST = "manifest.json"
+DOCUMENT_JSON = "document.json"
+ORIGINAL_PDF = "original.pdf"
+UPLOADS_DIR = "uploads"
+EXTRACTED_DIR = "extracted"
+CHUNK_SIZE = 1024 * 1024  # Bytes read from a file or member at a time
+_PAGE_IMAGE = re.compile(r"^pages/page_([1-9]\d*)\.jpg$")
+
+def page_image_name(page_number: int) -> str:
+    return f"pages/page_{page_number}.jpg"
+
+def bundle_file_name(document: Document) -> str:
+    """Download name of a document's bundle."""
+    stem = document.filename[:-4] if document.filename.lower().endswith(".pdf") else document.filename
+    return "".join(c if c.isalnum() else "_" for c in stem) + f"_doc_{document.id}_bundle.zip"
+
+def content_hash(files: Dict[str, Dict[str, Any]]) -> str:
+    """Hash of a bundle's content: the SHA-256 of every member but the manifest, by name."""
+    listing = "".join(f"{name}\n{files[name]['sha256']}\n" for name in sorted(files))
+    return hashlib.sha256(f"bundle/{BUNDLE_VERSION}/{listing}".encode("utf-8")).hexdigest()
+
+def _iso(value: Optional[datetime.datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _datetime(value: Optional[str]) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromisoformat(value) if value else None
+
+def _b64(value: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(value).decode("ascii") if value is not None else None
+
+def _document_json(db: Session, document: Document) -> Iterator[str]:
+    """document.json in pieces: pages and word geometry are read PAGE_BATCH rows at a time."""
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    yield '{"document": ' + dumps({
+        "filename": document.filename,
+        "status": document.status,
+        "total_pages": document.total_pages,
+        "upload_date": _iso(document.upload_date),
+    })
+    yield ', "pages": ['
+    rows = db.query(Page, ExtractedText).outerjoin(ExtractedText, ExtractedText.page_id == Page.id).filter(
+        Page.document_id == document.id
+    ).order_by(Page.page_number).yield_per(PAGE_BATCH)
+    for index, (page, extracted) in enumerate(rows):
+        has_image = bool(page.image_path) and os.path.isfile(page.image_path)
+        yield ("," if index else "") + "\n" + dumps({
+            "page_number": page.page_number,
+            "status": page.status,
+            "image": page_image_name(page.page_number) if has_image else None,
+            "extracted_text": {
+                "raw_text": extracted.raw_text,
+                "formatted_text": extracted.formatted_text,
+                "extraction_date": _iso(extracted.extraction_date),
+            } if extracted else None,
+        })
+    yield "]"
+
+    editable = db.query(EditablePDFText).filter(EditablePDFText.document_id == document.id).first()
+    yield ', "editable_pdf_text": ' + dumps({
+        "text_content_by_page": editable.text_content_by_page,
+        "extraction_date": _iso(editable.extraction_date),
+    } if editable else None)
+    corrected = db.query(CorrectedText).filter(CorrectedText.document_id == document.id).first()
+    yield ', "corrected_text": ' + dumps({
+        "corrected_content_by_page": corrected.corrected_content_by_page,
+        "last_update_date": _iso(corrected.last_update_date),
+    } if corrected else None)
+
+    yield ', "word_geometry": ['
+    geometry = db.query(PageWordGeometry).filter(PageWordGeometry.document_id == document.id).order_by(
+        PageWordGeometry.source, PageWordGeometry.page_number
+    ).yield_per(PAGE_BATCH)
+    for index, row in enumerate(geometry):
+        yield ("," if index else "") + "\n" + dumps({
+            "source": row.source,
+            "page_number": row.page_number,
+            "page_width": row.page_width,
+            "page_height": row.page_height,
+            "word_count": row.word_count,
+            "words": row.words,
+            "boxes": _b64(row.boxes),
+            "offsets": _b64(row.offsets),
+        })
+    yield "]"
+
+    # Only manual alignments: the computed ones are recomputed from the texts on demand
+    alignments = db.query(PageAlignment).filter(
+        PageAlignment.document_id == document.id, PageAlignment.method == "manual"
+    ).order_by(PageAlignment.page_number).all()
+    yield ', "page_alignments": ' + dumps([
+        {"page_number": row.page_number, "page_number_b": row.page_number_b} for row in alignments
+    ])
+    yield "}\n"
+
+class _ChunkSink:
+    """Write-only file without tell(), so ZipFile writes a stream with data descriptors."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+def _member_info(name: str, compress: bool) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, datetime.datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    return info
+
+def stream_bundle(document_id: int, session_factory: Callable[[], Session] = SessionLocal) -> Iterator[bytes]:
+    """
+    Chunks of the bundle of a document, produced while the archive is written. Rows are read
+    in a session of their own, so the export does not depend on the request's session; the
+    content hash is recorded at the end.
+
+    Raises:
+        ValueError: If the document does not exist.
+    """
+    db = session_factory()
+    try:
+        document = db.query(Document).filter(Document.id == document_id).first()
+        if document is None:
+            raise ValueError(f"Document with ID {document_id} not found")
+        sink = _ChunkSink()
+        files: Dict[str, Dict[str, Any]] = {}
+        with zipfile.ZipFile(sink, "w") as bundle:
+            def add_member(name: str, pieces: Iterator[bytes], compress: bool = True) -> Iterator[bytes]:
+                digest, size = hashlib.sha256(), 0
+                with bundle.open(_member_info(name, compress), "w") as member:
+                    for piece in pieces:
+                        member.write(piece)
+                        digest.update(piece)
+                        size += len(piece)
+                        if sink.size >= CHUNK_SIZE:
+                            yield sink.take()
+                files[name] = {"sha256": digest.hexdigest(), "size": size}
+                if sink.size:
+                    yield sink.take()
+
+            yield from add_member(DOCUMENT_JSON, (piece.encode("utf-8") for piece in _document_json(db, document)))
+            if os.path.isfile(document.file_path):
+                yield from add_member(ORIGINAL_PDF, _read_file(document.file_path))
+            pages = db.query(Page.page_number, Page.image_path).filter(
+                Page.document_id == document_id, Page.image_path.isnot(None)
+            ).order_by(Page.page_number).yield_per(PAGE_BATCH)
+            for page_number, image_path in pages:
+                if os.path.isfile(image_path):
+                    # JPEG does not deflate any further
+                    yield from add_member(page_image_name(page_number), _read_file(image_path), compress=False)
+
+            bundle_hash = content_hash(files)
+            manifest = {
+                "format": BUNDLE_FORMAT,
+                "version": BUNDLE_VERSION,
+                "created_at": _iso(datetime.datetime.utcnow()),
+                "filename": document.filename,
+                "content_hash": bundle_hash,
+                "files": files,
+            }
+            bundle.writestr(_member_info(MANIFEST, True), json.dumps(manifest, indent=2, sort_keys=True))
+        yield sink.take()
+        _record_bundle(db, bundle_hash, document_id)
+        logger.info(f"Exported document {document_id} as bundle {bundle_hash} ({len(files)} members)")
+    except Exception as e:
+        logger.error(f"Bundle export of document {document_id} failed: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
+
+def _read_file(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as source:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def _record_bundle(db: Session, bundle_hash: str, document_id: int) -> None:
+    row = db.query(DocumentBundle).filter(DocumentBundle.content_hash == bundle_hash).first()
+    if row is not None and _bundled_document(db, bundle_hash) is not None:
+        return
+    if row is None:
+        db.add(DocumentBundle(content_hash=bundle_hash, document_id=document_id))
+    else:
+        row.document_id = document_id  # The document it pointed to was deleted
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # Recorded concurrently
+
+def _bundled_document(db: Session, bundle_hash: str) -> Optional[Document]:
+    """The document a bundle was exported from or imported as, if it still exists."""
+    return db.query(Document).join(DocumentBundle, DocumentBundle.document_id == Document.id).filter(
+        DocumentBundle.content_hash == bundle_hash
+    ).first()
+
+def read_manifest(bundle: zipfile.ZipFile) -> Dict[str, Any]:
+    """
+    The manifest of a bundle, checked against the archive's members.
+
+    Raises:
+        ValueError: If the archive is not a bundle this version can import.
+    """
+    try:
+        manifest = json.loads(bundle.read(MANIFEST))
+    except KeyError:
+        raise ValueError("Not a document bundle: manifest.json is missing")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid bundle manifest: {e}")
+    if not isinstance(manifest, dict) or manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError("Not a document bundle")
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {manifest.get('version')}; this node reads version {BUNDLE_VERSION}")
+    files = manifest.get("files")
+    if not isinstance(files, dict) or DOCUMENT_JSON not in files:
+        raise ValueError("Bundle manifest lists no document.json")
+    for name in files:
+        if name not in (DOCUMENT_JSON, ORIGINAL_PDF) and not _PAGE_IMAGE.match(name):
+            raise ValueError(f"Unexpected bundle member '{name}'")
+    members = set(bundle.namelist()) - {MANIFEST}
+    if members != set(files):
+        raise ValueError("Bundle members do not match its manifest")
+    if manifest.get("content_hash") != content_hash(files):
+        raise ValueError("Bundle content hash does not match its manifest")
+    return manifest
+
+def _extract_member(bundle: zipfile.ZipFile, name: str, expected: Dict[str, Any], destination: str) -> None:
+    """Copy a member to a file, checking its size and SHA-256 against the manifest."""
+    digest, size = hashlib.sha256(), 0
+    with bundle.open(name) as member, open(destination, "wb") as target:
+        while True:
+            chunk = member.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            target.write(chunk)
+    if size != expected.get("size") or digest.hexdigest() != expected.get("sha256"):
+        raise ValueError(f"Bundle member '{name}' does not match its manifest")
+
+def _read_document_json(bundle: zipfile.ZipFile, expected: Dict[str, Any]) -> Dict[str, Any]:
+    # Checked before reading: the manifest bounds what is decompressed into memory
+    if bundle.getinfo(DOCUMENT_JSON).file_size != expected.get("size"):
+        raise ValueError("Bundle member 'document.json' does not match its manifest")
+    data = bundle.read(DOCUMENT_JSON)
+    if len(data) != expected.get("size") or hashlib.sha256(data).hexdigest() != expected.get("sha256"):
+        raise ValueError("Bundle member 'document.json' does not match its manifest")
+    return json.loads(data)
+
+def import_bundle(db: Session, bundle_path: str) -> Tuple[Document, bool]:
+    """
+    Import a bundle as a new document, or find the document it was already imported as (or
+    exported from).
+
+    The original PDF goes to uploads/ and the page images to extracted/{document id}/, as
+    the upload would have put them; the rows keep their statuses and text, so the document
+    is not rendered or OCRed again.
+
+    Returns:
+        Tuple[Document, bool]: The document, and whether it was created.
+
+    Raises:
+        ValueError: If the file is not a valid bundle or a member does not match the manifest.
+    """
+    try:
+        bundle = zipfile.ZipFile(bundle_path)
+    except zipfile.BadZipFile:
+        raise ValueError("Not a document bundle: the file is not a zip archive")
+    with bundle:
+        manifest = read_manifest(bundle)
+        bundle_hash = manifest["content_hash"]
+        existing = _bundled_document(db, bundle_hash)
+        if existing is not None:
+            return existing, False
+
+        files = manifest["files"]
+        data = _read_document_json(bundle, files[DOCUMENT_JSON])
+        staging = os.path.join(EXTRACTED_DIR, f".import_{uuid.uuid4().hex}")
+        file_path = None
+        document_dir = None
+        try:
+            # Files first, into a staging directory: the database is not locked while they are copied
+            os.makedirs(staging)
+            for name in files:
+                if _PAGE_IMAGE.match(name):
+                    _extract_member(bundle, name, files[name], os.path.join(staging, os.path.basename(name)))
+            if ORIGINAL_PDF in files:
+                os.makedirs(UPLOADS_DIR, exist_ok=True)
+                timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+                file_path = os.path.join(UPLOADS_DIR, f"{timestamp}_{uuid.uuid4()}.pdf")
+                _extract_member(bundle, ORIGINAL_PDF, files[ORIGINAL_PDF], file_path)
+
+            document = _add_rows(db, data, file_path or "", files)
+            document_dir = os.path.join(EXTRACTED_DIR, str(document.id))
+            if os.path.isdir(document_dir):
+                shutil.rmtree(document_dir)  # Left behind by a deleted document with the same id
+            os.replace(staging, document_dir)
+            db.add(DocumentBundle(content_hash=bundle_hash, document_id=document.id))
+            db.commit()
+        except IntegrityError:
+            # The same bundle was imported concurrently
+            db.rollback()
+            _remove_files(staging, document_dir, file_path)
+            existing = _bundled_document(db, bundle_hash)
+            if existing is None:
+                raise
+            return existing, False
+        except Exception as e:
+            db.rollback()
+            _remove_files(staging, document_dir, file_path)
+            if isinstance(e, (KeyError, TypeError)):
+                raise ValueError(f"Invalid document.json in bundle: {e!r}") from e
+            raise
+    db.refresh(document)
+    logger.info(f"Imported bundle {bundle_hash} as document {document.id} ({len(files)} members)")
+    return document, True
+
+def _remove_files(staging: str, document_dir: Optional[str], file_path: Optional[str]) -> None:
+    for directory in (staging, document_dir):
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+def _add_rows(db: Session, data: Dict[str, Any], file_path: str, files: Dict[str, Any]) -> Document:
+    """Rows of a bundle's document.json, flushed PAGE_BATCH pages at a time and not committed."""
+    source = data["document"]
+    document = Document(
+        filename=source["filename"],
+        file_path=file_path,
+        total_pages=source.get("total_pages") or len(data["pages"]),
+        status=source.get("status") or "uploaded",
+        upload_date=_datetime(source.get("upload_date")),
+    )
+    db.add(document)
+    db.flush()
+    image_dir = os.path.join(EXTRACTED_DIR, str(document.id))
+    for index, item in enumerate(data["pages"], start=1):
+        page_number = int(item["page_number"])
+        image_name = page_image_name(page_number)
+        page = Page(
+            document_id=document.id,
+            page_number=page_number,
+            status=item.get("status") or "pending",
+            image_path=os.path.join(image_dir, os.path.basename(image_name)) if image_name in files else None,
+        )
+        extracted = item.get("extracted_text")
+        if extracted:
+            page.extracted_text = ExtractedText(
+                raw_text=extracted.get("raw_text"),
+                formatted_text=extracted.get("formatted_text"),
+                extraction_date=_datetime(extracted.get("extraction_date")),
+            )
+        db.add(page)
+        if index % PAGE_BATCH == 0:
+            db.flush()
+
+    editable = data.get("editable_pdf_text")
+    if editable:
+        db.add(EditablePDFText(
+            document_id=document.id,
+            text_content_by_page=editable.get("text_content_by_page"),
+            extraction_date=_datetime(editable.get("extraction_date")),
+        ))
+        # A new editable PDF drops the document's word geometry and alignments in its flush
+        db.flush()
+    corrected = data.get("corrected_text")
+    if corrected:
+        db.add(CorrectedText(
+            document_id=document.id,
+            corrected_content_by_page=corrected.get("corrected_content_by_page"),
+            last_update_date=_datetime(corrected.get("last_update_date")),
+        ))
+    for index, item in enumerate(data.get("word_geometry") or [], start=1):
+        db.add(PageWordGeometry(
+            document_id=document.id,
+            source=item["source"],
+            page_number=int(item["page_number"]),
+            page_width=item.get("page_width"),
+            page_height=item.get("page_height"),
+            word_count=item.get("word_count") or 0,
+            words=item.get("words"),
+            boxes=base64.b64decode(item["boxes"]) if item.get("boxes") is not None else None,
+            offsets=base64.b64decode(item["offsets"]) if item.get("offsets") is not None else None,
+        ))
+        if index % PAGE_BATCH == 0:
+            db.flush()
+    for item in data.get("page_alignments") or []:
+        db.add(PageAlignment(
+            document_id=document.id,
+            page_number=int(item["page_number"]),
+            page_number_b=item.get("page_number_b"),
+            method="manual",
+        ))
+    db.flush()
+    return document
+
+def export_bundle_file(document_id: int, output_path: str,
+                       session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """Write the bundle of a document to a file."""
+    partial = f"{output_path}.{uuid.uuid4().hex}.partial"
+    try:
+        with open(partial, "wb") as output:
+            for chunk in stream_bundle(document_id, session_factory=session_factory):
+                output.write(chunk)
+        os.replace(partial, output_path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write the bundle of a document")
+    export_parser.add_argument("document_id", type=int)
+    export_parser.add_argument("path", help="Bundle file to write")
+    import_parser = commands.add_parser("import", help="Import a bundle as a document")
+    import_parser.add_argument("path", help="Bundle file to read")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            export_bundle_file(args.document_id, args.path)
+            print(f"Wrote bundle of document {args.document_id} to {args.path}")
+        else:
+            document, created = import_bundle(db, args.path)
+            print(f"{'Imported' if created else 'Already imported'}: document {document.id} ({document.filename})")
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
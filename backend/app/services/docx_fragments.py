@@ -0,0 +1,221 @@
+"""
+Per-page OOXML fragments for incremental Word exports.
+
+Each page is rendered by WordGenerator.render_page into the body XML of its paragraphs (a
+"fragment") and cached on disk under a hash of that page's WordGenerator input. An export
+renders only the pages whose fragment is not cached, then writes the package itself:
+word/document.xml is the blank python-docx template with the fragments spliced into its
+body, streamed into the zip page by page, and every other part is copied from the
+template. Re-exporting after editing a few pages costs a few page renders plus the zip of
+the document.
+
+The generated package is the same as WordGenerator.generate_document would produce for
+the same items; the fragments carry no relationships (WordGenerator adds no images or
+hyperlinks), so they are self-contained. The template is made by the same WordGenerator
+mode as the fragments, so the styles fragments of the styled path refer to are defined.
+"""
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+import zipfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+
+from app.services.wordextract import WordGenerator
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_FORMAT_VERSION = "2"  # Bump when WordGenerator page rendering changes
+FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_FRAGMENT_CACHE_MAX_MB", "256")) * 1024 * 1024
+DOCUMENT_PART = "word/document.xml"
+# What Document.add_page_break() adds between pages
+PAGE_BREAK_BYTES = b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_NAMESPACE_DECLARATION = re.compile(r'\s+xmlns:\w+="[^"]*"')
+
+TemplatePart = Tuple[str, Tuple[int, int, int, int, int, int], bytes]  # name, date_time, data
+
+_templates: Dict[bool, Tuple[List[TemplatePart], str, str]] = {}
+_template_lock = threading.Lock()
+
+def _docx_template(generator: WordGenerator) -> Tuple[List[TemplatePart], str, str]:
+    """Parts of the blank package of the generator's mode, and its document.xml split around the body content."""
+    with _template_lock:
+        if generator.fast not in _templates:
+            buffer = io.BytesIO()
+            generator.new_document().save(buffer)
+            with zipfile.ZipFile(buffer) as package:
+                parts = [(info.filename, info.date_time, package.read(info)) for info in package.infolist()]
+            document_xml = package_part(parts, DOCUMENT_PART).decode("utf-8")
+            split = document_xml.index("<w:sectPr")
+            _templates[generator.fast] = parts, document_xml[:split], document_xml[split:]
+        return _templates[generator.fast]
+
+def package_part(parts: List[TemplatePart], name: str) -> bytes:
+    return next(data for part_name, _, data in parts if part_name == name)
+
+def fragment_key(blocks: Dict[int, List[Dict[str, Any]]], fast: bool = False) -> str:
+    """
+    Cache key of a page: hash of its validated spans, block by block, the WordGenerator mode
+    and the fragment format version.
+
+    Page and block numbers are left out: only the order of the blocks affects the rendering,
+    and export items number blocks across the whole document, so editing one page would
+    otherwise change the key of every page after it.
+    """
+    spans = [
+        [{key: value for key, value in span.items() if key not in ("page", "block_no")} for span in blocks[block_no]]
+        for block_no in sorted(blocks)
+    ]
+    payload = json.dumps(spans, sort_keys=True, separators=(",", ":"), default=list)
+    mode = "styled" if fast else "direct"
+    return hashlib.sha256(f"fragment/{FRAGMENT_FORMAT_VERSION}/{mode}/{payload}".encode("utf-8")).hexdigest()
+
+def render_fragment(generator: WordGenerator, doc, blocks: Dict) -> str:
+    """
+    Body XML of one page, rendered into a scratch document which is left empty again.
+
+    Namespace declarations are dropped from the top-level elements: they repeat those of the
+    template's document element, which the fragment ends up in.
+    """
+    body = doc.element.body
+    start = len(body) - 1  # Before sectPr
+    generator.render_page(doc, blocks)
+    elements = list(body)[start:-1]
+    parts = []
+    for element in elements:
+        xml = etree.tostring(element, encoding="unicode")
+        end = xml.index(">")
+        parts.append(_NAMESPACE_DECLARATION.sub("", xml[:end]) + xml[end:])
+        body.remove(element)
+    return "".join(parts)
+
+class FragmentCache:
+    """Page fragments on disk, one file per key, evicted least recently used first."""
+
+    def __init__(self, directory: str, max_bytes: int = FRAGMENT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.xml")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fragment_file:
+                fragment = fragment_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return fragment
+
+    def put(self, key: str, fragment: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        partial = f"{self._path(key)}.{uuid.uuid4().hex}.partial"
+        with open(partial, "w", encoding="utf-8") as fragment_file:
+            fragment_file.write(fragment)
+        os.replace(partial, self._path(key))
+
+    def evict(self) -> int:
+        """Delete least recently used fragments until the cache fits max_bytes; returns the number deleted."""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, "*.xml")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        deleted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+        return deleted
+
+def stream_docx(pages: Iterable[List[Dict[str, Any]]], output_path: str, cache: FragmentCache,
+                progress: Optional[Callable[[int, int], None]] = None, total: Optional[int] = None,
+                fast: bool = True) -> Dict[str, int]:
+    """
+    Write the Word document of WordGenerator input items given page by page, in page order,
+    reusing cached page fragments.
+
+    Pages are consumed one at a time and word/document.xml is written into the package as
+    it goes, so only one page is held in memory. fast selects the styled WordGenerator path
+    (see WordGenerator).
+
+    Args:
+        pages: WordGenerator input items of each page (possibly empty)
+        progress: Called with (pages done, total) after each page
+        total: Number of pages, passed on to progress
+
+    Returns:
+        Dict[str, int]: Number of pages rendered and reused.
+    """
+    generator = WordGenerator([], fast=fast)
+    parts, head, tail = _docx_template(generator)
+    scratch = None
+    rendered = reused = 0
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, date_time, data in parts:
+            info = zipfile.ZipInfo(name, date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            if name != DOCUMENT_PART:
+                package.writestr(info, data)
+                continue
+            with package.open(info, "w") as document_xml:
+                document_xml.write(head.encode("utf-8"))
+                for index, page_items in enumerate(pages, start=1):
+                    validated = generator.validate_items(page_items)
+                    grouped = generator._group_by_page_and_block(validated) if validated else {}
+                    for page_number in sorted(grouped):
+                        blocks = grouped[page_number]
+                        key = fragment_key(blocks, fast)
+                        fragment = cache.get(key)
+                        if fragment is None:
+                            if scratch is None:
+                                scratch = generator.new_document()
+                            fragment = render_fragment(generator, scratch, blocks)
+                            cache.put(key, fragment)
+                            rendered += 1
+                        else:
+                            reused += 1
+                        if page_number > 1:
+                            document_xml.write(PAGE_BREAK_BYTES)
+                        document_xml.write(fragment.encode("utf-8"))
+                    if progress:
+                        progress(index, total if total is not None else index)
+                document_xml.write(tail.encode("utf-8"))
+
+    if not rendered + reused:
+        # Nothing was spliced: WordGenerator writes its "no text" document
+        generator.generate_document(output_path)
+        return {"pages_rendered": 0, "pages_reused": 0}
+    if rendered:
+        cache.evict()
+    logger.info(f"Assembled Word document {output_path}: {rendered} pages rendered, {reused} reused")
+    return {"pages_rendered": rendered, "pages_reused": reused}
+
+def generate_docx(items: List[Dict[str, Any]], output_path: str, cache: FragmentCache,
+                  progress: Optional[Callable[[int, int], None]] = None, fast: bool = True) -> Dict[str, int]:
+    """
+    Write the Word document of WordGenerator input items, reusing cached page fragments
+    (see stream_docx).
+    """
+    by_page: Dict[int, List[Dict[str, Any]]] = {}
+    for item in items:
+        by_page.setdefault(item.get("page", 1), []).append(item)
+    pages = [by_page[page_number] for page_number in sorted(by_page)]
+    return stream_docx(pages, output_path, cache, progress=progress, total=len(pages), fast=fast)
@@ -0,0 +1,180 @@
+"""
+Text-layer extraction of an uploaded editable PDF (Document B) as a background job.
+
+The upload endpoint only saves the file and creates the job. run_editable_pdf_extraction()
+splits the pages into ranges, extracts text and word geometry of each range in the job
+process pool (see jobs.get_process_pool), reports progress per finished range, then stores
+EditablePDFText and the word geometry and starts the document comparison job, superseding
+one still diffing the previous Text B. A job stops at the next finished range once a newer
+upload of the same document superseded it.
+
+Each upload is saved to a file of its own in UPLOADS_DIR, which its job deletes once it has
+finished or was superseded.
+"""
+import glob
+import json
+import logging
+import math
+import os
+import uuid
+from concurrent.futures import Executor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import BackgroundJob, EditablePDFText
+from app.services.batch_comparison import run_document_comparison, start_document_comparison
+from app.services.editable_pdf_service import extract_page_range
+from app.services.jobs import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_RUNNING,
+    create_job,
+    get_process_pool,
+    newer_job,
+    process_pool_size,
+    update_job,
+)
+from app.services.word_geometry import store_page_words
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = "editable_pdf_extraction"
+UPLOADS_DIR = "uploads/correction_inputs"
+MIN_PAGES_PER_TASK = 16  # Smaller documents are extracted in the job thread, without the pool
+TASKS_PER_WORKER = 4  # More ranges than workers, for load balancing and progress updates
+
+def page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """Split pages 1..page_count into (first, last) ranges of at least MIN_PAGES_PER_TASK pages."""
+    size = max(MIN_PAGES_PER_TASK, math.ceil(page_count / max(1, workers * TASKS_PER_WORKER)))
+    return [(first, min(page_count, first + size - 1)) for first in range(1, page_count + 1, size)]
+
+def extract_pages(pdf_path: str, page_count: int, executor: Optional[Executor] = None,
+                  workers: Optional[int] = None, progress=None,
+                  stop: Optional[Callable[[], bool]] = None) -> Optional[Tuple[Dict[int, str], Dict[int, object]]]:
+    """
+    Text and word geometry of every page, with the page ranges spread over an executor.
+
+    Args:
+        pdf_path: Path of the editable PDF.
+        page_count: Number of pages in it.
+        executor: Executor for the ranges; None extracts everything in the calling thread.
+        workers: Number of executor workers, used to size the ranges (default: the job pool size).
+        progress: Optional callback receiving the number of pages extracted so far.
+        stop: Optional callback checked before the first range and after each one; when it
+            returns True, the ranges not started yet are cancelled.
+
+    Returns:
+        Optional[Tuple[Dict[int, str], Dict[int, PageWords]]]: Text and word geometry by page
+        number, or None if stopped.
+    """
+    texts, words = {}, {}
+    if stop is not None and stop():
+        return None
+    futures = []
+    if executor is None:
+        ranges = [(1, page_count)] if page_count else []
+        results = (extract_page_range(pdf_path, first, last) for first, last in ranges)
+    else:
+        futures = [executor.submit(extract_page_range, pdf_path, first, last)
+                   for first, last in page_ranges(page_count, workers or process_pool_size())]
+        results = (future.result() for future in as_completed(futures))
+    for pages in results:
+        for page_number, text, page_words in pages:
+            texts[page_number], words[page_number] = text, page_words
+        if progress is not None:
+            progress(len(texts))
+        if stop is not None and stop():
+            for future in futures:
+                future.cancel()
+            return None
+    return dict(sorted(texts.items())), words
+
+def upload_file_name(document_id: int, filename: str) -> str:
+    """File name of an upload in UPLOADS_DIR, unique so that a running job keeps reading its own copy."""
+    return f"docA_{document_id}_editable_{uuid.uuid4().hex}_{os.path.basename(filename)}"
+
+def remove_uploads(document_id: int, uploads_dir: str = UPLOADS_DIR) -> None:
+    """Delete the upload files of a document that no job has cleaned up (e.g. the server stopped)."""
+    for path in glob.glob(os.path.join(uploads_dir, f"docA_{document_id}_editable_*")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def start_editable_pdf_extraction(db: Session, document_id: int, page_count: int) -> BackgroundJob:
+    """Create the extraction job of a new upload; an older job still running is superseded by it."""
+    return create_job(db, JOB_TYPE, document_id, total=page_count)
+
+def _store_text_b(db: Session, document_id: int, texts: Dict[int, str], words) -> EditablePDFText:
+    entry = db.query(EditablePDFText).filter(EditablePDFText.document_id == document_id).first()
+    if entry is None:
+        entry = EditablePDFText(document_id=document_id)
+        db.add(entry)
+    entry.text_content_by_page = json.dumps(texts)
+    db.commit()
+    # Separate flush: committing the new text above drops the previous geometry
+    store_page_words(db, document_id, words)
+    return entry
+
+def run_editable_pdf_extraction(job_id: int, pdf_path: str, session_factory=SessionLocal,
+                                executor: Optional[Executor] = None) -> None:
+    """
+    Extract Text B of an uploaded editable PDF, store it and run the comparison job.
+    pdf_path belongs to the job: it is deleted once the job has finished, failed or was superseded.
+
+    Meant to run outside the event loop (BackgroundTasks runs it in the thread pool).
+    """
+    db = session_factory()
+    job = db.get(BackgroundJob, job_id)
+    if job is None:
+        db.close()
+        _remove_upload(pdf_path)
+        return
+    document_id = job.document_id
+    try:
+        page_count = job.progress_total
+        update_job(db, job, status=JOB_RUNNING, current=0)
+        if executor is None and page_count > MIN_PAGES_PER_TASK:
+            executor = get_process_pool()
+        logger.info(f"Extraction job {job_id}: extracting {page_count} pages of {pdf_path} for document {document_id}")
+        newer = None
+
+        def superseded() -> bool:
+            nonlocal newer
+            newer = newer_job(db, job)
+            return newer is not None
+
+        extracted = extract_pages(pdf_path, page_count, executor,
+                                  progress=lambda done: update_job(db, job, current=done), stop=superseded)
+        if extracted is None or superseded():
+            update_job(db, job, status=JOB_FAILED, error=f"Superseded by extraction job {newer.id}")
+            return
+        texts, words = extracted
+        entry = _store_text_b(db, document_id, texts, words)
+        comparison_job, created = start_document_comparison(db, document_id, supersede=True)
+        comparison_job_id = comparison_job.id
+        update_job(db, job, status=JOB_COMPLETED, result={
+            "pages": len(texts),
+            "editable_pdf_internal_id": entry.id,
+            "comparison_job_id": comparison_job_id
+        })
+        logger.info(f"Extraction job {job_id} completed")
+    except Exception as e:
+        logger.error(f"Extraction job {job_id} for document {document_id} failed: {e}", exc_info=True)
+        db.rollback()
+        update_job(db, job, status=JOB_FAILED, error=str(e))
+        return
+    finally:
+        db.close()
+        _remove_upload(pdf_path)
+
+    if created:
+        run_document_comparison(comparison_job_id, session_factory, executor)
+
+def _remove_upload(pdf_path: str) -> None:
+    try:
+        os.remove(pdf_path)
+    except OSError as e:
+        logger.warning(f"Could not delete upload {pdf_path}: {e}")
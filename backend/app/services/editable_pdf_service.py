@@ -1,6 +1,8 @@
 import fitz  # PyMuPDF
 import logging
 
+from app.services.word_geometry import words_from_page
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,6 +45,34 @@ class EditablePDFService:
             logger.error(f"EditablePDFService: Error processing PDF {pdf_path} for Document A ID {document_a_id}: {e}")
             return {}
 
+    def count_pages(self, pdf_path: str) -> int:
+        """Number of pages of a PDF, 0 if it cannot be opened."""
+        try:
+            with fitz.open(pdf_path) as doc:
+                return doc.page_count
+        except Exception as e:
+            logger.error(f"EditablePDFService: Cannot open PDF {pdf_path}: {e}")
+            return 0
+
+    def extract_text_and_words(self, pdf_path: str, document_a_id: str) -> tuple:
+        """
+        Like extract_text_from_editable_pdf, but also collects the word boxes of every page
+        in the same pass over the PDF (see app/services/word_geometry.py).
+
+        Returns:
+            tuple: (text by page number, PageWords by page number); two empty dicts on error.
+        """
+        try:
+            doc = fitz.open(pdf_path)
+            page_count = doc.page_count
+            doc.close()
+            logger.info(f"EditablePDFService: Processing Document B ({pdf_path}) with {page_count} pages and word geometry for Document A ID: {document_a_id}.")
+            pages = extract_page_range(pdf_path, 1, page_count)
+            return {number: text for number, text, _ in pages}, {number: words for number, _, words in pages}
+        except Exception as e:
+            logger.error(f"EditablePDFService: Error processing PDF {pdf_path} for Document A ID {document_a_id}: {e}")
+            return {}, {}
+
     # Placeholder for actual storage logic
     # def store_text_b(self, document_a_id: str, text_b_data: dict):
     #     # Example: Store text_b_data in database, linking it to document_a_id
@@ -50,6 +80,26 @@ class EditablePDFService:
     #     logger.info(f"EditablePDFService: Storing extracted text for Document A ID {document_a_id}.")
     #     pass
 
+def extract_page_range(pdf_path: str, first_page: int, last_page: int) -> list:
+    """
+    Text and word geometry of pages first_page..last_page (1-based, inclusive).
+
+    Module-level so it can run in the job process pool; each call opens the PDF itself.
+
+    Returns:
+        list: (page_number, text, PageWords) tuples in page order.
+    """
+    pages = []
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num in range(first_page - 1, last_page):
+            page = doc.load_page(page_num)
+            text = page.get_text("text") or ""
+            pages.append((page_num + 1, text, words_from_page(page, text)))
+    finally:
+        doc.close()
+    return pages
+
 if __name__ == '__main__':
     # Example Usage (requires a sample PDF named 'sample_editable.pdf' in the same directory)
     # This is for testing purposes and should be removed or placed in a test file.
@@ -0,0 +1,260 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, event, inspect, insert, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.database import SessionLocal, engine
+from app.db.models import Document, EventLog, ExtractedText, Page
+
+logger = logging.getLogger(__name__)
+
+# Identifies events published by this process, so the relay does not deliver them twice
+PROCESS_ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "256"))
+RELAY_POLL_INTERVAL_SECONDS = float(os.getenv("EVENT_RELAY_POLL_INTERVAL_SECONDS", "0.5"))
+EVENT_RETENTION_SECONDS = float(os.getenv("EVENT_RETENTION_SECONDS", "600"))
+
+class Subscription:
+    """
+    A bounded per-consumer queue of events.
+
+    Slow consumers never block publishers: when the queue is full the oldest
+    event is dropped, and the consumer receives a single 'stream.lagged' event
+    with the number of dropped events before the next real one, so it knows to
+    resync (e.g. from the status endpoint).
+    """
+
+    def __init__(self, bus: "EventBus", document_id: Optional[int], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.bus = bus
+        self.document_id = document_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def matches(self, event_data: Dict[str, Any]) -> bool:
+        return self.document_id is None or event_data.get("document_id") == self.document_id
+
+    def _offer(self, event_data: Dict[str, Any]) -> None:
+        # Always runs on the subscriber's event loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event_data)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event; returns None if `timeout` elapses first."""
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return {"type": "stream.lagged", "document_id": self.document_id, "data": {"dropped": dropped}}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+class EventBus:
+    """In-process pub/sub for document progress events, safe to publish to from any thread."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, document_id: Optional[int] = None) -> Subscription:
+        """Subscribe to events of one document, or of all documents if `document_id` is None."""
+        subscription = Subscription(self, document_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, event_data: Dict[str, Any]) -> None:
+        """Deliver an event to every matching local subscriber."""
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.matches(event_data)]
+        for subscription in subscriptions:
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is subscription.loop:
+                subscription._offer(event_data)
+            elif not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription._offer, event_data)
+
+bus = EventBus()
+
+def _make_event(event_type: str, document_id: Optional[int], data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": event_type,
+        "document_id": document_id,
+        "data": data,
+        "timestamp": datetime.datetime.utcnow().isoformat()
+    }
+
+def _write_outbox(connection, event_data: Dict[str, Any]) -> None:
+    result = connection.execute(
+        insert(EventLog).values(
+            origin=PROCESS_ORIGIN,
+            document_id=event_data["document_id"],
+            event_type=event_data["type"],
+            payload=json.dumps(event_data),
+            created_at=datetime.datetime.utcnow()
+        )
+    )
+    event_data["id"] = result.inserted_primary_key[0]
+
+def record_event(session: Session, event_type: str, document_id: Optional[int], data: Dict[str, Any]) -> None:
+    """Record an event in the session's transaction; it is published only if that transaction commits."""
+    event_data = _make_event(event_type, document_id, data)
+    _write_outbox(session.connection(), event_data)
+    session.info.setdefault("pending_events", []).append(event_data)
+
+def emit_event(event_type: str, document_id: Optional[int], data: Dict[str, Any]) -> None:
+    """Publish an event immediately, outside of any ORM session (e.g. from a background job)."""
+    event_data = _make_event(event_type, document_id, data)
+    try:
+        with engine.begin() as connection:
+            _write_outbox(connection, event_data)
+    except Exception as e:
+        # Local subscribers still get the event; only cross-process delivery is lost
+        logger.error(f"Failed to write event {event_type} to the event log: {e}")
+    bus.publish(event_data)
+
+def _page_location(connection, page_id: int) -> Optional[tuple]:
+    return connection.execute(
+        select(Page.document_id, Page.page_number).where(Page.id == page_id)
+    ).first()
+
+@event.listens_for(Session, "after_flush")
+def _collect_events_after_flush(session: Session, flush_context) -> None:
+    """Turn page/document/OCR changes of this flush into outbox events."""
+    events = []
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Page) and obj.document_id is not None:
+            state = inspect(obj)
+            status_history = state.attrs.status.history
+            if status_history.added:
+                events.append(_make_event("page.status", obj.document_id, {
+                    "page_number": obj.page_number,
+                    "status": status_history.added[0] or "pending",
+                    "previous_status": status_history.deleted[0] if status_history.deleted else None
+                }))
+            image_history = state.attrs.image_path.history
+            if image_history.added and image_history.added[0]:
+                events.append(_make_event("page.image_ready", obj.document_id, {
+                    "page_number": obj.page_number,
+                    "image_url": f"/api/documents/{obj.document_id}/pages/{obj.page_number}/image"
+                }))
+        elif isinstance(obj, Document) and obj not in session.new:
+            status_history = inspect(obj).attrs.status.history
+            if status_history.added:
+                events.append(_make_event("document.status", obj.id, {"status": status_history.added[0]}))
+        elif isinstance(obj, ExtractedText) and obj.page_id is not None:
+            if obj in session.new or inspect(obj).attrs.raw_text.history.has_changes():
+                location = _page_location(session.connection(), obj.page_id)
+                if location:
+                    events.append(_make_event("page.ocr_complete", location.document_id, {
+                        "page_number": location.page_number,
+                        "text_length": len(obj.raw_text or "")
+                    }))
+
+    if not events:
+        return
+    connection = session.connection()
+    for event_data in events:
+        _write_outbox(connection, event_data)
+    session.info.setdefault("pending_events", []).extend(events)
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    for event_data in session.info.pop("pending_events", []):
+        bus.publish(event_data)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("pending_events", None)
+
+def replay_events(after_id: int, document_id: Optional[int] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+    """Events stored after `after_id` (used to resume a stream from Last-Event-ID)."""
+    db = SessionLocal()
+    try:
+        query = db.query(EventLog).filter(EventLog.id > after_id)
+        if document_id is not None:
+            query = query.filter(EventLog.document_id == document_id)
+        events = []
+        for row in query.order_by(EventLog.id).limit(limit):
+            event_data = json.loads(row.payload)
+            event_data["id"] = row.id
+            events.append(event_data)
+        return events
+    finally:
+        db.close()
+
+def _latest_event_id() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(EventLog.id).order_by(EventLog.id.desc()).limit(1).scalar() or 0
+    finally:
+        db.close()
+
+def _relay_new_events(last_id: int, prune_before: Optional[datetime.datetime]) -> int:
+    """Publish the events after last_id written by other processes, prune if asked; returns the new last id."""
+    db = SessionLocal()
+    try:
+        rows = db.query(EventLog).filter(EventLog.id > last_id).order_by(EventLog.id).limit(1000).all()
+        for row in rows:
+            last_id = row.id
+            if row.origin == PROCESS_ORIGIN or not bus.subscriber_count:
+                continue
+            event_data = json.loads(row.payload)
+            event_data["id"] = row.id
+            bus.publish(event_data)
+
+        if prune_before is not None:
+            db.execute(delete(EventLog).where(EventLog.created_at < prune_before))
+            db.commit()
+    except Exception as e:
+        logger.error(f"Event relay failed: {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+    return last_id
+
+async def run_event_relay(poll_interval: float = RELAY_POLL_INTERVAL_SECONDS) -> None:
+    """
+    Background job: relay events written by other worker processes to local subscribers.
+
+    The event_log table is the local broker stand-in; each process tails it by id
+    and prunes rows older than EVENT_RETENTION_SECONDS. The queries run in the thread
+    pool, off the event loop (publish() is thread-safe).
+    """
+    last_id = await run_in_threadpool(_latest_event_id)
+    last_prune = datetime.datetime.utcnow()
+    while True:
+        await asyncio.sleep(poll_interval)
+        now = datetime.datetime.utcnow()
+        prune_before = None
+        if (now - last_prune).total_seconds() > EVENT_RETENTION_SECONDS / 10:
+            prune_before = now - datetime.timedelta(seconds=EVENT_RETENTION_SECONDS)
+            last_prune = now
+        last_id = await run_in_threadpool(_relay_new_events, last_id, prune_before)
@@ -0,0 +1,126 @@
+"""
+Compact storage format for ExtractedText.formatted_text.
+
+Version 1 (legacy) is the dict returned by process_layout_markers serialized as-is:
+every block repeats every style key, and older rows also carry a full clean_text copy.
+
+Version 2 stores the same blocks as a struct-of-arrays table with interned styles:
+
+    {"v":2,"styles":[["paragraph","left",11,0,0,0,0,0],...],"s":[0,0,1],"t":["...","...","..."],"hf":1}
+
+"styles" holds each distinct style once as a tuple in STYLE_FIELDS order (booleans as 0/1),
+"s" is the style index of each block, "t" its text and "hf" the has_formatting flag.
+block_no is the position in the arrays. Both versions decode to the version 1 dict shape.
+"""
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+STYLE_FIELDS = ("type", "alignment", "font_size", "is_bold", "is_italic", "is_title", "is_heading", "is_indent")
+STYLE_DEFAULTS = ("paragraph", "left", 11, False, False, False, False, False)
+_BOOLEAN_FIELDS = frozenset(("is_bold", "is_italic", "is_title", "is_heading", "is_indent"))
+_BOOLEAN_POSITIONS = tuple(i for i, name in enumerate(STYLE_FIELDS) if name in _BOOLEAN_FIELDS)
+
+# Every version 2 value starts with this prefix, so the version can be checked without parsing
+_V2_PREFIX = '{"v":2,'
+
+LAYOUT_LEGACY = "legacy"
+LAYOUT_COMPACT = "compact"
+
+def is_compact(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith(_V2_PREFIX)
+
+def encode_formatted_text(data: Dict[str, Any]) -> str:
+    """
+    Encode process_layout_markers output (or a decoded value) as version 2.
+
+    Args:
+        data (Dict[str, Any]): Dict with "blocks" and "has_formatting".
+
+    Returns:
+        str: Compact JSON string.
+    """
+    style_ids: Dict[tuple, int] = {}
+    styles: List[list] = []
+    block_styles: List[int] = []
+    texts: List[str] = []
+    for block in data.get("blocks") or []:
+        style = tuple(
+            int(bool(block.get(name, default))) if name in _BOOLEAN_FIELDS else block.get(name, default)
+            for name, default in zip(STYLE_FIELDS, STYLE_DEFAULTS)
+        )
+        style_id = style_ids.get(style)
+        if style_id is None:
+            style_id = style_ids[style] = len(styles)
+            styles.append(list(style))
+        block_styles.append(style_id)
+        texts.append(block.get("text", ""))
+
+    # Key order matters: "v" must come first (see _V2_PREFIX)
+    compact = {"v": FORMAT_VERSION, "styles": styles, "s": block_styles, "t": texts,
+               "hf": int(bool(data.get("has_formatting")))}
+    return json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+
+def _blocks_from_compact(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    styles = []
+    for style in data["styles"]:
+        values = list(style)
+        for position in _BOOLEAN_POSITIONS:
+            values[position] = bool(values[position])
+        styles.append(dict(zip(STYLE_FIELDS, values)))
+    blocks = []
+    for block_no, (style_id, block_text) in enumerate(zip(data["s"], data["t"])):
+        block = dict(styles[style_id])
+        block["text"] = block_text
+        block["block_no"] = block_no
+        blocks.append(block)
+    return blocks
+
+def decode_formatted_text(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a stored formatted_text value of any version.
+
+    Args:
+        value (Optional[str]): Stored JSON string.
+
+    Returns:
+        Optional[Dict[str, Any]]: {"blocks": [...], "has_formatting": bool}, or None when the
+        value is empty or unreadable.
+    """
+    if not value:
+        return None
+    try:
+        data = json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        logger.warning("Unreadable formatted_text value")
+        return None
+    if not isinstance(data, dict):
+        return None
+    if data.get("v") == FORMAT_VERSION:
+        return {"blocks": _blocks_from_compact(data), "has_formatting": bool(data.get("hf"))}
+    if "blocks" in data:
+        # Version 1: drop the clean_text copy older rows carry
+        return {"blocks": data["blocks"], "has_formatting": bool(data.get("has_formatting"))}
+    return None
+
+def to_compact(value: Optional[str]) -> Optional[str]:
+    """Return a stored value as version 2, re-encoding legacy rows."""
+    if not value or is_compact(value):
+        return value
+    data = decode_formatted_text(value)
+    return encode_formatted_text(data) if data is not None else None
+
+def format_for_client(value: Optional[str], layout: str = LAYOUT_COMPACT) -> Optional[str]:
+    """
+    Prepare a stored value for an API response.
+
+    The compact layout ships version 2 rows exactly as stored; the legacy layout returns
+    the version 1 JSON for clients that have not been updated.
+    """
+    if layout == LAYOUT_LEGACY:
+        data = decode_formatted_text(value)
+        return json.dumps(data) if data is not None else None
+    return to_compact(value)
@@ -0,0 +1,162 @@
+"""
+Incremental re-diff of a page after Text A was edited.
+
+While a page is being corrected, only a small range of Text A changes between two
+requests. rediff() takes the previous differences in the compact layout (see
+diff_payload), keeps every segment left and right of the edit, and re-diffs only the
+window between the nearest equal run on each side:
+
+    ... equal | [window: re-diffed] | equal ...
+
+Equal runs that contain the edit are split at word boundaries so the window stays a few
+words wide; segments right of the edit have their Text A offsets shifted by the change in
+length. The window diff is optimal locally, so the result can differ in hunk boundaries
+from a full re-diff of the page, but it always describes text_a -> text_b exactly.
+"""
+import bisect
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.char_diff import CharEdit, aligned_char_edits, quick_char_edits, refine_deadline
+from app.services.diff_engine import get_opcodes
+from app.services.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+Segment = List[Any]
+
+def _shift(segment: Segment, delta: int) -> Segment:
+    """Move a segment's Text A offsets (and those of its char edits) by delta."""
+    shifted = [segment[0], segment[1] + delta, segment[2] + delta] + segment[3:]
+    if len(segment) > 7 and segment[7] is not None:
+        shifted[7] = [[edit[0], edit[1] + delta, edit[2] + delta, edit[3], edit[4]] for edit in segment[7]]
+    return shifted
+
+def diff_window(text_a: str, text_b: str, a_start: int, a_end: int, b_start: int, b_end: int,
+                char_level: bool = False) -> List[Segment]:
+    """Compact segments of text_a[a_start:a_end] vs text_b[b_start:b_end], in page offsets."""
+    started = time.perf_counter()
+    tokens_a = tokenize(text_a[a_start:a_end])
+    tokens_b = tokenize(text_b[b_start:b_end])
+    segments = []
+    for tag, i1, i2, j1, j2 in get_opcodes(tokens_a.tokens, tokens_b.tokens):
+        a1, a2 = tokens_a.span(i1, i2)
+        b1, b2 = tokens_b.span(j1, j2)
+        segment = [tag, a_start + a1, a_start + a2, b_start + b1, b_start + b2]
+        if tag != "equal":
+            segment += [" ".join(tokens_a.tokens[i1:i2]), " ".join(tokens_b.tokens[j1:j2])]
+        segments.append(segment)
+    if char_level:
+        # As refine_replace_hunks, with the time budget of the window diff
+        deadline = refine_deadline(started)
+        aligned = []
+        for segment in segments:
+            if segment[0] != "replace":
+                continue
+            edits, skipped = quick_char_edits(text_a[segment[1]:segment[2]], text_b[segment[3]:segment[4]])
+            if edits is None and skipped is None:
+                aligned.append(segment)
+            else:
+                _attach_char_edits(segment, edits, skipped)
+        for segment in aligned:
+            _attach_char_edits(segment, *aligned_char_edits(text_a[segment[1]:segment[2]], text_b[segment[3]:segment[4]], deadline))
+    return segments
+
+def _attach_char_edits(segment: Segment, edits: Optional[List[CharEdit]], skipped: Optional[str]) -> None:
+    if edits is None:
+        segment += [None, skipped]
+    else:
+        segment.append([[tag, segment[1] + i1, segment[1] + i2, segment[3] + j1, segment[3] + j2] for tag, i1, i2, j1, j2 in edits])
+
+def _split_left(segment: Segment, text_a: str, text_b: str, edit_start: int) -> Optional[Segment]:
+    """Leading part of an equal segment made of words that end before edit_start."""
+    words_a = tokenize(text_a[segment[1]:edit_start])
+    kept = len(words_a) - (1 if words_a.ends and segment[1] + words_a.ends[-1] >= edit_start else 0)
+    if kept <= 0:
+        return None
+    words_b = tokenize(text_b[segment[3]:segment[4]])
+    if words_a.tokens[:kept] != words_b.tokens[:kept]:
+        raise ValueError("Previous differences do not match the texts")
+    return ["equal", segment[1], segment[1] + words_a.ends[kept - 1], segment[3], segment[3] + words_b.ends[kept - 1]]
+
+def _split_right(segment: Segment, text_a: str, text_b: str, edit_end: int) -> Optional[Segment]:
+    """Trailing part (in new Text A offsets) of an equal segment made of words that start after edit_end."""
+    words_a = tokenize(text_a[edit_end:segment[2]])
+    kept = len(words_a) - (1 if words_a.starts and words_a.starts[0] == 0 else 0)
+    if kept <= 0:
+        return None
+    words_b = tokenize(text_b[segment[3]:segment[4]])
+    if len(words_b) < kept or words_a.tokens[-kept:] != words_b.tokens[-kept:]:
+        raise ValueError("Previous differences do not match the texts")
+    return ["equal", edit_end + words_a.starts[-kept], segment[2], segment[3] + words_b.starts[-kept], segment[4]]
+
+def _merge_equal(segments: List[Segment], index: int) -> None:
+    """Merge segments[index - 1] and segments[index] if both are equal runs."""
+    if 0 < index < len(segments) and segments[index - 1][0] == "equal" and segments[index][0] == "equal":
+        left, right = segments[index - 1], segments.pop(index)
+        segments[index - 1] = ["equal", left[1], right[2], left[3], right[4]]
+
+def rediff(
+    segments: List[Segment],
+    text_a: str,
+    text_b: str,
+    edit_start: int,
+    edit_end: int,
+    previous_length: int,
+    char_level: bool = False
+) -> Tuple[List[Segment], Dict[str, int]]:
+    """
+    Update the diff of a page after text_a[edit_start:edit_end] replaced part of the previous Text A.
+
+    Args:
+        segments: Previous differences (compact layout) of the previous Text A vs text_b.
+        text_a: Text A after the edit.
+        text_b: Text B the previous differences were computed against.
+        edit_start: Start of the edited range (the same in the previous and the new Text A).
+        edit_end: End of the edited range in text_a.
+        previous_length: Length of the previous Text A.
+        char_level: Attach character edits to the re-diffed replace segments.
+
+    Returns:
+        Tuple[List[Segment], Dict[str, int]]: The updated compact segments and the re-diffed
+        window (a_start, a_end, b_start, b_end).
+
+    Raises:
+        ValueError: If the edit range is outside text_a or the previous differences do not fit the texts.
+    """
+    delta = len(text_a) - previous_length
+    old_end = edit_end - delta
+    if not 0 <= edit_start <= edit_end <= len(text_a) or old_end < edit_start:
+        raise ValueError("Edit range does not fit text_a and previous_length")
+
+    # Segments entirely left of the edit; an equal run containing the edit keeps its leading words
+    split = bisect.bisect_left(segments, edit_start, key=lambda segment: segment[2])
+    left = segments[:split]
+    if split < len(segments) and segments[split][0] == "equal" and segments[split][1] < edit_start:
+        head = _split_left(segments[split], text_a, text_b, edit_start)
+        if head is not None:
+            left.append(head)
+    while left and left[-1][0] != "equal":
+        left.pop()
+
+    # Segments entirely right of the edit (previous offsets), likewise for their first equal run
+    split = bisect.bisect_right(segments, old_end, key=lambda segment: segment[1])
+    while split < len(segments) and segments[split][0] != "equal":
+        split += 1
+    right = [_shift(segment, delta) for segment in segments[split:]]
+    if split > 0 and segments[split - 1][0] == "equal" and segments[split - 1][2] > old_end:
+        tail = _split_right(_shift(segments[split - 1], delta), text_a, text_b, edit_end)
+        if tail is not None:
+            right.insert(0, tail)
+
+    a_start, b_start = (left[-1][2], left[-1][4]) if left else (0, 0)
+    a_end, b_end = (right[0][1], right[0][3]) if right else (len(text_a), len(text_b))
+    if a_start > a_end or b_start > b_end:
+        raise ValueError("Previous differences do not match the texts")
+
+    window = diff_window(text_a, text_b, a_start, a_end, b_start, b_end, char_level=char_level)
+    updated = left + window + right
+    _merge_equal(updated, len(left) + len(window))
+    _merge_equal(updated, len(left))
+    return updated, {"a_start": a_start, "a_end": a_end, "b_start": b_start, "b_end": b_end}
@@ -0,0 +1,139 @@
+"""
+Background job bookkeeping and the shared process pool for CPU-bound work.
+
+Jobs are rows in background_jobs so their status survives the request that started them
+and is visible to every worker process; each state change is also published as a
+"job.progress" event (see event_bus).
+"""
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.models import BackgroundJob
+from app.services.event_bus import record_event
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# A queued or running job not updated for this long is treated as lost (e.g. server restart)
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def process_pool_size() -> int:
+    """Workers of the job process pool: JOB_WORKERS, default the CPU count."""
+    return int(os.getenv("JOB_WORKERS", "0")) or os.cpu_count() or 1
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by all CPU-bound jobs, created on first use.
+
+    Size comes from JOB_WORKERS (default: CPU count). Workers are spawned rather than
+    forked so they never inherit the server's threads, sockets or database connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and getattr(_pool, "_broken", False):
+            # A worker died (e.g. out of memory); the executor refuses new work after that
+            logger.warning("Job process pool is broken, starting a new one")
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            workers = process_pool_size()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started job process pool with {workers} workers")
+        return _pool
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def job_to_dict(job: BackgroundJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "document_id": job.document_id,
+        "status": job.status,
+        "progress": {"current": job.progress_current, "total": job.progress_total},
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+def _publish(db: Session, job: BackgroundJob) -> None:
+    record_event(db, "job.progress", job.document_id, {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "current": job.progress_current,
+        "total": job.progress_total
+    })
+
+def create_job(db: Session, job_type: str, document_id: Optional[int] = None, total: int = 0) -> BackgroundJob:
+    job = BackgroundJob(job_type=job_type, document_id=document_id, status=JOB_QUEUED, progress_total=total)
+    db.add(job)
+    db.flush()
+    _publish(db, job)
+    db.commit()
+    return job
+
+def find_active_job(db: Session, job_type: str, document_id: int) -> Optional[BackgroundJob]:
+    """Latest queued or running job of a type for a document, ignoring stale ones."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=JOB_STALE_SECONDS)
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.job_type == job_type,
+        BackgroundJob.document_id == document_id,
+        BackgroundJob.status.in_([JOB_QUEUED, JOB_RUNNING]),
+        BackgroundJob.updated_at >= cutoff
+    ).order_by(BackgroundJob.id.desc()).first()
+
+def latest_job(db: Session, job_type: str, document_id: int) -> Optional[BackgroundJob]:
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.job_type == job_type,
+        BackgroundJob.document_id == document_id
+    ).order_by(BackgroundJob.id.desc()).first()
+
+def newer_job(db: Session, job: BackgroundJob) -> Optional[BackgroundJob]:
+    """The latest job of the same type and document, if it is not this one: this job is superseded."""
+    newest = latest_job(db, job.job_type, job.document_id)
+    return newest if newest is not None and newest.id != job.id else None
+
+def update_job(
+    db: Session,
+    job: BackgroundJob,
+    status: Optional[str] = None,
+    current: Optional[int] = None,
+    total: Optional[int] = None,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None
+) -> None:
+    """Update a job's state and progress, publish it and commit."""
+    if status is not None:
+        job.status = status
+    if current is not None:
+        job.progress_current = current
+    if total is not None:
+        job.progress_total = total
+    if result is not None:
+        job.result = json.dumps(result)
+    if error is not None:
+        job.error = error
+    job.updated_at = datetime.datetime.utcnow()
+    _publish(db, job)
+    db.commit()
@@ -0,0 +1,327 @@
+"""
+Page alignment between Document A (scan) and Document B (editable PDF).
+
+Page N of the scan is not always page N of the editable PDF: Document B may have an extra
+cover page, a missing blank page or different pagination. Every page is reduced to a
+bottom-k MinHash sketch of its word shingles. Candidate page pairs come from an inverted
+index over sketch values, and the best order-preserving pairing is the heaviest increasing
+chain of candidates (a monotone DP solved with a Fenwick tree in O(P log n) for P candidate
+pairs). Cost grows linearly with the number of pages; sketching the text dominates.
+
+Runs of unpaired pages of equal length between two aligned pages are paired positionally.
+Manual overrides are kept as fixed anchors that the automatic pairing must respect.
+"""
+import json
+import logging
+import string
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import EditablePDFText, ExtractedText, Page, PageAlignment, PageComparisonSummary
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3  # Words per shingle
+SKETCH_SIZE = 64  # Smallest shingle hashes kept per page
+MIN_SHARED = 2  # Sketch values two pages must share to be compared at all
+MIN_SIMILARITY = 0.1  # Lowest estimated Jaccard similarity accepted as a pair
+MAX_POSTINGS = 32  # Sketch values on more Document B pages than this are boilerplate
+
+METHOD_MINHASH = "minhash"
+METHOD_INTERPOLATED = "interpolated"  # Paired by position between two aligned pages
+METHOD_UNMATCHED = "unmatched"
+METHOD_MANUAL = "manual"
+
+Alignment = Dict[int, Tuple[Optional[int], Optional[float], str]]
+
+# Punctuation is dropped so OCR'd "word," and "word" give the same shingle
+_PUNCTUATION = str.maketrans({char: " " for char in string.punctuation})
+
+def page_sketch(text_content: Optional[str]) -> FrozenSet[int]:
+    """Bottom-k MinHash sketch of the word shingles of a page (shorter pages use shorter shingles)."""
+    words = text_content.lower().translate(_PUNCTUATION).split() if text_content else []
+    size = min(SHINGLE_SIZE, len(words))
+    if not size:
+        return frozenset()
+    shingles = sorted(set(map(_shingle_hash, zip(*(words[offset:] for offset in range(size))))))
+    return frozenset(shingles[:SKETCH_SIZE])
+
+def _shingle_hash(shingle: Tuple[str, ...]) -> int:
+    # Not hash(): string hashes are salted per process, which would make sketches, and so
+    # the stored alignment, differ from one run to the next. CRC-32 spread over 64 bits by
+    # a Fibonacci multiplier, so the smallest values are not biased towards similar shingles
+    return (zlib.crc32(" ".join(shingle).encode("utf-8")) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+
+def estimate_similarity(sketch_a: FrozenSet[int], sketch_b: FrozenSet[int]) -> float:
+    """Jaccard similarity estimate of two pages from their sketches."""
+    if not sketch_a or not sketch_b:
+        return 0.0
+    union = sorted(sketch_a | sketch_b)[:SKETCH_SIZE]
+    return sum(1 for value in union if value in sketch_a and value in sketch_b) / len(union)
+
+def _heaviest_chain(candidates: List[Tuple[int, int, float]], size_b: int) -> List[Tuple[int, int, float]]:
+    """
+    Heaviest chain of (i, j, weight) candidates increasing in both i and j.
+
+    candidates must be sorted by i. A Fenwick tree over j holds the best chain ending
+    before each column, so every candidate costs two O(log n) operations.
+    """
+    if not candidates:
+        return []
+    tree: List[Tuple[float, int]] = [(0.0, -1)] * (size_b + 1)
+    scores = [0.0] * len(candidates)
+    previous = [-1] * len(candidates)
+    start = 0
+    while start < len(candidates):
+        row = candidates[start][0]
+        end = start
+        while end < len(candidates) and candidates[end][0] == row:
+            end += 1
+        # Query the whole row before updating so two pages of B never chain to one page of A
+        for index in range(start, end):
+            best, node = (0.0, -1), candidates[index][1]
+            while node > 0:
+                if tree[node][0] > best[0]:
+                    best = tree[node]
+                node -= node & -node
+            scores[index] = best[0] + candidates[index][2]
+            previous[index] = best[1]
+        for index in range(start, end):
+            node = candidates[index][1] + 1
+            while node <= size_b:
+                if scores[index] > tree[node][0]:
+                    tree[node] = (scores[index], index)
+                node += node & -node
+        start = end
+
+    index = max(range(len(candidates)), key=scores.__getitem__)
+    chain = []
+    while index != -1:
+        chain.append(candidates[index])
+        index = previous[index]
+    return chain[::-1]
+
+def _anchor_bounds(pages_a: Sequence[int], index_b: Dict[int, int], fixed: Dict[int, Optional[int]]) -> Tuple[List[int], List[int]]:
+    """Per Document A index, the range of Document B indexes allowed by the manual anchors."""
+    anchors = {index: index_b[fixed[page]] for index, page in enumerate(pages_a) if fixed.get(page) is not None}
+    lower, upper = [0] * len(pages_a), [len(index_b) - 1] * len(pages_a)
+    bound = 0
+    for index in range(len(pages_a)):
+        lower[index] = bound
+        if index in anchors:
+            bound = anchors[index] + 1
+    bound = len(index_b) - 1
+    for index in reversed(range(len(pages_a))):
+        upper[index] = bound
+        if index in anchors:
+            bound = anchors[index] - 1
+    return lower, upper
+
+def align_pages(
+    texts_a: Dict[int, str],
+    texts_b: Dict[int, str],
+    fixed: Optional[Dict[int, Optional[int]]] = None
+) -> Alignment:
+    """
+    Pair the pages of Document A with the pages of Document B, preserving page order.
+
+    Args:
+        texts_a: Text of every Document A page by page number.
+        texts_b: Text of every Document B page by page number.
+        fixed: Manual pairs (Document A page -> Document B page or None), in page order.
+
+    Returns:
+        Alignment: Document A page -> (Document B page or None, similarity or None, method).
+    """
+    fixed = {page: page_b for page, page_b in (fixed or {}).items() if page_b is None or page_b in texts_b}
+    pages_a, pages_b = sorted(texts_a), sorted(texts_b)
+    index_b = {page: index for index, page in enumerate(pages_b)}
+    sketches_a = [page_sketch(texts_a[page]) for page in pages_a]
+    sketches_b = [page_sketch(texts_b[page]) for page in pages_b]
+
+    postings: Dict[int, List[int]] = defaultdict(list)
+    for index, sketch in enumerate(sketches_b):
+        for value in sketch:
+            postings[value].append(index)
+
+    lower, upper = _anchor_bounds(pages_a, index_b, fixed)
+    taken_b = {index_b[page_b] for page_b in fixed.values() if page_b is not None}
+    candidates = []
+    for i, sketch in enumerate(sketches_a):
+        if pages_a[i] in fixed or not sketch:
+            continue
+        shared = Counter()
+        for value in sketch:
+            indexes = postings.get(value)
+            if indexes and len(indexes) <= MAX_POSTINGS:
+                shared.update(indexes)
+        for j in sorted(shared):
+            if shared[j] < MIN_SHARED or j in taken_b or not lower[i] <= j <= upper[i]:
+                continue
+            similarity = estimate_similarity(sketch, sketches_b[j])
+            if similarity >= MIN_SIMILARITY:
+                candidates.append((i, j, similarity))
+
+    alignment: Alignment = {page: (None, None, METHOD_UNMATCHED) for page in pages_a}
+    pairs = []
+    for i, j, similarity in _heaviest_chain(candidates, len(pages_b)):
+        alignment[pages_a[i]] = (pages_b[j], round(similarity, 4), METHOD_MINHASH)
+        pairs.append((i, j))
+    for index, page in enumerate(pages_a):
+        if page in fixed:
+            alignment[page] = (fixed[page], None, METHOD_MANUAL)
+            if fixed[page] is not None:
+                pairs.append((index, index_b[fixed[page]]))
+    for page, page_b in fixed.items():
+        alignment.setdefault(page, (page_b, None, METHOD_MANUAL))
+
+    # Pair equally long unmatched runs (blank or image-only pages) by position
+    pairs.sort()
+    for (i1, j1), (i2, j2) in zip([(-1, -1)] + pairs, pairs + [(len(pages_a), len(pages_b))]):
+        if i2 - i1 != j2 - j1:
+            continue
+        for offset in range(1, i2 - i1):
+            page = pages_a[i1 + offset]
+            if alignment[page][2] == METHOD_UNMATCHED:
+                alignment[page] = (pages_b[j1 + offset], None, METHOD_INTERPOLATED)
+    return alignment
+
+def load_alignment_texts(db: Session, document_id: int) -> Tuple[Dict[int, str], Optional[Dict[int, str]]]:
+    """Text of every Document A page and of every Document B page (None without an editable PDF)."""
+    rows = db.query(Page.page_number, ExtractedText.raw_text).outerjoin(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).filter(Page.document_id == document_id)
+    texts_a = {page_number: raw_text or "" for page_number, raw_text in rows}
+    editable = db.query(EditablePDFText.text_content_by_page).filter(
+        EditablePDFText.document_id == document_id
+    ).scalar()
+    if not editable:
+        return texts_a, None
+    return texts_a, {int(page): text_content or "" for page, text_content in json.loads(editable).items()}
+
+def compute_alignment(db: Session, document_id: int, commit: bool = True) -> List[int]:
+    """
+    (Re)align a document's pages and store the mapping, keeping manual overrides.
+
+    Comparison summaries of pages whose counterpart changed are dropped.
+
+    Returns:
+        List[int]: Document A pages whose Document B counterpart changed.
+    """
+    texts_a, texts_b = load_alignment_texts(db, document_id)
+    if texts_b is None:
+        return []
+    existing = {row.page_number: row for row in db.query(PageAlignment).filter(PageAlignment.document_id == document_id)}
+    fixed = {page: row.page_number_b for page, row in existing.items() if row.method == METHOD_MANUAL}
+    alignment = align_pages(texts_a, texts_b, fixed)
+
+    changed = []
+    for page_number, (page_number_b, similarity, method) in alignment.items():
+        row = existing.pop(page_number, None)
+        # Without a stored alignment, pages were compared to the page with the same number
+        previous = row.page_number_b if row is not None else page_number
+        if row is None:
+            row = PageAlignment(document_id=document_id, page_number=page_number)
+            db.add(row)
+        row.page_number_b, row.similarity, row.method = page_number_b, similarity, method
+        if previous != page_number_b:
+            changed.append(page_number)
+    for row in existing.values():
+        db.delete(row)
+    if changed:
+        db.query(PageComparisonSummary).filter(
+            PageComparisonSummary.document_id == document_id,
+            PageComparisonSummary.page_number.in_(changed)
+        ).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+
+    methods = Counter(method for _, _, method in alignment.values())
+    logger.info(f"Aligned {len(texts_a)} pages of document {document_id} to {len(texts_b)} editable PDF pages: {dict(methods)}")
+    return sorted(changed)
+
+def get_alignment(db: Session, document_id: int) -> List[PageAlignment]:
+    return db.query(PageAlignment).filter(PageAlignment.document_id == document_id).order_by(PageAlignment.page_number).all()
+
+def get_page_mapping(db: Session, document_id: int) -> Dict[int, Optional[int]]:
+    """Document A page -> Document B page; pages missing from the mapping compare to the same page number."""
+    return dict(db.query(PageAlignment.page_number, PageAlignment.page_number_b).filter(
+        PageAlignment.document_id == document_id
+    ).all())
+
+def counterpart_page(db: Session, document_id: int, page_number: int) -> Optional[int]:
+    """Document B page holding the text of a Document A page (None if it has no counterpart)."""
+    row = db.query(PageAlignment.page_number_b).filter(
+        PageAlignment.document_id == document_id,
+        PageAlignment.page_number == page_number
+    ).first()
+    return row[0] if row is not None else page_number
+
+def set_manual_alignment(db: Session, document_id: int, page_number: int, page_number_b: Optional[int]) -> List[int]:
+    """
+    Pin a Document A page to a Document B page (or to none) and realign the other pages around it.
+
+    Raises:
+        ValueError: If either page does not exist or the override would break page order
+            relative to the other manual overrides.
+    """
+    texts_a, texts_b = load_alignment_texts(db, document_id)
+    if page_number not in texts_a:
+        raise ValueError(f"Document A has no page {page_number}")
+    if texts_b is None:
+        raise ValueError("No editable PDF text (Document B) uploaded for this document")
+    if page_number_b is not None:
+        if page_number_b not in texts_b:
+            raise ValueError(f"Document B has no page {page_number_b}")
+        manual = db.query(PageAlignment.page_number, PageAlignment.page_number_b).filter(
+            PageAlignment.document_id == document_id,
+            PageAlignment.method == METHOD_MANUAL,
+            PageAlignment.page_number != page_number,
+            PageAlignment.page_number_b.isnot(None)
+        )
+        for other, other_b in manual:
+            if (other < page_number) != (other_b < page_number_b) or other_b == page_number_b:
+                raise ValueError(f"Page {page_number} -> {page_number_b} conflicts with the manual alignment of page {other} -> {other_b}")
+
+    row = db.query(PageAlignment).filter(
+        PageAlignment.document_id == document_id,
+        PageAlignment.page_number == page_number
+    ).first()
+    if row is None:
+        row = PageAlignment(document_id=document_id, page_number=page_number, page_number_b=page_number)
+        db.add(row)
+    # compute_alignment only sees the new counterpart of this page, so compare it here
+    previous = row.page_number_b
+    row.method, row.similarity = METHOD_MANUAL, None
+    row.page_number_b = page_number_b
+    db.flush()
+    changed = compute_alignment(db, document_id, commit=False)
+    if previous != page_number_b:
+        db.query(PageComparisonSummary).filter(
+            PageComparisonSummary.document_id == document_id,
+            PageComparisonSummary.page_number == page_number
+        ).delete(synchronize_session=False)
+        changed = sorted(set(changed) | {page_number})
+    db.commit()
+    return changed
+
+def clear_manual_alignment(db: Session, document_id: int, page_number: int) -> Optional[List[int]]:
+    """
+    Drop the manual override of a page and realign it automatically.
+
+    Returns:
+        Optional[List[int]]: Pages whose counterpart changed, or None if the page had no override.
+    """
+    row = db.query(PageAlignment).filter(
+        PageAlignment.document_id == document_id,
+        PageAlignment.page_number == page_number,
+        PageAlignment.method == METHOD_MANUAL
+    ).first()
+    if row is None:
+        return None
+    row.method = METHOD_UNMATCHED
+    db.flush()
+    return compute_alignment(db, document_id)
@@ -0,0 +1,141 @@
+"""
+Bulk page text: the text of all of a document's pages, or of page ranges, streamed as NDJSON.
+
+Each line holds what GET /api/documents/{id}/pages/{n}/text returns for a page, keyed by
+page_number, so a viewer can load a whole document in one request instead of one per page.
+The pages come from a single query read PAGE_BATCH rows at a time, which picks the
+corrected text over the OCR text itself: the corrected JSON of the document is decompressed
+and expanded with json_each once (a materialized CTE), whose pages replace those of the OCR
+text. Only the selected fields are read, so leaving out formatted_text skips that column.
+
+Compressed columns are read in SQL through the decompress_text function that
+app.db.compression registers on SQLite connections.
+"""
+import json
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    CompoundSelect, DateTime, Integer, and_, case, cast, func, literal, literal_column, null, or_, select, type_coerce, union_all
+)
+from sqlalchemy.orm import Session
+
+from app.db.compression import CompressedText
+from app.db.database import SessionLocal
+from app.db.models import CorrectedText, ExtractedText, Page
+from app.services.formatted_text_codec import LAYOUT_COMPACT, format_for_client
+from app.services.text_export import PageRange
+from app.services.word_export import PAGE_BATCH
+
+logger = logging.getLogger(__name__)
+
+PAGE_TEXT_MEDIA_TYPE = "application/x-ndjson"
+# Fields a client can select, in record order; page_number is always included
+FIELDS = ("text", "formatted_text", "status", "source", "extraction_date")
+
+def parse_fields(spec: Optional[str]) -> Tuple[str, ...]:
+    """
+    Fields selected by a comma-separated spec such as "text,source", in FIELDS order.
+    None or "" selects every field.
+
+    Raises:
+        ValueError: If the spec names an unknown field.
+    """
+    if not spec or not spec.strip():
+        return FIELDS
+    names = {name.strip() for name in spec.split(",") if name.strip()}
+    unknown = names - set(FIELDS) - {"page_number"}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; available: {', '.join(FIELDS)}")
+    return tuple(name for name in FIELDS if name in names)
+
+def page_text_query(document_id: int, ranges: List[PageRange], fields: Sequence[str]) -> CompoundSelect:
+    """
+    Query of page_number and the selected fields of the pages in the ranges, in page order:
+    the corrected pages, then the others with their OCR text, merged by the ORDER BY.
+    """
+    stored = select(
+        func.decompress_text(CorrectedText.corrected_content_by_page).label("content")
+    ).where(CorrectedText.document_id == document_id).cte("stored_corrections").prefix_with("MATERIALIZED")
+    content = select(stored.c.content).scalar_subquery()
+    # Unparseable JSON counts as no corrections, as in the single-page endpoint
+    entries = func.json_each(
+        case((func.json_valid(content) == literal_column("1"), content), else_=literal_column("'{}'"))
+    ).table_valued("key", "value")
+    corrections = select(
+        cast(entries.c.key, Integer).label("page_number"), entries.c.value.label("text")
+    ).cte("corrections").prefix_with("MATERIALIZED")
+    in_ranges = or_(*(and_(Page.page_number >= first, Page.page_number <= last) for first, last in ranges))
+    selected_pages = select(Page.page_number).where(Page.document_id == document_id, in_ranges)
+    # Both sides are matched with IN, which SQLite always answers from an index it builds
+    # on the subquery; a join with the corrections CTE is only indexed when the planner
+    # guesses that it is large, and otherwise scanned for every page
+    corrected_columns = {
+        "text": corrections.c.text,
+        "formatted_text": type_coerce(null(), CompressedText()),
+        "status": literal("corrected"),
+        "source": literal("corrected_text"),
+        "extraction_date": type_coerce(null(), DateTime()),
+    }
+    not_extracted = ExtractedText.id.is_(None)
+    ocr_columns = {
+        "text": case((not_extracted, literal("")), else_=func.decompress_text(ExtractedText.raw_text)),
+        "formatted_text": ExtractedText.formatted_text,  # Decoded by the column type, then laid out in Python
+        "status": case((not_extracted, literal("not_extracted")), else_=literal("extracted")),
+        "source": case((not_extracted, null()), else_=literal("original_ocr")),
+        "extraction_date": ExtractedText.extraction_date,
+    }
+    corrected = select(
+        corrections.c.page_number, *(corrected_columns[name].label(name) for name in fields)
+    ).where(corrections.c.page_number.in_(selected_pages))
+    ocr = select(Page.page_number, *(ocr_columns[name].label(name) for name in fields)).outerjoin(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).where(
+        Page.document_id == document_id,
+        in_ranges,
+        Page.page_number.notin_(select(corrections.c.page_number))
+    )
+    return union_all(corrected, ocr).order_by(literal_column("page_number"))
+
+def _record(row, fields: Sequence[str], formatted_layout: str) -> Dict[str, Any]:
+    record = {"page_number": row.page_number}
+    for name in fields:
+        value = getattr(row, name)
+        if name == "formatted_text":
+            value = format_for_client(value, formatted_layout) if value is not None else None
+        elif name == "extraction_date" and value is not None:
+            value = value.isoformat()
+        record[name] = value
+    return record
+
+def iter_page_texts(db: Session, document_id: int, ranges: List[PageRange], fields: Sequence[str] = FIELDS,
+                    formatted_layout: str = LAYOUT_COMPACT) -> Iterator[Dict[str, Any]]:
+    """Records of the pages in the ranges, in page order, read PAGE_BATCH rows at a time."""
+    if not ranges:
+        return
+    result = db.execute(page_text_query(document_id, ranges, fields), execution_options={"yield_per": PAGE_BATCH})
+    for row in result:
+        yield _record(row, fields, formatted_layout)
+
+def stream_page_texts(document_id: int, ranges: List[PageRange], fields: Sequence[str] = FIELDS,
+                      formatted_layout: str = LAYOUT_COMPACT,
+                      session_factory: Callable[[], Session] = SessionLocal) -> Iterator[bytes]:
+    """
+    NDJSON chunks of the page records, one chunk per batch of rows, produced as the response
+    is sent. The rows are read in a session of their own, like the streaming exports.
+    """
+    db = session_factory()
+    try:
+        lines = []
+        for record in iter_page_texts(db, document_id, ranges, fields, formatted_layout):
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+            if len(lines) >= PAGE_BATCH:
+                yield "".join(lines).encode("utf-8")
+                lines = []
+        if lines:
+            yield "".join(lines).encode("utf-8")
+    except Exception as e:
+        logger.error(f"Page text stream of document {document_id} failed: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
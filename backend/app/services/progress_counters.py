@@ -0,0 +1,199 @@
+import asyncio
+import datetime
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.database import SessionLocal
+from app.db.models import Document, DocumentProgress, Page
+
+logger = logging.getLogger(__name__)
+
+# Page.status value -> DocumentProgress counter column
+STATUS_COLUMNS = {
+    "pending": "pending_pages",
+    "processed": "processed_pages",
+    "error": "error_pages",
+    "no_text": "no_text_pages",
+    "minimal_text": "minimal_text_pages",
+}
+OTHER_COLUMN = "other_pages"
+COUNTER_COLUMNS = list(STATUS_COLUMNS.values()) + [OTHER_COLUMN]
+
+def _column_for_status(status: Optional[str]) -> str:
+    # A freshly added Page may still have status=None before the column default is applied
+    return STATUS_COLUMNS.get(status or "pending", OTHER_COLUMN)
+
+def _count_pages(connection, document_ids: Optional[List[int]] = None) -> Dict[int, Counter]:
+    """Count pages per document and status straight from the pages table."""
+    stmt = select(Page.document_id, Page.status, func.count(Page.id)).group_by(Page.document_id, Page.status)
+    if document_ids is not None:
+        stmt = stmt.where(Page.document_id.in_(document_ids))
+
+    counts: Dict[int, Counter] = defaultdict(Counter)
+    for document_id, status, count in connection.execute(stmt):
+        counts[document_id][_column_for_status(status)] += count
+        counts[document_id]["total_pages"] += count
+    return counts
+
+def _counter_values(counts: Counter) -> Dict[str, int]:
+    values = {column: counts.get(column, 0) for column in COUNTER_COLUMNS}
+    values["total_pages"] = counts.get("total_pages", 0)
+    return values
+
+def _rebuild_row(connection, document_id: int) -> None:
+    """Create the counter row for a document that does not have one yet (e.g. legacy documents)."""
+    document_exists = connection.execute(
+        select(Document.id).where(Document.id == document_id)
+    ).first()
+    if not document_exists:
+        # The document is being deleted in this flush; nothing to count
+        return
+
+    counts = _count_pages(connection, [document_id]).get(document_id, Counter())
+    connection.execute(
+        insert(DocumentProgress).values(
+            document_id=document_id,
+            updated_at=datetime.datetime.utcnow(),
+            **_counter_values(counts)
+        )
+    )
+
+@event.listens_for(Session, "after_flush")
+def _update_counters_after_flush(session: Session, flush_context) -> None:
+    """Apply page status transitions of this flush to the per-document counters.
+
+    Runs inside the flush's transaction, so the counters commit (or roll back)
+    together with the Page rows that caused them.
+    """
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+
+    for obj in session.new:
+        if isinstance(obj, Page) and obj.document_id is not None:
+            deltas[obj.document_id][_column_for_status(obj.status)] += 1
+            deltas[obj.document_id]["total_pages"] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Page) or obj.document_id is None:
+            continue
+        history = inspect(obj).attrs.status.history
+        if not history.has_changes():
+            continue
+        for old_status in history.deleted:
+            deltas[obj.document_id][_column_for_status(old_status)] -= 1
+        for new_status in history.added:
+            deltas[obj.document_id][_column_for_status(new_status)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Page) and obj.document_id is not None:
+            history = inspect(obj).attrs.status.history
+            old_status = history.deleted[0] if history.deleted else obj.status
+            deltas[obj.document_id][_column_for_status(old_status)] -= 1
+            deltas[obj.document_id]["total_pages"] -= 1
+
+    if not deltas:
+        return
+
+    connection = session.connection()
+    now = datetime.datetime.utcnow()
+    for document_id, counter in deltas.items():
+        changes = {column: amount for column, amount in counter.items() if amount}
+        if not changes:
+            continue
+        values = {column: getattr(DocumentProgress, column) + amount for column, amount in changes.items()}
+        values["updated_at"] = now
+        result = connection.execute(
+            update(DocumentProgress)
+            .where(DocumentProgress.document_id == document_id)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            # No counter row yet: the pages are already flushed, so a recount is exact
+            _rebuild_row(connection, document_id)
+
+def get_progress(db: Session, document_id: int) -> Optional[DocumentProgress]:
+    """Return the counter row for a document, building it on first access if it is missing."""
+    progress = db.query(DocumentProgress).filter(DocumentProgress.document_id == document_id).first()
+    if progress is None:
+        _rebuild_row(db.connection(), document_id)
+        db.commit()
+        progress = db.query(DocumentProgress).filter(DocumentProgress.document_id == document_id).first()
+    return progress
+
+def status_counts(progress: Optional[DocumentProgress]) -> Dict[str, int]:
+    """Map a counter row back to {page_status: count}, omitting empty statuses."""
+    if progress is None:
+        return {}
+    counts = {status: getattr(progress, column) for status, column in STATUS_COLUMNS.items()}
+    counts["other"] = progress.other_pages
+    return {status: count for status, count in counts.items() if count}
+
+def reconcile_progress_counters(db: Session, document_id: Optional[int] = None) -> List[int]:
+    """
+    Recount page statuses and repair any counter rows that have drifted.
+
+    Args:
+        db (Session): Database session.
+        document_id (Optional[int]): Restrict the check to one document; all documents if None.
+
+    Returns:
+        List[int]: IDs of the documents whose counters were created or corrected.
+    """
+    connection = db.connection()
+    document_ids = [document_id] if document_id is not None else None
+    actual = _count_pages(connection, document_ids)
+
+    doc_stmt = select(Document.id)
+    progress_stmt = select(DocumentProgress)
+    if document_id is not None:
+        doc_stmt = doc_stmt.where(Document.id == document_id)
+        progress_stmt = progress_stmt.where(DocumentProgress.document_id == document_id)
+
+    existing_docs = {row[0] for row in connection.execute(doc_stmt)}
+    stored = {row.document_id: row for row in connection.execute(progress_stmt)}
+
+    repaired = []
+    now = datetime.datetime.utcnow()
+    for doc_id in existing_docs:
+        expected = _counter_values(actual.get(doc_id, Counter()))
+        row = stored.get(doc_id)
+        if row is None:
+            connection.execute(insert(DocumentProgress).values(document_id=doc_id, updated_at=now, **expected))
+            repaired.append(doc_id)
+        elif any(getattr(row, column) != value for column, value in expected.items()):
+            logger.warning(f"Progress counters for document {doc_id} drifted; repairing.")
+            connection.execute(
+                update(DocumentProgress)
+                .where(DocumentProgress.document_id == doc_id)
+                .values(updated_at=now, **expected)
+            )
+            repaired.append(doc_id)
+
+    db.commit()
+    if repaired:
+        logger.info(f"Reconciled progress counters for {len(repaired)} document(s): {sorted(repaired)}")
+    return sorted(repaired)
+
+def _reconcile_all() -> None:
+    db = SessionLocal()
+    try:
+        reconcile_progress_counters(db)
+    except Exception as e:
+        logger.error(f"Progress counter reconciliation failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+async def run_reconciliation_job(interval_seconds: float) -> None:
+    """
+    Background job: reconcile all counters now, then every `interval_seconds` (once if <= 0).
+    Reconciliation scans every page, so it runs in the thread pool, off the event loop.
+    """
+    while True:
+        await run_in_threadpool(_reconcile_all)
+        if interval_seconds <= 0:
+            return
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,268 @@
+"""
+Rule-based bulk resolution of Text A / Text B differences.
+
+For documents where Text B is trusted for some classes of difference, resolve_document()
+accepts every hunk that the enabled rules explain, for all pages of a document at once,
+and writes the resulting corrected pages in a single transaction.
+
+A hunk is explained by a set of rules when both sides are equal after normalizing them
+with those rules:
+
+    whitespace   - ignore whitespace (split and merged words)
+    case         - ignore letter case
+    quotes       - treat typographic quotes as ASCII ' and "
+    dashes       - treat hyphen, en/em dashes and minus as "-"
+    punctuation  - ignore punctuation altogether (includes quotes and dashes)
+"""
+import json
+import logging
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import CorrectedText, EditablePDFText, ExtractedText, Page
+from app.services import comparison_cache
+from app.services.event_bus import record_event
+from app.services.page_alignment import get_page_mapping
+from app.services.text_comparison_service import TextComparisonService
+from app.services.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+RULE_WHITESPACE = "whitespace"
+RULE_CASE = "case"
+RULE_QUOTES = "quotes"
+RULE_DASHES = "dashes"
+RULE_PUNCTUATION = "punctuation"
+# Order in which single rules are tried when reporting why a hunk was accepted
+RULES = (RULE_WHITESPACE, RULE_CASE, RULE_QUOTES, RULE_DASHES, RULE_PUNCTUATION)
+DEFAULT_RULES = RULES
+RULE_COMBINED = "combined"  # Accepted only by several rules together
+
+_QUOTES = str.maketrans({
+    **{char: '"' for char in "“”„‟«»"},
+    **{char: "'" for char in "‘’‚‛‹›`´"},
+})
+_DASHES = str.maketrans({char: "-" for char in "‐‑‒–—―−"})
+
+def validate_rules(rules: Iterable[str]) -> Tuple[str, ...]:
+    """Known rules in canonical order; raises ValueError for unknown names."""
+    rules = set(rules)
+    unknown = rules.difference(RULES)
+    if unknown:
+        raise ValueError(f"Unknown resolution rules: {', '.join(sorted(unknown))} (known: {', '.join(RULES)})")
+    return tuple(rule for rule in RULES if rule in rules)
+
+def normalize(text_content: str, rules: Sequence[str]) -> str:
+    """Text with every difference the given rules ignore removed."""
+    if RULE_QUOTES in rules:
+        text_content = text_content.translate(_QUOTES)
+    if RULE_DASHES in rules:
+        text_content = text_content.translate(_DASHES)
+    if RULE_PUNCTUATION in rules:
+        text_content = "".join(char for char in text_content if not unicodedata.category(char).startswith("P"))
+    if RULE_CASE in rules:
+        text_content = text_content.casefold()
+    separator = "" if RULE_WHITESPACE in rules else " "
+    return separator.join(text_content.split())
+
+def classify_hunk(text_a: str, text_b: str, rules: Sequence[str]) -> Optional[str]:
+    """
+    Rule that explains a hunk: the first single rule that does, RULE_COMBINED if only all
+    enabled rules together do, or None if the hunk needs a human.
+    """
+    if normalize(text_a, rules) != normalize(text_b, rules):
+        return None
+    for rule in rules:
+        if normalize(text_a, (rule,)) == normalize(text_b, (rule,)):
+            return rule
+    return RULE_COMBINED
+
+def apply_hunks(text_a: str, text_b: str, differences: List[Dict[str, Any]]) -> str:
+    """
+    Text A with the given (non-equal, ordered) differences replaced by their Text B side.
+
+    Whitespace outside the hunks is kept as it is in Text A. A deleted word takes the
+    whitespace before it along; an inserted word is separated by a space.
+    """
+    parts, cursor = [], 0
+    for diff in differences:
+        a_start, a_end = diff["a_start_index"], diff["a_end_index"]
+        replacement = text_b[diff["b_start_index"]:diff["b_end_index"]]
+        if diff["type"] == "replace":
+            parts += [text_a[cursor:a_start], replacement]
+            cursor = a_end
+        elif diff["type"] == "delete":
+            start = a_start
+            while start > cursor and text_a[start - 1].isspace():
+                start -= 1
+            end = a_end
+            if start == 0:
+                # Nothing before the deleted word: drop the whitespace after it instead
+                while end < len(text_a) and text_a[end].isspace():
+                    end += 1
+            parts.append(text_a[cursor:start])
+            cursor = end
+        elif diff["type"] == "insert":
+            parts.append(text_a[cursor:a_start])
+            if not text_a:
+                parts.append(replacement)
+            else:
+                parts.append(" " + replacement if a_start > 0 else replacement + " ")
+            cursor = a_start
+    parts.append(text_a[cursor:])
+    return "".join(parts)
+
+def _word_hunks(diff: Dict[str, Any], text_a: str, text_b: str) -> List[Dict[str, Any]]:
+    """
+    Split a replace hunk with as many words on both sides into one hunk per word pair, so
+    "TEST -" vs "test –" can be accepted word by word; other hunks are returned as they are.
+    """
+    if diff["type"] != "replace":
+        return [diff]
+    a_start, b_start = diff["a_start_index"], diff["b_start_index"]
+    words_a = tokenize(text_a[a_start:diff["a_end_index"]])
+    words_b = tokenize(text_b[b_start:diff["b_end_index"]])
+    if len(words_a) != len(words_b) or len(words_a) < 2:
+        return [diff]
+    return [
+        {
+            "type": "replace",
+            "original_text_a_segment": word_a,
+            "suggested_text_b_segment": word_b,
+            "a_start_index": a_start + start_a,
+            "a_end_index": a_start + end_a,
+            "b_start_index": b_start + start_b,
+            "b_end_index": b_start + end_b
+        }
+        for (word_a, start_a, end_a), (word_b, start_b, end_b) in zip(words_a.iter_spans(), words_b.iter_spans())
+        if word_a != word_b
+    ]
+
+def resolve_page(text_a: str, text_b: str, differences: List[Dict[str, Any]], rules: Sequence[str]) -> Tuple[str, List[Dict[str, Any]], int]:
+    """
+    Apply the hunks the rules explain to one page. Replace hunks with the same number of
+    words on both sides are judged word by word.
+
+    Returns:
+        Tuple[str, List[Dict[str, Any]], int]: The resolved text, the accepted changes and the
+        number of differences left for manual review.
+    """
+    accepted, changes, remaining = [], [], 0
+    hunks = [hunk for diff in differences if diff["type"] != "equal" for hunk in _word_hunks(diff, text_a, text_b)]
+    for diff in hunks:
+        rule = classify_hunk(diff["original_text_a_segment"], diff["suggested_text_b_segment"], rules)
+        if rule is None:
+            remaining += 1
+            continue
+        accepted.append(diff)
+        changes.append({
+            "rule": rule,
+            "type": diff["type"],
+            "text_a": diff["original_text_a_segment"],
+            "text_b": diff["suggested_text_b_segment"],
+            "a_start_index": diff["a_start_index"],
+            "a_end_index": diff["a_end_index"]
+        })
+    return (apply_hunks(text_a, text_b, accepted) if accepted else text_a), changes, remaining
+
+def resolve_document(
+    db: Session,
+    document_id: int,
+    rules: Sequence[str] = DEFAULT_RULES,
+    pages: Optional[Iterable[int]] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Auto-accept the differences the rules explain on every page of a document.
+
+    Each page starts from its corrected text if it has one, else from its OCR text, and is
+    compared with the aligned Document B page (diffs come from the comparison cache when
+    possible). All changed pages are written to CorrectedText in one transaction.
+
+    Args:
+        db: Database session.
+        document_id: Document to resolve.
+        rules: Enabled rules (see RULES).
+        pages: Restrict to these page numbers.
+        dry_run: Only report what would change.
+
+    Returns:
+        Dict[str, Any]: Report with totals, counts per rule and the changes of every page.
+    """
+    rules = validate_rules(rules)
+    selected = set(pages) if pages is not None else None
+    editable = db.query(EditablePDFText.text_content_by_page).filter(EditablePDFText.document_id == document_id).scalar()
+    text_b_by_page = json.loads(editable) if editable else {}
+    corrected_entry = db.query(CorrectedText).filter(CorrectedText.document_id == document_id).first()
+    corrected = json.loads(corrected_entry.corrected_content_by_page) if corrected_entry and corrected_entry.corrected_content_by_page else {}
+    mapping = get_page_mapping(db, document_id)
+    rows = db.query(Page.page_number, ExtractedText.raw_text).outerjoin(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).filter(Page.document_id == document_id).order_by(Page.page_number)
+
+    service = TextComparisonService()
+    report_pages, by_rule = [], {}
+    for page_number, raw_text in rows:
+        if selected is not None and page_number not in selected:
+            continue
+        page_number_b = mapping.get(page_number, page_number)
+        text_b = text_b_by_page.get(str(page_number_b)) if page_number_b is not None else None
+        text_a = corrected.get(str(page_number), raw_text)
+        if text_a is None or text_b is None:
+            continue
+
+        key = comparison_cache.cache_key(text_a, text_b)
+        differences = comparison_cache.get_cached(db, key)
+        if differences is None:
+            differences = service.compare_texts(text_a, text_b)
+            if not dry_run:
+                comparison_cache.store(db, key, document_id, page_number, differences, commit=False)
+
+        resolved, changes, remaining = resolve_page(text_a, text_b, differences, rules)
+        if changes:
+            corrected[str(page_number)] = resolved
+            for change in changes:
+                by_rule[change["rule"]] = by_rule.get(change["rule"], 0) + 1
+        report_pages.append({
+            "page_number": page_number,
+            "page_number_b": page_number_b,
+            "accepted": len(changes),
+            "remaining": remaining,
+            "changes": changes
+        })
+
+    changed_pages = [page["page_number"] for page in report_pages if page["accepted"]]
+    report = {
+        "document_id": document_id,
+        "dry_run": dry_run,
+        "rules": list(rules),
+        "pages_checked": len(report_pages),
+        "pages_changed": len(changed_pages),
+        "hunks_accepted": sum(by_rule.values()),
+        "hunks_remaining": sum(page["remaining"] for page in report_pages),
+        "by_rule": by_rule,
+        "pages": report_pages
+    }
+    if dry_run:
+        db.rollback()
+        return report
+
+    try:
+        if changed_pages:
+            if corrected_entry is None:
+                corrected_entry = CorrectedText(document_id=document_id)
+                db.add(corrected_entry)
+            corrected_entry.corrected_content_by_page = json.dumps(corrected)
+            record_event(db, "document.auto_resolved", document_id, {
+                "pages": changed_pages,
+                "hunks_accepted": report["hunks_accepted"],
+                "rules": list(rules)
+            })
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info(f"Auto-resolved {report['hunks_accepted']} differences on {len(changed_pages)} pages of document {document_id} with rules {list(rules)}")
+    return report
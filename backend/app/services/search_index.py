@@ -0,0 +1,296 @@
+import json
+import logging
+import re
+import weakref
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import CorrectedText, Document, ExtractedText, Page
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "text_search"
+
+SOURCE_OCR = "ocr"
+SOURCE_CORRECTED = "corrected"
+
+LAYOUT_MARKER_PATTERN = re.compile(r"\[(?:CENTER|INDENT|TITLE|HEADING)\]")
+
+# Engines on which the FTS5 table has been created (True) or is unavailable (False)
+_index_ready: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def strip_layout_markers(text_content: Optional[str]) -> str:
+    """Remove the [CENTER]/[INDENT]/[TITLE]/[HEADING] markers the OCR prompt adds."""
+    return LAYOUT_MARKER_PATTERN.sub("", text_content or "")
+
+# Row ids are derived from the indexed entity so rows can be replaced without a lookup:
+# OCR rows use the ExtractedText id (even), corrected rows use (document, page) (odd).
+def _ocr_rowid(extracted_text_id: int) -> int:
+    return extracted_text_id * 2
+
+def _corrected_rowid(document_id: int, page_number: int) -> int:
+    return ((document_id << 20) | page_number) * 2 + 1
+
+def ensure_search_index(connection) -> bool:
+    """Create the FTS5 table if needed. Returns False when the database does not support it."""
+    engine = connection.engine
+    if engine in _index_ready:
+        return _index_ready[engine]
+
+    available = False
+    if engine.dialect.name == "sqlite":
+        try:
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "content, document_id UNINDEXED, page_number UNINDEXED, source UNINDEXED, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+            available = True
+        except Exception as e:
+            logger.warning(f"SQLite FTS5 is not available, full-text search falls back to LIKE: {e}")
+    _index_ready[engine] = available
+    return available
+
+def _upsert(connection, rowid: int, document_id: int, page_number: int, source: str, content: str) -> None:
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), {"rowid": rowid})
+    content = strip_layout_markers(content)
+    if content.strip():
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, content, document_id, page_number, source) "
+                 "VALUES (:rowid, :content, :document_id, :page_number, :source)"),
+            {"rowid": rowid, "content": content, "document_id": document_id,
+             "page_number": page_number, "source": source}
+        )
+
+def _load_pages_json(value: Optional[str]) -> Dict[str, str]:
+    if not value:
+        return {}
+    try:
+        return json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        return {}
+
+def _index_corrected(connection, document_id: int, new_pages: Dict[str, str], old_pages: Optional[Dict[str, str]]) -> None:
+    if old_pages is None:
+        # Previous value unknown: rebuild every corrected row of the document
+        connection.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE document_id = :document_id AND source = :source"),
+            {"document_id": document_id, "source": SOURCE_CORRECTED}
+        )
+        old_pages = {}
+    for page_key in set(old_pages) - set(new_pages):
+        connection.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"),
+            {"rowid": _corrected_rowid(document_id, int(page_key))}
+        )
+    for page_key, page_text in new_pages.items():
+        if old_pages.get(page_key) != page_text:
+            _upsert(connection, _corrected_rowid(document_id, int(page_key)), document_id, int(page_key),
+                    SOURCE_CORRECTED, page_text)
+
+@event.listens_for(Session, "after_flush")
+def _sync_index_after_flush(session: Session, flush_context) -> None:
+    """Keep the FTS5 index in step with ExtractedText and CorrectedText in the same transaction."""
+    relevant = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, (ExtractedText, CorrectedText, Document))
+    ]
+    if not relevant:
+        return
+    connection = session.connection()
+    if not ensure_search_index(connection):
+        return
+
+    for obj in relevant:
+        deleted = obj in session.deleted
+        if isinstance(obj, Document):
+            if deleted:
+                connection.execute(
+                    text(f"DELETE FROM {FTS_TABLE} WHERE document_id = :document_id"), {"document_id": obj.id}
+                )
+        elif isinstance(obj, ExtractedText):
+            if deleted:
+                connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"),
+                                   {"rowid": _ocr_rowid(obj.id)})
+            elif obj in session.new or inspect(obj).attrs.raw_text.history.has_changes():
+                location = connection.execute(
+                    select(Page.document_id, Page.page_number).where(Page.id == obj.page_id)
+                ).first()
+                if location:
+                    _upsert(connection, _ocr_rowid(obj.id), location.document_id, location.page_number,
+                            SOURCE_OCR, obj.raw_text)
+        elif isinstance(obj, CorrectedText):
+            if deleted:
+                connection.execute(
+                    text(f"DELETE FROM {FTS_TABLE} WHERE document_id = :document_id AND source = :source"),
+                    {"document_id": obj.document_id, "source": SOURCE_CORRECTED}
+                )
+                continue
+            history = inspect(obj).attrs.corrected_content_by_page.history
+            if obj in session.new or history.has_changes():
+                old_pages = _load_pages_json(history.deleted[0]) if history.deleted else None
+                if obj in session.new:
+                    old_pages = {}
+                _index_corrected(connection, obj.document_id,
+                                 _load_pages_json(obj.corrected_content_by_page), old_pages)
+
+def rebuild_search_index(db: Session) -> int:
+    """
+    Rebuild the whole index from ExtractedText and CorrectedText.
+
+    Returns:
+        int: Number of page texts indexed.
+    """
+    connection = db.connection()
+    if not ensure_search_index(connection):
+        return 0
+    connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+
+    indexed = 0
+    rows = db.query(ExtractedText.id, ExtractedText.raw_text, Page.document_id, Page.page_number).join(
+        Page, Page.id == ExtractedText.page_id
+    )
+    for extracted_id, raw_text, document_id, page_number in rows.yield_per(500):
+        _upsert(connection, _ocr_rowid(extracted_id), document_id, page_number, SOURCE_OCR, raw_text)
+        indexed += 1
+    for corrected in db.query(CorrectedText).yield_per(50):
+        pages = _load_pages_json(corrected.corrected_content_by_page)
+        _index_corrected(connection, corrected.document_id, pages, {})
+        indexed += len(pages)
+
+    db.commit()
+    logger.info(f"Rebuilt full-text search index with {indexed} page texts")
+    return indexed
+
+def index_is_empty(db: Session) -> bool:
+    connection = db.connection()
+    if not ensure_search_index(connection):
+        return False
+    return connection.execute(text(f"SELECT 1 FROM {FTS_TABLE} LIMIT 1")).first() is None
+
+def initialize_search_index() -> None:
+    """Create the index on startup and backfill it once for databases that predate it."""
+    db = SessionLocal()
+    try:
+        has_text = db.query(ExtractedText.id).first() is not None or db.query(CorrectedText.id).first() is not None
+        if index_is_empty(db) and has_text:
+            rebuild_search_index(db)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to initialize full-text search index: {e}", exc_info=True)
+    finally:
+        db.close()
+
+def build_match_query(query: str) -> str:
+    """
+    Turn user input into a safe FTS5 MATCH expression.
+
+    "quoted phrases" are kept as phrases, a trailing * makes a prefix search, every other
+    term is quoted so FTS5 operators and punctuation in user input cannot break the query.
+    """
+    parts = []
+    for phrase, term in re.findall(r'"([^"]*)"|(\S+)', query):
+        value = phrase if phrase else term
+        prefix = value.endswith("*") and not phrase
+        value = value.rstrip("*") if prefix else value
+        value = value.replace('"', '""').strip()
+        if re.search(r"\w", value):
+            parts.append(f'"{value}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+def search_pages(
+    db: Session,
+    query: str,
+    document_id: Optional[int] = None,
+    source: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Ranked full-text search over page texts.
+
+    By default a page that has corrected text only matches on its corrected text;
+    pass source="ocr" or source="corrected" to search one source explicitly.
+
+    Returns:
+        List[Dict[str, Any]]: Hits with document_id, filename, page_number, source, score and snippet.
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    connection = db.connection()
+    if not ensure_search_index(connection):
+        return _search_pages_like(db, query, document_id, limit, offset)
+
+    conditions = [f"{FTS_TABLE} MATCH :match"]
+    params: Dict[str, Any] = {"match": match, "limit": limit, "offset": offset}
+    if document_id is not None:
+        conditions.append("s.document_id = :document_id")
+        params["document_id"] = document_id
+    if source in (SOURCE_OCR, SOURCE_CORRECTED):
+        conditions.append("s.source = :source")
+        params["source"] = source
+    else:
+        # Skip OCR rows that are superseded by a corrected row for the same page
+        conditions.append(
+            f"NOT (s.source = '{SOURCE_OCR}' AND EXISTS (SELECT 1 FROM {FTS_TABLE} c "
+            "WHERE c.rowid = ((s.document_id << 20) | s.page_number) * 2 + 1))"
+        )
+
+    sql = text(
+        f"SELECT s.document_id, s.page_number, s.source, bm25({FTS_TABLE}) AS score, "
+        f"snippet({FTS_TABLE}, 0, '<mark>', '</mark>', '…', 12) AS snippet, d.filename "
+        f"FROM {FTS_TABLE} s JOIN documents d ON d.id = s.document_id "
+        f"WHERE {' AND '.join(conditions)} "
+        "ORDER BY score LIMIT :limit OFFSET :offset"
+    )
+    return [
+        {
+            "document_id": row.document_id,
+            "filename": row.filename,
+            "page_number": row.page_number,
+            "source": row.source,
+            "score": -row.score,  # bm25() is lower-is-better; expose higher-is-better
+            "snippet": row.snippet
+        }
+        for row in connection.execute(sql, params)
+    ]
+
+def _search_pages_like(db: Session, query: str, document_id: Optional[int], limit: int, offset: int) -> List[Dict[str, Any]]:
+    """Fallback for databases without FTS5: unranked substring scan over OCR text.
+
+    Text columns are stored compressed, so the match runs on decompressed values in Python.
+    """
+    rows = db.query(Page.document_id, Page.page_number, ExtractedText.raw_text, Document.filename).join(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).join(Document, Document.id == Page.document_id)
+    if document_id is not None:
+        rows = rows.filter(Page.document_id == document_id)
+
+    needle = query.lower()
+    hits = []
+    skipped = 0
+    for doc_id, page_number, raw_text, filename in rows.order_by(Page.document_id, Page.page_number).yield_per(200):
+        clean = strip_layout_markers(raw_text)
+        position = clean.lower().find(needle)
+        if position == -1:
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        start = max(0, position - 60)
+        hits.append({
+            "document_id": doc_id,
+            "filename": filename,
+            "page_number": page_number,
+            "source": SOURCE_OCR,
+            "score": 0.0,
+            "snippet": clean[start:position + len(query) + 60]
+        })
+        if len(hits) >= limit:
+            break
+    return hits
@@ -0,0 +1,253 @@
+"""
+Cache-friendly delivery of page images and original PDFs.
+
+Files are identified by the SHA-256 of their content (file_digest, memoized per path, size
+and modification time). Responses carry a strong ETag of the bytes served and a
+Cache-Control header: a URL whose ?v= is the current version of the file (versioned_url) is
+immutable, any other URL must be revalidated, which costs a 304 when nothing changed. PDFs
+honour single byte ranges (Range, If-Range), so the viewer can load them progressively.
+
+Page images are served as WebP, or AVIF when the optional pillow-avif-plugin is installed,
+when the Accept header ranks the format at least as high as JPEG. A variant is encoded on
+its first request into a cache keyed by the digest of the JPEG, and only served when it is
+smaller. JPEG, WebP, AVIF and scanned PDF bodies are compressed already, so no
+Content-Encoding is applied on top.
+"""
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from PIL import Image, features
+
+from app.services.diff_payload import _accepted
+
+try:
+    import pillow_avif  # noqa: F401  Registers the AVIF codec with Pillow
+except ImportError:  # Optional: WebP or JPEG is served instead
+    pillow_avif = None
+
+logger = logging.getLogger(__name__)
+
+VERSION_LENGTH = 16  # Hex digits of the digest in versioned URLs
+IMMUTABLE = "private, max-age=31536000, immutable"
+REVALIDATE = "private, no-cache"
+DIGEST_CACHE_SIZE = 4096  # Files whose digest is memoized
+READ_CHUNK_SIZE = 1024 * 1024
+RANGE_CHUNK_SIZE = 64 * 1024
+IMAGE_VARIANT_DIR = os.getenv("IMAGE_VARIANT_CACHE_DIR", "temp_exports/images")
+IMAGE_VARIANT_MAX_BYTES = int(os.getenv("IMAGE_VARIANT_CACHE_MAX_MB", "512")) * 1024 * 1024
+IMAGE_VARIANT_QUALITY = {"webp": 80, "avif": 60}
+IMAGE_MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "avif": "image/avif"}
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def _available_formats() -> Tuple[str, ...]:
+    """Variant formats to negotiate, best first: PAGE_IMAGE_FORMATS that this Pillow can encode."""
+    wanted = [name.strip().lower() for name in os.getenv("PAGE_IMAGE_FORMATS", "avif,webp").split(",")]
+    encodable = {"webp": features.check("webp"), "avif": pillow_avif is not None}
+    return tuple(name for name in wanted if encodable.get(name))
+
+IMAGE_FORMATS = _available_formats()
+
+_digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_digest_lock = threading.Lock()
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, recomputed only when its size or modification time changes."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+            return digest
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()
+    with _digest_lock:
+        _digests[key] = digest
+        while len(_digests) > DIGEST_CACHE_SIZE:
+            _digests.popitem(last=False)
+    return digest
+
+def versioned_url(url: str, path: str) -> str:
+    """URL of the current content of a file, cacheable forever."""
+    return f"{url}?v={file_digest(path)[:VERSION_LENGTH]}"
+
+def choose_image_format(accept: Optional[str]) -> str:
+    """The best IMAGE_FORMATS variant Accept ranks at least as high as JPEG, else "jpeg"."""
+    accepted = _accepted(accept)
+    jpeg_quality = max(accepted.get("image/jpeg", 0.0), accepted.get("image/*", 0.0), accepted.get("*/*", 0.0))
+    best, best_quality = "jpeg", 0.0
+    for name in IMAGE_FORMATS:
+        quality = accepted.get(IMAGE_MEDIA_TYPES[name], 0.0)
+        if quality > best_quality and quality >= jpeg_quality:
+            best, best_quality = name, quality
+    return best
+
+class ImageVariantCache:
+    """
+    Encoded variants of page images on disk, one file per source digest and format, evicted
+    least recently used first. An empty file records that the variant was not smaller than
+    the source, so it is not encoded again.
+    """
+
+    def __init__(self, directory: str = IMAGE_VARIANT_DIR, max_bytes: int = IMAGE_VARIANT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, digest: str, image_format: str) -> str:
+        return os.path.join(self.directory, f"{digest}.{image_format}")
+
+    def variant(self, source_path: str, digest: str, image_format: str) -> Optional[str]:
+        """Path of the variant of a source image, encoding it if needed; None when it would not be smaller."""
+        path = self._path(digest, image_format)
+        try:
+            size = os.path.getsize(path)
+            os.utime(path)
+        except FileNotFoundError:
+            size = self._encode(source_path, path, image_format)
+        return path if size else None
+
+    def _encode(self, source_path: str, path: str, image_format: str) -> int:
+        os.makedirs(self.directory, exist_ok=True)
+        partial = f"{path}.{uuid.uuid4().hex}.partial"
+        with Image.open(source_path) as image:
+            image.save(partial, format=image_format.upper(), quality=IMAGE_VARIANT_QUALITY[image_format])
+        size = os.path.getsize(partial)
+        if size >= os.path.getsize(source_path):
+            open(partial, "wb").close()
+            size = 0
+        os.replace(partial, path)
+        self.evict()
+        return size
+
+    def evict(self) -> int:
+        """Delete least recently used variants until the cache fits max_bytes; returns the number deleted."""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, "*.*")):
+            if path.endswith(".partial"):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        deleted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+        return deleted
+
+image_variants = ImageVariantCache()
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak: a W/ prefix is ignored)."""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte (inclusive) of a single "bytes=" range. None when there is no usable
+    range: no header, a malformed one or several ranges, which are answered with the whole file.
+
+    Raises:
+        ValueError: If the range is not satisfiable (starts past the end of the file).
+    """
+    match = _BYTE_RANGE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError(f"Range {header} is not satisfiable")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Range {header} is not satisfiable")
+    return start, end
+
+def _read_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = source.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+def cached_file_response(request: Request, path: str, media_type: str, digest: str, etag_suffix: str = "",
+                         byte_ranges: bool = False, vary: Optional[str] = None,
+                         filename: Optional[str] = None) -> Response:
+    """
+    Response for a file identified by its content digest: 304 when If-None-Match matches,
+    206/416 for a byte range when byte_ranges is set, else the whole file. Immutable when the
+    request's ?v= is the current version of the file.
+    """
+    etag = f'"{digest[:32]}{etag_suffix}"'
+    version = request.query_params.get("v")
+    current = version is not None and len(version) == VERSION_LENGTH and digest[:VERSION_LENGTH] == version.lower()
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE if current else REVALIDATE,
+    }
+    if vary:
+        headers["Vary"] = vary
+    if byte_ranges:
+        headers["Accept-Ranges"] = "bytes"
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    byte_range = None
+    if byte_ranges and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_byte_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers, filename=filename)
+    start, end = byte_range
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(_read_range(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+def page_image_response(request: Request, image_path: str) -> Response:
+    """A page image, as the variant format Accept prefers when it is smaller than the JPEG."""
+    digest = file_digest(image_path)
+    vary = "Accept" if IMAGE_FORMATS else None
+    image_format = choose_image_format(request.headers.get("accept"))
+    if image_format != "jpeg":
+        try:
+            variant_path = image_variants.variant(image_path, digest, image_format)
+        except OSError as e:
+            logger.warning(f"Could not encode {image_path} as {image_format}: {e}")
+            variant_path = None
+        if variant_path:
+            return cached_file_response(request, variant_path, IMAGE_MEDIA_TYPES[image_format], digest,
+                                        etag_suffix=f".{image_format}", vary=vary)
+    return cached_file_response(request, image_path, IMAGE_MEDIA_TYPES["jpeg"], digest, vary=vary)
@@ -1,19 +1,24 @@
-import difflib
 import logging
-from typing import List, Dict, Any, Tuple
+import time
+from typing import List, Dict, Any
+
+from app.services.char_diff import refine_deadline, refine_replace_hunks
+from app.services.diff_engine import get_opcodes
+from app.services.tokenizer import tokenize
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class TextComparisonService:
-    def compare_texts(self, text_a: str, text_b: str) -> List[Dict[str, Any]]:
+    def compare_texts(self, text_a: str, text_b: str, char_level: bool = False) -> List[Dict[str, Any]]:
         """
         Compares two texts (Text A - OCR, Text B - Editable PDF) and returns structured differences.
 
         Args:
             text_a (str): The OCR'd text from Document A.
             text_b (str): The extracted text from Document B's existing layer.
+            char_level (bool): Also refine 'replace' differences into character-level 'char_edits'.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries, where each dictionary represents a difference.
@@ -25,89 +30,31 @@ class TextComparisonService:
                                   - 'a_end_index': End index in text_a for this segment.
                                   - 'b_start_index': Start index in text_b for this segment.
                                   - 'b_end_index': End index in text_b for this segment.
+                                  - 'char_edits': Character edits inside a 'replace' (only with char_level).
+                                  - 'char_edits_skipped': Why a 'replace' has no char_edits (only with char_level).
         """
         differences = []
+        started = time.perf_counter()
         try:
             logger.info(f"TextComparisonService: Starting comparison between Text A (len: {len(text_a)}) and Text B (len: {len(text_b)}).")
             
-            # Using SequenceMatcher to find differing blocks
-            # We split by lines first for a more robust comparison, then could go finer.
-            # For simplicity here, we'll compare word by word by splitting the string.
-            # A more sophisticated approach might involve NLP sentence tokenization.
-            
-            words_a = text_a.split() # Simplistic word tokenization
-            words_b = text_b.split() # Simplistic word tokenization
+            # Tokens and their character offsets come from a single pass over each text
+            tokens_a = tokenize(text_a)
+            tokens_b = tokenize(text_b)
+            words_a = tokens_a.tokens
+            words_b = tokens_b.tokens
 
             logger.info(f"TextComparisonService: Split into {len(words_a)} words (A) and {len(words_b)} words (B).")
 
-            matcher = difflib.SequenceMatcher(None, words_a, words_b, autojunk=False)
-            
-            # To map word indices back to character indices, we need to track original positions.
-            # This is a simplified example. Real-world scenarios need more robust index mapping.
-            # We'll store (start_char_index, end_char_index) for each word.
-
-            def get_char_indices(text_content: str, word_list: List[str]) -> List[Tuple[int, int]]:
-                indices = []
-                current_pos = 0
-                for word in word_list:
-                    # Skip whitespace to find the start of the next word
-                    while current_pos < len(text_content) and text_content[current_pos].isspace():
-                        current_pos += 1
-                    
-                    start = current_pos
-                    end = start + len(word)
-                    
-                    # Validate that we're actually at the expected word
-                    if start < len(text_content) and end <= len(text_content):
-                        actual_word = text_content[start:end]
-                        if actual_word == word:
-                            indices.append((start, end))
-                            current_pos = end
-                        else:
-                            # Fallback: try to find the word from current position
-                            word_start = text_content.find(word, current_pos)
-                            if word_start != -1:
-                                indices.append((word_start, word_start + len(word)))
-                                current_pos = word_start + len(word)
-                            else:
-                                # Last resort: use current position
-                                indices.append((current_pos, current_pos + len(word)))
-                                current_pos += len(word)
-                    else:
-                        # Handle edge case where we've reached end of text
-                        indices.append((start, min(end, len(text_content))))
-                        current_pos = len(text_content)
-                
-                return indices
-
-            indices_a = get_char_indices(text_a, words_a)
-            indices_b = get_char_indices(text_b, words_b)
-
-            logger.info(f"TextComparisonService: Calculated {len(indices_a)} char indices for A, {len(indices_b)} for B.")
-
-            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            # Patience/Myers engine (see diff_engine); DIFF_ENGINE=difflib restores SequenceMatcher
+            for tag, i1, i2, j1, j2 in get_opcodes(words_a, words_b):
                 original_segment_a_words = words_a[i1:i2]
                 suggested_segment_b_words = words_b[j1:j2]
 
-                # Get character indices for segments
-                # This is simplified: it takes the start of the first word and end of the last word
-                a_start_char = indices_a[i1][0] if i1 < len(indices_a) else (indices_a[i1-1][1] if i1 > 0 else 0)
-                a_end_char = indices_a[i2-1][1] if i2 > 0 and i2 <= len(indices_a) else (indices_a[i1-1][1] if i1 > 0 else 0)
-                if not original_segment_a_words and i2 > 0 and i1 == i2 : # Handle insertions relative to end of previous A segment
-                     a_start_char = indices_a[i2-1][1] if i2 > 0 else 0
-                     a_end_char = a_start_char
-                elif not original_segment_a_words and i1 == 0 and i2 == 0: # Handle insertion at the beginning
-                     a_start_char = 0
-                     a_end_char = 0
-                
-                b_start_char = indices_b[j1][0] if j1 < len(indices_b) else (indices_b[j1-1][1] if j1 > 0 else 0)
-                b_end_char = indices_b[j2-1][1] if j2 > 0 and j2 <= len(indices_b) else (indices_b[j1-1][1] if j1 > 0 else 0)
-                if not suggested_segment_b_words and j2 > 0 and j1 == j2: # Handle deletions relative to end of previous B segment
-                    b_start_char = indices_b[j2-1][1] if j2 > 0 else 0
-                    b_end_char = b_start_char
-                elif not suggested_segment_b_words and j1 == 0 and j2 == 0: # Handle deletion at the beginning
-                    b_start_char = 0
-                    b_end_char = 0
+                # Segments span from the start of their first word to the end of their last;
+                # empty segments sit at the end of the preceding word
+                a_start_char, a_end_char = tokens_a.span(i1, i2)
+                b_start_char, b_end_char = tokens_b.span(j1, j2)
 
                 diff = {
                     'type': tag,
@@ -122,6 +69,10 @@ class TextComparisonService:
                 logger.debug(f"TextComparisonService: Diff {tag} - A[{a_start_char}:{a_end_char}]='{diff['original_text_a_segment']}', B[{b_start_char}:{b_end_char}]='{diff['suggested_text_b_segment']}'")
                 
                 differences.append(diff)
+
+            if char_level:
+                refined = refine_replace_hunks(differences, text_a, text_b, deadline=refine_deadline(started))
+                logger.info(f"TextComparisonService: Refined {refined} replace segments to character level.")
             
             logger.info(f"TextComparisonService: Successfully compared texts, {len(differences)} opcodes generated.")
             return differences
@@ -0,0 +1,273 @@
+"""
+Streaming text exports of a document: plain text, Markdown, JSONL and searchable PDF.
+
+Every format is a writer registered in WRITERS. A writer turns the selected pages, read
+from the database PAGE_BATCH at a time, into chunks of bytes that the route streams to the
+client as they are produced, without a temporary file. Pages carry the same content as the
+Word export: the corrected text where there is some, else the OCR text. Their blocks follow
+the [TITLE]/[HEADING]/[CENTER]/[INDENT] schema: the stored formatting blocks of OCR pages,
+or the markers of the text parsed by process_layout_markers.
+
+The searchable PDF is the exception to constant memory: PDF cross-references come at the
+end of the file, so the output document is built in memory, then streamed in chunks.
+"""
+import html
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+import fitz  # PyMuPDF
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import Document, ExtractedText, Page
+from app.services.formatted_text_codec import decode_formatted_text
+from app.services.text_extraction import process_layout_markers
+from app.services.word_export import PAGE_BATCH, _corrected_pages
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CORRECTED = "corrected"
+SOURCE_OCR = "ocr"
+CHUNK_SIZE = 64 * 1024  # Bytes per streamed chunk of the in-memory PDF
+# Invisible text layer of the searchable PDF. A fitz.Font, unlike the base-14 font of the same
+# name, is not limited to Latin-1: it covers Latin, Greek and Cyrillic, and MuPDF embeds a
+# fallback font for the characters of other scripts (CJK, Tamil, ...)
+PDF_FONT = "helv"
+PDF_MAX_FONT_SIZE = 12.0
+PDF_MARGIN = 36.0
+PDF_LINE_HEIGHT = 1.15
+
+# Text at the start of a line that Markdown would read as a heading, quote or list item
+_MARKDOWN_LINE_START = re.compile(r"^(?:(#|>|[-+*](?=\s))|(\d+)([.)])(?=\s))")
+
+def _escape_line_start(match: "re.Match") -> str:
+    marker, number, delimiter = match.groups()
+    return "\\" + marker if marker else number + "\\" + delimiter
+
+PageRange = Tuple[int, int]  # First and last page, inclusive
+
+class PageContent(NamedTuple):
+    page_number: int
+    source: str  # SOURCE_CORRECTED or SOURCE_OCR
+    blocks: List[Dict[str, Any]]  # Blocks of the [TITLE]/[HEADING]/[CENTER]/[INDENT] schema
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(block["text"] for block in self.blocks)
+
+def parse_page_ranges(spec: Optional[str], page_count: int) -> List[PageRange]:
+    """
+    Pages selected by a spec such as "1-5,8,12-": comma-separated pages and inclusive ranges
+    (open-ended on either side), clamped to the document. None or "" selects every page.
+
+    Returns:
+        List[PageRange]: Sorted, non-overlapping ranges.
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    if not spec or not spec.strip():
+        return [(1, page_count)] if page_count > 0 else []
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"Invalid page range spec '{spec}'")
+        first, dash, last = part.partition("-")
+        try:
+            first_page = int(first) if first.strip() else 1
+            last_page = (int(last) if last.strip() else page_count) if dash else first_page
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part}'")
+        if first_page < 1 or (last.strip() and last_page < first_page):
+            raise ValueError(f"Invalid page range '{part}'")
+        if first_page <= page_count:
+            ranges.append((first_page, min(last_page, page_count)))
+    merged: List[PageRange] = []
+    for first_page, last_page in sorted(ranges):
+        if merged and first_page <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last_page))
+        else:
+            merged.append((first_page, last_page))
+    return merged
+
+def iter_page_contents(db: Session, document_id: int, ranges: List[PageRange]) -> Iterator[PageContent]:
+    """Content of the pages in the ranges, in page order, read PAGE_BATCH pages at a time. Pages without text are skipped."""
+    if not ranges:
+        return
+    corrected = _corrected_pages(db, document_id)
+    rows = db.query(Page.page_number, ExtractedText.raw_text, ExtractedText.formatted_text).outerjoin(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).filter(
+        Page.document_id == document_id,
+        or_(*(and_(Page.page_number >= first, Page.page_number <= last) for first, last in ranges))
+    ).order_by(Page.page_number).yield_per(PAGE_BATCH)
+    for page_number, raw_text, formatted_text in rows:
+        if str(page_number) in corrected:
+            page_text, source = corrected[str(page_number)], SOURCE_CORRECTED
+        else:
+            page_text, source = raw_text, SOURCE_OCR
+        if not page_text:
+            continue
+        formatted_data = decode_formatted_text(formatted_text) if source == SOURCE_OCR else None
+        if not formatted_data or not formatted_data.get("blocks"):
+            formatted_data = process_layout_markers(page_text)
+        blocks = [block for block in formatted_data["blocks"] if block.get("text", "").strip()]
+        if blocks:
+            yield PageContent(page_number, source, blocks)
+
+class ExportWriter:
+    """
+    A streaming export format. Subclasses set the class attributes and implement write(),
+    and are registered in WRITERS with register_writer.
+    """
+    name = ""
+    extension = ""
+    media_type = ""
+    needs_scan = False  # Whether the original PDF of the document must exist
+
+    def __init__(self, document: Document, **options):
+        # Plain values: the writer outlives the request's session
+        self.document_id = document.id
+        self.file_path = document.file_path
+        self.options = options
+
+    def write(self, pages: Iterable[PageContent]) -> Iterator[bytes]:
+        raise NotImplementedError
+
+WRITERS: Dict[str, Type[ExportWriter]] = {}
+
+def register_writer(writer: Type[ExportWriter]) -> Type[ExportWriter]:
+    WRITERS[writer.name] = writer
+    return writer
+
+@register_writer
+class PlainTextWriter(ExportWriter):
+    """Text of each page without layout markers, pages separated by form feeds."""
+    name, extension, media_type = "txt", "txt", "text/plain"  # Starlette adds the UTF-8 charset
+
+    def write(self, pages):
+        for index, page in enumerate(pages):
+            yield (("\f" if index else "") + page.text + "\n").encode("utf-8")
+
+@register_writer
+class MarkdownWriter(ExportWriter):
+    """Titles as "#", headings as "##", indented blocks as quotes, centered blocks as centered HTML paragraphs."""
+    name, extension, media_type = "md", "md", "text/markdown"
+
+    def write(self, pages):
+        for index, page in enumerate(pages):
+            lines = ["---", ""] if index else []
+            lines.append(f"<!-- page {page.page_number} -->")
+            lines.append("")
+            for block in page.blocks:
+                lines.append(self.block_markdown(block))
+                lines.append("")
+            # Ends with a blank line, so the next "---" is a rule, not a heading underline
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    def block_markdown(block: Dict[str, Any]) -> str:
+        text = block["text"].strip()
+        if block.get("is_title"):
+            return "# " + " ".join(text.split())
+        if block.get("is_heading"):
+            return "## " + " ".join(text.split())
+        if block.get("alignment") == "center":
+            return '<p align="center">' + "<br>".join(html.escape(line.strip()) for line in text.split("\n")) + "</p>"
+        # Lines are stripped: leading spaces (process_layout_markers indents [INDENT] lines)
+        # would make a code block
+        lines = [_MARKDOWN_LINE_START.sub(_escape_line_start, line.strip()) for line in text.split("\n")]
+        if block.get("is_indent"):
+            return "\n".join("> " + line for line in lines)
+        # Hard line breaks inside a paragraph
+        return "  \n".join(lines)
+
+@register_writer
+class JsonLinesWriter(ExportWriter):
+    """One JSON record per page, or per block with granularity="block"."""
+    name, extension, media_type = "jsonl", "jsonl", "application/x-ndjson"
+
+    def write(self, pages):
+        by_block = self.options.get("granularity") == "block"
+        document_id = self.document_id
+        for page in pages:
+            if by_block:
+                records = [{
+                    "document_id": document_id,
+                    "page": page.page_number,
+                    "block": block_no,
+                    "source": page.source,
+                    "text": block["text"],
+                    "alignment": block.get("alignment", "left"),
+                    "is_title": bool(block.get("is_title")),
+                    "is_heading": bool(block.get("is_heading")),
+                    "is_indent": bool(block.get("is_indent"))
+                } for block_no, block in enumerate(page.blocks)]
+            else:
+                records = [{"document_id": document_id, "page": page.page_number, "source": page.source, "text": page.text}]
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+
+@register_writer
+class SearchablePDFWriter(ExportWriter):
+    """
+    The selected pages of the original scan, each with its text as an invisible text layer,
+    so the PDF can be searched and its text selected and copied.
+    """
+    name, extension, media_type = "pdf", "pdf", "application/pdf"
+    needs_scan = True
+
+    def write(self, pages):
+        output = fitz.open()
+        with fitz.open(self.file_path) as scan:
+            for page in pages:
+                if page.page_number > scan.page_count:
+                    break
+                output.insert_pdf(scan, from_page=page.page_number - 1, to_page=page.page_number - 1)
+                add_text_layer(output[-1], page.text)
+        if not output.page_count:
+            output.new_page()  # A PDF needs at least one page
+        data = output.tobytes(garbage=3, deflate=True)
+        output.close()
+        for offset in range(0, len(data), CHUNK_SIZE):
+            yield data[offset:offset + CHUNK_SIZE]
+
+def add_text_layer(page: fitz.Page, text: str) -> None:
+    """
+    Write text invisibly (render mode 3) over a page, one line per text line, at the largest
+    font size up to PDF_MAX_FONT_SIZE at which every line fits inside the margins.
+    """
+    lines = [line.strip() for line in text.split("\n")]
+    lines = [line for line in lines if line]
+    if not lines:
+        return
+    rect = page.rect
+    width = max(rect.width - 2 * PDF_MARGIN, 1.0)
+    height = max(rect.height - 2 * PDF_MARGIN, 1.0)
+    font = fitz.Font(PDF_FONT)
+    widest = max(font.text_length(line, fontsize=1.0) for line in lines)
+    font_size = min(PDF_MAX_FONT_SIZE, height / (len(lines) * PDF_LINE_HEIGHT), width / widest if widest else PDF_MAX_FONT_SIZE)
+    font_size = max(font_size, 0.5)
+    writer = fitz.TextWriter(rect)
+    for index, line in enumerate(lines):
+        origin = fitz.Point(rect.x0 + PDF_MARGIN, rect.y0 + PDF_MARGIN + font_size * (1 + index * PDF_LINE_HEIGHT))
+        writer.append(origin, line, font=font, fontsize=font_size)
+    writer.write_text(page, render_mode=3)
+
+def stream_export(document_id: int, writer: ExportWriter, ranges: List[PageRange],
+                  session_factory: Callable[[], Session] = SessionLocal) -> Iterator[bytes]:
+    """
+    Chunks of an export, produced as the response is sent. The pages are read in a session
+    of their own, so the export does not depend on the request's session staying open.
+    """
+    db = session_factory()
+    try:
+        yield from writer.write(iter_page_contents(db, document_id, ranges))
+    except Exception as e:
+        logger.error(f"{writer.name} export of document {document_id} failed while streaming: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
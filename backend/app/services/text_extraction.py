@@ -191,6 +191,7 @@ from sqlalchemy.orm import Session
 import logging
 
 from app.db.models import Page, ExtractedText
+from app.services.formatted_text_codec import encode_formatted_text
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -255,11 +256,6 @@ def process_layout_markers(text_content: str) -> dict:
         dict: Structured formatting data for Word export
     """
     try:
-        # Create clean text without markers for raw_text storage
-        clean_text = text_content
-        for marker in ['[CENTER]', '[INDENT]', '[TITLE]', '[HEADING]']:
-            clean_text = clean_text.replace(marker, '')
-        
         # Split content into lines for processing
         lines = text_content.split('\n')
         formatted_blocks = []
@@ -371,9 +367,9 @@ def process_layout_markers(text_content: str) -> dict:
                 })
         
         # Return structured data similar to what WordGenerator expects
+        # (no clean_text copy: the marker-free text is derivable from raw_text and the blocks)
         return {
             "blocks": formatted_blocks,
-            "clean_text": clean_text.strip(),
             "has_formatting": len([b for b in formatted_blocks if b.get('alignment') != 'left' or b.get('is_bold') or b.get('font_size') != 11]) > 0
         }
         
@@ -390,7 +386,6 @@ def process_layout_markers(text_content: str) -> dict:
                 "is_bold": False,
                 "is_italic": False
             }],
-            "clean_text": text_content,
             "has_formatting": False
         }
 
@@ -534,7 +529,7 @@ Extract all visible text with maximum fidelity to the original document."""},
                 
                 # Process layout markers and create structured formatting
                 formatted_data = process_layout_markers(extracted_text)
-                formatted_text_json = json.dumps(formatted_data)
+                formatted_text_json = encode_formatted_text(formatted_data)
             except Exception as api_error:
                 print(f"ERROR calling GPT Vision API: {str(api_error)}")
                 return {
@@ -0,0 +1,174 @@
+"""
+Validators for the text endpoints (page text, page comparison, corrected text), so they can
+answer If-None-Match with a 304 without loading any text column.
+
+A response's strong ETag hashes what its text rows are, not their content: the document's
+upload date, the ids of the rows and their version in text_versions, plus the options and
+negotiated representation of the response. An after_flush listener bumps the version of a
+row's text whenever it is updated in place or deleted; a new row has a new id. Versions are:
+    ocr             a page's ExtractedText (raw or formatted text)
+    editable_pdf    the document's EditablePDFText (page 0)
+    corrected       the document's CorrectedText (page 0)
+
+Cache-Control depends on the document: text of documents still being processed changes as
+OCR progresses, and that of documents under review as corrections are saved, so both are
+revalidated on every use (a 304 when unchanged). Finalized documents may be reused for
+FINALIZED_TEXT_MAX_AGE seconds.
+"""
+import datetime
+import hashlib
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import and_, event, inspect, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import CorrectedText, Document, EditablePDFText, ExtractedText, Page, TextVersion
+from app.services.char_diff import CHAR_DIFF_VERSION
+from app.services.diff_engine import ENGINE_VERSION, default_engine
+from app.services.page_alignment import counterpart_page
+from app.services.static_delivery import etag_matches
+
+SOURCE_OCR = "ocr"
+SOURCE_EDITABLE_PDF = "editable_pdf"
+SOURCE_CORRECTED = "corrected"
+DOCUMENT_WIDE = 0  # page_number of document-wide text
+
+PROCESSING_STATUSES = {"uploaded", "processing", "images_extracted", "partial"}
+FINALIZED_STATUSES = {"correction_finalized"}
+FINALIZED_TEXT_MAX_AGE = int(os.getenv("FINALIZED_TEXT_MAX_AGE_SECONDS", "300"))
+REVALIDATE = "private, no-cache"
+
+# Text columns whose changes bump a version, by model
+_VERSIONED_COLUMNS = {
+    ExtractedText: ("raw_text", "formatted_text"),
+    EditablePDFText: ("text_content_by_page",),
+    CorrectedText: ("corrected_content_by_page",),
+}
+
+VersionKey = Tuple[int, int, str]  # document_id, page_number, source
+
+def _bump(connection, keys: Iterable[VersionKey]) -> None:
+    now = datetime.datetime.utcnow()
+    table = TextVersion.__table__
+    for document_id, page_number, source in keys:
+        match = (table.c.document_id == document_id) & (table.c.page_number == page_number) & (table.c.source == source)
+        result = connection.execute(update(table).where(match).values(version=table.c.version + 1, updated_at=now))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(
+                document_id=document_id, page_number=page_number, source=source, version=1, updated_at=now
+            ))
+
+@event.listens_for(Session, "after_flush")
+def _bump_versions_after_flush(session: Session, flush_context) -> None:
+    """Bump the version of text rows updated or deleted in this flush, in its transaction."""
+    page_ids = set()
+    keys = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        columns = _VERSIONED_COLUMNS.get(type(obj))
+        if columns is None:
+            continue
+        if obj in session.dirty and not any(inspect(obj).attrs[column].history.has_changes() for column in columns):
+            continue
+        if isinstance(obj, ExtractedText):
+            page_ids.add(obj.page_id)
+        elif isinstance(obj, EditablePDFText):
+            keys.add((obj.document_id, DOCUMENT_WIDE, SOURCE_EDITABLE_PDF))
+        else:
+            keys.add((obj.document_id, DOCUMENT_WIDE, SOURCE_CORRECTED))
+    if not page_ids and not keys:
+        return
+
+    connection = session.connection()
+    if page_ids:
+        # Pages deleted in the same flush are skipped: their document is going too, and a
+        # new document has a new upload date
+        locations = connection.execute(
+            select(Page.document_id, Page.page_number).where(Page.id.in_(page_ids))
+        ).fetchall()
+        keys.update((document_id, page_number, SOURCE_OCR) for document_id, page_number in locations)
+    _bump(connection, sorted(keys))
+
+def _versions(db: Session, document_id: int, keys: List[Tuple[int, str]]) -> List[int]:
+    """Versions of (page_number, source) keys of a document, 0 for text never updated."""
+    rows = db.query(TextVersion.page_number, TextVersion.source, TextVersion.version).filter(
+        TextVersion.document_id == document_id,
+        or_(*(and_(TextVersion.page_number == page_number, TextVersion.source == source) for page_number, source in keys))
+    ).all()
+    found = {(page_number, source): version for page_number, source, version in rows}
+    return [found.get(key, 0) for key in keys]
+
+def cache_control(document_status: Optional[str]) -> str:
+    if document_status in FINALIZED_STATUSES:
+        return f"private, max-age={FINALIZED_TEXT_MAX_AGE}"
+    return REVALIDATE
+
+def make_etag(*parts: Any) -> str:
+    return '"' + hashlib.sha256("/".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+class TextValidators(NamedTuple):
+    etag: str
+    cache_control: str
+    vary: Optional[str] = None
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.vary:
+            headers["Vary"] = self.vary
+        return headers
+
+def not_modified(request: Request, validators: Optional[TextValidators]) -> Optional[Response]:
+    """A 304 response when the request's If-None-Match matches, else None."""
+    if validators is None or not etag_matches(request.headers.get("if-none-match"), validators.etag):
+        return None
+    return Response(status_code=304, headers=validators.headers())
+
+def _document_row(db: Session, document_id: int):
+    return db.query(Document.status, Document.upload_date).filter(Document.id == document_id).first()
+
+def _corrected_id(db: Session, document_id: int) -> Optional[int]:
+    return db.query(CorrectedText.id).filter(CorrectedText.document_id == document_id).scalar()
+
+def page_text_validators(db: Session, document_id: int, page_number: int, *options: Any) -> Optional[TextValidators]:
+    """Validators of a page's text response (corrected text, else OCR text); None if the page does not exist."""
+    row = db.query(Document.status, Document.upload_date, ExtractedText.id).join(
+        Page, Page.document_id == Document.id
+    ).outerjoin(ExtractedText, ExtractedText.page_id == Page.id).filter(
+        Document.id == document_id, Page.page_number == page_number
+    ).first()
+    if row is None:
+        return None
+    status, upload_date, extracted_id = row
+    versions = _versions(db, document_id, [(page_number, SOURCE_OCR), (DOCUMENT_WIDE, SOURCE_CORRECTED)])
+    etag = make_etag("page-text", document_id, upload_date, page_number, extracted_id,
+                     _corrected_id(db, document_id), *versions, *options)
+    return TextValidators(etag, cache_control(status))
+
+def comparison_validators(db: Session, document_id: int, page_number: int, *options: Any,
+                          vary: Optional[str] = None) -> Optional[TextValidators]:
+    """
+    Validators of a page comparison response: Text A, the aligned Document B page and its
+    text, and the diff engine; None if the document does not exist.
+    """
+    document = _document_row(db, document_id)
+    if document is None:
+        return None
+    extracted_id = db.query(ExtractedText.id).join(Page, Page.id == ExtractedText.page_id).filter(
+        Page.document_id == document_id, Page.page_number == page_number
+    ).scalar()
+    editable_id = db.query(EditablePDFText.id).filter(EditablePDFText.document_id == document_id).scalar()
+    versions = _versions(db, document_id, [(page_number, SOURCE_OCR), (DOCUMENT_WIDE, SOURCE_EDITABLE_PDF)])
+    etag = make_etag("comparison", document_id, document.upload_date, page_number, extracted_id, editable_id,
+                     counterpart_page(db, document_id, page_number), *versions,
+                     default_engine(), ENGINE_VERSION, CHAR_DIFF_VERSION, *options)
+    return TextValidators(etag, cache_control(document.status), vary)
+
+def corrected_text_validators(db: Session, document_id: int) -> TextValidators:
+    """Validators of a document's corrected text response."""
+    document = _document_row(db, document_id)
+    version, = _versions(db, document_id, [(DOCUMENT_WIDE, SOURCE_CORRECTED)])
+    etag = make_etag("corrected-text", document_id, document.upload_date if document else None,
+                     _corrected_id(db, document_id), version)
+    return TextValidators(etag, cache_control(document.status if document else None))
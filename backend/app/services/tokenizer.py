@@ -0,0 +1,64 @@
+"""
+Offset-preserving word tokenizer.
+
+Splits text exactly like str.split() (runs of Unicode whitespace) in a single regex pass
+and records where each token sits in the original text, so diff hunks, search hits or
+word geometry can be mapped back to character ranges without rescanning the text.
+"""
+import bisect
+import re
+from array import array
+from typing import Iterator, List, NamedTuple, Tuple
+
+# \s matches the same characters str.isspace() accepts, so tokens equal text.split()
+TOKEN_PATTERN = re.compile(r"\S+")
+
+class TokenizedText(NamedTuple):
+    """Tokens of a text with their character offsets; text[starts[i]:ends[i]] == tokens[i]."""
+    text: str
+    tokens: List[str]
+    starts: array
+    ends: array
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def span(self, first: int, last: int) -> Tuple[int, int]:
+        """
+        Character range covered by tokens[first:last].
+
+        An empty token range maps to an empty range at the end of the preceding token
+        (or at 0), which is where an insertion lands in the text.
+        """
+        if first < last:
+            return self.starts[first], self.ends[last - 1]
+        position = self.ends[first - 1] if first > 0 else 0
+        return position, position
+
+    def token_at(self, offset: int) -> int:
+        """Index of the token containing character `offset`, or -1 if it falls on whitespace."""
+        index = bisect.bisect_right(self.starts, offset) - 1
+        if index >= 0 and offset < self.ends[index]:
+            return index
+        return -1
+
+    def iter_spans(self) -> Iterator[Tuple[str, int, int]]:
+        return zip(self.tokens, self.starts, self.ends)
+
+def tokenize(text: str) -> TokenizedText:
+    """
+    Tokenize text on whitespace, keeping character offsets.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        TokenizedText: Tokens (identical to text.split()) with start/end offsets in array('i').
+    """
+    matches = list(TOKEN_PATTERN.finditer(text))
+    return TokenizedText(
+        text,
+        [match.group() for match in matches],
+        array("i", [match.start() for match in matches]),
+        array("i", [match.end() for match in matches])
+    )
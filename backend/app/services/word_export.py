@@ -0,0 +1,288 @@
+"""
+Word export of a document with a content-addressed file cache and a background job.
+
+A document's export is identified by its content version: a SHA-256 over the page numbers,
+OCR texts, formatting and corrected texts (and EXPORT_FORMAT_VERSION). The DOCX built for
+a version is kept in EXPORT_CACHE_DIR, so exporting an unchanged document again serves the
+cached file; any edit changes the version and the stale file simply ages out.
+
+The cache is bounded by EXPORT_CACHE_MAX_MB and evicted least recently used first: serving
+a cached file touches its modification time, and eviction deletes the oldest files.
+
+Exports stream: page rows are read in batches of PAGE_BATCH, each page is converted and
+rendered on its own, and the document XML is written into the package as it is produced,
+so memory stays flat however many pages a document has (the corrected texts, one JSON
+object per document, are the exception).
+
+Building a new version renders only the pages whose content changed since an earlier export:
+rendered pages are kept as OOXML fragments under EXPORT_CACHE_DIR/fragments (see
+docx_fragments) and reassembled into the package.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Query, Session
+
+from app.db.database import SessionLocal
+from app.db.models import BackgroundJob, CorrectedText, Document, ExtractedText, Page
+from app.services.docx_fragments import FragmentCache, stream_docx
+from app.services.formatted_text_codec import decode_formatted_text
+from app.services.jobs import JOB_COMPLETED, JOB_FAILED, JOB_RUNNING, create_job, find_active_job, update_job
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = "word_export"
+EXPORT_FORMAT_VERSION = "2"  # Bump when WordGenerator output changes, to invalidate cached files
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join("temp_exports", "cache"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_MB", "512")) * 1024 * 1024
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PROGRESS_EVERY = 10  # Pages between progress commits
+PAGE_BATCH = 200  # Page rows fetched per round trip while streaming
+_PARTIAL_SUFFIX = ".partial.docx"
+
+PageRow = Tuple[int, Optional[str], Optional[str]]  # page_number, raw_text, formatted_text
+
+def _page_rows(db: Session, document_id: int) -> Query:
+    """Page rows in page order, fetched PAGE_BATCH at a time as they are iterated."""
+    return db.query(Page.page_number, ExtractedText.raw_text, ExtractedText.formatted_text).outerjoin(
+        ExtractedText, ExtractedText.page_id == Page.id
+    ).filter(Page.document_id == document_id).order_by(Page.page_number).yield_per(PAGE_BATCH)
+
+def _corrected_pages(db: Session, document_id: int) -> Dict[str, str]:
+    content = db.query(CorrectedText.corrected_content_by_page).filter(CorrectedText.document_id == document_id).scalar()
+    if not content:
+        return {}
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        logger.warning(f"Failed to parse corrected text JSON for document {document_id}")
+        return {}
+
+def _version_of(rows: Iterable[PageRow], corrected: Dict[str, str]) -> str:
+    digest = hashlib.sha256(f"word-export/{EXPORT_FORMAT_VERSION}".encode())
+    for page_number, raw_text, formatted_text in rows:
+        for part in (str(page_number), corrected.get(str(page_number)), raw_text, formatted_text):
+            # Length-prefixed, with None distinct from "", so no two inputs hash alike
+            encoded = b"" if part is None else part.encode("utf-8")
+            digest.update(b"-" if part is None else len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+    return digest.hexdigest()
+
+def content_version(db: Session, document_id: int) -> str:
+    """Content version of a document's Word export."""
+    return _version_of(_page_rows(db, document_id), _corrected_pages(db, document_id))
+
+def _page_items(page_number: int, raw_text: Optional[str], formatted_text: Optional[str],
+                corrected: Dict[str, str], first_block_no: int) -> List[Dict[str, Any]]:
+    if str(page_number) in corrected:
+        page_text_content, source = corrected[str(page_number)], "corrected"
+    else:
+        page_text_content, source = raw_text, "extracted"
+    if not page_text_content:
+        return []
+
+    formatted_data = None
+    if source == "extracted" and formatted_text:
+        formatted_data = decode_formatted_text(formatted_text)
+        if formatted_data is None:
+            logger.warning(f"Failed to parse formatted_text for page {page_number}")
+
+    items = []
+    if formatted_data and "blocks" in formatted_data:
+        for block in formatted_data["blocks"]:
+            items.append({
+                "text": block.get("text", ""),
+                "page": page_number,
+                "block_no": block.get("block_no", first_block_no + len(items)),
+                "line_no": 0,
+                "font": "Calibri",
+                "size": block.get("font_size", 11),
+                "color": (0, 0, 0),  # Black
+                "is_bold": block.get("is_bold", False),
+                "is_italic": block.get("is_italic", False),
+                "alignment": block.get("alignment", "left"),
+                "is_title": block.get("is_title", False),
+                "is_heading": block.get("is_heading", False),
+                "is_indent": block.get("is_indent", False),
+                "is_last_span_in_line": True,
+                "bbox": [0, 0, 100, 20]  # Default bbox
+            })
+    else:
+        items.append({
+            "text": page_text_content,
+            "page": page_number,
+            "block_no": first_block_no,
+            "line_no": 0,
+            "font": "Calibri",
+            "size": 11,
+            "color": (0, 0, 0),
+            "is_bold": False,
+            "is_italic": False,
+            "alignment": "left",
+            "is_last_span_in_line": True,
+            "bbox": [0, 0, 100, 20]
+        })
+    return items
+
+def iter_export_pages(rows: Iterable[PageRow], corrected: Dict[str, str]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    WordGenerator input page by page, converted as the rows are read: corrected text where
+    there is some, else the OCR text with its formatting blocks when available. Pages without
+    text give an empty list.
+    """
+    block_count = 0
+    for page_number, raw_text, formatted_text in rows:
+        items = _page_items(page_number, raw_text, formatted_text, corrected, block_count)
+        block_count += len(items)
+        yield items
+
+def export_file_name(document: Document, extension: str = "docx") -> str:
+    """Download name of a document's export (by default, the Word export)."""
+    safe_filename = "".join(c if c.isalnum() else "_" for c in document.filename)
+    if not safe_filename.lower().endswith(".pdf"):
+        safe_filename += f"_doc_{document.id}"
+    else:
+        safe_filename = safe_filename[:-4] + f"_doc_{document.id}"
+    return f"{safe_filename}_corrected.{extension}"
+
+def export_path(document_id: int, version: str) -> str:
+    return os.path.join(EXPORT_CACHE_DIR, f"doc_{document_id}_{version}.docx")
+
+def cached_export(document_id: int, version: str) -> Optional[str]:
+    """Path of the cached export of a version (marked as recently used), or None."""
+    path = export_path(document_id, version)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+def evict_exports(max_bytes: int = EXPORT_CACHE_MAX_BYTES, keep: Optional[str] = None) -> int:
+    """Delete least recently used exports until the cache fits max_bytes; returns the number deleted."""
+    files = []
+    for path in glob.glob(os.path.join(EXPORT_CACHE_DIR, "*.docx")):
+        if path.endswith(_PARTIAL_SUFFIX):
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    if deleted:
+        logger.info(f"Evicted {deleted} cached Word exports")
+    return deleted
+
+def remove_exports(document_id: int) -> None:
+    """Delete every cached export of a document."""
+    for path in glob.glob(os.path.join(EXPORT_CACHE_DIR, f"doc_{document_id}_*.docx")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def fragment_cache() -> FragmentCache:
+    return FragmentCache(os.path.join(EXPORT_CACHE_DIR, "fragments"))
+
+def build_export(db: Session, document_id: int, progress: Optional[Callable[[int, int], None]] = None,
+                 stats: Optional[Dict[str, int]] = None) -> Tuple[str, str]:
+    """
+    Word export of the current content of a document, from the cache or freshly generated.
+
+    When generated, the numbers of pages rendered and reused from the fragment cache are
+    added to stats.
+
+    Returns:
+        Tuple[str, str]: The content version and the path of the DOCX file.
+
+    Raises:
+        ValueError: If the document has no extracted or corrected text.
+    """
+    corrected = _corrected_pages(db, document_id)
+    version = _version_of(_page_rows(db, document_id), corrected)
+    path = cached_export(document_id, version)
+    if path is not None:
+        return version, path
+
+    total = db.query(Page.id).filter(Page.document_id == document_id).count()
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    path = export_path(document_id, version)
+    # Written under a unique name and renamed, so concurrent builds never serve a partial file
+    partial = f"{path[:-len('.docx')]}.{uuid.uuid4().hex}{_PARTIAL_SUFFIX}"
+    try:
+        pages = iter_export_pages(_page_rows(db, document_id), corrected)
+        counts = stream_docx(pages, partial, fragment_cache(), progress=progress, total=total)
+        if not counts["pages_rendered"] + counts["pages_reused"]:
+            raise ValueError("No extracted or corrected text available for this document")
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    evict_exports(keep=path)
+    if stats is not None:
+        stats.update(counts)
+    return version, path
+
+def start_word_export(db: Session, document_id: int) -> Tuple[BackgroundJob, bool]:
+    """
+    Create an export job for a document unless one is already queued or running.
+
+    Returns:
+        Tuple[BackgroundJob, bool]: The job and whether it was newly created (and must be run).
+    """
+    active = find_active_job(db, JOB_TYPE, document_id)
+    if active is not None:
+        return active, False
+    total = db.query(Page.id).filter(Page.document_id == document_id).count()
+    return create_job(db, JOB_TYPE, document_id, total=total), True
+
+def run_word_export(job_id: int, session_factory=SessionLocal) -> None:
+    """
+    Build the Word export of a document into the cache, reporting progress per page.
+
+    Meant to run outside the event loop (BackgroundTasks runs it in the thread pool).
+    """
+    db = session_factory()
+    job = db.get(BackgroundJob, job_id)
+    if job is None:
+        db.close()
+        return
+    document_id = job.document_id
+    try:
+        update_job(db, job, status=JOB_RUNNING, current=0)
+
+        def progress(done: int, total: int) -> None:
+            if done % PROGRESS_EVERY == 0 or done == total:
+                update_job(db, job, current=done, total=total)
+
+        stats = {"pages_rendered": 0, "pages_reused": 0}
+        version, path = build_export(db, document_id, progress=progress, stats=stats)
+        update_job(db, job, status=JOB_COMPLETED, result={
+            "version": version,
+            "size": os.path.getsize(path),
+            **stats
+        })
+        logger.info(f"Word export job {job_id} for document {document_id} completed")
+    except Exception as e:
+        logger.error(f"Word export job {job_id} for document {document_id} failed: {e}", exc_info=True)
+        db.rollback()
+        update_job(db, job, status=JOB_FAILED, error=str(e))
+    finally:
+        db.close()
@@ -0,0 +1,203 @@
+"""
+Word geometry of Document B pages and a grid index for spatial and offset lookups.
+
+Word boxes come from PyMuPDF's page.get_text("words") and are stored per page in compact
+array-backed form: one float32 array with x0, y0, x1, y1 per word (PDF points, origin top
+left) and one int32 array with the start/end character offsets of each word in the page
+text (-1 when a word could not be located in it).
+
+Lookups go through WordIndex, a uniform grid over the page whose cells list the words
+overlapping them. Indexes are built on first use and kept in a small LRU cache, so point,
+rectangle and offset queries cost a few microseconds plus the database lookup.
+"""
+import bisect
+import logging
+import math
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import PageWordGeometry
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EDITABLE_PDF = "editable_pdf"
+RENDER_SCALE = 2.0  # Page images are rendered at 2x (see pdf_processing); multiply points by this for pixels
+MAX_GRID_SIZE = 64  # Cells per side
+INDEX_CACHE_SIZE = 256  # Page indexes kept in memory
+
+class PageWords(NamedTuple):
+    """Words of one page with their boxes and offsets into the page text."""
+    width: float
+    height: float
+    words: List[str]
+    boxes: array  # 'f': x0, y0, x1, y1 per word
+    offsets: array  # 'i': start, end per word
+
+def words_from_page(page, text_content: str) -> PageWords:
+    """
+    Word boxes of a PyMuPDF page, located in text_content (the page's get_text("text")).
+
+    Both come from the same text layer in the same order, so each word is searched from the
+    end of the previous one.
+    """
+    words, boxes, offsets = [], array("f"), array("i")
+    cursor = 0
+    for x0, y0, x1, y1, word, *_ in page.get_text("words"):
+        start = text_content.find(word, cursor)
+        if start >= 0:
+            cursor = start + len(word)
+            offsets.extend((start, cursor))
+        else:
+            offsets.extend((-1, -1))
+        words.append(word)
+        boxes.extend((x0, y0, x1, y1))
+    return PageWords(page.rect.width, page.rect.height, words, boxes, offsets)
+
+def _to_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data or b"")
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def store_page_words(db: Session, document_id: int, words_by_page: Dict[int, PageWords],
+                     source: str = SOURCE_EDITABLE_PDF, commit: bool = True) -> None:
+    """Replace the stored word geometry of a document's pages."""
+    db.query(PageWordGeometry).filter(
+        PageWordGeometry.document_id == document_id,
+        PageWordGeometry.source == source
+    ).delete(synchronize_session=False)
+    for page_number, page_words in words_by_page.items():
+        db.add(PageWordGeometry(
+            document_id=document_id,
+            source=source,
+            page_number=page_number,
+            page_width=page_words.width,
+            page_height=page_words.height,
+            word_count=len(page_words.words),
+            words="\n".join(page_words.words),
+            boxes=_to_bytes(page_words.boxes),
+            offsets=_to_bytes(page_words.offsets)
+        ))
+    if commit:
+        db.commit()
+
+class WordIndex:
+    """Uniform grid over a page's word boxes, plus a sorted offset table."""
+
+    def __init__(self, page_words: PageWords):
+        self.width, self.height = page_words.width, page_words.height
+        self.words, self.boxes, self.offsets = page_words.words, page_words.boxes, page_words.offsets
+        count = len(self.words)
+        # About two words per cell
+        self.size = max(1, min(MAX_GRID_SIZE, math.ceil(math.sqrt(count / 2))))
+        self.cell_width = (self.width or 1.0) / self.size
+        self.cell_height = (self.height or 1.0) / self.size
+        self.cells: List[List[int]] = [[] for _ in range(self.size * self.size)]
+        boxes = self.boxes
+        for index in range(count):
+            col0, row0, col1, row1 = self._cell_range(boxes[4 * index], boxes[4 * index + 1], boxes[4 * index + 2], boxes[4 * index + 3])
+            for row in range(row0, row1 + 1):
+                base = row * self.size
+                for col in range(col0, col1 + 1):
+                    self.cells[base + col].append(index)
+        located = sorted((self.offsets[2 * index], index) for index in range(count) if self.offsets[2 * index] >= 0)
+        self._starts = [start for start, _ in located]
+        self._order = [index for _, index in located]
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float) -> Tuple[int, int, int, int]:
+        last = self.size - 1
+        return (
+            min(last, max(0, int(x0 / self.cell_width))),
+            min(last, max(0, int(y0 / self.cell_height))),
+            min(last, max(0, int(x1 / self.cell_width))),
+            min(last, max(0, int(y1 / self.cell_height)))
+        )
+
+    def box(self, index: int) -> Tuple[float, float, float, float]:
+        return tuple(self.boxes[4 * index:4 * index + 4])
+
+    def at_point(self, x: float, y: float, tolerance: float = 0.0) -> List[int]:
+        """Words whose box (grown by tolerance) contains (x, y), in reading order."""
+        return self.in_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float, contained: bool = False) -> List[int]:
+        """Words intersecting (or, with contained=True, fully inside) a rectangle, in reading order."""
+        boxes = self.boxes
+        col0, row0, col1, row1 = self._cell_range(x0, y0, x1, y1)
+        found = set()
+        for row in range(row0, row1 + 1):
+            base = row * self.size
+            for col in range(col0, col1 + 1):
+                for index in self.cells[base + col]:
+                    if index in found:
+                        continue
+                    bx0, by0, bx1, by1 = boxes[4 * index], boxes[4 * index + 1], boxes[4 * index + 2], boxes[4 * index + 3]
+                    if contained:
+                        hit = x0 <= bx0 and bx1 <= x1 and y0 <= by0 and by1 <= y1
+                    else:
+                        hit = bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1
+                    if hit:
+                        found.add(index)
+        return sorted(found)
+
+    def at_offset(self, offset: int) -> Optional[int]:
+        """Word containing character `offset` of the page text, or None if it falls between words."""
+        position = bisect.bisect_right(self._starts, offset) - 1
+        if position < 0:
+            return None
+        index = self._order[position]
+        return index if offset < self.offsets[2 * index + 1] else None
+
+    def describe(self, index: int, scale: float = 1.0) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "word": self.words[index],
+            "box": [round(value * scale, 2) for value in self.box(index)],
+            "start": self.offsets[2 * index] if self.offsets[2 * index] >= 0 else None,
+            "end": self.offsets[2 * index + 1] if self.offsets[2 * index] >= 0 else None
+        }
+
+_index_cache: "OrderedDict[Tuple, WordIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_word_index(db: Session, document_id: int, page_number: int, source: str = SOURCE_EDITABLE_PDF) -> Optional[WordIndex]:
+    """Grid index of a stored page, built on first use (None if the page has no stored geometry)."""
+    version = db.query(PageWordGeometry.id, PageWordGeometry.created_at).filter(
+        PageWordGeometry.document_id == document_id,
+        PageWordGeometry.source == source,
+        PageWordGeometry.page_number == page_number
+    ).first()
+    if version is None:
+        return None
+    key = (document_id, source, page_number, version.id, version.created_at)
+    with _cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    row = db.get(PageWordGeometry, version.id)
+    index = WordIndex(PageWords(
+        row.page_width,
+        row.page_height,
+        row.words.split("\n") if row.words else [],
+        _from_bytes("f", row.boxes),
+        _from_bytes("i", row.offsets)
+    ))
+    with _cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
@@ -1,22 +1,60 @@
 from docx import Document
-from docx.shared import Pt, RGBColor
+from docx.shared import Inches, Pt, RGBColor
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from typing import List, Dict
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from typing import List, Dict, Optional, Tuple
 import logging
 import traceback
 import sys
 
+# Styles defined once per document by the styled (fast) path
+DEFAULT_FONT = "Calibri"
+DEFAULT_SIZE = 11
+BLACK = RGBColor(0, 0, 0)
+# Block kind: (paragraph style name, bold, indented)
+PARAGRAPH_STYLES = {
+    "body": ("Export Body", False, False),
+    "title": ("Export Title", True, False),
+    "heading": ("Export Heading", True, False),
+    "indent": ("Export Indent", False, True),
+}
+# (bold, italic) on top of the paragraph style: character style name
+CHARACTER_STYLES = {
+    (True, False): "Export Strong",
+    (False, True): "Export Emphasis",
+    (True, True): "Export Strong Emphasis",
+}
+
 class WordGenerator:
-    def __init__(self, formatted_text: List[Dict]):
+    def __init__(self, formatted_text: List[Dict], fast: bool = False):
+        """
+        Args:
+            formatted_text (List[Dict]): Text spans with formatting
+            fast (bool): Render paragraphs with shared styles and merged runs, writing only the
+                formatting that differs from the style, instead of fully formatting every run
+        """
         self.formatted_text = formatted_text
+        self.fast = fast
         self.logger = logging.getLogger(__name__)
+        self._paragraph_styles: Dict[str, Tuple[str, bool]] = {}
+        self._character_styles: Dict[Tuple[bool, bool], str] = {}
+
+    def new_document(self) -> Document:
+        """A blank Word document, with the export styles defined when rendering the styled way."""
+        doc = Document()
+        if self.fast:
+            self._add_styles(doc)
+        return doc
         
-    def generate_document(self, output_path: str):
+    def generate_document(self, output_path: str, progress=None):
         """
         Create a Word document from formatted text stored in self.formatted_text.
         
         Args:
             output_path (str): Path where the Word document will be saved
+            progress (callable, optional): Called with (pages done, total pages) after each page
         """
         try:
             self.logger.info(f"Creating Word document at: {output_path}")
@@ -31,50 +69,7 @@ class WordGenerator:
             
             self.logger.info(f"Text elements by page: {page_counts}")
             
-            validated_text = []
-            for item in self.formatted_text:
-                # Skip items without text
-                if not item.get("text"):
-                    continue
-                    
-                # Ensure all required keys exist
-                clean_item = {
-                    "text": item.get("text", ""),
-                    "font": item.get("font", "Calibri"),
-                    "size": item.get("size", 11),
-                    # Default to black color for text visibility
-                    "color": (0, 0, 0),  
-                    "is_bold": item.get("is_bold", False),
-                    "is_italic": item.get("is_italic", False),
-                    "page": item.get("page", 1),
-                    "block_no": item.get("block_no", 0),
-                    "line_no": item.get("line_no", 0),
-                    "is_last_span_in_line": item.get("is_last_span_in_line", False),
-                    "bbox": item.get("bbox", [0, 0, 100, 20])
-                }
-                
-                # Only add the original color if it's from the original PDF extraction
-                # This helps avoid white text from edited content
-                if "color" in item and isinstance(item["color"], (list, tuple)) and len(item["color"]) >= 3:
-                    # Check if the color is too light (close to white)
-                    r, g, b = item["color"][:3]
-                    
-                    # Convert to values between 0-255 if they're not already
-                    if isinstance(r, float) and r <= 1.0:
-                        r = int(r * 255)
-                    if isinstance(g, float) and g <= 1.0:
-                        g = int(g * 255)
-                    if isinstance(b, float) and b <= 1.0:
-                        b = int(b * 255)
-                    
-                    # Calculate brightness (higher values are lighter)
-                    brightness = (r + g + b) / 3
-                    
-                    # If the color is too light (close to white), use black instead
-                    if brightness < 230:  # Threshold for "not too light"
-                        clean_item["color"] = item["color"]
-                
-                validated_text.append(clean_item)
+            validated_text = self.validate_items()
                 
             if not validated_text:
                 self.logger.warning("No valid text to export to Word document")
@@ -87,96 +82,33 @@ class WordGenerator:
                 
             # Continue with normal processing using validated text
             self.logger.info(f"Processing {len(validated_text)} validated text elements")
-            doc = Document()
+            doc = self.new_document()
             
             # Group text elements by page and block for better structure
             text_by_blocks = self._group_by_page_and_block(validated_text)
             self.logger.info(f"Grouped text into {len(text_by_blocks)} pages")
             
             # Process each page and block
-            for page_num in sorted(text_by_blocks.keys()):
+            for page_index, page_num in enumerate(sorted(text_by_blocks.keys())):
+                if progress and page_index:
+                    progress(page_index, len(text_by_blocks))
                 # Add page break for new pages (except the first page)
                 if page_num > 1:
-                    doc.add_page_break()
+                    if self.fast:
+                        self._add_p(doc).add_r().add_br().type = "page"
+                    else:
+                        doc.add_page_break()
                 
                 self.logger.info(f"Processing page {page_num} with {len(text_by_blocks[page_num])} blocks")
                 
                 # Process blocks on this page
-                for block_no in sorted(text_by_blocks[page_num].keys()):
-                    # Create a new paragraph for this block
-                    current_paragraph = doc.add_paragraph()
-                    current_line_no = -1
-                    
-                    # Get spans for this block
-                    spans = text_by_blocks[page_num][block_no]
-                    
-                    # Sort spans by line and position
-                    spans.sort(key=lambda x: (x.get("line_no", 0), x.get("bbox", [0, 0, 0, 0])[0]))
-                    
-                    # Check if this is a special formatting block (single span with formatting)
-                    if len(spans) == 1:
-                        span = spans[0]
-                        
-                        # Apply paragraph-level formatting for special blocks
-                        if span.get("alignment") == "center":
-                            current_paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                        elif span.get("is_indent"):
-                            # Add indentation for indent blocks
-                            from docx.shared import Inches
-                            current_paragraph.paragraph_format.left_indent = Inches(0.5)
-                        
-                        # Add the text with appropriate formatting
-                        if span.get("text"):
-                            run = current_paragraph.add_run(span.get("text", ""))
-                            
-                            # Apply text formatting
-                            font = run.font
-                            font.name = span.get("font", "Calibri")
-                            font.size = Pt(span.get("size", 11))
-                            font.bold = span.get("is_bold", False)
-                            font.italic = span.get("is_italic", False)
-                            font.color.rgb = RGBColor(0, 0, 0)  # Black
-                            
-                            # Apply color if available
-                            if "color" in span and span["color"]:
-                                self._apply_color_to_run(font, span["color"])
-                    else:
-                        # Process multiple spans in the block (regular paragraph)
-                        for span in spans:
-                            # Skip empty spans
-                            if not span.get("text"):
-                                continue
-                            
-                            # Check if we need to add a line break within the same paragraph
-                            if "line_no" in span and span["line_no"] != current_line_no and current_line_no != -1:
-                                # Add line break instead of paragraph break
-                                current_paragraph.add_run().add_break()
-                            
-                            current_line_no = span.get("line_no", 0)
-                            
-                            # Create text run with proper formatting
-                            run = current_paragraph.add_run(span.get("text", "").rstrip())
-                            
-                            # Apply formatting to this specific run only
-                            font = run.font
-                            font.name = span.get("font", "Calibri")
-                            font.size = Pt(span.get("size", 11))
-                            font.bold = span.get("is_bold", False)
-                            font.italic = span.get("is_italic", False)
-                            font.color.rgb = RGBColor(0, 0, 0)
-                            
-                            # Set color if available and not too light
-                            if "color" in span and span["color"]:
-                                self._apply_color_to_run(font, span["color"])
-                            
-                            # Add space after text if not the last span in a line and there's no space already
-                            span_text = span.get("text", "")
-                            if not span.get("is_last_span_in_line", False) and not span_text.endswith(" "):
-                                current_paragraph.add_run(" ")
+                self.render_page(doc, text_by_blocks[page_num])
             
             # Save the document
             try:
                 doc.save(output_path)
+                if progress:
+                    progress(len(text_by_blocks), len(text_by_blocks))
                 self.logger.info(f"Word document saved to {output_path}")
             except Exception as save_error:
                 self.logger.error(f"Error saving Word document: {str(save_error)}")
@@ -215,6 +147,266 @@ class WordGenerator:
             
             raise
             
+    def validate_items(self, items: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Items (default: self.formatted_text) that have text, with defaults filled in and colors
+        too close to white replaced by black.
+        """
+        validated_text = []
+        for item in self.formatted_text if items is None else items:
+            # Skip items without text
+            if not item.get("text"):
+                continue
+
+            # Ensure all required keys exist
+            clean_item = {
+                "text": item.get("text", ""),
+                "font": item.get("font", "Calibri"),
+                "size": item.get("size", 11),
+                # Default to black color for text visibility
+                "color": (0, 0, 0),  
+                "is_bold": item.get("is_bold", False),
+                "is_italic": item.get("is_italic", False),
+                "page": item.get("page", 1),
+                "block_no": item.get("block_no", 0),
+                "line_no": item.get("line_no", 0),
+                "is_last_span_in_line": item.get("is_last_span_in_line", False),
+                "bbox": item.get("bbox", [0, 0, 100, 20])
+            }
+
+            # Block-level formatting, applied to single-span blocks
+            for key in ("alignment", "is_indent", "is_title", "is_heading"):
+                if key in item:
+                    clean_item[key] = item[key]
+
+            # Only add the original color if it's from the original PDF extraction
+            # This helps avoid white text from edited content
+            if "color" in item and isinstance(item["color"], (list, tuple)) and len(item["color"]) >= 3:
+                # Check if the color is too light (close to white)
+                r, g, b = item["color"][:3]
+
+                # Convert to values between 0-255 if they're not already
+                if isinstance(r, float) and r <= 1.0:
+                    r = int(r * 255)
+                if isinstance(g, float) and g <= 1.0:
+                    g = int(g * 255)
+                if isinstance(b, float) and b <= 1.0:
+                    b = int(b * 255)
+
+                # Calculate brightness (higher values are lighter)
+                brightness = (r + g + b) / 3
+
+                # If the color is too light (close to white), use black instead
+                if brightness < 230:  # Threshold for "not too light"
+                    clean_item["color"] = item["color"]
+
+            validated_text.append(clean_item)
+        return validated_text
+
+    def render_page(self, doc: Document, blocks: Dict) -> None:
+        """
+        Add the paragraphs of one page to a Word document.
+
+        Args:
+            doc (Document): The Word document
+            blocks (Dict): Validated spans of the page by block number (see _group_by_page_and_block)
+        """
+        if self.fast:
+            self._render_page_styled(doc, blocks)
+            return
+        for block_no in sorted(blocks.keys()):
+            # Create a new paragraph for this block
+            current_paragraph = doc.add_paragraph()
+            current_line_no = -1
+
+            # Get spans for this block
+            spans = blocks[block_no]
+
+            # Sort spans by line and position
+            spans.sort(key=lambda x: (x.get("line_no", 0), x.get("bbox", [0, 0, 0, 0])[0]))
+
+            # Check if this is a special formatting block (single span with formatting)
+            if len(spans) == 1:
+                span = spans[0]
+
+                # Apply paragraph-level formatting for special blocks
+                if span.get("alignment") == "center":
+                    current_paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+                elif span.get("is_indent"):
+                    # Add indentation for indent blocks
+                    from docx.shared import Inches
+                    current_paragraph.paragraph_format.left_indent = Inches(0.5)
+
+                # Add the text with appropriate formatting
+                if span.get("text"):
+                    run = current_paragraph.add_run(span.get("text", ""))
+
+                    # Apply text formatting
+                    font = run.font
+                    font.name = span.get("font", "Calibri")
+                    font.size = Pt(span.get("size", 11))
+                    font.bold = span.get("is_bold", False)
+                    font.italic = span.get("is_italic", False)
+                    font.color.rgb = RGBColor(0, 0, 0)  # Black
+
+                    # Apply color if available
+                    if "color" in span and span["color"]:
+                        self._apply_color_to_run(font, span["color"])
+            else:
+                # Process multiple spans in the block (regular paragraph)
+                for span in spans:
+                    # Skip empty spans
+                    if not span.get("text"):
+                        continue
+
+                    # Check if we need to add a line break within the same paragraph
+                    if "line_no" in span and span["line_no"] != current_line_no and current_line_no != -1:
+                        # Add line break instead of paragraph break
+                        current_paragraph.add_run().add_break()
+
+                    current_line_no = span.get("line_no", 0)
+
+                    # Create text run with proper formatting
+                    run = current_paragraph.add_run(span.get("text", "").rstrip())
+
+                    # Apply formatting to this specific run only
+                    font = run.font
+                    font.name = span.get("font", "Calibri")
+                    font.size = Pt(span.get("size", 11))
+                    font.bold = span.get("is_bold", False)
+                    font.italic = span.get("is_italic", False)
+                    font.color.rgb = RGBColor(0, 0, 0)
+
+                    # Set color if available and not too light
+                    if "color" in span and span["color"]:
+                        self._apply_color_to_run(font, span["color"])
+
+                    # Add space after text if not the last span in a line and there's no space already
+                    span_text = span.get("text", "")
+                    if not span.get("is_last_span_in_line", False) and not span_text.endswith(" "):
+                        current_paragraph.add_run(" ")
+
+    def _add_styles(self, doc: Document) -> None:
+        """Define the paragraph and character styles of the styled path in a document."""
+        styles = doc.styles
+        for kind, (name, bold, indented) in PARAGRAPH_STYLES.items():
+            style = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+            style.base_style = styles["Normal"]
+            style.font.name = DEFAULT_FONT
+            style.font.size = Pt(DEFAULT_SIZE)
+            if bold:
+                style.font.bold = True
+            if indented:
+                style.paragraph_format.left_indent = Inches(0.5)
+            self._paragraph_styles[kind] = (style.style_id, bold)
+        for (bold, italic), name in CHARACTER_STYLES.items():
+            style = styles.add_style(name, WD_STYLE_TYPE.CHARACTER)
+            style.font.bold = bold or None
+            style.font.italic = italic or None
+            self._character_styles[(bold, italic)] = style.style_id
+
+    def _render_page_styled(self, doc: Document, blocks: Dict) -> None:
+        """
+        render_page for the styled path: each block is a paragraph of its style, adjacent spans
+        with the same formatting share one run, and a run only carries the formatting that
+        differs from its paragraph style.
+        """
+        for block_no in sorted(blocks.keys()):
+            spans = blocks[block_no]
+            p = self._add_p(doc)
+            center = False
+            if len(spans) == 1:
+                span = spans[0]
+                center = span.get("alignment") == "center"
+                if span.get("is_title"):
+                    kind = "title"
+                elif span.get("is_heading"):
+                    kind = "heading"
+                elif span.get("is_indent") and not center:
+                    kind = "indent"
+                else:
+                    kind = "body"
+                style_id, style_bold = self._paragraph_styles[kind]
+                runs = [(self._run_format(span), [span["text"]])] if span.get("text") else []
+            else:
+                style_id, style_bold = self._paragraph_styles["body"]
+                runs = self._merged_runs(spans)
+            p.style = style_id
+            if center:
+                p.get_or_add_pPr().jc_val = WD_PARAGRAPH_ALIGNMENT.CENTER
+            for (font, size, bold, italic, color), parts in runs:
+                r = p.add_r()
+                extra_bold = bold and not style_bold
+                if extra_bold or italic:
+                    r.style = self._character_styles[(extra_bold, italic)]
+                if style_bold and not bold:
+                    r.get_or_add_rPr()._set_bool_val("b", False)
+                if font != DEFAULT_FONT:
+                    rPr = r.get_or_add_rPr()
+                    rPr.rFonts_ascii = font
+                    rPr.rFonts_hAnsi = font
+                if size != DEFAULT_SIZE:
+                    r.get_or_add_rPr().sz_val = Pt(size)
+                if color is not None:
+                    r.get_or_add_rPr().get_or_add_color().val = color
+                # "\n" becomes a line break, as with Run.text
+                r.text = "".join(parts)
+
+    def _add_p(self, doc: Document):
+        """
+        Append a w:p element to the body. Unlike CT_Body.add_p, which looks for the sectPr
+        from the first child on and so makes building a long document quadratic, this checks
+        the last child only.
+        """
+        body = doc.element.body
+        p = OxmlElement("w:p")
+        try:
+            last = body[-1]
+        except IndexError:
+            last = None
+        if last is not None and last.tag == qn("w:sectPr"):
+            last.addprevious(p)
+        else:
+            body.append(p)
+        return p
+
+    def _merged_runs(self, spans: List[Dict]) -> List[Tuple[Tuple, List[str]]]:
+        """Runs of a multi-span block as (format, text parts), merging adjacent spans of one format."""
+        if len(spans) > 1:
+            spans.sort(key=lambda x: (x.get("line_no", 0), x.get("bbox", [0, 0, 0, 0])[0]))
+        runs = []
+        current_line_no = -1
+        for span in spans:
+            span_text = span.get("text", "")
+            if not span_text:
+                continue
+            run_format = self._run_format(span)
+            if runs and runs[-1][0] == run_format:
+                parts = runs[-1][1]
+            else:
+                parts = []
+                runs.append((run_format, parts))
+            if "line_no" in span and span["line_no"] != current_line_no and current_line_no != -1:
+                # Line break instead of paragraph break, at the end of the previous run
+                (runs[-2][1] if not parts and len(runs) > 1 else parts).append("\n")
+            current_line_no = span.get("line_no", 0)
+            parts.append(span_text.rstrip())
+            if not span.get("is_last_span_in_line", False) and not span_text.endswith(" "):
+                parts.append(" ")
+        return runs
+
+    def _run_format(self, span: Dict) -> Tuple[str, float, bool, bool, Optional[RGBColor]]:
+        """Formatting of a span's run: font, size, bold, italic and its color unless black."""
+        color = span.get("color")
+        if not color or (isinstance(color, (list, tuple)) and not any(color[:3])):
+            rgb = None  # The default: no color conversion and no color element
+        else:
+            rgb = self._to_rgb(color)
+            if rgb == BLACK:
+                rgb = None
+        return (span.get("font", DEFAULT_FONT), span.get("size", DEFAULT_SIZE), bool(span.get("is_bold")),
+                bool(span.get("is_italic")), rgb)
+
     def add_metadata(self, doc: Document, title: str, author: str = None):
         """
         Add metadata to the Word document.
@@ -269,6 +461,15 @@ class WordGenerator:
             font: The font object to apply color to
             color_value: The color value (can be tuple, list, int)
         """
+        font.color.rgb = self._to_rgb(color_value)
+
+    def _to_rgb(self, color_value) -> RGBColor:
+        """
+        Text color of a color value, black if it is too light or invalid.
+        
+        Args:
+            color_value: The color value (can be tuple, list, int)
+        """
         try:
             # Handle different color formats
             if isinstance(color_value, (list, tuple)) and len(color_value) >= 3:
@@ -290,13 +491,12 @@ class WordGenerator:
                     # If color is too light (close to white), use black instead
                     if brightness > 230:
                         self.logger.info(f"Converting light color {(r,g,b)} to black for better visibility")
-                        font.color.rgb = RGBColor(0, 0, 0)
-                    else:
-                        font.color.rgb = RGBColor(r, g, b)
+                        return BLACK
+                    return RGBColor(r, g, b)
                 except (ValueError, TypeError):
                     # If conversion fails, use default black
                     self.logger.warning(f"Invalid color value: {color_value}, using black instead")
-                    font.color.rgb = RGBColor(0, 0, 0)
+                    return BLACK
             elif isinstance(color_value, (int, float)):
                 # Grayscale value
                 try:
@@ -306,17 +506,16 @@ class WordGenerator:
                     # If grayscale value is too light, use black instead
                     if gray > 230:
                         self.logger.info(f"Converting light grayscale {gray} to black for better visibility")
-                        font.color.rgb = RGBColor(0, 0, 0)
-                    else:
-                        font.color.rgb = RGBColor(gray, gray, gray)
+                        return BLACK
+                    return RGBColor(gray, gray, gray)
                 except (ValueError, TypeError):
                     # If conversion fails, use default black
                     self.logger.warning(f"Invalid grayscale value: {color_value}, using black instead")
-                    font.color.rgb = RGBColor(0, 0, 0)
+                    return BLACK
             else:
                 # For any other case, use default black
-                font.color.rgb = RGBColor(0, 0, 0)
+                return BLACK
         except Exception as e:
             # Catch any other errors and use black as fallback
             self.logger.error(f"Error applying color: {str(e)}")
-            font.color.rgb = RGBColor(0, 0, 0) 
\ No newline at end of file
+            return BLACK
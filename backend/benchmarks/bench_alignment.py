@@ -0,0 +1,59 @@
+"""
+Benchmark page alignment on synthetic documents with shifted pagination.
+
+Document B is Document A with OCR-style word noise, an extra cover page, a few dropped
+pages and a few inserted pages, so the correct mapping is known. Reports the alignment
+time and how many Document A pages were mapped to the right Document B page.
+
+Usage (from the backend directory):
+    python benchmarks/bench_alignment.py
+    python benchmarks/bench_alignment.py --pages 100 1000 5000 --words 400 --noise 0.2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.page_alignment import align_pages  # noqa: E402
+
+def make_documents(rng: random.Random, pages: int, words: int, noise: float):
+    vocabulary = [f"w{index}" for index in range(20000)]
+    texts_a = {page: " ".join(rng.choices(vocabulary, k=words)) for page in range(1, pages + 1)}
+    dropped = set(rng.sample(range(2, pages + 1), k=max(1, pages // 200)))
+    inserted = set(rng.sample(range(2, pages + 1), k=max(1, pages // 200)))
+
+    texts_b = {1: "Cover page"}
+    expected = {}
+    for page, text in texts_a.items():
+        if page in inserted:
+            texts_b[len(texts_b) + 1] = " ".join(rng.choices(vocabulary, k=words))
+        if page in dropped:
+            expected[page] = None
+            continue
+        noisy = [word + "1" if rng.random() < noise else word for word in text.split()]
+        texts_b[len(texts_b) + 1] = " ".join(noisy)
+        expected[page] = len(texts_b)
+    return texts_a, texts_b, expected
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 3000, 10000])
+    parser.add_argument("--words", type=int, default=300, help="Words per page")
+    parser.add_argument("--noise", type=float, default=0.1, help="Fraction of words with an OCR error")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'pages':>7}{'pages B':>9}{'ms':>10}{'correct':>10}")
+    for pages in args.pages:
+        texts_a, texts_b, expected = make_documents(rng, pages, args.words, args.noise)
+        started = time.perf_counter()
+        alignment = align_pages(texts_a, texts_b)
+        elapsed = (time.perf_counter() - started) * 1000
+        correct = sum(1 for page, page_b in expected.items() if alignment[page][0] == page_b)
+        print(f"{pages:>7}{len(texts_b):>9}{elapsed:>10.0f}{correct / pages:>10.1%}")
+
+if __name__ == "__main__":
+    main()
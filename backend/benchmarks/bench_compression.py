@@ -0,0 +1,132 @@
+"""
+Benchmark compressed text columns: database size and read latency for ExtractedText rows,
+before migration (plain text with the duplicated clean_text), after compressing with the
+built-in dictionary, and after training a shared dictionary.
+
+Usage (from the backend directory):
+    python benchmarks/bench_compression.py --pages 5000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_compression_")
+DB_PATH = os.path.join(WORK_DIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.db.database import Base, SessionLocal, engine  # noqa: E402
+from app.db.migrations import compress_existing_rows, train_and_store_dictionary  # noqa: E402
+from app.db.models import Document, ExtractedText, Page  # noqa: E402
+
+WORDS = (
+    "the of and to a in that is was he for it with as his on be at by had not are but from or have an they "
+    "which one you were her all she there would their we him been has when who will more no if out so said "
+    "what up its about into than them can only other new some could time these two may then do first any my "
+    "now such like our over man me even most made after also did many before must through back years where "
+    "much your way well down should because each just those people how too little state good very make world "
+    "still own see men work long get here between both life being under never day same another know while last"
+).split()
+
+def make_page(rng: random.Random, words: int):
+    """Raw OCR text with layout markers plus its legacy formatted_text (blocks + clean_text)."""
+    lines = [f"[CENTER][TITLE]Chapter {rng.randint(1, 40)}", ""]
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(40, 120))
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        lines.append(("[INDENT]" if rng.random() < 0.2 else "") + sentence.capitalize() + ".")
+        lines.append("")
+        remaining -= length
+    raw_text = "\n".join(lines)
+    blocks = []
+    for block_no, paragraph in enumerate(p for p in raw_text.split("\n\n") if p.strip()):
+        is_title = "[TITLE]" in paragraph
+        blocks.append({
+            "type": "paragraph",
+            "text": paragraph.replace("[CENTER]", "").replace("[TITLE]", "").replace("[INDENT]", "    ").strip(),
+            "block_no": block_no,
+            "alignment": "center" if is_title else "left",
+            "font_size": 16 if is_title else 11,
+            "is_bold": is_title,
+            "is_italic": False,
+            "is_title": is_title,
+            "is_heading": False,
+            "is_indent": "[INDENT]" in paragraph
+        })
+    clean_text = raw_text.replace("[CENTER]", "").replace("[TITLE]", "").replace("[INDENT]", "")
+    formatted = {"blocks": blocks, "clean_text": clean_text.strip(), "has_formatting": True}
+    return raw_text, json.dumps(formatted)
+
+def db_size_mb():
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    return os.path.getsize(DB_PATH) / 1e6
+
+def read_latency_ms(ids, repeat_ids):
+    db = SessionLocal()
+    try:
+        latencies = []
+        for extracted_id in repeat_ids:
+            db.expunge_all()
+            started = time.perf_counter()
+            row = db.query(ExtractedText).filter(ExtractedText.id == extracted_id).first()
+            _ = (row.raw_text, row.formatted_text)
+            latencies.append((time.perf_counter() - started) * 1000)
+        return statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    doc = Document(filename="bench.pdf", file_path="", total_pages=args.pages, status="completed")
+    db.add(doc)
+    db.commit()
+    text_bytes = 0
+    for page_number in range(1, args.pages + 1):
+        page = Page(document_id=doc.id, page_number=page_number, status="processed")
+        db.add(page)
+        db.flush()
+        raw_text, formatted_text = make_page(rng, args.words_per_page)
+        text_bytes += len(raw_text.encode()) + len(formatted_text.encode())
+        # Written with raw SQL to reproduce legacy, uncompressed rows
+        db.execute(
+            text("INSERT INTO extracted_texts (page_id, raw_text, formatted_text) VALUES (:page_id, :raw, :formatted)"),
+            {"page_id": page.id, "raw": raw_text, "formatted": formatted_text}
+        )
+    db.commit()
+    ids = [row[0] for row in db.execute(text("SELECT id FROM extracted_texts"))]
+    db.close()
+    reads = [rng.choice(ids) for _ in range(args.reads)]
+
+    print(f"{args.pages} pages, {text_bytes / 1e6:.1f} MB of raw_text + formatted_text")
+    results = [("legacy (plain, clean_text)", db_size_mb(), *read_latency_ms(ids, reads))]
+
+    db = SessionLocal()
+    compress_existing_rows(db)
+    results.append(("compressed, built-in dict", db_size_mb(), *read_latency_ms(ids, reads)))
+    train_and_store_dictionary(db)
+    db.close()
+    results.append(("compressed, trained dict", db_size_mb(), *read_latency_ms(ids, reads)))
+
+    print(f"{'storage':<28} {'DB size':>10} {'read median':>12} {'read p95':>10}")
+    for label, size, median, p95 in results:
+        print(f"{label:<28} {size:>7.1f} MB {median:>9.3f} ms {p95:>7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark the word diff engines on synthetic OCR-vs-text-layer pages.
+
+Pages are drawn from a Zipf-like vocabulary; text B is text A with OCR-style noise
+(character substitutions, split and merged words, dropped and inserted words) applied
+to the given fraction of words. difflib is only run up to --difflib-max words.
+
+A second table shows the compare_texts() time and that of the character-level
+refinement of its replace hunks (char_level=True), timed on its own for stable numbers,
+with the time budget compare_texts() gives it and without one ("full"). Compares and
+refinements alternate, so that both see the same machine load. The benchmark fails if
+refinement adds MAX_REFINE_OVERHEAD or more to any compare.
+
+Usage (from the backend directory):
+    python benchmarks/bench_diff.py
+    python benchmarks/bench_diff.py --sizes 100 1000 50000 --noise 0.01 0.1 0.3
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.char_diff import REFINE_TIME_RATIO, refine_replace_hunks  # noqa: E402
+from app.services.diff_engine import get_opcodes  # noqa: E402
+from app.services.text_comparison_service import TextComparisonService, logger as comparison_logger  # noqa: E402
+
+MAX_REFINE_OVERHEAD = 0.10
+CONFUSIONS = [("m", "rn"), ("l", "1"), ("o", "0"), ("e", "c"), ("h", "b"), ("i", "l"), ("u", "v")]
+
+def make_vocabulary(rng: random.Random, size: int = 5000):
+    letters = "etaoinshrdlucmfwypvbgkqjxz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters[:rng.randint(6, 26)]) for _ in range(rng.randint(1, 10))))
+    return sorted(words)
+
+def make_page(rng: random.Random, vocabulary, words: int):
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return rng.choices(vocabulary, weights=weights, k=words)
+
+def add_noise(rng: random.Random, tokens, noise: float):
+    noisy = []
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if rng.random() >= noise:
+            noisy.append(token)
+            continue
+        kind = rng.randrange(5)
+        if kind == 0:  # character confusion
+            source, target = rng.choice(CONFUSIONS)
+            noisy.append(token.replace(source, target, 1) if source in token else token + target)
+        elif kind == 1 and len(token) > 2:  # split word
+            cut = rng.randrange(1, len(token))
+            noisy.extend([token[:cut], token[cut:]])
+        elif kind == 2 and index < len(tokens):  # merged words
+            noisy.append(token + tokens[index])
+            index += 1
+        elif kind == 3:  # dropped word
+            continue
+        else:  # inserted word
+            noisy.extend([token, rng.choice(tokens)])
+    return noisy
+
+def run(engine: str, tokens_a, tokens_b):
+    started = time.perf_counter()
+    if engine == "difflib":
+        opcodes = difflib.SequenceMatcher(None, tokens_a, tokens_b, autojunk=False).get_opcodes()
+    else:
+        opcodes = get_opcodes(tokens_a, tokens_b, engine=engine)
+    elapsed = time.perf_counter() - started
+    matched = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+    return elapsed * 1000, matched, sum(1 for opcode in opcodes if opcode[0] != "equal")
+
+def best_time(function, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def compare_and_refine_times(service, text_a: str, text_b: str, repeat: int = 7):
+    """Best compare_texts() time and best time of the refinement under the deadline it sets, in ms."""
+    differences = service.compare_texts(text_a, text_b)
+    compare, refine = float("inf"), float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        service.compare_texts(text_a, text_b)
+        finished = time.perf_counter()
+        deadline = finished + (finished - started) * REFINE_TIME_RATIO
+        # Refining again does the same work: char_edits are replaced, not extended
+        refine_replace_hunks(differences, text_a, text_b, deadline=deadline)
+        compare = min(compare, finished - started)
+        refine = min(refine, time.perf_counter() - finished)
+    return compare * 1000, refine * 1000, differences
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 10000, 50000])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.01, 0.05, 0.2, 0.4])
+    parser.add_argument("--difflib-max", type=int, default=10000, help="Largest page size to run difflib on")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    print(f"{'words':>7}{'noise':>7}{'engine':>10}{'ms':>11}{'matched words':>15}{'hunks':>8}")
+    for size in args.sizes:
+        for noise in args.noise:
+            tokens_a = make_page(rng, vocabulary, size)
+            tokens_b = add_noise(rng, tokens_a, noise)
+            engines = ["patience"] + (["difflib"] if size <= args.difflib_max else [])
+            for engine in engines:
+                elapsed, matched, hunks = run(engine, tokens_a, tokens_b)
+                print(f"{size:>7}{noise:>7.2f}{engine:>10}{elapsed:>11.1f}{matched:>15}{hunks:>8}")
+
+    comparison_logger.setLevel("WARNING")
+    service = TextComparisonService()
+    print(f"\n{'words':>7}{'noise':>7}{'compare ms':>12}{'refine ms':>11}{'overhead':>10}{'full ms':>9}"
+          f"{'refined':>9}{'hunks':>7}")
+    worst = 0.0
+    for size in args.sizes:
+        for noise in args.noise:
+            tokens_a = make_page(rng, vocabulary, size)
+            text_a, text_b = " ".join(tokens_a), " ".join(add_noise(rng, tokens_a, noise))
+            compare, refine, differences = compare_and_refine_times(service, text_a, text_b)
+            refined = sum(1 for diff in differences if "char_edits" in diff)
+            hunks = sum(1 for diff in differences if diff["type"] == "replace")
+            full = best_time(lambda: refine_replace_hunks(differences, text_a, text_b))
+            overhead = refine / compare
+            worst = max(worst, overhead)
+            print(f"{size:>7}{noise:>7.2f}{compare:>12.1f}{refine:>11.2f}{overhead:>10.1%}{full:>9.2f}{refined:>9}{hunks:>7}")
+    assert worst < MAX_REFINE_OVERHEAD, f"Character-level refinement adds {worst:.1%} to compare time"
+
+if __name__ == "__main__":
+    main()
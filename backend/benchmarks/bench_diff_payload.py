@@ -0,0 +1,85 @@
+"""
+Benchmark page comparison payload size and serialization time per response layout.
+
+"full" is the default response (pydantic model, JSON-encoded the way FastAPI does it);
+"compact" is diff_layout=compact, optionally gzip/brotli compressed or msgpack-encoded
+(brotli and msgpack rows are skipped when those packages are not installed). Times
+include building the payload from the cached diff.
+
+Usage (from the backend directory):
+    python benchmarks/bench_diff_payload.py
+    python benchmarks/bench_diff_payload.py --sizes 300 3000 --noise 0.01 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.schemas.correction_schemas import DifferenceSegment, PageComparisonResponse  # noqa: E402
+from app.services import diff_payload  # noqa: E402
+from app.services.text_comparison_service import TextComparisonService, logger as comparison_logger  # noqa: E402
+from bench_diff import add_noise, make_page, make_vocabulary  # noqa: E402
+
+def full_layout(text_a, text_b, differences):
+    response = PageComparisonResponse(
+        document_id=1, page_number=1, text_a_ocr=text_a, text_b_editable_pdf=text_b,
+        differences=[DifferenceSegment(**diff) for diff in differences]
+    )
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+def compact_layout(text_a, text_b, differences, media_type=diff_payload.MEDIA_JSON, encoding=None):
+    payload = {
+        "document_id": 1, "page_number": 1, "text_a_ocr": text_a, "text_b_editable_pdf": text_b,
+        "diff_layout": diff_payload.DIFF_LAYOUT_COMPACT,
+        "differences": diff_payload.compact_differences(differences)
+    }
+    return diff_payload.compress(diff_payload.serialize(payload, media_type), encoding)
+
+def best_time(function, repeat=5):
+    best, body = float("inf"), b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 1000, 5000])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.01, 0.1])
+    args = parser.parse_args()
+
+    layouts = [
+        ("full", lambda a, b, d: full_layout(a, b, d)),
+        ("compact", lambda a, b, d: compact_layout(a, b, d)),
+        ("compact+gzip", lambda a, b, d: compact_layout(a, b, d, encoding="gzip")),
+    ]
+    if diff_payload.brotli is not None:
+        layouts.append(("compact+br", lambda a, b, d: compact_layout(a, b, d, encoding="br")))
+    if diff_payload.msgpack is not None:
+        layouts.append(("compact+msgpack", lambda a, b, d: compact_layout(a, b, d, media_type=diff_payload.MEDIA_MSGPACK)))
+
+    comparison_logger.setLevel("WARNING")
+    service = TextComparisonService()
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    print(f"{'words':>7}{'noise':>7}{'layout':>17}{'bytes':>10}{'vs full':>9}{'ms':>8}")
+    for size in args.sizes:
+        for noise in args.noise:
+            tokens_a = make_page(rng, vocabulary, size)
+            text_a, text_b = " ".join(tokens_a), " ".join(add_noise(rng, tokens_a, noise))
+            differences = service.compare_texts(text_a, text_b)
+            full_bytes = None
+            for name, build in layouts:
+                elapsed, size_bytes = best_time(lambda: build(text_a, text_b, differences))
+                full_bytes = full_bytes or size_bytes
+                print(f"{size:>7}{noise:>7.2f}{name:>17}{size_bytes:>10}{size_bytes / full_bytes:>9.0%}{elapsed:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark incremental Word export with the per-page fragment cache.
+
+Times a full WordGenerator.generate_document, a cold generate_docx (every page rendered
+into the fragment cache), and a re-export after editing a few pages.
+
+Usage (from the backend directory):
+    python benchmarks/bench_docx_fragments.py
+    python benchmarks/bench_docx_fragments.py --pages 600 --blocks 12 --edited 1
+"""
+import argparse
+import copy
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.docx_fragments import FragmentCache, generate_docx  # noqa: E402
+from app.services.wordextract import WordGenerator  # noqa: E402
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+def book(rng, pages, blocks):
+    items = []
+    for page in range(1, pages + 1):
+        for _ in range(blocks):
+            items.append({"text": " ".join(rng.choice(WORDS) for _ in range(60)), "page": page,
+                          "block_no": len(items), "line_no": 0, "size": 11, "is_last_span_in_line": True})
+    return items
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<28}{time.perf_counter() - start:>8.2f} s  {result or ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=600)
+    parser.add_argument("--blocks", type=int, default=12, help="Paragraphs per page")
+    parser.add_argument("--edited", type=int, default=1, help="Pages changed before the re-export")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(42)
+    items = book(rng, args.pages, args.blocks)
+    edited = copy.deepcopy(items)
+    for page in rng.sample(range(1, args.pages + 1), args.edited):
+        edited[(page - 1) * args.blocks]["text"] = "Corrected paragraph"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = FragmentCache(os.path.join(workdir, "fragments"))
+        output = os.path.join(workdir, "export.docx")
+        timed("full generate_document", lambda: WordGenerator(copy.deepcopy(items)).generate_document(output))
+        timed("fragments, cold cache", lambda: generate_docx(copy.deepcopy(items), output, cache))
+        timed(f"fragments, {args.edited} page(s) edited", lambda: generate_docx(edited, output, cache))
+
+if __name__ == "__main__":
+    main()
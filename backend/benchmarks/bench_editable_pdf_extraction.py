@@ -0,0 +1,59 @@
+"""
+Benchmark text-layer extraction of a large editable PDF across process pool sizes.
+
+Times extract_pages() (text and word geometry of every page, in page ranges) serially in
+one thread and with a spawned process pool of each size. Pool start-up is excluded: each
+pool is warmed up on a small range first, as the job pool of a running server would be.
+
+Usage (from the backend directory):
+    python benchmarks/bench_editable_pdf_extraction.py
+    python benchmarks/bench_editable_pdf_extraction.py --pages 2000 --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.editable_pdf_extraction import extract_pages  # noqa: E402
+from app.services.editable_pdf_service import extract_page_range, logger as service_logger  # noqa: E402
+from bench_word_geometry import build_pdf  # noqa: E402
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--font-size", type=float, default=9.0)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cpus} & set(range(1, cpus + 1))) or [1])
+    args = parser.parse_args()
+
+    service_logger.setLevel("WARNING")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "editable.pdf")
+        start = time.perf_counter()
+        build_pdf(path, random.Random(42), args.pages, args.font_size)
+        print(f"built {args.pages}-page PDF in {time.perf_counter() - start:.1f} s ({cpus} CPUs)")
+
+        start = time.perf_counter()
+        texts, _ = extract_pages(path, args.pages)
+        serial = time.perf_counter() - start
+        print(f"{'workers':>8}{'seconds':>10}{'pages/s':>10}{'speedup':>9}")
+        print(f"{'serial':>8}{serial:>10.2f}{args.pages / serial:>10.0f}{1.0:>9.2f}")
+
+        for workers in args.workers:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                list(executor.map(extract_page_range, [path] * workers, [1] * workers, [1] * workers))
+                start = time.perf_counter()
+                parallel_texts, _ = extract_pages(path, args.pages, executor, workers=workers)
+                seconds = time.perf_counter() - start
+            assert parallel_texts == texts
+            print(f"{workers:>8}{seconds:>10.2f}{args.pages / seconds:>10.0f}{serial / seconds:>9.2f}")
+
+if __name__ == "__main__":
+    main()
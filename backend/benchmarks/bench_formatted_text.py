@@ -0,0 +1,86 @@
+"""
+Benchmark the formatted_text layouts: stored size (plain and compressed) and decode time
+for the legacy version 1 JSON (with and without clean_text) and the compact version 2 layout.
+
+Usage (from the backend directory):
+    python benchmarks/bench_formatted_text.py --pages 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.compression import compress_text  # noqa: E402
+from app.services.formatted_text_codec import decode_formatted_text, encode_formatted_text  # noqa: E402
+
+WORDS = (
+    "the of and to a in that is was he for it with as his on be at by had not are but from or have an they "
+    "which one you were her all she there would their we him been has when who will more no if out so said "
+    "what up its about into than them can only other new some could time these two may then do first any my"
+).split()
+
+def make_formatted(rng: random.Random, paragraphs: int) -> dict:
+    """A page as process_layout_markers returns it: a title, headings and short paragraphs."""
+    blocks = [{
+        "type": "paragraph", "text": f"Chapter {rng.randint(1, 40)}", "block_no": 0, "alignment": "center",
+        "font_size": 16, "is_bold": True, "is_italic": False, "is_title": True, "is_heading": False,
+        "is_indent": False
+    }]
+    for _ in range(paragraphs):
+        if rng.random() < 0.1:
+            blocks.append({
+                "type": "paragraph", "text": " ".join(rng.choice(WORDS) for _ in range(4)).title(),
+                "block_no": len(blocks), "alignment": "left", "font_size": 13, "is_bold": True,
+                "is_italic": False, "is_title": False, "is_heading": True, "is_indent": False
+            })
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+        blocks.append({
+            "type": "paragraph", "text": sentence.capitalize() + ".", "block_no": len(blocks),
+            "alignment": "left", "font_size": 11, "is_bold": False, "is_italic": False
+        })
+    return {"blocks": blocks, "has_formatting": True}
+
+def time_decode(values, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for value in values:
+            decode_formatted_text(value)
+    return (time.perf_counter() - started) / (repeat * len(values)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=25, help="Paragraph blocks per page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    pages = [make_formatted(rng, args.paragraphs) for _ in range(args.pages)]
+    with_clean_text = []
+    for page in pages:
+        clean_text = "\n\n".join(block["text"] for block in page["blocks"])
+        with_clean_text.append(json.dumps({**page, "clean_text": clean_text}))
+    layouts = [
+        ("v1 + clean_text", with_clean_text),
+        ("v1", [json.dumps(page) for page in pages]),
+        ("v2 compact", [encode_formatted_text(page) for page in pages]),
+    ]
+
+    started = time.perf_counter()
+    for page in pages:
+        encode_formatted_text(page)
+    encode_us = (time.perf_counter() - started) / len(pages) * 1e6
+
+    print(f"{args.pages} pages, {args.paragraphs} paragraphs per page, v2 encode {encode_us:.1f} us/page")
+    print(f"{'layout':<18}{'plain KB/page':>15}{'compressed KB/page':>20}{'decode us/page':>16}")
+    for name, values in layouts:
+        plain = sum(len(value.encode("utf-8")) for value in values) / len(values) / 1024
+        compressed = sum(len(compress_text(value, force_bytes=True)) for value in values) / len(values) / 1024
+        print(f"{name:<18}{plain:>15.2f}{compressed:>20.2f}{time_decode(values, args.repeat):>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark incremental re-diff against a full re-diff while a page is being corrected.
+
+Each step fixes one OCR error of Text A (a small edit, like a keystroke batch) and updates
+the diff. "server ms" adds decoding the JSON request and encoding the JSON response to the
+incremental re-diff, which is what the incremental endpoint does per request. "same" is the
+share of steps where the incremental result equals a full re-diff exactly.
+
+Usage (from the backend directory):
+    python benchmarks/bench_incremental_diff.py
+    python benchmarks/bench_incremental_diff.py --sizes 1000 20000 --noise 0.1 --steps 100
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.diff_payload import compact_differences  # noqa: E402
+from app.services.incremental_diff import rediff  # noqa: E402
+from app.services.text_comparison_service import TextComparisonService, logger as comparison_logger  # noqa: E402
+from bench_diff import add_noise, make_page, make_vocabulary  # noqa: E402
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--steps", type=int, default=50, help="Corrections per page")
+    args = parser.parse_args()
+
+    comparison_logger.setLevel("WARNING")
+    service = TextComparisonService()
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    print(f"{'words':>7}{'full ms':>10}{'incr ms':>10}{'server ms':>11}{'p95 ms':>9}{'same':>7}")
+    for size in args.sizes:
+        tokens_b = make_page(rng, vocabulary, size)
+        text_b = " ".join(tokens_b)
+        text_a = " ".join(add_noise(rng, tokens_b, args.noise))
+        segments = compact_differences(service.compare_texts(text_a, text_b))
+
+        full_times, incremental_times, server_times, same = [], [], [], 0
+        for _ in range(args.steps):
+            changed = [segment for segment in segments if segment[0] == "replace"]
+            if not changed:
+                break
+            # Type the Text B words over one replace hunk
+            segment = rng.choice(changed)
+            start, end, replacement = segment[1], segment[2], segment[6]
+            corrected = text_a[:start] + replacement + text_a[end:]
+            request = json.dumps({"text_a": corrected, "text_b": text_b, "differences": segments})
+
+            started = time.perf_counter()
+            payload = json.loads(request)
+            updated, window = rediff(payload["differences"], payload["text_a"], payload["text_b"],
+                                     start, start + len(replacement), len(text_a))
+            json.dumps({"differences": updated, "window": window})
+            server_times.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            rediff(segments, corrected, text_b, start, start + len(replacement), len(text_a))
+            incremental_times.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            full = compact_differences(service.compare_texts(corrected, text_b))
+            full_times.append((time.perf_counter() - started) * 1000)
+
+            same += updated == full
+            text_a, segments = corrected, updated
+
+        print(f"{size:>7}{statistics.median(full_times):>10.2f}{statistics.median(incremental_times):>10.2f}"
+              f"{statistics.median(server_times):>11.2f}{percentile(server_times, 0.95):>9.2f}{same / len(full_times):>7.0%}")
+
+if __name__ == "__main__":
+    main()
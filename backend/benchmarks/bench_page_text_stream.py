@@ -0,0 +1,118 @@
+"""
+Benchmark loading the text of a whole document: one request per page against the NDJSON stream.
+
+Seeds a document whose pages have OCR text with formatting blocks, and corrections for every
+other page, then loads every page's text through the document routes (in process, so times
+are server time plus serialization, without network latency):
+
+    per page            GET /pages/{n}/text for each page, as the viewer does
+    stream              GET /pages/text with every field
+    stream, text only   GET /pages/text?fields=text,source (no formatted_text)
+
+Every extra round trip adds the network latency on top of the per-page time shown.
+
+Usage (from the backend directory):
+    python benchmarks/bench_page_text_stream.py
+    python benchmarks/bench_page_text_stream.py --pages 400 2000 --paragraphs 25
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api.routes import documents  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.database import Base, get_db  # noqa: E402
+from app.services.formatted_text_codec import encode_formatted_text  # noqa: E402
+from app.services.page_text_stream import stream_page_texts  # noqa: E402
+from bench_formatted_text import make_formatted  # noqa: E402
+
+def seed(session_factory, pages, paragraphs):
+    rng = random.Random(42)
+    db = session_factory()
+    doc = models.Document(filename=f"book_{pages}.pdf", file_path="/uploads/book.pdf", total_pages=pages, status="completed")
+    db.add(doc)
+    db.flush()
+    corrected = {}
+    for page_number in range(1, pages + 1):
+        formatted = make_formatted(rng, paragraphs)
+        text = "\n\n".join(block["text"] for block in formatted["blocks"])
+        page = models.Page(document_id=doc.id, page_number=page_number, status="processed")
+        page.extracted_text = models.ExtractedText(raw_text=text, formatted_text=encode_formatted_text(formatted))
+        db.add(page)
+        if page_number % 2 == 0:
+            corrected[str(page_number)] = text.replace("the", "The")
+    db.add(models.CorrectedText(document_id=doc.id, corrected_content_by_page=json.dumps(corrected)))
+    db.commit()
+    document_id = doc.id
+    db.close()
+    return document_id
+
+def make_client(session_factory):
+    documents.stream_page_texts = functools.partial(stream_page_texts, session_factory=session_factory)
+    app = FastAPI()
+    app.include_router(documents.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+def timed(load):
+    start = time.perf_counter()
+    requests, transferred = load()
+    return requests, transferred, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per page")
+    args = parser.parse_args()
+
+    print(f"{'pages':>6}{'mode':>20}{'requests':>10}{'MB':>8}{'seconds':>9}")
+    for pages in args.pages:
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}", connect_args={"check_same_thread": False})
+            Base.metadata.create_all(bind=engine)
+            session_factory = sessionmaker(bind=engine)
+            document_id = seed(session_factory, pages, args.paragraphs)
+            client = make_client(session_factory)
+            base = f"/api/documents/{document_id}/pages"
+
+            def per_page():
+                sizes = [len(client.get(f"{base}/{page_number}/text").content) for page_number in range(1, pages + 1)]
+                return len(sizes), sum(sizes)
+
+            def stream(query=""):
+                response = client.get(f"{base}/text{query}")
+                assert response.status_code == 200
+                return 1, len(response.content)
+
+            modes = [
+                ("per page", per_page),
+                ("stream", stream),
+                ("stream, text only", lambda: stream("?fields=text,source")),
+            ]
+            for name, load in modes:
+                requests, transferred, seconds = timed(load)
+                print(f"{pages:>6}{name:>20}{requests:>10}{transferred / 1e6:>8.2f}{seconds:>9.3f}")
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
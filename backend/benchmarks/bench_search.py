@@ -0,0 +1,86 @@
+"""
+Benchmark full-text search latency: FTS5 index vs. LIKE scan over ExtractedText.raw_text.
+
+Usage (from the backend directory):
+    python benchmarks/bench_search.py --pages 20000 --words-per-page 350
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_search_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.database import Base, SessionLocal, engine  # noqa: E402
+from app.db.models import Document, ExtractedText, Page  # noqa: E402
+from app.services.search_index import search_pages, _search_pages_like  # noqa: E402
+
+def build_vocabulary(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+def build_corpus(pages: int, words_per_page: int, pages_per_document: int, rng: random.Random):
+    vocabulary = build_vocabulary(50000, rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]  # Zipf-like word frequencies
+    db = SessionLocal()
+    try:
+        for first_page in range(0, pages, pages_per_document):
+            doc = Document(filename=f"doc_{first_page}.pdf", file_path="", total_pages=pages_per_document, status="completed")
+            db.add(doc)
+            db.flush()
+            for page_number in range(1, min(pages_per_document, pages - first_page) + 1):
+                page = Page(document_id=doc.id, page_number=page_number, status="processed")
+                db.add(page)
+                db.flush()
+                words = rng.choices(vocabulary, weights=weights, k=words_per_page)
+                db.add(ExtractedText(page_id=page.id, raw_text="[HEADING]" + " ".join(words), formatted_text=None))
+            db.commit()
+        return vocabulary
+    finally:
+        db.close()
+
+def time_queries(label: str, fn, queries, repeat: int):
+    latencies = []
+    for query in queries:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<28} median {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms   ({len(latencies)} queries)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--pages-per-document", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    vocabulary = build_corpus(args.pages, args.words_per_page, args.pages_per_document, rng)
+    print(f"Indexed {args.pages} pages x {args.words_per_page} words in {time.perf_counter() - started:.1f} s "
+          f"(DB size {os.path.getsize(os.path.join(WORK_DIR, 'bench.db')) / 1e6:.1f} MB)")
+
+    common = vocabulary[:5]
+    rare = vocabulary[-5:]
+    phrases = [f'"{vocabulary[i]} {vocabulary[i + 1]}"' for i in range(5)]
+
+    db = SessionLocal()
+    try:
+        for label, queries in (("common term", common), ("rare term", rare), ("phrase", phrases)):
+            time_queries(f"FTS5  {label}", lambda q: search_pages(db, q, limit=20), queries, args.repeat)
+            time_queries(f"LIKE  {label}", lambda q: _search_pages_like(db, q.strip('"'), None, 20, 0), queries, 1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark the bytes transferred for page images and the PDF during review sessions.
+
+Seeds a document whose page images are rendered like pdf_processing renders them (2x,
+JPEG) and whose PDF embeds those scans, then replays a review session twice (a first visit
+and a return visit, e.g. the next day) against the document routes with an emulated
+browser cache. A session opens the document, loads the PDF, views every page in order and
+goes back to every third page. Only the PDF and image requests are counted (bodies and
+response headers); the document and page listings are the same in every mode.
+
+    no cache        every view downloads the file again (before ETags were honoured)
+    etag            plain URLs, revalidated with If-None-Match on every view
+    versioned       the ?v= URLs from the API, cached as immutable
+    versioned+webp  the same, with Accept asking for WebP
+
+"PDF first render" is what the viewer downloads before it can draw the first page: the
+whole file without range support, or (like pdf.js with its 64 KB range chunks) the chunk
+with the header and the chunk with the cross-reference table.
+
+Usage (from the backend directory):
+    python benchmarks/bench_static_delivery.py
+    python benchmarks/bench_static_delivery.py --pages 50 --lines 60
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api.routes import documents  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.database import Base, get_db  # noqa: E402
+from app.services import static_delivery  # noqa: E402
+
+RANGE_CHUNK = 64 * 1024
+MODES = ["no cache", "etag", "versioned", "versioned+webp"]
+
+def seed(workdir, pages, lines):
+    rng = random.Random(42)
+    words = [f"word{index}" for index in range(5000)]
+    source = fitz.open()
+    scan = fitz.open()
+    image_dir = os.path.join(workdir, "extracted", "1")
+    os.makedirs(image_dir)
+    image_paths = []
+    for page_number in range(1, pages + 1):
+        page = source.new_page()
+        for line in range(lines):
+            page.insert_text((50, 60 + line * 12), " ".join(rng.choices(words, k=10)), fontsize=9)
+        image_path = os.path.join(image_dir, f"page_{page_number}.jpg")
+        page.get_pixmap(matrix=fitz.Matrix(2, 2)).save(image_path)
+        image_paths.append(image_path)
+        scan.new_page(width=page.rect.width, height=page.rect.height).insert_image(page.rect, filename=image_path)
+    pdf_path = os.path.join(workdir, "scan.pdf")
+    scan.save(pdf_path)
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    doc = models.Document(filename="scan.pdf", file_path=pdf_path, total_pages=pages, status="completed")
+    db.add(doc)
+    db.flush()
+    for page_number, image_path in enumerate(image_paths, start=1):
+        db.add(models.Page(document_id=doc.id, page_number=page_number, status="processed", image_path=image_path))
+    db.commit()
+    document_id = doc.id
+    db.close()
+    return session_factory, document_id, pdf_path
+
+class Browser:
+    """HTTP cache of a browser: immutable responses are reused, others revalidated with their ETag."""
+
+    def __init__(self, client, mode):
+        self.client = client
+        self.mode = mode
+        self.cache = {}
+        self.requests = 0
+        self.bytes = 0
+
+    def get(self, url, headers=None):
+        headers = dict(headers or {})
+        if self.mode == "versioned+webp":
+            headers.setdefault("Accept", "image/webp,*/*")
+        cached = self.cache.get(url)
+        if cached and cached["immutable"]:
+            return cached
+        if cached and self.mode != "no cache":
+            headers["If-None-Match"] = cached["etag"]
+        response = self.client.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += len(response.content) + sum(len(key) + len(value) + 4 for key, value in response.headers.items())
+        if response.status_code == 304:
+            return cached
+        entry = {"etag": response.headers.get("etag"), "immutable": "immutable" in response.headers.get("cache-control", "")}
+        if response.status_code == 200 and "Range" not in headers:
+            self.cache[url] = entry
+        return entry
+
+def review_session(browser, document_id, pages):
+    versioned = browser.mode.startswith("versioned")
+    document = browser.client.get(f"/api/documents/{document_id}").json()
+    listing = browser.client.get(f"/api/documents/{document_id}/pages").json()
+    image_urls = {
+        page["page_number"]: page["image_url"] if versioned else f"/api/documents/{document_id}/pages/{page['page_number']}/image"
+        for page in listing
+    }
+    browser.get(document["file_url"] if versioned else f"/api/documents/{document_id}/file")
+    views = list(range(1, pages + 1)) + list(range(1, pages + 1, 3))
+    for page_number in views:
+        browser.get(image_urls[page_number])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=50, help="Text lines per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        static_delivery.image_variants = static_delivery.ImageVariantCache(os.path.join(workdir, "variants"))
+        if "webp" not in static_delivery.IMAGE_FORMATS:
+            static_delivery.IMAGE_FORMATS = static_delivery.IMAGE_FORMATS + ("webp",)
+        session_factory, document_id, pdf_path = seed(workdir, args.pages, args.lines)
+
+        app = FastAPI()
+        app.include_router(documents.router)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+
+        pdf_size = os.path.getsize(pdf_path)
+        image_bytes = sum(os.path.getsize(os.path.join(workdir, "extracted", "1", name)) for name in os.listdir(os.path.join(workdir, "extracted", "1")))
+        print(f"{args.pages} pages: PDF {pdf_size / 1e6:.1f} MB, JPEG page images {image_bytes / 1e6:.1f} MB")
+        print(f"{'mode':>16}{'visit 1 req':>13}{'visit 1 MB':>12}{'visit 2 req':>13}{'visit 2 MB':>12}")
+        for mode in MODES:
+            browser = Browser(client, mode)
+            results = []
+            for _ in range(2):
+                requests, transferred = browser.requests, browser.bytes
+                review_session(browser, document_id, args.pages)
+                results.append((browser.requests - requests, (browser.bytes - transferred) / 1e6))
+            print(f"{mode:>16}{results[0][0]:>13}{results[0][1]:>12.3f}{results[1][0]:>13}{results[1][1]:>12.3f}")
+
+        first_render = 0
+        for byte_range in (f"bytes=0-{RANGE_CHUNK - 1}", f"bytes=-{RANGE_CHUNK}"):
+            response = client.get(f"/api/documents/{document_id}/file", headers={"Range": byte_range})
+            assert response.status_code == 206
+            first_render += len(response.content)
+        print(f"PDF first render: {pdf_size / 1e6:.2f} MB whole file, {first_render / 1e6:.2f} MB with range requests")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the peak memory of Word exports as documents grow.
+
+Seeds an SQLite database with documents of each size (OCR text with formatting blocks, as
+process_layout_markers stores it) and exports each one in a fresh spawned process with a
+cold fragment cache, so the peak is measured alone. "streamed" is build_export; the
+"materialized" baseline reads every row first and builds one item list for the whole
+document before generating it, as exports did before streaming.
+
+Usage (from the backend directory):
+    python benchmarks/bench_word_export.py
+    python benchmarks/bench_word_export.py --pages 10 1000 10000 --paragraphs 25
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.db.database import Base  # noqa: E402
+from app.services.formatted_text_codec import encode_formatted_text  # noqa: E402
+from bench_formatted_text import make_formatted  # noqa: E402
+
+def seed(database_url, pages, paragraphs):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(42)
+    doc = models.Document(filename=f"book_{pages}.pdf", file_path="/uploads/book.pdf", total_pages=pages, status="completed")
+    db.add(doc)
+    db.flush()
+    for page_number in range(1, pages + 1):
+        formatted = make_formatted(rng, paragraphs)
+        page = models.Page(document_id=doc.id, page_number=page_number, status="processed")
+        page.extracted_text = models.ExtractedText(
+            raw_text="\n\n".join(block["text"] for block in formatted["blocks"]),
+            formatted_text=encode_formatted_text(formatted)
+        )
+        db.add(page)
+        if page_number % 500 == 0:
+            db.flush()
+            db.expunge_all()
+    db.commit()
+    document_id = doc.id
+    db.close()
+    return document_id
+
+def export(database_url, cache_dir, document_id, materialized):
+    from app.services import word_export
+    from app.services.docx_fragments import generate_docx
+
+    word_export.EXPORT_CACHE_DIR = cache_dir
+    db = sessionmaker(bind=create_engine(database_url))()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if materialized:
+        rows = word_export._page_rows(db, document_id).all()
+        corrected = word_export._corrected_pages(db, document_id)
+        items = [item for page in word_export.iter_export_pages(rows, corrected) for item in page]
+        path = os.path.join(cache_dir, "materialized.docx")
+        os.makedirs(cache_dir, exist_ok=True)
+        generate_docx(items, path, word_export.fragment_cache())
+    else:
+        _, path = word_export.build_export(db, document_id)
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    db.close()
+    return seconds, peak_kb, os.path.getsize(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--paragraphs", type=int, default=25, help="Paragraph blocks per page")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        print(f"{'pages':>7}{'export':>14}{'seconds':>10}{'peak MB':>10}{'size MB':>10}")
+        for pages in args.pages:
+            document_id = seed(database_url, pages, args.paragraphs)
+            for materialized in (True, False):
+                cache_dir = os.path.join(workdir, f"cache_{pages}_{materialized}")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    seconds, peak_kb, size = executor.submit(export, database_url, cache_dir, document_id, materialized).result()
+                label = "materialized" if materialized else "streamed"
+                print(f"{pages:>7}{label:>14}{seconds:>10.1f}{peak_kb / 1024:>10.1f}{size / 2 ** 20:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark WordGenerator.generate_document, direct versus styled (fast=True) path.
+
+Each run happens in a fresh spawned process, so its peak memory is measured alone: the
+reported peak is the growth of the process's maximum resident set size during the run.
+The synthetic book has per-page titles, indented blocks and multi-line paragraphs of
+spans with mixed bold, italic and color, like OCR output with formatting. The direct path
+needs about 1.2 GB per 1000 pages of that book, so it is skipped above --direct-max-pages.
+
+Usage (from the backend directory):
+    python benchmarks/bench_word_generator.py
+    python benchmarks/bench_word_generator.py --pages 1000 10000 --blocks 8 --direct-max-pages 10000
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.wordextract import WordGenerator  # noqa: E402
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+def book(pages, blocks, seed=42):
+    rng = random.Random(seed)
+    items = []
+    for page in range(1, pages + 1):
+        items.append({"text": f"Chapter {page}", "page": page, "block_no": len(items), "size": 16, "is_bold": True,
+                      "is_title": True, "alignment": "center", "is_last_span_in_line": True})
+        for block in range(blocks):
+            block_no = len(items)
+            if block % 4 == 3:
+                items.append({"text": " ".join(rng.choices(WORDS, k=40)), "page": page, "block_no": block_no,
+                              "is_indent": True, "is_italic": True, "is_last_span_in_line": True})
+                continue
+            for line_no in range(6):
+                for word_index in range(8):
+                    items.append({"text": rng.choice(WORDS), "page": page, "block_no": block_no, "line_no": line_no,
+                                  "bbox": [word_index * 40, 0, word_index * 40 + 30, 10],
+                                  "is_bold": rng.random() < 0.05, "color": (0.1, 0.2, 0.6) if rng.random() < 0.02 else (0, 0, 0),
+                                  "is_last_span_in_line": word_index == 7})
+    return items
+
+def run(pages, blocks, fast, path):
+    logging.disable(logging.INFO)
+    items = book(pages, blocks)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    WordGenerator(items, fast=fast).generate_document(path)
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    return seconds, peak_kb, os.path.getsize(path), len(items)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--blocks", type=int, default=8, help="Blocks per page besides the title")
+    parser.add_argument("--direct-max-pages", type=int, default=1000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'pages':>7}{'spans':>10}{'path':>8}{'seconds':>10}{'peak MB':>10}{'size MB':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in args.pages:
+            for fast in (False, True):
+                if not fast and pages > args.direct_max_pages:
+                    print(f"{pages:>7}{'':>10}{'direct':>8}{'skipped':>10}")
+                    continue
+                path = os.path.join(workdir, f"{pages}_{fast}.docx")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    seconds, peak_kb, size, spans = executor.submit(run, pages, args.blocks, fast, path).result()
+                label = "styled" if fast else "direct"
+                print(f"{pages:>7}{spans:>10}{label:>8}{seconds:>10.1f}{peak_kb / 1024:>10.0f}{size / 2 ** 20:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark word geometry extraction and grid index lookups.
+
+Builds a PDF whose pages are filled with words, then times the single pass that extracts
+page text and word boxes, the size of the packed arrays, building a page's grid index, and
+point, rectangle and offset queries against it (compared with a linear scan of the boxes).
+
+Usage (from the backend directory):
+    python benchmarks/bench_word_geometry.py
+    python benchmarks/bench_word_geometry.py --pages 50 --queries 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.editable_pdf_service import EditablePDFService, logger as service_logger  # noqa: E402
+from app.services.word_geometry import WordIndex, _to_bytes  # noqa: E402
+from bench_diff import make_page, make_vocabulary  # noqa: E402
+
+def build_pdf(path, rng, pages, font_size):
+    vocabulary = make_vocabulary(rng)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        words = make_page(rng, vocabulary, 4000)
+        lines, line = [], []
+        for word in words:
+            line.append(word)
+            if fitz.get_text_length(" ".join(line), fontsize=font_size) > page.rect.width - 72:
+                lines.append(" ".join(line[:-1]))
+                line = [word]
+        line_count = int((page.rect.height - 72) / (font_size * 1.2))
+        page.insert_text(fitz.Point(36, 36 + font_size), "\n".join(lines[:line_count]), fontsize=font_size)
+    doc.save(path)
+    doc.close()
+
+def linear_scan(boxes, count, x0, y0, x1, y1):
+    return [
+        index for index in range(count)
+        if boxes[4 * index] <= x1 and x0 <= boxes[4 * index + 2] and boxes[4 * index + 1] <= y1 and y0 <= boxes[4 * index + 3]
+    ]
+
+def per_query_us(function, queries):
+    start = time.perf_counter()
+    for query in queries:
+        function(*query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--font-size", type=float, default=7.0, help="Smaller fonts put more words on a page")
+    parser.add_argument("--queries", type=int, default=10000)
+    args = parser.parse_args()
+
+    service_logger.setLevel("WARNING")
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "editable.pdf")
+        build_pdf(path, rng, args.pages, args.font_size)
+        service = EditablePDFService()
+        start = time.perf_counter()
+        service.extract_text_from_editable_pdf(path, "bench")
+        text_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        texts, words_by_page = service.extract_text_and_words(path, "bench")
+        words_seconds = time.perf_counter() - start
+
+    word_counts = [len(page_words.words) for page_words in words_by_page.values()]
+    located = sum(1 for page_words in words_by_page.values() for start in page_words.offsets[::2] if start >= 0)
+    packed = sum(len(_to_bytes(p.boxes)) + len(_to_bytes(p.offsets)) for p in words_by_page.values())
+    print(f"{args.pages} pages, {sum(word_counts)} words ({located / max(1, sum(word_counts)):.1%} located in the page text)")
+    print(f"text only: {text_seconds * 1000 / args.pages:.2f} ms/page, text + words: {words_seconds * 1000 / args.pages:.2f} ms/page")
+    print(f"packed boxes + offsets: {packed / max(1, sum(word_counts)):.0f} bytes/word")
+
+    page_number = max(words_by_page, key=lambda number: len(words_by_page[number].words))
+    page_words = words_by_page[page_number]
+    count = len(page_words.words)
+    start = time.perf_counter()
+    index = WordIndex(page_words)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    points = [(rng.uniform(0, index.width), rng.uniform(0, index.height)) for _ in range(args.queries)]
+    rects = [(x, y, x + rng.uniform(10, 150), y + rng.uniform(5, 60)) for x, y in points]
+    offsets = [(rng.randrange(len(texts[page_number]) or 1),) for _ in range(args.queries)]
+    print(f"largest page: {count} words, {index.size}x{index.size} grid built in {build_ms:.2f} ms")
+    print(f"{'query':>8}{'grid us':>10}{'scan us':>10}")
+    print(f"{'point':>8}{per_query_us(index.at_point, points):>10.1f}"
+          f"{per_query_us(lambda x, y: linear_scan(page_words.boxes, count, x, y, x, y), points[:1000]):>10.1f}")
+    print(f"{'rect':>8}{per_query_us(index.in_rect, rects):>10.1f}"
+          f"{per_query_us(lambda *rect: linear_scan(page_words.boxes, count, *rect), rects[:1000]):>10.1f}")
+    print(f"{'offset':>8}{per_query_us(index.at_offset, offsets):>10.1f}{'-':>10}")
+
+if __name__ == "__main__":
+    main()
@@ -114,16 +114,18 @@ def test_upload_editable_pdf_success(client: TestClient, db_session, setup_docum
     
     os.remove(minimal_pdf_path) # Clean up the temp PDF
 
-    assert response.status_code == 200, response.text
+    assert response.status_code == 202, response.text
     data = response.json()
-    assert data["message"] == "Editable PDF (Document B) uploaded and text extracted successfully."
+    assert data["message"] == "Editable PDF (Document B) uploaded; text extraction started."
     assert data["document_id"] == document_id
-    assert data["editable_pdf_internal_id"] is not None
+    assert data["extraction_job_id"] is not None
 
-    # Verify in DB
+    # Verify in DB (the TestClient runs the extraction job before returning)
+    job = db_session.get(models.BackgroundJob, data["extraction_job_id"])
+    assert job.status == "completed"
     editable_text_entry = db_session.query(models.EditablePDFText).filter(models.EditablePDFText.document_id == document_id).first()
     assert editable_text_entry is not None
-    assert editable_text_entry.id == data["editable_pdf_internal_id"]
+    assert editable_text_entry.id == json.loads(job.result)["editable_pdf_internal_id"]
     page_texts = json.loads(editable_text_entry.text_content_by_page)
     assert "1" in page_texts # Page number as string key
     assert "Text from minimal PDF page 1" in page_texts["1"]
@@ -153,7 +155,7 @@ def test_get_page_comparison_data_success(client: TestClient, db_session, setup_
     pdf_doc.close()
     with open(minimal_pdf_path, "rb") as f:
         upload_resp = client.post(f"/correction/documents/{document_id}/editable-pdf", files={"editable_pdf_file": ("minimal_compare.pdf", f, "application/pdf")})
-    assert upload_resp.status_code == 200
+    assert upload_resp.status_code == 202
     os.remove(minimal_pdf_path)
 
     # Now get comparison data
@@ -1,5 +1,12 @@
 import sys
 import os
+import json
+from typing import Dict, Optional
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Add the project root to the Python path to allow imports from Backend.app
 # This assumes conftest.py is in Backend/tests/
@@ -25,4 +32,67 @@ if ACTUAL_PROJECT_ROOT_FOR_BACKEND_IMPORT not in sys.path:
     sys.path.insert(0, ACTUAL_PROJECT_ROOT_FOR_BACKEND_IMPORT)
 
 print(f"PYTHONPATH extended with: {ACTUAL_PROJECT_ROOT_FOR_BACKEND_IMPORT}")
-print(f"Current sys.path: {sys.path}") 
\ No newline at end of file
+print(f"Current sys.path: {sys.path}")
+
+from app.db.database import Base  # noqa: E402
+from app.db import models  # noqa: E402
+
+@pytest.fixture(scope="function")
+def make_session_factory():
+    """Factory of session factories, each bound to a new empty in-memory database."""
+    engines = []
+
+    def make():
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        engines.append(engine)
+        return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    yield make
+    for engine in engines:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+@pytest.fixture(scope="function")
+def session_factory(make_session_factory):
+    return make_session_factory()
+
+@pytest.fixture(scope="function")
+def db_session(session_factory):
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(scope="function")
+def add_document():
+    """
+    Function that adds and commits a document with its pages: add_document(db, {1: "OCR text", 2: None}),
+    where None leaves a page without extracted text. text_b and corrected map str(page_number) to
+    the editable PDF text and the corrected text, formatted_text page_number to formatted text.
+    """
+    def add(db: Session, pages: Dict[int, Optional[str]], text_b: Optional[Dict[str, str]] = None,
+            corrected: Optional[Dict[str, str]] = None, formatted_text: Optional[Dict[int, str]] = None,
+            page_status: str = "processed", **fields) -> models.Document:
+        fields.setdefault("filename", "doc.pdf")
+        fields.setdefault("file_path", f"/uploads/{fields['filename']}")
+        fields.setdefault("total_pages", len(pages))
+        doc = models.Document(**fields)
+        db.add(doc)
+        db.commit()
+        for page_number, raw_text in pages.items():
+            page = models.Page(document_id=doc.id, page_number=page_number, status=page_status)
+            if raw_text is not None:
+                page.extracted_text = models.ExtractedText(
+                    raw_text=raw_text, formatted_text=(formatted_text or {}).get(page_number)
+                )
+            db.add(page)
+        if text_b is not None:
+            db.add(models.EditablePDFText(document_id=doc.id, text_content_by_page=json.dumps(text_b)))
+        if corrected is not None:
+            db.add(models.CorrectedText(document_id=doc.id, corrected_content_by_page=json.dumps(corrected)))
+        db.commit()
+        return doc
+
+    return add
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import text
+
+from app.db import models
+from app.db.compression import compress_text, decompress_text, register_dictionary, train_dictionary
+from app.db.migrations import compress_existing_rows, upgrade_schema
+
+LONG_TEXT = "It was the best of times, it was the worst of times, it was the age of wisdom. " * 10
+
+@pytest.mark.parametrize("value", ["", "short", LONG_TEXT, "ünïcödé — “quotes” " * 20])
+def test_round_trip(value):
+    assert decompress_text(compress_text(value)) == value
+    assert decompress_text(compress_text(value, force_bytes=True)) == value
+
+def test_long_text_is_smaller_and_short_text_stays_plain():
+    assert len(compress_text(LONG_TEXT)) < len(LONG_TEXT) / 4
+    assert compress_text("short") == "short"
+
+def test_trained_dictionary_round_trip():
+    register_dictionary(200, train_dictionary([LONG_TEXT] * 3))
+    compressed = compress_text(LONG_TEXT, dictionary_id=200)
+    assert compressed[1] == 200
+    assert decompress_text(compressed) == LONG_TEXT
+
+def test_legacy_rows_read_and_migrate(db_session):
+    doc = models.Document(filename="doc.pdf", file_path="/uploads/doc.pdf", total_pages=1)
+    db_session.add(doc)
+    db_session.commit()
+    page = models.Page(document_id=doc.id, page_number=1)
+    db_session.add(page)
+    db_session.commit()
+    db_session.execute(
+        text("INSERT INTO extracted_texts (page_id, raw_text, formatted_text) VALUES (:page_id, :raw, :formatted)"),
+        {"page_id": page.id, "raw": LONG_TEXT, "formatted": '{"blocks": [], "clean_text": "%s"}' % LONG_TEXT}
+    )
+    db_session.commit()
+    assert db_session.query(models.ExtractedText).first().raw_text == LONG_TEXT
+
+    compress_existing_rows(db_session)
+    stored = db_session.execute(text("SELECT typeof(raw_text), typeof(formatted_text) FROM extracted_texts")).first()
+    assert tuple(stored) == ("blob", "text")  # formatted_text is short once re-encoded without clean_text
+
+    db_session.expire_all()
+    row = db_session.query(models.ExtractedText).first()
+    assert row.raw_text == LONG_TEXT
+    assert row.formatted_text == '{"v":2,"styles":[],"s":[],"t":[],"hf":0}'
+
+def test_upgrade_schema_recreates_event_log_with_autoincrement(session_factory):
+    engine = session_factory.kw["bind"]
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE event_log"))
+        connection.execute(text("CREATE TABLE event_log (id INTEGER PRIMARY KEY, origin VARCHAR, document_id INTEGER, "
+                                "event_type VARCHAR, payload TEXT, created_at DATETIME)"))
+        connection.execute(text("INSERT INTO event_log (id, event_type) VALUES (1, 'test')"))
+
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # A no-op once upgraded
+    with engine.begin() as connection:
+        table_sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'event_log'")).scalar()
+        assert "AUTOINCREMENT" in table_sql
+        connection.execute(text("INSERT INTO event_log (event_type) VALUES ('test')"))
+        connection.execute(text("DELETE FROM event_log"))
+        connection.execute(text("INSERT INTO event_log (event_type) VALUES ('test')"))
+        assert connection.execute(text("SELECT id FROM event_log")).scalar() == 2
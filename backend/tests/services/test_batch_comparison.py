@@ -0,0 +1,85 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.db import models
+from app.services.batch_comparison import run_document_comparison, start_document_comparison, triage_pages
+from app.services.comparison_cache import cache_key, get_cached
+from app.services.comparison_worker import summarize_differences
+
+TEXT_B = {"1": "The quick brown fox", "2": "jumps over the lazy dog", "3": "and runs away"}
+TEXT_A = {1: "The quick brown fox", 2: "jumps ovcr tbe lazy dog", 3: "and runs awav"}
+
+@pytest.fixture(scope="function")
+def document_id(session_factory, add_document):
+    db = session_factory()
+    doc = add_document(db, TEXT_A, text_b=TEXT_B)
+    doc_id = doc.id
+    db.close()
+    return doc_id
+
+def test_summary_similarity():
+    differences = [
+        {"type": "equal", "original_text_a_segment": "a b c"},
+        {"type": "replace", "original_text_a_segment": "d"},
+    ]
+    assert summarize_differences(differences, 4, 4) == {"similarity": 0.75, "edit_count": 1, "words_a": 4, "words_b": 4}
+    assert summarize_differences([], 0, 0)["similarity"] == 1.0
+
+def test_job_ranks_pages_and_warms_cache(session_factory, document_id):
+    db = session_factory()
+    job, created = start_document_comparison(db, document_id)
+    assert created
+    assert start_document_comparison(db, document_id) == (job, False)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        run_document_comparison(job.id, session_factory=session_factory, executor=executor)
+
+    db.expire_all()
+    assert job.status == "completed"
+    assert (job.progress_current, job.progress_total) == (3, 3)
+    assert json.loads(job.result)["pages_needing_attention"] == 2
+    assert [page["page_number"] for page in triage_pages(db, document_id)] == [2, 3, 1]
+    assert triage_pages(db, document_id, max_similarity=0.99)[-1]["page_number"] == 3
+    assert get_cached(db, cache_key(TEXT_A[2], TEXT_B["2"])) is not None
+
+    # Editing Text A drops the now stale summary of that page
+    page = db.query(models.Page).filter(models.Page.page_number == 2).first()
+    page.extracted_text.raw_text = TEXT_B["2"]
+    db.commit()
+    assert [page["page_number"] for page in triage_pages(db, document_id)] == [3, 1]
+    db.close()
+
+def test_superseded_job_saves_no_summaries(session_factory, document_id):
+    db = session_factory()
+    older, _ = start_document_comparison(db, document_id)
+    newer, created = start_document_comparison(db, document_id, supersede=True)  # E.g. after a new Text B upload
+    assert created and newer.id != older.id
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        run_document_comparison(older.id, session_factory=session_factory, executor=executor)
+        db.expire_all()
+        assert older.status == "failed" and f"comparison job {newer.id}" in older.error
+        assert triage_pages(db, document_id) == []
+
+        run_document_comparison(newer.id, session_factory=session_factory, executor=executor)
+    db.expire_all()
+    assert newer.status == "completed"
+    assert len(triage_pages(db, document_id)) == 3
+    db.close()
+
+def test_job_with_identical_pages(session_factory, add_document):
+    db = session_factory()
+    doc = add_document(db, {1: "Chapter", 2: "Chapter", 3: ""}, text_b={"1": "Chapter", "2": "Chapter", "3": ""})
+    job, _ = start_document_comparison(db, doc.id)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        run_document_comparison(job.id, session_factory=session_factory, executor=executor)
+
+    db.expire_all()
+    assert job.status == "completed" and job.progress_current == 3
+    assert db.query(models.ComparisonCacheEntry).filter(
+        models.ComparisonCacheEntry.cache_key == cache_key("Chapter", "Chapter")
+    ).count() == 1
+    db.close()
@@ -0,0 +1,88 @@
+import random
+
+from app.services.char_diff import (
+    SKIPPED_LONG_HUNK,
+    SKIPPED_TIME_BUDGET,
+    char_edits,
+    edit_distance,
+    refine_replace_hunks,
+)
+from app.services.diff_payload import compact_differences, expand_differences
+from app.services.text_comparison_service import TextComparisonService
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def test_edit_distance_matches_dynamic_programming():
+    rng = random.Random(11)
+    for _ in range(1000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 80)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 80)))
+        assert edit_distance(a, b) == levenshtein(a, b)
+
+def test_char_edits_transform_a_into_b():
+    rng = random.Random(5)
+    for _ in range(500):
+        a = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+        b = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+        rebuilt, position = [], 0
+        for _, i1, i2, j1, j2 in char_edits(a, b):
+            rebuilt.append(a[position:i1] + b[j1:j2])
+            position = i2
+        assert "".join(rebuilt) + a[position:] == b
+
+def test_ocr_confusion_is_a_single_small_edit():
+    assert char_edits("modern", "rnodern") == [("replace", 0, 1, 0, 2)]
+
+def test_compare_texts_attaches_absolute_char_edits():
+    text_a = "The rnodern world"
+    text_b = "The modern world"
+    differences = TextComparisonService().compare_texts(text_a, text_b, char_level=True)
+    replace = next(diff for diff in differences if diff["type"] == "replace")
+    [edit] = replace["char_edits"]
+    assert text_a[edit["a_start_index"]:edit["a_end_index"]] == "rn"
+    assert text_b[edit["b_start_index"]:edit["b_end_index"]] == "m"
+    assert "char_edits" not in TextComparisonService().compare_texts(text_a, text_b)[1]
+
+def test_long_hunks_are_not_refined():
+    differences = [{"type": "replace", "a_start_index": 0, "a_end_index": 300, "b_start_index": 0, "b_end_index": 3}]
+    assert refine_replace_hunks(differences, "a" * 300, "bbb") == 0
+    assert "char_edits" not in differences[0]
+    assert differences[0]["char_edits_skipped"] == SKIPPED_LONG_HUNK
+
+def test_every_ocr_substitution_on_a_page_is_refined():
+    rng = random.Random(3)
+    words = ["".join(rng.choice("etaoinshrdlu") for _ in range(rng.randint(2, 9))) for _ in range(450)]
+    noisy = list(words)
+    for index in rng.sample(range(len(words)), 17):
+        position = rng.randrange(len(words[index]))
+        noisy[index] = words[index][:position] + "#" + words[index][position + 1:]
+    text_a, text_b = " ".join(noisy), " ".join(words)
+    differences = TextComparisonService().compare_texts(text_a, text_b, char_level=True)
+    replaces = [diff for diff in differences if diff["type"] == "replace"]
+    assert len(replaces) == 17
+    assert all(len(diff["char_edits"]) == 1 and "char_edits_skipped" not in diff for diff in replaces)
+    # Single-character cores need no alignment: they are refined even past the deadline
+    assert refine_replace_hunks(differences, text_a, text_b, deadline=0.0) == 17
+
+def test_hunks_past_the_deadline_are_marked():
+    words_a = [f"word{index}xx" for index in range(50)]
+    words_b = [f"word{index}yyy" for index in range(50)]
+    text_a, text_b = " ".join(words_a), " ".join(words_b)
+    differences = [
+        {"type": "replace", "original_text_a_segment": a, "suggested_text_b_segment": b,
+         "a_start_index": text_a.index(a), "a_end_index": text_a.index(a) + len(a),
+         "b_start_index": text_b.index(b), "b_end_index": text_b.index(b) + len(b)}
+        for a, b in zip(words_a, words_b)
+    ]
+    assert refine_replace_hunks(differences, text_a, text_b, deadline=0.0) == 0
+    assert all(diff["char_edits_skipped"] == SKIPPED_TIME_BUDGET for diff in differences)
+    assert expand_differences(compact_differences(differences), text_a, text_b)[0]["char_edits_skipped"] == SKIPPED_TIME_BUDGET
+    assert refine_replace_hunks(differences, text_a, text_b) == len(differences)
+    assert all("char_edits" in diff and "char_edits_skipped" not in diff for diff in differences)
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.db import models
+from app.services.comparison_cache import CACHE_HIT, CACHE_MISS, CACHE_SHARED, cache_key, get_or_compute
+
+@pytest.fixture(scope="function")
+def document(db_session, add_document):
+    return add_document(db_session, {1: "Hello wrold"}, text_b={"1": "Hello world"})
+
+def cached_rows(db_session):
+    return db_session.query(models.ComparisonCacheEntry).count()
+
+def test_key_depends_on_texts_and_options():
+    assert cache_key("a", "b") == cache_key("a", "b")
+    assert len({cache_key("a", "b"), cache_key("a", "c"), cache_key("a", "b", char_level=True)}) == 3
+
+def test_second_request_is_a_hit(db_session, document):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [{"type": "replace"}]
+
+    first = asyncio.run(get_or_compute(db_session, document.id, 1, "Hello wrold", "Hello world", compute))
+    second = asyncio.run(get_or_compute(db_session, document.id, 1, "Hello wrold", "Hello world", compute))
+    assert first == ([{"type": "replace"}], CACHE_MISS)
+    assert second == ([{"type": "replace"}], CACHE_HIT)
+    assert len(calls) == 1
+
+def test_concurrent_requests_compute_once(db_session, document):
+    calls = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+        time.sleep(0.05)
+        return []
+
+    async def scenario():
+        return await asyncio.gather(*[
+            get_or_compute(db_session, document.id, 1, "a", "b", compute) for _ in range(3)
+        ])
+
+    statuses = sorted(status for _, status in asyncio.run(scenario()))
+    assert statuses == sorted([CACHE_MISS, CACHE_SHARED, CACHE_SHARED])
+    assert len(calls) == 1
+
+def test_text_changes_invalidate_entries(db_session, document):
+    asyncio.run(get_or_compute(db_session, document.id, 1, "Hello wrold", "Hello world", lambda: []))
+    assert cached_rows(db_session) == 1
+
+    page = db_session.query(models.Page).first()
+    page.extracted_text.raw_text = "Hello world"
+    db_session.commit()
+    assert cached_rows(db_session) == 0
+
+    asyncio.run(get_or_compute(db_session, document.id, 1, "Hello world", "Hello world", lambda: []))
+    editable = db_session.query(models.EditablePDFText).first()
+    editable.text_content_by_page = json.dumps({"1": "Hello, world"})
+    db_session.commit()
+    assert cached_rows(db_session) == 0
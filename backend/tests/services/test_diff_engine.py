@@ -0,0 +1,60 @@
+import difflib
+import random
+
+import pytest
+
+from app.services.diff_engine import get_opcodes, intern_tokens, _myers
+
+def apply_opcodes(tokens_a, tokens_b, opcodes):
+    """Check opcodes cover both sequences contiguously and rebuild B from them."""
+    rebuilt = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert tokens_a[i1:i2] == tokens_b[j1:j2]
+        rebuilt.extend(tokens_b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(tokens_a), len(tokens_b))
+    return rebuilt
+
+def lcs_length(tokens_a, tokens_b):
+    row = [0] * (len(tokens_b) + 1)
+    for token in tokens_a:
+        previous = 0
+        for j, other in enumerate(tokens_b):
+            current = row[j + 1]
+            row[j + 1] = previous + 1 if token == other else max(row[j + 1], row[j])
+            previous = current
+    return row[-1]
+
+@pytest.mark.parametrize("text_a, text_b", [
+    ("Hello world", "Hello beautiful world"),
+    ("apple banana cherry", "apple grape cherry durian"),
+    ("This is a test sentence.", "This was a test sentence."),
+    ("", ""),
+])
+def test_matches_difflib_on_simple_cases(text_a, text_b):
+    words_a, words_b = text_a.split(), text_b.split()
+    expected = difflib.SequenceMatcher(None, words_a, words_b, autojunk=False).get_opcodes()
+    assert get_opcodes(words_a, words_b) == expected
+
+def test_random_sequences_round_trip_with_minimal_edits():
+    rng = random.Random(7)
+    for _ in range(500):
+        alphabet = "abcdef"[:rng.randint(1, 6)]
+        tokens_a = [rng.choice(alphabet) for _ in range(rng.randint(0, 25))]
+        tokens_b = [rng.choice(alphabet) for _ in range(rng.randint(0, 25))]
+        assert apply_opcodes(tokens_a, tokens_b, get_opcodes(tokens_a, tokens_b)) == tokens_b
+        ids_a, ids_b = intern_tokens(tokens_a, tokens_b)
+        assert len(_myers(ids_a, 0, len(ids_a), ids_b, 0, len(ids_b), 100)) == lcs_length(tokens_a, tokens_b)
+
+def test_long_repetitive_pages_stay_aligned():
+    rng = random.Random(3)
+    vocabulary = "the of and to a in that is was he for it".split()
+    tokens_a = [rng.choice(vocabulary) for _ in range(5000)]
+    tokens_b = [token if rng.random() > 0.1 else rng.choice(vocabulary) for token in tokens_a]
+    opcodes = get_opcodes(tokens_a, tokens_b)
+    assert apply_opcodes(tokens_a, tokens_b, opcodes) == tokens_b
+    equal = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+    assert equal > 0.9 * len(tokens_a)
@@ -0,0 +1,48 @@
+import gzip
+import json
+
+import pytest
+
+from app.services import diff_payload
+from app.services.diff_payload import (
+    MEDIA_JSON,
+    MEDIA_MSGPACK,
+    choose_content_encoding,
+    choose_media_type,
+    compact_differences,
+    encode_payload,
+    expand_differences,
+)
+from app.services.text_comparison_service import TextComparisonService
+
+TEXT_A = "The quick brown fox\njumps ovcr the  lazy dog and runs"
+TEXT_B = "The quick brown fox jumps over the lazy cat and runs away"
+
+@pytest.mark.parametrize("char_level", [False, True])
+def test_compact_round_trip(char_level):
+    differences = TextComparisonService().compare_texts(TEXT_A, TEXT_B, char_level=char_level)
+    segments = compact_differences(differences)
+    assert all(len(segment) == 5 for segment in segments if segment[0] == "equal")
+    assert expand_differences(segments, TEXT_A, TEXT_B) == differences
+
+def test_accept_headers(monkeypatch):
+    monkeypatch.setattr(diff_payload, "msgpack", object())
+    assert choose_media_type(None) == MEDIA_JSON
+    assert choose_media_type("application/json") == MEDIA_JSON
+    assert choose_media_type("application/x-msgpack") == MEDIA_MSGPACK
+    assert choose_media_type("application/msgpack;q=0.5, application/json") == MEDIA_JSON
+    monkeypatch.setattr(diff_payload, "msgpack", None)
+    assert choose_media_type("application/msgpack") == MEDIA_JSON
+
+    monkeypatch.setattr(diff_payload, "brotli", None)
+    assert choose_content_encoding("gzip, deflate, br") == "gzip"
+    assert choose_content_encoding("gzip;q=0, identity") is None
+
+def test_encode_compresses_large_bodies():
+    payload = {"text": "word " * 1000}
+    body, headers = encode_payload(payload, "application/json", "gzip")
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == payload
+
+    body, headers = encode_payload({"text": "short"}, None, "gzip")
+    assert "Content-Encoding" not in headers and json.loads(body) == {"text": "short"}
@@ -0,0 +1,117 @@
+import json
+import os
+import zipfile
+
+import fitz
+import pytest
+
+from app.db import models
+from app.services import comparison_cache  # noqa: F401 (its after_flush listener runs during imports)
+from app.services.document_bundle import MANIFEST, import_bundle, read_manifest, stream_bundle
+from app.services.progress_counters import get_progress
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads")
+    os.makedirs("extracted/1")
+    return tmp_path
+
+@pytest.fixture(scope="function")
+def source(session_factory):
+    scan = fitz.open()
+    for _ in range(3):
+        scan.new_page()
+    scan.save("uploads/scan.pdf")
+    db = session_factory()
+    doc = models.Document(filename="scan.pdf", file_path="uploads/scan.pdf", total_pages=3, status="completed")
+    db.add(doc)
+    db.commit()
+    for page_number in range(1, 4):
+        image_path = f"extracted/{doc.id}/page_{page_number}.jpg"
+        scan[page_number - 1].get_pixmap().save(image_path)
+        page = models.Page(document_id=doc.id, page_number=page_number, status="processed", image_path=image_path)
+        page.extracted_text = models.ExtractedText(raw_text=f"OCR text of page {page_number}", formatted_text='{"blocks": []}')
+        db.add(page)
+    scan.close()
+    db.add(models.EditablePDFText(document_id=doc.id, text_content_by_page=json.dumps({"1": "Text B"})))
+    db.commit()  # Before the geometry and alignments, which a new editable PDF drops
+    db.add(models.CorrectedText(document_id=doc.id, corrected_content_by_page=json.dumps({"2": "Corrected page 2"})))
+    db.add(models.PageWordGeometry(document_id=doc.id, page_number=1, word_count=2, words="Text\nB",
+                                   boxes=b"\x00\x01" * 16, offsets=b"\x02" * 16))
+    db.add(models.PageAlignment(document_id=doc.id, page_number=3, page_number_b=1, method="manual"))
+    db.add(models.PageAlignment(document_id=doc.id, page_number=1, page_number_b=1, method="minhash"))
+    db.commit()
+    document_id = doc.id
+    db.close()
+    return session_factory, document_id
+
+def export(session_factory, document_id, path="bundle.zip"):
+    with open(path, "wb") as output:
+        for chunk in stream_bundle(document_id, session_factory=session_factory):
+            output.write(chunk)
+    return path
+
+def test_bundle_round_trip(source, make_session_factory):
+    session_factory, document_id = source
+    path = export(session_factory, document_id)
+    with zipfile.ZipFile(path) as bundle:
+        assert bundle.namelist()[-1] == MANIFEST
+        assert bundle.getinfo("pages/page_1.jpg").compress_type == zipfile.ZIP_STORED
+        manifest = read_manifest(bundle)
+    assert sorted(manifest["files"]) == ["document.json", "original.pdf", "pages/page_1.jpg", "pages/page_2.jpg", "pages/page_3.jpg"]
+
+    target = make_session_factory()()
+    target.add(models.Document(filename="other.pdf", file_path="uploads/other.pdf"))
+    target.commit()
+    document, created = import_bundle(target, path)
+    assert created and document.id == 2 and document.status == "completed"
+    with open(document.file_path, "rb") as imported, open("uploads/scan.pdf", "rb") as original:
+        assert imported.read() == original.read()
+
+    pages = target.query(models.Page).filter(models.Page.document_id == document.id).order_by(models.Page.page_number).all()
+    assert [(page.status, page.image_path) for page in pages] == [
+        ("processed", os.path.join("extracted", "2", f"page_{n}.jpg")) for n in range(1, 4)
+    ]
+    assert all(os.path.isfile(page.image_path) for page in pages)
+    assert pages[2].extracted_text.raw_text == "OCR text of page 3"
+    assert json.loads(target.query(models.CorrectedText).one().corrected_content_by_page) == {"2": "Corrected page 2"}
+    assert target.query(models.EditablePDFText).one().document_id == document.id
+    geometry = target.query(models.PageWordGeometry).one()
+    assert (geometry.words, geometry.boxes, geometry.offsets) == ("Text\nB", b"\x00\x01" * 16, b"\x02" * 16)
+    assert [(row.page_number, row.page_number_b, row.method) for row in target.query(models.PageAlignment)] == [(3, 1, "manual")]
+    assert get_progress(target, document.id).processed_pages == 3
+
+    # Idempotent by content hash, also for the node the bundle came from
+    assert import_bundle(target, path) == (document, False)
+    assert target.query(models.Document).count() == 2
+    origin = session_factory()
+    assert import_bundle(origin, path)[0].id == document_id
+    origin.close()
+    target.close()
+
+def test_bundle_hash_ignores_export_time_and_ids(source, make_session_factory):
+    session_factory, document_id = source
+    first = export(session_factory, document_id, "first.zip")
+    target = make_session_factory()()
+    document, _ = import_bundle(target, first)
+    again = export(lambda: target, document.id, "again.zip")
+    with zipfile.ZipFile(first) as a, zipfile.ZipFile(again) as b:
+        assert read_manifest(a)["content_hash"] == read_manifest(b)["content_hash"]
+
+def test_tampered_bundle_is_rejected(source, make_session_factory):
+    session_factory, document_id = source
+    path = export(session_factory, document_id)
+    with zipfile.ZipFile(path) as bundle, zipfile.ZipFile("tampered.zip", "w") as tampered:
+        for info in bundle.infolist():
+            data = bundle.read(info)
+            tampered.writestr(info, b"not a jpeg" if info.filename == "pages/page_2.jpg" else data)
+
+    target = make_session_factory()()
+    with pytest.raises(ValueError, match="page_2.jpg"):
+        import_bundle(target, "tampered.zip")
+    assert target.query(models.Document).count() == 0
+    assert os.listdir("extracted") == ["1"] and os.listdir("uploads") == ["scan.pdf"]
+    with pytest.raises(ValueError):
+        import_bundle(target, "uploads/scan.pdf")
+    target.close()
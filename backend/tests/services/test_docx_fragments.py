@@ -0,0 +1,84 @@
+import copy
+import zipfile
+
+import pytest
+from docx import Document as DocxDocument
+
+from app.services.docx_fragments import FragmentCache, generate_docx, stream_docx
+from app.services.wordextract import WordGenerator
+
+def span(page, block_no, text, line_no=0, **formatting):
+    item = {"text": text, "page": page, "block_no": block_no, "line_no": line_no,
+            "is_last_span_in_line": True, "bbox": [0, 0, 100, 20]}
+    item.update(formatting)
+    return item
+
+def book(pages, changed=None):
+    items = []
+    for page in range(1, pages + 1):
+        text = changed if page == 2 and changed else f"Body of page {page}"
+        items.append(span(page, len(items), f"Title {page}", alignment="center", is_bold=True, size=16))
+        items.append(span(page, len(items), text, color=(0.2, 0.4, 0.6)))
+        items.append(span(page, len(items), "Second line", line_no=1, is_italic=True))
+        if page % 2:
+            items.append(span(page, len(items), "Indented note", is_indent=True))
+    return items
+
+def document_xml(path):
+    with zipfile.ZipFile(path) as package:
+        return DocxDocument(path), package.read("word/document.xml").decode("utf-8")
+
+@pytest.fixture
+def cache(tmp_path):
+    return FragmentCache(str(tmp_path / "fragments"))
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_output_matches_full_generation(tmp_path, cache, fast):
+    items = book(5)
+    WordGenerator(copy.deepcopy(items), fast=fast).generate_document(str(tmp_path / "full.docx"))
+    assert generate_docx(copy.deepcopy(items), str(tmp_path / "cold.docx"), cache, fast=fast) == {"pages_rendered": 5, "pages_reused": 0}
+    assert generate_docx(copy.deepcopy(items), str(tmp_path / "warm.docx"), cache, fast=fast) == {"pages_rendered": 0, "pages_reused": 5}
+
+    full, full_xml = document_xml(tmp_path / "full.docx")
+    for name in ("cold.docx", "warm.docx"):
+        assembled, assembled_xml = document_xml(tmp_path / name)
+        assert assembled_xml == full_xml
+        assert [p.text for p in assembled.paragraphs] == [p.text for p in full.paragraphs]
+
+def test_changed_page_is_the_only_one_rendered(tmp_path, cache):
+    generate_docx(book(6), str(tmp_path / "before.docx"), cache)
+    progress = []
+    counts = generate_docx(book(6, changed="Corrected body"), str(tmp_path / "after.docx"), cache, progress=lambda done, total: progress.append(done))
+    assert counts == {"pages_rendered": 1, "pages_reused": 5}
+    assert progress == [1, 2, 3, 4, 5, 6]
+    texts = [p.text for p in DocxDocument(str(tmp_path / "after.docx")).paragraphs]
+    assert "Corrected body" in texts and "Body of page 2" not in texts
+
+def test_items_without_text(tmp_path, cache):
+    assert generate_docx([span(1, 0, "")], str(tmp_path / "empty.docx"), cache) == {"pages_rendered": 0, "pages_reused": 0}
+    assert [p.text for p in DocxDocument(str(tmp_path / "empty.docx")).paragraphs] == ["No text content could be extracted from the PDF."]
+
+def test_eviction_keeps_recent_fragments(tmp_path):
+    cache = FragmentCache(str(tmp_path / "fragments"), max_bytes=0)
+    generate_docx(book(3), str(tmp_path / "out.docx"), cache)
+    assert cache.evict() == 0  # Everything was evicted right after the build
+    cache.max_bytes = 10 ** 6
+    generate_docx(book(3), str(tmp_path / "out.docx"), cache)
+    assert len(list((tmp_path / "fragments").iterdir())) == 3
+
+def test_pages_are_consumed_one_at_a_time(tmp_path, cache):
+    items = book(4)
+    progress, produced = [], []
+
+    def pages():
+        for page_number in range(1, 6):
+            produced.append(len(progress))  # Pages written so far when this one is requested
+            yield [item for item in items if item["page"] == page_number]  # Page 5 has no text
+
+    counts = stream_docx(pages(), str(tmp_path / "streamed.docx"), cache, progress=lambda done, total: progress.append((done, total)), total=5)
+    assert counts == {"pages_rendered": 4, "pages_reused": 0}
+    assert produced == [0, 1, 2, 3, 4]
+    assert progress[-1] == (5, 5)
+
+    generate_docx(copy.deepcopy(items), str(tmp_path / "whole.docx"), cache)
+    assert document_xml(tmp_path / "streamed.docx")[1] == document_xml(tmp_path / "whole.docx")[1]
@@ -0,0 +1,110 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import pytest
+
+from app.db import models
+from app.services import editable_pdf_extraction
+from app.services.editable_pdf_extraction import (
+    MIN_PAGES_PER_TASK,
+    extract_pages,
+    page_ranges,
+    remove_uploads,
+    run_editable_pdf_extraction,
+    start_editable_pdf_extraction,
+    upload_file_name,
+)
+from app.services.word_geometry import get_word_index
+
+PAGE_COUNT = 40
+
+@pytest.fixture(scope="function")
+def document_id(session_factory, add_document):
+    db = session_factory()
+    doc = add_document(db, {page_number: f"Text of page {page_number}" for page_number in range(1, PAGE_COUNT + 1)})
+    doc_id = doc.id
+    db.close()
+    return doc_id
+
+@pytest.fixture
+def editable_pdf(tmp_path):
+    path = tmp_path / "editable.pdf"
+    doc = fitz.open()
+    for page_number in range(1, PAGE_COUNT + 1):
+        page = doc.new_page()
+        page.insert_text(fitz.Point(72, 72), f"Text of page {page_number}", fontsize=12)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+def test_page_ranges_cover_every_page_once():
+    for page_count, workers in [(1, 4), (15, 8), (100, 1), (2000, 8), (2001, 3)]:
+        ranges = page_ranges(page_count, workers)
+        pages = [page for first, last in ranges for page in range(first, last + 1)]
+        assert pages == list(range(1, page_count + 1))
+        assert all(last - first + 1 >= MIN_PAGES_PER_TASK for first, last in ranges[:-1])
+    assert len(page_ranges(2000, 8)) == 32
+    assert page_ranges(0, 4) == []
+
+def test_parallel_extraction_matches_serial(editable_pdf):
+    serial_texts, serial_words = extract_pages(editable_pdf, PAGE_COUNT)
+    progress = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        texts, words = extract_pages(editable_pdf, PAGE_COUNT, executor, workers=3, progress=progress.append)
+    assert list(texts) == list(range(1, PAGE_COUNT + 1))
+    assert texts == serial_texts
+    assert {page: w.words for page, w in words.items()} == {page: w.words for page, w in serial_words.items()}
+    assert progress[-1] == PAGE_COUNT and progress == sorted(progress) and len(progress) > 1
+
+def test_extraction_stops_after_the_current_range(editable_pdf):
+    progress, checks = [], []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        result = extract_pages(editable_pdf, PAGE_COUNT, executor, workers=1, progress=progress.append,
+                               stop=lambda: checks.append(True) or len(checks) > 1)
+    assert result is None
+    assert progress == [MIN_PAGES_PER_TASK] and len(page_ranges(PAGE_COUNT, 1)) > 2
+
+def test_job_stores_text_b_and_runs_comparison(session_factory, document_id, editable_pdf):
+    db = session_factory()
+    job = start_editable_pdf_extraction(db, document_id, PAGE_COUNT)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        run_editable_pdf_extraction(job.id, editable_pdf, session_factory=session_factory, executor=executor)
+
+    db.expire_all()
+    assert job.status == "completed"
+    assert (job.progress_current, job.progress_total) == (PAGE_COUNT, PAGE_COUNT)
+    result = json.loads(job.result)
+    entry = db.query(models.EditablePDFText).filter(models.EditablePDFText.document_id == document_id).one()
+    assert result["editable_pdf_internal_id"] == entry.id
+    assert json.loads(entry.text_content_by_page)["7"].strip() == "Text of page 7"
+    assert get_word_index(db, document_id, 7).words == ["Text", "of", "page", "7"]
+    assert db.get(models.BackgroundJob, result["comparison_job_id"]).status == "completed"
+    assert not os.path.exists(editable_pdf)  # The upload is deleted once extracted
+    db.close()
+
+def test_older_job_is_superseded(session_factory, document_id, editable_pdf, monkeypatch):
+    extracted = []
+    monkeypatch.setattr(editable_pdf_extraction, "extract_page_range", lambda *args: extracted.append(args) or [])
+    db = session_factory()
+    older = start_editable_pdf_extraction(db, document_id, PAGE_COUNT)
+    newer = start_editable_pdf_extraction(db, document_id, PAGE_COUNT)
+    run_editable_pdf_extraction(older.id, editable_pdf, session_factory=session_factory, executor=ThreadPoolExecutor(max_workers=1))
+
+    db.expire_all()
+    assert older.status == "failed"
+    assert f"extraction job {newer.id}" in older.error
+    assert db.query(models.EditablePDFText).count() == 0
+    assert extracted == []  # Stopped before extracting a single range
+    assert not os.path.exists(editable_pdf)
+    db.close()
+
+def test_remove_uploads_keeps_other_documents(tmp_path):
+    names = [upload_file_name(1, "b.pdf"), upload_file_name(1, "../b.pdf"), upload_file_name(10, "b.pdf")]
+    for name in names:
+        (tmp_path / name).write_bytes(b"%PDF")
+    assert names[0] != names[1] and os.path.dirname(names[1]) == ""
+
+    remove_uploads(1, uploads_dir=str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [names[2]]
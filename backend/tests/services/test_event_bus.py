@@ -0,0 +1,107 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+from app.db import models
+from app.services import event_bus
+from app.services.event_bus import EventBus, Subscription, bus, run_event_relay
+
+async def _drain(subscription: Subscription):
+    events = []
+    while True:
+        event_data = await subscription.get(timeout=0.05)
+        if event_data is None:
+            return events
+        events.append(event_data)
+
+def test_slow_consumer_drops_oldest_and_gets_lagged_notice():
+    async def scenario():
+        local_bus = EventBus(queue_size=3)
+        subscription = local_bus.subscribe()
+        for i in range(10):
+            local_bus.publish({"type": "test", "document_id": 1, "data": {"i": i}})
+        return await _drain(subscription)
+
+    events = asyncio.run(scenario())
+    assert events[0]["type"] == "stream.lagged"
+    assert events[0]["data"]["dropped"] == 7
+    assert [e["data"]["i"] for e in events[1:]] == [7, 8, 9]
+
+def test_document_filter():
+    async def scenario():
+        local_bus = EventBus()
+        subscription = local_bus.subscribe(document_id=2)
+        local_bus.publish({"type": "test", "document_id": 1, "data": {}})
+        local_bus.publish({"type": "test", "document_id": 2, "data": {}})
+        return await _drain(subscription)
+
+    events = asyncio.run(scenario())
+    assert [e["document_id"] for e in events] == [2]
+
+def test_page_changes_published_only_on_commit(db_session):
+    async def scenario():
+        subscription = bus.subscribe()
+        try:
+            doc = models.Document(filename="doc.pdf", file_path="/uploads/doc.pdf", total_pages=1)
+            db_session.add(doc)
+            db_session.commit()
+            page = models.Page(document_id=doc.id, page_number=1, status="pending")
+            db_session.add(page)
+            db_session.commit()
+
+            page.status = "error"
+            db_session.flush()
+            db_session.rollback()
+
+            page.image_path = "extracted/1/page_1.jpg"
+            page.status = "processed"
+            db_session.add(models.ExtractedText(page_id=page.id, raw_text="Some text"))
+            db_session.commit()
+            return await _drain(subscription)
+        finally:
+            subscription.close()
+
+    events = asyncio.run(scenario())
+    types = [e["type"] for e in events]
+    assert types.count("page.status") == 2
+    assert "page.image_ready" in types
+    assert "page.ocr_complete" in types
+    assert all(e["data"].get("status") != "error" for e in events)
+    # Every published event was also written to the outbox
+    assert db_session.query(models.EventLog).count() == len(events)
+
+def test_relay_delivers_events_published_after_pruning(session_factory, monkeypatch):
+    monkeypatch.setattr(event_bus, "SessionLocal", session_factory)
+
+    def publish_from_other_process(n):
+        db = session_factory()
+        db.add(models.EventLog(
+            origin="other-process", document_id=1, event_type="test",
+            payload=json.dumps({"type": "test", "document_id": 1, "data": {"n": n}}),
+            created_at=datetime.datetime.utcnow()
+        ))
+        db.commit()
+        db.close()
+
+    async def scenario():
+        subscription = bus.subscribe()
+        publish_from_other_process(1)
+        publish_from_other_process(2)
+        relay = asyncio.create_task(run_event_relay(poll_interval=0.01))
+        try:
+            await asyncio.sleep(0.05)  # The relay starts after the existing events
+            db = session_factory()
+            db.query(models.EventLog).delete()  # Pruned, as after EVENT_RETENTION_SECONDS
+            db.commit()
+            db.close()
+            publish_from_other_process(3)
+            return await _drain(subscription)
+        finally:
+            relay.cancel()
+            subscription.close()
+
+    events = asyncio.run(scenario())
+    assert [e["data"]["n"] for e in events] == [3]
+    assert events[0]["id"] == 3  # Ids of pruned events are not reused
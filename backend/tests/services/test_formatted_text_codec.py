@@ -0,0 +1,48 @@
+import json
+
+from app.services.formatted_text_codec import (
+    decode_formatted_text,
+    encode_formatted_text,
+    format_for_client,
+    is_compact,
+    to_compact,
+)
+
+LEGACY = {
+    "blocks": [
+        {"type": "paragraph", "text": "Chapter 1", "block_no": 0, "alignment": "center", "font_size": 16,
+         "is_bold": True, "is_italic": False, "is_title": True, "is_heading": False, "is_indent": False},
+        {"type": "paragraph", "text": "It was the best of times.", "block_no": 1, "alignment": "left",
+         "font_size": 11, "is_bold": False, "is_italic": False},
+        {"type": "paragraph", "text": "It was the worst of times.", "block_no": 2, "alignment": "left",
+         "font_size": 11, "is_bold": False, "is_italic": False},
+    ],
+    "has_formatting": True
+}
+
+def test_styles_are_interned_and_text_stored_once():
+    encoded = encode_formatted_text(LEGACY)
+    data = json.loads(encoded)
+    assert is_compact(encoded)
+    assert data["s"] == [0, 1, 1]
+    assert len(data["styles"]) == 2
+    assert data["t"] == [block["text"] for block in LEGACY["blocks"]]
+
+def test_round_trip_matches_legacy_blocks():
+    decoded = decode_formatted_text(encode_formatted_text(LEGACY))
+    assert decoded["has_formatting"] is True
+    for block, original in zip(decoded["blocks"], LEGACY["blocks"]):
+        assert {key: block[key] for key in original} == original
+    assert decoded["blocks"][1]["is_title"] is False
+
+def test_legacy_rows_still_decode():
+    stored = json.dumps({**LEGACY, "clean_text": "Chapter 1 ..."})
+    assert decode_formatted_text(stored) == LEGACY
+    assert decode_formatted_text(to_compact(stored)) == decode_formatted_text(encode_formatted_text(LEGACY))
+    assert decode_formatted_text("not json") is None
+    assert decode_formatted_text(None) is None
+
+def test_format_for_client_layouts():
+    encoded = encode_formatted_text(LEGACY)
+    assert format_for_client(encoded) is encoded
+    assert json.loads(format_for_client(encoded, "legacy"))["blocks"][0]["text"] == "Chapter 1"
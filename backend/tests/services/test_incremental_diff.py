@@ -0,0 +1,82 @@
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from app.services.diff_payload import compact_differences
+from app.services.incremental_diff import rediff
+from app.services.text_comparison_service import TextComparisonService
+from app.services.tokenizer import tokenize
+
+service = TextComparisonService()
+
+def full_diff(text_a, text_b, char_level=False):
+    return compact_differences(service.compare_texts(text_a, text_b, char_level=char_level))
+
+def assert_describes(segments, text_a, text_b):
+    """Segments cover both texts word by word, in order, with offsets matching compare_texts."""
+    tokens_a, tokens_b = tokenize(text_a), tokenize(text_b)
+    i = j = 0
+    for segment in segments:
+        words_a = text_a[segment[1]:segment[2]].split()
+        words_b = text_b[segment[3]:segment[4]].split()
+        assert words_a == tokens_a.tokens[i:i + len(words_a)]
+        assert words_b == tokens_b.tokens[j:j + len(words_b)]
+        assert (segment[1], segment[2]) == tokens_a.span(i, i + len(words_a))
+        assert (segment[3], segment[4]) == tokens_b.span(j, j + len(words_b))
+        if segment[0] == "equal":
+            assert words_a == words_b
+        else:
+            assert segment[5:7] == [" ".join(words_a), " ".join(words_b)]
+        i, j = i + len(words_a), j + len(words_b)
+    assert (i, j) == (len(tokens_a), len(tokens_b))
+
+def apply_edit(text, start, end, replacement):
+    return text[:start] + replacement + text[end:]
+
+def test_single_word_fix_only_rediffs_a_window():
+    text_b = " ".join(f"word{index}" for index in range(2000))
+    text_a = text_b.replace("word1000", "wrod1000")
+    segments = full_diff(text_a, text_b)
+    start = text_a.index("wrod1000")
+    corrected = apply_edit(text_a, start, start + 4, "word")
+
+    updated, window = rediff(segments, corrected, text_b, start, start + 4, len(text_a))
+    assert updated == [["equal", 0, len(text_b), 0, len(text_b)]]
+    assert window["a_end"] - window["a_start"] < 40
+
+def test_edit_shifts_the_segments_after_it():
+    text_b = "alpha beta gamma delta epsilon zeta eta theta"
+    text_a = "alpha betta gamma delta epsilon zetta eta theta"
+    segments = full_diff(text_a, text_b)
+    corrected = apply_edit(text_a, 6, 11, "beta")  # "betta" -> "beta"
+    updated, _ = rediff(segments, corrected, text_b, 6, 10, len(text_a))
+    assert updated == full_diff(corrected, text_b)
+
+def test_char_edits_in_window():
+    text_b = "one two three four five six"
+    text_a = "one two three four five six"
+    corrected = apply_edit(text_a, 8, 13, "threo")
+    updated, _ = rediff(full_diff(text_a, text_b, char_level=True), corrected, text_b, 8, 13, len(text_a), char_level=True)
+    assert updated == full_diff(corrected, text_b, char_level=True)
+
+def test_rejects_edit_outside_text():
+    with pytest.raises(ValueError):
+        rediff([], "abc", "abc", 2, 10, 3)
+
+WORDS = st.sampled_from(["a", "b", "c", "dd", "ee", "f.", "gg"])
+
+@settings(max_examples=300, deadline=None)
+@given(
+    words_a=st.lists(WORDS, max_size=30),
+    words_b=st.lists(WORDS, max_size=30),
+    separator=st.sampled_from([" ", "\n", "  "]),
+    data=st.data()
+)
+def test_incremental_result_describes_the_edited_text(words_a, words_b, separator, data):
+    text_a, text_b = separator.join(words_a), " ".join(words_b)
+    start = data.draw(st.integers(0, len(text_a)))
+    end = data.draw(st.integers(start, len(text_a)))
+    replacement = data.draw(st.text(alphabet="ab ce\n", max_size=6))
+    corrected = apply_edit(text_a, start, end, replacement)
+
+    updated, _ = rediff(full_diff(text_a, text_b), corrected, text_b, start, start + len(replacement), len(text_a))
+    assert_describes(updated, corrected, text_b)
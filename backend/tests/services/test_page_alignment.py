@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from app.services.batch_comparison import load_page_texts
+from app.services.page_alignment import (
+    METHOD_INTERPOLATED,
+    METHOD_MANUAL,
+    align_pages,
+    clear_manual_alignment,
+    compute_alignment,
+    counterpart_page,
+    estimate_similarity,
+    page_sketch,
+    set_manual_alignment,
+)
+
+def make_pages(count, seed=7):
+    rng = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(3000)]
+    return {page: " ".join(rng.choice(vocabulary) for _ in range(120)) for page in range(1, count + 1)}
+
+def ocr_noise(text, seed=3):
+    rng = random.Random(seed)
+    return " ".join(word + "l" if rng.random() < 0.1 else word for word in text.split())
+
+def counterparts(alignment):
+    return {page: page_b for page, (page_b, _, _) in alignment.items()}
+
+def test_similarity_estimate():
+    pages = make_pages(2)
+    assert estimate_similarity(page_sketch(pages[1]), page_sketch(pages[1])) == 1.0
+    assert estimate_similarity(page_sketch(pages[1]), page_sketch(pages[2])) < 0.05
+    assert estimate_similarity(page_sketch(pages[1]), page_sketch(ocr_noise(pages[1]))) > 0.4
+    assert page_sketch("") == frozenset()
+
+def test_extra_cover_page_shifts_the_mapping():
+    texts_a = make_pages(20)
+    texts_b = {1: "Annual report cover"}
+    texts_b.update({page + 1: ocr_noise(text) for page, text in texts_a.items()})
+    assert counterparts(align_pages(texts_a, texts_b)) == {page: page + 1 for page in texts_a}
+
+def test_missing_pages_and_blank_pages():
+    texts_a = make_pages(10)
+    texts_a[4] = ""  # Blank page in both documents: paired by position
+    texts_b = {page: text for page, text in texts_a.items() if page != 8}
+    alignment = align_pages(texts_a, texts_b)
+    assert alignment[4] == (4, None, METHOD_INTERPOLATED)
+    assert alignment[8][0] is None
+    assert alignment[9][0] == 9
+
+def test_manual_anchor_constrains_neighbours():
+    texts_a = make_pages(6)
+    alignment = align_pages(texts_a, dict(texts_a), fixed={3: 5})
+    assert alignment[3] == (5, None, METHOD_MANUAL)
+    mapped = [page_b for page_b in counterparts(alignment).values() if page_b is not None]
+    assert mapped == sorted(mapped) and len(mapped) == len(set(mapped))
+
+@pytest.fixture(scope="function")
+def document(db_session, add_document):
+    texts_a = make_pages(5)
+    text_b = {"1": "Cover page"}
+    text_b.update({str(page + 1): text for page, text in texts_a.items()})
+    return add_document(db_session, texts_a, text_b=text_b)
+
+def test_stored_alignment_and_overrides(db_session, document):
+    assert counterpart_page(db_session, document.id, 2) == 2  # Same page number until aligned
+    assert compute_alignment(db_session, document.id) == [1, 2, 3, 4, 5]
+    assert counterpart_page(db_session, document.id, 2) == 3
+    assert [text_a == text_b for _, text_a, text_b in load_page_texts(db_session, document.id)] == [True] * 5
+
+    assert set_manual_alignment(db_session, document.id, 5, None) == [5]
+    assert counterpart_page(db_session, document.id, 5) is None
+    with pytest.raises(ValueError):
+        set_manual_alignment(db_session, document.id, 2, 99)
+    assert clear_manual_alignment(db_session, document.id, 5) == [5]
+    assert clear_manual_alignment(db_session, document.id, 5) is None
+
+    # A new editable PDF drops the alignment
+    document.editable_pdf_text_data[0].text_content_by_page = json.dumps({"1": "Replaced"})
+    db_session.commit()
+    assert counterpart_page(db_session, document.id, 2) == 2
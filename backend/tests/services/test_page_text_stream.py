@@ -0,0 +1,83 @@
+import functools
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import documents
+from app.db.database import get_db
+from app.db import models
+from app.services.page_text_stream import FIELDS, iter_page_texts, parse_fields, stream_page_texts
+
+FORMATTED = json.dumps({"blocks": [{"type": "paragraph", "text": "Heading", "is_heading": True}], "has_formatting": True})
+
+@pytest.fixture(scope="function")
+def document_id(session_factory, add_document):
+    db = session_factory()
+    doc = add_document(
+        db, {1: "OCR text of page 1 " * 10, 2: "OCR text of page 2 " * 10, 3: "OCR text of page 3 " * 10, 4: None},
+        formatted_text={1: FORMATTED, 2: FORMATTED, 3: FORMATTED},
+        corrected={"2": "Corrected page 2 " * 10, "9": "No such page"}, filename="scan.pdf", status="completed"
+    )
+    doc_id = doc.id
+    db.close()
+    return doc_id
+
+def test_parse_fields():
+    assert parse_fields(None) == FIELDS
+    assert parse_fields(" source, text,page_number") == ("text", "source")
+    with pytest.raises(ValueError):
+        parse_fields("text,ocr_text")
+
+def test_corrected_text_takes_precedence(session_factory, document_id):
+    db = session_factory()
+    records = list(iter_page_texts(db, document_id, [(1, 4)]))
+    assert [record["page_number"] for record in records] == [1, 2, 3, 4]
+    assert records[0]["text"] == "OCR text of page 1 " * 10
+    assert records[0]["source"] == "original_ocr" and records[0]["status"] == "extracted"
+    assert records[0]["formatted_text"] is not None and records[0]["extraction_date"]
+    assert records[1] == {
+        "page_number": 2, "text": "Corrected page 2 " * 10, "formatted_text": None,
+        "status": "corrected", "source": "corrected_text", "extraction_date": None
+    }
+    assert records[3]["text"] == "" and records[3]["status"] == "not_extracted"
+
+    selected = list(iter_page_texts(db, document_id, [(2, 3)], ("text",)))
+    assert selected == [{"page_number": 2, "text": "Corrected page 2 " * 10}, {"page_number": 3, "text": "OCR text of page 3 " * 10}]
+    assert list(iter_page_texts(db, document_id, [])) == []
+    db.close()
+
+def test_unparseable_corrections_are_ignored(session_factory, document_id):
+    db = session_factory()
+    db.query(models.CorrectedText).one().corrected_content_by_page = "{not json"
+    db.commit()
+    assert [record["source"] for record in iter_page_texts(db, document_id, [(1, 3)], ("source",))] == ["original_ocr"] * 3
+    db.close()
+
+def test_stream_matches_single_page_endpoint(session_factory, document_id, monkeypatch):
+    monkeypatch.setattr(documents, "stream_page_texts", functools.partial(stream_page_texts, session_factory=session_factory))
+    app = FastAPI()
+    app.include_router(documents.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    response = client.get(f"/api/documents/{document_id}/pages/text?fields=text,formatted_text,source,status")
+    assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    for record in records[:3]:
+        single = client.get(f"/api/documents/{document_id}/pages/{record.pop('page_number')}/text").json()
+        assert record == {name: single[name] for name in record}
+
+    ranged = client.get(f"/api/documents/{document_id}/pages/text?pages=3-&fields=text")
+    assert [json.loads(line)["page_number"] for line in ranged.text.splitlines()] == [3, 4]
+    assert client.get(f"/api/documents/{document_id}/pages/text?fields=words").status_code == 400
+    assert client.get("/api/documents/999/pages/text").status_code == 404
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.db import models
+from app.services import progress_counters
+from app.services.progress_counters import get_progress, reconcile_progress_counters, run_reconciliation_job, status_counts
+
+@pytest.fixture(scope="function")
+def document(db_session, add_document):
+    return add_document(db_session, {1: None, 2: None, 3: None}, page_status="pending")
+
+def test_counters_created_with_pages(db_session, document):
+    progress = get_progress(db_session, document.id)
+    assert progress.total_pages == 3
+    assert status_counts(progress) == {"pending": 3}
+
+def test_counters_follow_status_changes(db_session, document):
+    pages = db_session.query(models.Page).order_by(models.Page.page_number).all()
+    pages[0].status = "processed"
+    pages[1].status = "error"
+    db_session.commit()
+    pages[1].status = "processed"
+    pages[2].status = "some_new_status"
+    db_session.commit()
+
+    db_session.expire_all()
+    progress = get_progress(db_session, document.id)
+    assert status_counts(progress) == {"processed": 2, "other": 1}
+    assert progress.total_pages == 3
+
+def test_rolled_back_changes_do_not_count(db_session, document):
+    page = db_session.query(models.Page).first()
+    page.status = "processed"
+    db_session.flush()
+    db_session.rollback()
+
+    assert status_counts(get_progress(db_session, document.id)) == {"pending": 3}
+
+def test_reconcile_repairs_drift(db_session, document):
+    db_session.query(models.DocumentProgress).update({"pending_pages": 7, "processed_pages": 2})
+    db_session.commit()
+
+    assert reconcile_progress_counters(db_session) == [document.id]
+    db_session.expire_all()
+    assert status_counts(get_progress(db_session, document.id)) == {"pending": 3}
+    assert reconcile_progress_counters(db_session) == []
+
+def test_reconciliation_job_runs_off_the_event_loop(session_factory, db_session, document, monkeypatch):
+    db_session.query(models.DocumentProgress).update({"pending_pages": 7})
+    db_session.commit()
+    threads = []
+
+    def reconcile(db):
+        threads.append(threading.get_ident())
+        return reconcile_progress_counters(db)
+
+    monkeypatch.setattr(progress_counters, "SessionLocal", session_factory)
+    monkeypatch.setattr(progress_counters, "reconcile_progress_counters", reconcile)
+    asyncio.run(run_reconciliation_job(0))
+
+    assert threads and threads[0] != threading.get_ident()
+    db_session.expire_all()
+    assert status_counts(get_progress(db_session, document.id)) == {"pending": 3}
+
+def test_document_delete_removes_counters(db_session, document):
+    db_session.delete(document)
+    db_session.commit()
+    assert db_session.query(models.DocumentProgress).count() == 0
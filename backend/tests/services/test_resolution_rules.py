@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.db import models
+from app.services.resolution_rules import RULE_COMBINED, classify_hunk, resolve_document, resolve_page
+from app.services.text_comparison_service import TextComparisonService
+
+ALL_RULES = ("whitespace", "case", "quotes", "dashes", "punctuation")
+
+@pytest.mark.parametrize("text_a, text_b, rules, expected", [
+    ("“Hello”", '"Hello"', ALL_RULES, "quotes"),
+    ("1990–1995", "1990-1995", ALL_RULES, "dashes"),
+    ("HELLO", "hello", ALL_RULES, "case"),
+    ("to gether", "together", ALL_RULES, "whitespace"),
+    ("word,", "word.", ALL_RULES, "punctuation"),
+    ("“WORD”", '"word"', ("case", "quotes"), RULE_COMBINED),
+    ("word,", "word.", ("quotes", "dashes"), None),
+    ("wrod", "word", ALL_RULES, None),
+])
+def test_classify_hunk(text_a, text_b, rules, expected):
+    assert classify_hunk(text_a, text_b, rules) == expected
+
+def test_resolve_page_keeps_layout_and_other_differences():
+    text_a = "He said “hello”\nto the  WORLD today; and wrod ,"
+    text_b = 'He said "hello" to the world today, and word'
+    differences = TextComparisonService().compare_texts(text_a, text_b)
+    resolved, changes, remaining = resolve_page(text_a, text_b, differences, ALL_RULES)
+    assert resolved == 'He said "hello"\nto the  world today, and wrod ,'
+    assert sorted(change["rule"] for change in changes) == ["case", "punctuation", "quotes"]
+    assert remaining == 1
+
+def test_deleted_and_inserted_punctuation():
+    text_a, text_b = "one , two three", "one two three ."
+    differences = TextComparisonService().compare_texts(text_a, text_b)
+    resolved, changes, remaining = resolve_page(text_a, text_b, differences, ["punctuation"])
+    assert (resolved, len(changes), remaining) == ("one two three .", 2, 0)
+
+@pytest.fixture(scope="function")
+def document(db_session, add_document):
+    return add_document(
+        db_session, {1: "It’s a TEST - page", 2: "Nothing to do here"},
+        text_b={"1": "It's a test – page", "2": "Nothing to do here"}, corrected={"2": "Nothing to do hcre"}
+    )
+
+def corrected_pages(db_session, document_id):
+    entry = db_session.query(models.CorrectedText).filter(models.CorrectedText.document_id == document_id).first()
+    return json.loads(entry.corrected_content_by_page)
+
+def test_resolve_document(db_session, document):
+    report = resolve_document(db_session, document.id, rules=["quotes", "case", "dashes"], dry_run=True)
+    assert report["pages_changed"] == 1 and report["hunks_accepted"] == 3
+    assert corrected_pages(db_session, document.id) == {"2": "Nothing to do hcre"}
+
+    report = resolve_document(db_session, document.id, rules=["quotes", "case", "dashes"])
+    assert report["by_rule"] == {"quotes": 1, "case": 1, "dashes": 1}
+    # Page 2 starts from its existing correction, which the rules do not touch
+    assert report["pages"][1]["remaining"] == 1
+    assert corrected_pages(db_session, document.id) == {"1": "It's a test – page", "2": "Nothing to do hcre"}
+
+    with pytest.raises(ValueError):
+        resolve_document(db_session, document.id, rules=["spelling"])
+
+def test_resolve_document_with_identical_pages(db_session, add_document):
+    doc = add_document(db_session, {1: "“Chapter”", 2: "“Chapter”"}, text_b={"1": '"Chapter"', "2": '"Chapter"'})
+
+    report = resolve_document(db_session, doc.id, rules=["quotes"])
+    assert report["pages_changed"] == 2
+    assert corrected_pages(db_session, doc.id) == {"1": '"Chapter"', "2": '"Chapter"'}
+    assert db_session.query(models.ComparisonCacheEntry).count() == 1
@@ -0,0 +1,33 @@
+import json
+import pytest
+
+from app.db import models
+from app.services.search_index import build_match_query, rebuild_search_index, search_pages
+
+@pytest.fixture(scope="function")
+def document(db_session, add_document):
+    texts = ["[CENTER][TITLE]A Tale of Two Cities\nIt was the best of times", "It was the worst of times"]
+    return add_document(db_session, dict(enumerate(texts, start=1)), filename="book.pdf")
+
+def test_build_match_query_quotes_user_input():
+    assert build_match_query('best "of times" wor* (') == '"best" "of times" "wor"*'
+
+def test_search_ranks_and_strips_markers(db_session, document):
+    hits = search_pages(db_session, "worst")
+    assert [(h["page_number"], h["source"]) for h in hits] == [(2, "ocr")]
+    assert "<mark>worst</mark>" in hits[0]["snippet"]
+    assert search_pages(db_session, "TITLE") == []
+
+def test_corrected_text_supersedes_ocr(db_session, document):
+    db_session.add(models.CorrectedText(document_id=document.id,
+                                        corrected_content_by_page=json.dumps({"2": "It was the finest of times"})))
+    db_session.commit()
+
+    assert search_pages(db_session, "worst") == []
+    assert [h["source"] for h in search_pages(db_session, "worst", source="ocr")] == ["ocr"]
+    assert [h["page_number"] for h in search_pages(db_session, "finest")] == [2]
+
+def test_rebuild_matches_incremental_index(db_session, document):
+    before = search_pages(db_session, "times")
+    assert rebuild_search_index(db_session) == 2
+    assert search_pages(db_session, "times") == before
@@ -0,0 +1,113 @@
+import os
+
+import fitz
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.services import static_delivery
+from app.services.static_delivery import (
+    IMMUTABLE,
+    REVALIDATE,
+    ImageVariantCache,
+    cached_file_response,
+    choose_image_format,
+    file_digest,
+    page_image_response,
+    parse_byte_range,
+    versioned_url,
+)
+
+@pytest.fixture(scope="function")
+def files(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "scan.pdf"
+    pdf = fitz.open()
+    page = pdf.new_page()
+    page.insert_text((72, 72), "Scanned page " * 20)
+    pdf.save(str(pdf_path))
+    image_path = tmp_path / "page_1.jpg"
+    page.get_pixmap(matrix=fitz.Matrix(2, 2)).save(str(image_path))
+    pdf.close()
+    monkeypatch.setattr(static_delivery, "IMAGE_FORMATS", ("webp",))
+    monkeypatch.setattr(static_delivery, "image_variants", ImageVariantCache(str(tmp_path / "variants")))
+    return str(pdf_path), str(image_path)
+
+@pytest.fixture(scope="function")
+def client(files):
+    pdf_path, image_path = files
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return cached_file_response(request, pdf_path, "application/pdf", file_digest(pdf_path), byte_ranges=True)
+
+    @app.get("/image")
+    def get_image(request: Request):
+        return page_image_response(request, image_path)
+
+    return TestClient(app)
+
+def test_parse_byte_range():
+    assert parse_byte_range(None, 100) is None
+    assert parse_byte_range("bytes=0-9", 100) == (0, 9)
+    assert parse_byte_range("bytes=90-", 100) == (90, 99)
+    assert parse_byte_range("bytes=-10", 100) == (90, 99)
+    assert parse_byte_range("bytes=50-500", 100) == (50, 99)
+    assert parse_byte_range("bytes=0-1,5-9", 100) is None  # Several ranges: whole file
+    assert parse_byte_range("items=0-9", 100) is None
+    for header in ("bytes=100-", "bytes=-0"):
+        with pytest.raises(ValueError):
+            parse_byte_range(header, 100)
+
+def test_choose_image_format(monkeypatch):
+    monkeypatch.setattr(static_delivery, "IMAGE_FORMATS", ("avif", "webp"))
+    assert choose_image_format("image/avif,image/webp,*/*") == "avif"
+    assert choose_image_format("image/webp,image/*;q=0.8") == "webp"
+    assert choose_image_format("image/webp;q=0.5,image/jpeg") == "jpeg"
+    assert choose_image_format(None) == "jpeg"
+
+def test_versioned_url_is_immutable_and_revalidates(client, files):
+    pdf_path, _ = files
+    url = versioned_url("/file", pdf_path)
+    response = client.get(url)
+    assert response.status_code == 200 and response.headers["cache-control"] == IMMUTABLE
+    with open(pdf_path, "rb") as pdf:
+        assert response.content == pdf.read()
+
+    etag = response.headers["etag"]
+    plain = client.get("/file")
+    assert plain.headers["cache-control"] == REVALIDATE and plain.headers["etag"] == etag
+    version = url.split("?v=")[1]
+    for partial in (version[:1], version[:-1], version + "0"):
+        assert client.get(f"/file?v={partial}").headers["cache-control"] == REVALIDATE
+    assert client.get(f"/file?v={version.upper()}").headers["cache-control"] == IMMUTABLE
+    not_modified = client.get("/file", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+    with open(pdf_path, "ab") as pdf:
+        pdf.write(b"\n% appended\n")
+    os.utime(pdf_path, (1, 1))
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.headers["cache-control"] == REVALIDATE  # Stale version
+
+def test_pdf_byte_ranges(client, files):
+    pdf_path, _ = files
+    with open(pdf_path, "rb") as pdf:
+        data = pdf.read()
+    response = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206 and response.content == data[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(data)}"
+    assert client.get("/file", headers={"Range": "bytes=-5"}).content == data[-5:]
+    assert client.get("/file", headers={"Range": f"bytes={len(data)}-"}).status_code == 416
+    assert client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"old"'}).status_code == 200
+
+def test_page_image_webp_variant(client, files):
+    _, image_path = files
+    jpeg = client.get("/image", headers={"Accept": "image/jpeg"})
+    assert jpeg.headers["content-type"] == "image/jpeg" and jpeg.headers["vary"] == "Accept"
+    webp = client.get("/image", headers={"Accept": "image/webp,*/*"})
+    assert webp.headers["content-type"] == "image/webp"
+    assert len(webp.content) < os.path.getsize(image_path)
+    assert webp.headers["etag"] != jpeg.headers["etag"]
+    assert client.get("/image", headers={"Accept": "image/webp", "If-None-Match": webp.headers["etag"]}).status_code == 304
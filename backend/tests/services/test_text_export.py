@@ -0,0 +1,95 @@
+import json
+import re
+
+import fitz
+import pytest
+
+from app.services.formatted_text_codec import encode_formatted_text
+from app.services.text_export import WRITERS, add_text_layer, iter_page_contents, parse_page_ranges, stream_export
+from app.services.text_extraction import process_layout_markers
+
+PAGE_TEXTS = {
+    1: "[CENTER][TITLE]Annual Report\n[CENTER]Acme Corp\n\nFirst paragraph\ncontinues here.",
+    2: "[HEADING]Results\n\n1. Revenue grew\n[INDENT]Quoted remark",
+    3: "Third page text",
+}
+
+@pytest.fixture(scope="function")
+def document(session_factory, add_document, tmp_path):
+    scan_path = tmp_path / "scan.pdf"
+    scan = fitz.open()
+    for _ in PAGE_TEXTS:
+        scan.new_page()
+    scan.save(str(scan_path))
+    scan.close()
+
+    db = session_factory()
+    doc = add_document(
+        db, PAGE_TEXTS, formatted_text={1: encode_formatted_text(process_layout_markers(PAGE_TEXTS[1]))},
+        corrected={"3": "Corrected third page"}, filename="scan.pdf", file_path=str(scan_path), status="completed"
+    )
+    db.refresh(doc)
+    db.expunge(doc)
+    db.close()
+    return doc
+
+def export(session_factory, document, export_format, pages=None, **options):
+    writer = WRITERS[export_format](document, **options)
+    ranges = parse_page_ranges(pages, len(PAGE_TEXTS))
+    return b"".join(stream_export(document.id, writer, ranges, session_factory=session_factory))
+
+def test_parse_page_ranges():
+    assert parse_page_ranges(None, 10) == [(1, 10)]
+    assert parse_page_ranges("8, 1-3,2-4,12-", 10) == [(1, 4), (8, 8)]
+    assert parse_page_ranges("-2,9-", 10) == [(1, 2), (9, 10)]
+    assert parse_page_ranges("11-20", 10) == []
+    for spec in ("0", "5-3", "a-b", "1,,2"):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec, 10)
+
+def test_page_contents_prefer_corrected_text(session_factory, document):
+    db = session_factory()
+    contents = list(iter_page_contents(db, document.id, [(1, 1), (3, 3)]))
+    db.close()
+    assert [(page.page_number, page.source) for page in contents] == [(1, "ocr"), (3, "corrected")]
+    assert contents[0].blocks[0]["is_title"] and contents[0].text.startswith("Annual Report\n\nAcme Corp")
+    assert contents[1].text == "Corrected third page"
+
+def test_plain_text_and_markdown(session_factory, document):
+    text = export(session_factory, document, "txt").decode("utf-8")
+    assert "[TITLE]" not in text and text.count("\f") == 2
+    assert text.split("\f")[2] == "Corrected third page\n"
+
+    markdown = export(session_factory, document, "md", pages="1-2").decode("utf-8")
+    assert "# Annual Report" in markdown
+    assert '<p align="center">Acme Corp</p>' in markdown
+    assert "First paragraph  \ncontinues here." in markdown
+    assert "## Results" in markdown and "1\\. Revenue grew" in markdown
+    assert "Corrected third page" not in markdown
+
+def test_jsonl_by_page_and_by_block(session_factory, document):
+    records = [json.loads(line) for line in export(session_factory, document, "jsonl").decode("utf-8").splitlines()]
+    assert [(record["page"], record["source"]) for record in records] == [(1, "ocr"), (2, "ocr"), (3, "corrected")]
+
+    blocks = [json.loads(line) for line in export(session_factory, document, "jsonl", pages="1", granularity="block").splitlines()]
+    assert [block["text"] for block in blocks] == ["Annual Report", "Acme Corp", "First paragraph\ncontinues here."]
+    assert blocks[0]["is_title"] and blocks[1]["alignment"] == "center" and blocks[2]["block"] == 2
+
+def test_searchable_pdf_has_invisible_text_layer(session_factory, document):
+    data = export(session_factory, document, "pdf", pages="2-3")
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        assert pdf.page_count == 2
+        assert "Revenue grew" in pdf[0].get_text()
+        assert pdf[1].search_for("Corrected third page")
+        spans = [span for block in pdf[0].get_text("dict")["blocks"] for line in block["lines"] for span in line["spans"]]
+        assert spans and all(span["bbox"][2] <= pdf[0].rect.width for span in spans)
+        assert re.search(rb"(?<![\d.])3 Tr\b", pdf[0].read_contents())  # Invisible rendering mode
+
+def test_text_layer_keeps_text_outside_latin_1():
+    lines = ["Café naïve — “quotes” €5", "Ελληνικά, русский", "தமிழ் உரை 中文"]
+    output = fitz.open()
+    add_text_layer(output.new_page(), "\n".join(lines))
+    with fitz.open(stream=output.tobytes(), filetype="pdf") as pdf:
+        assert pdf[0].get_text().splitlines() == lines
+        assert pdf[0].search_for("“quotes”")
+    output.close()
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import correction, documents
+from app.db.database import get_db
+from app.db import models
+from app.services.text_versions import (
+    REVALIDATE,
+    comparison_validators,
+    corrected_text_validators,
+    page_text_validators,
+)
+
+@pytest.fixture(scope="function")
+def document_id(session_factory, add_document):
+    db = session_factory()
+    doc = add_document(
+        db, {1: "OCR text of page 1", 2: "OCR text of page 2"}, text_b={"1": "Text B of page 1"},
+        filename="scan.pdf", status="completed"
+    )
+    doc_id = doc.id
+    db.close()
+    return doc_id
+
+@pytest.fixture(scope="function")
+def client(session_factory):
+    app = FastAPI()
+    app.include_router(documents.router)
+    app.include_router(correction.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+def test_validators_follow_text_changes(session_factory, document_id):
+    db = session_factory()
+    page_1 = page_text_validators(db, document_id, 1, "compact")
+    page_2 = page_text_validators(db, document_id, 2, "compact")
+    comparison = comparison_validators(db, document_id, 1, "compact", False, "full")
+    corrected = corrected_text_validators(db, document_id)
+    assert page_text_validators(db, document_id, 1, "compact") == page_1
+    assert page_text_validators(db, document_id, 1, "legacy").etag != page_1.etag
+    assert page_text_validators(db, document_id, 3) is None
+    assert page_1.cache_control == REVALIDATE
+
+    page = db.query(models.Page).filter(models.Page.page_number == 2).one()
+    page.extracted_text.raw_text = "Edited OCR text"
+    db.commit()
+    assert page_text_validators(db, document_id, 1, "compact") == page_1  # Other pages keep their ETag
+    assert page_text_validators(db, document_id, 2, "compact") != page_2
+
+    db.add(models.CorrectedText(document_id=document_id, corrected_content_by_page=json.dumps({"1": "Fixed"})))
+    db.commit()
+    assert page_text_validators(db, document_id, 1, "compact") != page_1
+    assert corrected_text_validators(db, document_id) != corrected
+    assert comparison_validators(db, document_id, 1, "compact", False, "full") == comparison
+
+    db.query(models.EditablePDFText).one().text_content_by_page = json.dumps({"1": "New text B"})
+    db.commit()
+    assert comparison_validators(db, document_id, 1, "compact", False, "full") != comparison
+
+    db.query(models.Document).one().status = "correction_finalized"
+    db.commit()
+    assert "max-age" in corrected_text_validators(db, document_id).cache_control
+    db.close()
+
+def test_conditional_requests(client, document_id):
+    url = f"/api/documents/{document_id}/pages/1/text"
+    response = client.get(url)
+    assert response.status_code == 200 and response.headers["cache-control"] == REVALIDATE
+    etag = response.headers["etag"]
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.headers["etag"] == etag
+
+    client.post(f"/api/correction/documents/{document_id}/corrections/page/1", json={"corrected_text_for_page": "Fixed page 1"})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["text"] == "Fixed page 1"
+
+    corrected_url = f"/api/correction/documents/{document_id}/corrected-text"
+    corrected_etag = client.get(corrected_url).headers["etag"]
+    assert client.get(corrected_url, headers={"If-None-Match": corrected_etag}).status_code == 304
+
+    compare_url = f"/api/correction/documents/{document_id}/compare/page/1?diff_layout=compact"
+    compact = client.get(compare_url, headers={"Accept-Encoding": "gzip"})
+    assert compact.status_code == 200 and compact.headers["vary"] == "Accept, Accept-Encoding"
+    assert client.get(compare_url, headers={"Accept-Encoding": "gzip", "If-None-Match": compact.headers["etag"]}).status_code == 304
+    assert client.get(compare_url, headers={"Accept-Encoding": "identity", "If-None-Match": compact.headers["etag"]}).status_code == 200
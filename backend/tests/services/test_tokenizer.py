@@ -0,0 +1,41 @@
+from hypothesis import given, strategies as st
+
+from app.services.tokenizer import tokenize
+
+# Mix ordinary words with every kind of whitespace str.split() knows about
+WHITESPACE = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f\x85\xa0      　"
+texts = st.text(alphabet=st.one_of(st.sampled_from(WHITESPACE), st.characters()), max_size=200)
+
+@given(texts)
+def test_tokens_match_str_split(text):
+    assert tokenize(text).tokens == text.split()
+
+@given(texts)
+def test_offsets_round_trip(text):
+    tokenized = tokenize(text)
+    previous_end = 0
+    for token, start, end in tokenized.iter_spans():
+        assert text[start:end] == token
+        assert start >= previous_end
+        assert text[previous_end:start].strip() == ""
+        previous_end = end
+    assert text[previous_end:].strip() == ""
+
+@given(texts, st.data())
+def test_span_and_token_at(text, data):
+    tokenized = tokenize(text)
+    count = len(tokenized)
+    first = data.draw(st.integers(0, count))
+    last = data.draw(st.integers(first, count))
+    start, end = tokenized.span(first, last)
+    assert text[start:end].split() == tokenized.tokens[first:last]
+    for index, (_, token_start, token_end) in enumerate(tokenized.iter_spans()):
+        assert tokenized.token_at(token_start) == index
+        assert tokenized.token_at(token_end - 1) == index
+
+def test_empty_ranges_sit_after_previous_token():
+    tokenized = tokenize("  Hello   world ")
+    assert tokenized.span(0, 0) == (0, 0)
+    assert tokenized.span(1, 1) == (7, 7)
+    assert tokenized.span(0, 2) == (2, 15)
+    assert tokenized.token_at(8) == -1
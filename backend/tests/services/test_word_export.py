@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+from docx import Document as DocxDocument
+
+from app.db import models
+from app.services import word_export
+from app.services.word_export import (
+    build_export,
+    cached_export,
+    content_version,
+    evict_exports,
+    remove_exports,
+    run_word_export,
+    start_word_export,
+)
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(word_export, "EXPORT_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+@pytest.fixture(scope="function")
+def document_id(session_factory, add_document):
+    db = session_factory()
+    pages = {page_number: f"OCR text of page {page_number}" for page_number in range(1, 4)}
+    doc = add_document(db, pages, filename="scan.pdf", status="completed")
+    doc_id = doc.id
+    db.close()
+    return doc_id
+
+def docx_text(path):
+    return [paragraph.text for paragraph in DocxDocument(path).paragraphs if paragraph.text.strip()]
+
+def test_version_tracks_content(session_factory, document_id):
+    db = session_factory()
+    version = content_version(db, document_id)
+    assert content_version(db, document_id) == version
+
+    db.add(models.CorrectedText(document_id=document_id, corrected_content_by_page=json.dumps({"2": "Fixed page 2"})))
+    db.commit()
+    corrected = content_version(db, document_id)
+    assert corrected != version
+
+    page = db.query(models.Page).filter(models.Page.page_number == 3).one()
+    page.extracted_text.formatted_text = json.dumps({"blocks": [{"text": "OCR text of page 3", "is_bold": True}]})
+    db.commit()
+    assert content_version(db, document_id) not in (version, corrected)
+    db.close()
+
+def test_export_is_built_once_per_version(session_factory, document_id, monkeypatch):
+    db = session_factory()
+    version, path = build_export(db, document_id)
+    assert docx_text(path) == ["OCR text of page 1", "OCR text of page 2", "OCR text of page 3"]
+    assert cached_export(document_id, version) == path
+
+    built = []
+    with monkeypatch.context() as patch:
+        patch.setattr(word_export, "stream_docx", lambda *args, **kwargs: built.append(args))
+        assert build_export(db, document_id) == (version, path)
+    assert built == []
+
+    db.add(models.CorrectedText(document_id=document_id, corrected_content_by_page=json.dumps({"2": "Fixed page 2"})))
+    db.commit()
+    new_version, new_path = build_export(db, document_id)
+    assert new_version != version
+    assert docx_text(new_path)[1] == "Fixed page 2"
+    db.close()
+
+def test_export_streams_pages_in_batches(session_factory, document_id, monkeypatch):
+    monkeypatch.setattr(word_export, "PAGE_BATCH", 2)
+    db = session_factory()
+    progress = []
+    version, path = build_export(db, document_id, progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert docx_text(path) == ["OCR text of page 1", "OCR text of page 2", "OCR text of page 3"]
+    db.close()
+
+def test_document_without_text_is_rejected(session_factory, add_document):
+    db = session_factory()
+    doc = add_document(db, {}, filename="empty.pdf", status="completed")
+    with pytest.raises(ValueError):
+        build_export(db, doc.id)
+    db.close()
+
+def test_lru_eviction(cache_dir):
+    os.makedirs(cache_dir)
+    for index in range(4):
+        path = cache_dir / f"doc_{index}_v.docx"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + index, 1000 + index))
+    cached_export(0, "v")  # Recently used: survives
+    assert evict_exports(max_bytes=250) == 2
+    assert sorted(os.listdir(cache_dir)) == ["doc_0_v.docx", "doc_3_v.docx"]
+    remove_exports(3)
+    assert os.listdir(cache_dir) == ["doc_0_v.docx"]
+
+def test_export_job(session_factory, document_id):
+    db = session_factory()
+    job, created = start_word_export(db, document_id)
+    assert created
+    assert start_word_export(db, document_id) == (job, False)
+    run_word_export(job.id, session_factory=session_factory)
+
+    db.expire_all()
+    assert job.status == "completed"
+    assert (job.progress_current, job.progress_total) == (3, 3)
+    result = json.loads(job.result)
+    assert (result["pages_rendered"], result["pages_reused"]) == (3, 0)
+    version = result["version"]
+    assert version == content_version(db, document_id)
+    assert cached_export(document_id, version) is not None
+    db.close()
@@ -0,0 +1,49 @@
+import copy
+import zipfile
+
+from docx import Document as DocxDocument
+
+from app.services.wordextract import WordGenerator
+
+def span(page, block_no, text, line_no=0, **formatting):
+    item = {"text": text, "page": page, "block_no": block_no, "line_no": line_no,
+            "is_last_span_in_line": True, "bbox": [0, 0, 100, 20]}
+    item.update(formatting)
+    return item
+
+ITEMS = [
+    span(1, 0, "Chapter One", alignment="center", is_title=True, is_bold=True, size=16),
+    span(1, 1, "Plain body text of the first page."),
+    span(1, 2, "Quoted passage", is_indent=True, is_italic=True),
+    span(1, 3, "first", is_last_span_in_line=False, bbox=[0, 0, 10, 10]),
+    span(1, 3, "second", bbox=[20, 0, 30, 10]),
+    span(1, 3, "bold", line_no=1, is_bold=True, is_last_span_in_line=False),
+    span(1, 3, "blue", line_no=1, is_bold=True, color=(0.0, 0.0, 0.8)),
+    span(2, 4, "Corrected page\nwith a second line"),
+]
+
+def generate(tmp_path, fast):
+    path = str(tmp_path / f"{'fast' if fast else 'direct'}.docx")
+    WordGenerator(copy.deepcopy(ITEMS), fast=fast).generate_document(path)
+    with zipfile.ZipFile(path) as package:
+        return DocxDocument(path), package.read("word/document.xml").decode("utf-8")
+
+def test_styled_path_keeps_text_and_layout(tmp_path):
+    direct, direct_xml = generate(tmp_path, fast=False)
+    styled, styled_xml = generate(tmp_path, fast=True)
+    assert [(p.text, p.alignment) for p in styled.paragraphs] == [(p.text, p.alignment) for p in direct.paragraphs]
+    assert [p.text for p in styled.paragraphs if p.text.strip()][3] == "first second\nbold blue"
+    assert len(styled_xml) < len(direct_xml)
+
+def test_styled_path_writes_formatting_once(tmp_path):
+    styled, styled_xml = generate(tmp_path, fast=True)
+    paragraphs = [p for p in styled.paragraphs if p.text.strip()]
+    assert [p.style.name for p in paragraphs] == ["Export Title", "Export Body", "Export Indent", "Export Body", "Export Body"]
+    assert paragraphs[2].paragraph_format.left_indent is None  # From the style
+
+    # Adjacent spans of one format share a run; black needs no color element
+    runs = paragraphs[3].runs
+    assert [run.text for run in runs] == ["first second\n", "bold ", "blue"]
+    assert [run.style.name for run in runs] == ["Default Paragraph Font", "Export Strong", "Export Strong"]
+    assert runs[0].font.color.rgb is None and str(runs[2].font.color.rgb) == "0000CC"
+    assert "w:rFonts" not in styled_xml and styled_xml.count("<w:sz ") == 1
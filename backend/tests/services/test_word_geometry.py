@@ -0,0 +1,116 @@
+import json
+import random
+from array import array
+
+import fitz
+import pytest
+
+from app.db import models
+from app.services import comparison_cache  # noqa: F401 - registers the invalidation listener
+from app.services.editable_pdf_service import EditablePDFService
+from app.services.word_geometry import PageWords, WordIndex, get_word_index, store_page_words, words_from_page
+
+def make_page_words(count, seed=5, width=612.0, height=792.0):
+    """Words laid out in lines like a text page, with their offsets in the joined text."""
+    rng = random.Random(seed)
+    words, boxes, offsets, lines = [], array("f"), array("i"), []
+    x, y, line, cursor = 50.0, 50.0, [], 0
+    for index in range(count):
+        word = f"w{index}"
+        word_width = 6.0 * len(word) + rng.random()
+        if x + word_width > width - 50:
+            lines.append(" ".join(line))
+            x, y, line = 50.0, y + 14.0, []
+        words.append(word)
+        boxes.extend((x, y, x + word_width, y + 10.0))
+        offsets.extend((cursor, cursor + len(word)))
+        cursor += len(word) + 1  # Space or newline
+        line.append(word)
+        x += word_width + 4.0
+    lines.append(" ".join(line))
+    return PageWords(width, height, words, boxes, offsets), "\n".join(lines)
+
+def brute_force(page_words, x0, y0, x1, y1):
+    boxes = page_words.boxes
+    return [
+        index for index in range(len(page_words.words))
+        if boxes[4 * index] <= x1 and x0 <= boxes[4 * index + 2] and boxes[4 * index + 1] <= y1 and y0 <= boxes[4 * index + 3]
+    ]
+
+@pytest.fixture
+def editable_pdf(tmp_path):
+    path = tmp_path / "editable.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text(fitz.Point(72, 72), "Hello brave new world", fontsize=12)
+    page.insert_text(fitz.Point(72, 144), "Second line here", fontsize=12)
+    doc.new_page()  # No text
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+def test_offsets_point_into_page_text(editable_pdf):
+    texts, words_by_page = EditablePDFService().extract_text_and_words(editable_pdf, "1")
+    page_words = words_by_page[1]
+    assert page_words.words == ["Hello", "brave", "new", "world", "Second", "line", "here"]
+    for index, word in enumerate(page_words.words):
+        start, end = page_words.offsets[2 * index], page_words.offsets[2 * index + 1]
+        assert texts[1][start:end] == word
+    assert words_by_page[2].words == [] and texts[2] == ""
+
+def test_words_missing_from_text_have_no_offset(editable_pdf):
+    doc = fitz.open(editable_pdf)
+    page_words = words_from_page(doc.load_page(0), "Hello world")
+    doc.close()
+    assert list(page_words.offsets[:2]) == [0, 5]
+    assert list(page_words.offsets[2:4]) == [-1, -1]  # "brave"
+    assert list(page_words.offsets[6:8]) == [6, 11]  # "world"
+
+def test_point_and_rect_queries_match_brute_force():
+    page_words, _ = make_page_words(400)
+    index = WordIndex(page_words)
+    rng = random.Random(11)
+    for _ in range(200):
+        x0, y0 = rng.uniform(-20, 620), rng.uniform(-20, 800)
+        x1, y1 = x0 + rng.uniform(0, 200), y0 + rng.uniform(0, 100)
+        assert index.in_rect(x0, y0, x1, y1) == brute_force(page_words, x0, y0, x1, y1)
+        assert index.at_point(x0, y0) == brute_force(page_words, x0, y0, x0, y0)
+
+def test_contained_rect_query():
+    page_words, _ = make_page_words(20)
+    index = WordIndex(page_words)
+    x0, y0, x1, y1 = index.box(3)
+    assert index.in_rect(x0, y0, x1, y1, contained=True) == [3]
+    assert 3 not in index.in_rect(x0 + 1, y0, x1, y1, contained=True)
+
+def test_offset_lookup():
+    page_words, text_content = make_page_words(300)
+    index = WordIndex(page_words)
+    for position, char in enumerate(text_content):
+        match = index.at_offset(position)
+        if char.isspace():
+            assert match is None
+        else:
+            start, end = page_words.offsets[2 * match], page_words.offsets[2 * match + 1]
+            assert start <= position < end and text_content[start:end] == page_words.words[match]
+    assert index.at_offset(-1) is None
+    assert index.at_offset(len(text_content) + 10) is None
+
+def test_stored_geometry_round_trip(db_session, add_document, editable_pdf):
+    doc = add_document(db_session, {}, total_pages=2)
+    texts, words_by_page = EditablePDFService().extract_text_and_words(editable_pdf, str(doc.id))
+    store_page_words(db_session, doc.id, words_by_page)
+
+    index = get_word_index(db_session, doc.id, 1)
+    assert index.words == words_by_page[1].words
+    assert index.at_offset(texts[1].index("brave")) == 1
+    x0, y0, x1, y1 = index.box(1)
+    assert index.at_point((x0 + x1) / 2, (y0 + y1) / 2) == [1]
+    assert get_word_index(db_session, doc.id, 1) is index  # Cached
+    assert get_word_index(db_session, doc.id, 2).words == []
+    assert get_word_index(db_session, doc.id, 3) is None
+
+    # New editable PDF text drops the stored geometry
+    db_session.add(models.EditablePDFText(document_id=doc.id, text_content_by_page=json.dumps(texts)))
+    db_session.commit()
+    assert get_word_index(db_session, doc.id, 1) is None
@@ -3,7 +3,7 @@ import { useDropzone } from 'react-dropzone';
 import { useNavigate, useParams } from 'react-router-dom';
 import { Box, Typography, Alert, Paper, Button, Grid, CircularProgress, Chip } from '@mui/material';
 import { CloudUpload as CloudUploadIcon, CheckCircleOutline as CheckCircleIcon, ArrowForward as ArrowForwardIcon, Assignment as AssignmentIcon } from '@mui/icons-material';
-import { getDocumentDetails, uploadEditablePdfForCorrection } from '../../services/api';
+import { getDocumentDetails, uploadEditablePdfForCorrection, waitForJob } from '../../services/api';
 import { usePDFContext } from '../../contexts/PDFContext';
 
 const CorrectionDocumentUpload = () => {
@@ -28,6 +28,7 @@ const CorrectionDocumentUpload = () => {
   const [docBUploadProgress, setDocBUploadProgress] = useState(0);
   const [docBError, setDocBError] = useState(null);
   const [docBUploadedInfo, setDocBUploadedInfo] = useState(null);
+  const [docBExtraction, setDocBExtraction] = useState(null); // { current, total } while Text B is extracted
 
   // Load existing document details
   useEffect(() => {
@@ -113,7 +114,10 @@ const CorrectionDocumentUpload = () => {
       });
       
       console.log('✅ Editable PDF uploaded successfully:', response.data);
-      setDocBUploadedInfo(response.data);
+      // Text B is extracted by a background job; wait for it before allowing the comparison
+      setDocBExtraction({ current: 0, total: 0 });
+      const extractionJob = await waitForJob(response.data.extraction_job_id, setDocBExtraction);
+      setDocBUploadedInfo({ ...response.data, ...extractionJob.result });
       
     } catch (err) {
       console.error('❌ Editable PDF upload failed:', err);
@@ -121,6 +125,7 @@ const CorrectionDocumentUpload = () => {
       setDocBFile(null);
     } finally {
       setDocBUploading(false);
+      setDocBExtraction(null);
     }
   };
 
@@ -175,6 +180,17 @@ const CorrectionDocumentUpload = () => {
   const renderDocBContent = () => {
     console.log('🔍 Rendering DocB content - uploading:', docBUploading, 'uploadedInfo:', !!docBUploadedInfo);
     
+    if (docBUploading && docBExtraction) {
+      const percentExtracted = docBExtraction.total ? Math.round((docBExtraction.current * 100) / docBExtraction.total) : 0;
+      return (
+        <Box sx={{ textAlign: 'center' }}>
+          <CircularProgress variant="determinate" value={percentExtracted} sx={{mb: 1}} />
+          <Typography>Extracting text: {docBExtraction.current} / {docBExtraction.total} pages</Typography>
+          <Typography variant="caption">{docBFile?.name}</Typography>
+        </Box>
+      );
+    }
+
     if (docBUploading) {
       return (
         <Box sx={{ textAlign: 'center' }}>
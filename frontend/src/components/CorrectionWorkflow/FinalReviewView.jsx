@@ -6,7 +6,7 @@ import { PanelGroup, Panel, PanelResizeHandle } from 'react-resizable-panels';
 import PDFRenderer from '../PDFViewer/PDFRenderer';
 import FormattedTextRenderer from '../UI/FormattedTextRenderer';
 
-import { getDocumentDetails, submitPageCorrections, getFinalCorrectedText, finalizeDocumentCorrection, downloadDocumentAsWord } from '../../services/api'; 
+import { getDocumentDetails, submitPageCorrections, getFinalCorrectedText, finalizeDocumentCorrection, downloadDocumentAsWord, getDocumentFileUrl } from '../../services/api'; 
 import { usePDFContext } from '../../contexts/PDFContext';
 
 const FinalReviewView = ({ onFinalize, onBackToPhase1 }) => {
@@ -256,7 +256,7 @@ const FinalReviewView = ({ onFinalize, onBackToPhase1 }) => {
                 <Box sx={{ flexGrow: 1, display: 'flex', justifyContent: 'center', alignItems: 'flex-start', p: 1 }}>
                   {documentData ? (
                     <PDFRenderer 
-                      documentUrl={`http://localhost:8000/api/documents/${documentId}/file`}
+                      documentUrl={getDocumentFileUrl(documentData, documentId)}
                       currentPage={currentPage}
                       zoom={100}
                       onLoadSuccess={(numPages) => {
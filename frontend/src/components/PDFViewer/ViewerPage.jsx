@@ -6,6 +6,7 @@ import {
   PanelResizeHandle 
 } from 'react-resizable-panels';
 import { usePDFContext } from '../../contexts/PDFContext';
+import { getDocumentFileUrl } from '../../services/api';
 import { useThemeContext } from '../../contexts/ThemeContext';
 import PDFRenderer from './PDFRenderer';
 import TextDisplay from '../TextEditor/TextDisplay';
@@ -175,7 +176,7 @@ const ViewerPage = () => {
               >
                 {currentDocument ? (
                   <PDFRenderer 
-                    documentUrl={`http://localhost:8000/api/documents/${documentId}/file`}
+                    documentUrl={getDocumentFileUrl(currentDocument, documentId)}
                     currentPage={currentPage}
                     zoom={zoom}
                     onLoadSuccess={(numPages) => {
@@ -1,5 +1,6 @@
 import React from 'react';
 import { Box, Typography } from '@mui/material';
+import { parseFormattedText } from '../../utils/formattedText';
 
 const FormattedTextRenderer = ({ 
   rawText, 
@@ -41,7 +42,7 @@ const FormattedTextRenderer = ({
   let formattedData = null;
   try {
     if (formattedTextJson) {
-      formattedData = JSON.parse(formattedTextJson);
+      formattedData = parseFormattedText(formattedTextJson);
     }
   } catch (e) {
     console.log("Failed to parse formatted text, using raw text");
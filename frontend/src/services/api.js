@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { expandComparisonResponse } from '../utils/comparisonPayload';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'; // Default to localhost:8000
 
@@ -38,14 +39,45 @@ export const getExtractedText = (docId, pageNumber) => {
   return apiClient.get(`/api/documents/${docId}/pages/${pageNumber}/text`);
 };
 
-export const getDocumentPageImage = (docId, pageNumber) => {
-  // This might be a direct URL if static files are served, or an API endpoint returning image data
-  // Assuming direct URL structure based on typical static file serving with FastAPI
-  return `${API_BASE_URL}/extracted/doc_${docId}_page_${pageNumber}.png`; 
+export const getDocumentPages = (docId) => {
+  return apiClient.get(`/api/documents/${docId}/pages`);
 };
 
-export const downloadDocumentAsWord = (docId) => {
-  return apiClient.get(`/api/documents/${docId}/export/word`, {
+/**
+ * URL of a document's original PDF. The file_url of getDocumentDetails carries a content
+ * hash (?v=), so the browser caches the file as immutable; without it every view revalidates.
+ * @param {object|null} document - The document details, if loaded.
+ * @param {number} docId - The document ID.
+ */
+export const getDocumentFileUrl = (document, docId) => {
+  return `${API_BASE_URL}${document?.file_url || `/api/documents/${docId}/file`}`;
+};
+
+/**
+ * URL of a page image, from an entry of getDocumentPages (image_url is versioned like file_url).
+ * @param {object} page - The page entry.
+ * @param {number} docId - The document ID.
+ */
+export const getDocumentPageImage = (page, docId) => {
+  return `${API_BASE_URL}${page.image_url || `/api/documents/${docId}/pages/${page.page_number}/image`}`;
+};
+
+/**
+ * Exports a document to Word: the export is prepared by a background job (or served from
+ * the export cache when the content is unchanged), then downloaded.
+ * @param {number} docId - The document ID.
+ * @param {function} onProgress - Optional callback receiving { current, total } while the export is built.
+ * @returns {Promise<AxiosResponse<Blob>>}
+ */
+export const downloadDocumentAsWord = async (docId, onProgress) => {
+  const { data: started } = await apiClient.post(`/api/documents/${docId}/export/word`);
+  let version = started.version;
+  if (started.status !== 'ready') {
+    const job = await waitForJob(started.job_id, onProgress);
+    version = job.result.version;
+  }
+  return apiClient.get(`/api/documents/${docId}/export/word/download`, {
+    params: { version },
     responseType: 'blob', // Important for file downloads
   });
 };
@@ -71,14 +103,76 @@ export const uploadEditablePdfForCorrection = (documentId, editablePdfFile, onUp
   });
 };
 
+/**
+ * Fetches the status, progress and result of a background job.
+ * @param {number} jobId - The job ID (e.g. extraction_job_id of an editable PDF upload).
+ * @returns {Promise<AxiosResponse<any>>}
+ */
+export const getJob = (jobId) => {
+  return apiClient.get(`/api/jobs/${jobId}`);
+};
+
+/**
+ * Polls a background job until it completes or fails.
+ * @param {number} jobId - The job ID.
+ * @param {function} onProgress - Optional callback receiving { current, total }.
+ * @param {number} intervalMs - Delay between polls.
+ * @returns {Promise<object>} The completed job; rejects with the job error if it failed.
+ */
+export const waitForJob = async (jobId, onProgress, intervalMs = 1000) => {
+  for (;;) {
+    const { data: job } = await getJob(jobId);
+    if (onProgress) onProgress(job.progress);
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed') throw new Error(job.error || 'Background job failed');
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 /**
  * Fetches comparison data (Text A OCR, Text B Editable PDF, and differences) for a specific page.
  * @param {number} documentId - The ID of the document.
  * @param {number} pageNumber - The page number to compare.
  * @returns {Promise<AxiosResponse<any>>}
  */
-export const getPageComparisonData = (documentId, pageNumber) => {
-  return apiClient.get(`/api/correction/documents/${documentId}/compare/page/${pageNumber}`);
+export const getPageComparisonData = async (documentId, pageNumber) => {
+  // The compact layout skips the text of equal segments; it is expanded here for the components
+  const response = await apiClient.get(`/api/correction/documents/${documentId}/compare/page/${pageNumber}`, {
+    params: { diff_layout: 'compact' },
+  });
+  return { ...response, data: expandComparisonResponse(response.data) };
+};
+
+/**
+ * Updates the differences of a page after an edit of Text A without a full re-diff.
+ * @param {number} documentId - The ID of the document.
+ * @param {number} pageNumber - The page number being corrected.
+ * @param {object} edit - { textA, previousLength, editStart, editEnd, differences (compact), textB, charLevel }.
+ * @returns {Promise<AxiosResponse<any>>} Compact differences and the re-diffed window.
+ */
+export const getIncrementalPageComparison = (documentId, pageNumber, edit) => {
+  return apiClient.post(`/api/correction/documents/${documentId}/compare/page/${pageNumber}/incremental`, {
+    text_a: edit.textA,
+    previous_length: edit.previousLength,
+    edit_start: edit.editStart,
+    edit_end: edit.editEnd,
+    differences: edit.differences,
+    text_b: edit.textB,
+    char_level: Boolean(edit.charLevel),
+  });
+};
+
+/**
+ * Accepts Text B for every difference explained by the given rules on all pages of a document.
+ * @param {number} documentId - The ID of the document.
+ * @param {object} options - { rules: ['whitespace', 'case', 'quotes', 'dashes', 'punctuation'], pages, dryRun }.
+ * @returns {Promise<AxiosResponse<any>>} Report of the accepted changes per page.
+ */
+export const autoResolveCorrections = (documentId, options = {}) => {
+  const payload = { dry_run: Boolean(options.dryRun) };
+  if (options.rules) payload.rules = options.rules;
+  if (options.pages) payload.pages = options.pages;
+  return apiClient.post(`/api/correction/documents/${documentId}/corrections/auto-resolve`, payload);
 };
 
 /**
@@ -0,0 +1,69 @@
+// Decoder for the compact page comparison layout (?diff_layout=compact,
+// see backend/app/services/diff_payload.py). Segments are lists:
+//   ['equal', aStart, aEnd, bStart, bEnd]
+//   [type, aStart, aEnd, bStart, bEnd, textA, textB, charEdits?]
+//   [type, aStart, aEnd, bStart, bEnd, textA, textB, null, charEditsSkipped]
+// Equal segments carry no text; it is the whitespace-normalized slice of the page texts.
+// Offsets count code points (Python str indices), not the UTF-16 units of JS strings.
+
+// The characters of Python's str.isspace(), which str.split() splits on; JS \s differs
+// (it lacks \x1c-\x1f and \x85, and includes \ufeff)
+const PYTHON_WHITESPACE = /[\t\n\v\f\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+/;
+
+const normalize = (text) => text.split(PYTHON_WHITESPACE).filter(Boolean).join(' ');
+
+// UTF-16 index of every code point offset of the text, or null when both are the same
+// (no character outside the Basic Multilingual Plane)
+const utf16Offsets = (text) => {
+  if (!/[\ud800-\udfff]/.test(text)) return null;
+  const indices = [0];
+  let index = 0;
+  for (const character of text) {
+    index += character.length;
+    indices.push(index);
+  }
+  return indices;
+};
+
+const sliceCodePoints = (text, indices, start, end) => (
+  indices ? text.slice(indices[start], indices[end]) : text.slice(start, end)
+);
+
+const offsets = (segment) => ({
+  a_start_index: segment[1],
+  a_end_index: segment[2],
+  b_start_index: segment[3],
+  b_end_index: segment[4],
+});
+
+export const expandDifferences = (segments, textA, textB) => {
+  if (!segments) return segments;
+  const indicesA = utf16Offsets(textA);
+  const indicesB = utf16Offsets(textB);
+  return segments.map((segment) => {
+    const diff = { type: segment[0], ...offsets(segment) };
+    if (segment[0] === 'equal') {
+      diff.original_text_a_segment = normalize(sliceCodePoints(textA, indicesA, segment[1], segment[2]));
+      diff.suggested_text_b_segment = normalize(sliceCodePoints(textB, indicesB, segment[3], segment[4]));
+    } else {
+      diff.original_text_a_segment = segment[5];
+      diff.suggested_text_b_segment = segment[6];
+      if (segment.length > 7 && segment[7] !== null) {
+        diff.char_edits = segment[7].map((edit) => ({ type: edit[0], ...offsets(edit) }));
+      } else if (segment.length > 8) {
+        diff.char_edits_skipped = segment[8];
+      }
+    }
+    return diff;
+  });
+};
+
+// Turns a compact comparison response into the full layout expected by the components.
+export const expandComparisonResponse = (data) => {
+  if (!data || data.diff_layout !== 'compact') return data;
+  const { diff_layout: _layout, ...rest } = data;
+  return {
+    ...rest,
+    differences: expandDifferences(data.differences, data.text_a_ocr || '', data.text_b_editable_pdf || ''),
+  };
+};
@@ -0,0 +1,22 @@
+// Decoder for the formatted_text JSON returned by the API.
+// Version 2 is the compact struct-of-arrays layout (see backend/app/services/formatted_text_codec.py);
+// version 1 is the legacy {"blocks": [...]} object and is returned unchanged.
+
+const STYLE_FIELDS = ['type', 'alignment', 'font_size', 'is_bold', 'is_italic', 'is_title', 'is_heading', 'is_indent'];
+const BOOLEAN_FIELDS = new Set(['is_bold', 'is_italic', 'is_title', 'is_heading', 'is_indent']);
+
+export const parseFormattedText = (formattedTextJson) => {
+  if (!formattedTextJson) return null;
+  const data = JSON.parse(formattedTextJson);
+  if (!data || data.v !== 2) return data;
+
+  const styles = data.styles.map((style) => {
+    const entry = {};
+    STYLE_FIELDS.forEach((field, index) => {
+      entry[field] = BOOLEAN_FIELDS.has(field) ? Boolean(style[index]) : style[index];
+    });
+    return entry;
+  });
+  const blocks = data.t.map((text, blockNo) => ({ ...styles[data.s[blockNo]], text, block_no: blockNo }));
+  return { blocks, has_formatting: Boolean(data.hf) };
+};